@@ -0,0 +1 @@
+"""Benchmarks reproducibles de RUTEALO (sin claves de Gemini ni MongoDB)."""
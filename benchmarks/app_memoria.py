@@ -0,0 +1,97 @@
+"""
+RUTEALO sobre MongoDB en memoria y el modelo falso, lista para cualquier servidor WSGI.
+
+Cada proceso que importa este módulo crea su propia base en memoria con los
+mismos `RUTEALO_BENCH_USUARIOS` estudiantes (ruta, examen y perfil), así
+todos los workers de gunicorn responden lo mismo. La latencia por operación
+de BD se simula con RUTEALO_BENCH_LATENCIA_BD_MS.
+
+    gunicorn -c gunicorn.conf.py benchmarks.app_memoria:app
+    python -m benchmarks.app_memoria desarrollo 127.0.0.1:5000
+    python -m benchmarks.app_memoria waitress 127.0.0.1:5000
+    python -m benchmarks.app_memoria asgi 127.0.0.1:5000
+"""
+
+import os
+import sys
+import datetime
+from pathlib import Path
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("RUTEALO_LLM_BACKEND", "fake")
+
+from benchmarks.mongo_memoria import instalar_cliente_memoria  # noqa: E402
+from src.config import DB_NAME  # noqa: E402
+
+JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
+USUARIOS = int(os.getenv("RUTEALO_BENCH_USUARIOS", "20"))
+FLASHCARDS = int(os.getenv("RUTEALO_BENCH_FLASHCARDS", "20"))
+
+
+def usuario(i):
+    return f"alumno_{i}"
+
+
+def ruta_id(i):
+    """ObjectId fijo de la ruta del estudiante i (igual en todos los procesos)."""
+    return ObjectId(f"{i + 1:024x}")
+
+
+def sembrar(db, usuarios=USUARIOS, flashcards=FLASHCARDS):
+    """Una ruta con contenido en todos los niveles y un examen inicial por estudiante."""
+    ahora = datetime.datetime(2025, 1, 1)
+    estructura = {
+        "flashcards": {
+            nivel: [{"id": j, "frente": f"Concepto {j} de {nivel}", "reverso": "Explicación " * 15} for j in range(flashcards)]
+            for nivel in JERARQUIA_BLOOM
+        },
+        "examenes": {
+            nivel: [{"id": j, "pregunta": f"Pregunta {j} de {nivel}", "opciones": ["a) Sí", "b) No"], "respuesta_correcta": "a"}
+                    for j in range(flashcards // 2)]
+            for nivel in JERARQUIA_BLOOM
+        },
+    }
+    db["rutas_aprendizaje"].insert_many([
+        {
+            "_id": ruta_id(i),
+            "usuario": usuario(i),
+            "nombre_ruta": f"Ruta {i}",
+            "estado": "ACTIVA",
+            "estructura_ruta": estructura,
+            "metadatos_ruta": {"niveles_incluidos": JERARQUIA_BLOOM},
+            "fecha_creacion": ahora,
+            "fecha_actualizacion": ahora,
+        }
+        for i in range(usuarios)
+    ])
+    db["examen_inicial"].insert_many([
+        {
+            "usuario": usuario(i),
+            "estado": "PENDIENTE",
+            "contenido": {"EXAMENES": {"EXAMEN_INICIAL": estructura["examenes"]["Recordar"]}},
+            "fecha_generacion": ahora,
+        }
+        for i in range(usuarios)
+    ])
+
+
+sembrar(instalar_cliente_memoria(latencia_ms=float(os.getenv("RUTEALO_BENCH_LATENCIA_BD_MS", "0")))[DB_NAME])
+
+from src.wsgi import app, servir_waitress  # noqa: E402
+
+
+if __name__ == "__main__":
+    modo, bind = sys.argv[1], sys.argv[2]
+    if modo == "desarrollo":
+        host, _, puerto = bind.rpartition(":")
+        # Como `python -m src.app` pero sin recargador ni depurador
+        app.run(host=host, port=int(puerto), debug=False, threaded=True)
+    elif modo == "waitress":
+        servir_waitress(app, bind)
+    elif modo == "asgi":
+        from src.asgi import servir_uvicorn
+
+        servir_uvicorn(bind=bind)
+    else:
+        raise SystemExit(f"Modo desconocido: {modo}")
@@ -0,0 +1,179 @@
+"""
+Benchmark de concurrencia del chatbot: servidor WSGI con hilos vs. servidor ASGI.
+
+Lanza `clientes` estudiantes que conversan a la vez con el tutor
+(POST /api/chatbot, `peticiones` mensajes cada uno en la misma sesión). El
+modelo falso tarda `latencia_llm_ms` por respuesta, como Gemini, y MongoDB
+en memoria `latencia_bd_ms` por operación.
+
+- "waitress": src/wsgi.py en un proceso con `hilos` hilos; cada conversación
+  en curso ocupa un hilo mientras espera al modelo.
+- "asgi": src/asgi.py con uvicorn en un proceso; la espera al modelo y a
+  MongoDB es asíncrona (chatbot_async).
+
+Reporta peticiones por segundo, latencia p50/p95, errores y esperas
+simultáneas promedio (suma de latencias / duración, ley de Little).
+
+Uso:
+    python -m benchmarks.benchmark_asgi --clientes 200 --peticiones 2 --hilos 16 \\
+        --latencia-llm-ms 500 --salida resultados.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import http.client
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = Path(__file__).parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from benchmarks.benchmark_servidor import _puerto_libre, _disponible, _cookie_sesion, _iniciar  # noqa: E402
+
+MODOS = ("waitress", "asgi")
+
+
+def _cliente(puerto, i, usuarios, peticiones):
+    """Un estudiante que conversa `peticiones` turnos; retorna latencias (s) y errores."""
+    from benchmarks.app_memoria import ruta_id, usuario
+
+    n = i % usuarios
+    cabeceras = {"Cookie": _cookie_sesion(usuario(n)), "Content-Type": "application/json"}
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=300)
+    latencias, errores, sesion_id = [], 0, None
+    for k in range(peticiones):
+        cuerpo = json.dumps({"mensaje": f"Duda {k} del estudiante {i} sobre el concepto {k}",
+                             "ruta_id": str(ruta_id(n)), "sesion_id": sesion_id})
+        inicio = time.perf_counter()
+        try:
+            conexion.request("POST", "/api/chatbot", body=cuerpo, headers=cabeceras)
+            respuesta = conexion.getresponse()
+            datos = respuesta.read()
+            if respuesta.status == 200 and json.loads(datos).get("exito"):
+                sesion_id = json.loads(datos)["sesion_id"]
+            else:
+                errores += 1
+        except (OSError, ValueError, http.client.HTTPException):
+            errores += 1
+            conexion.close()
+            conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=300)
+        latencias.append(time.perf_counter() - inicio)
+    conexion.close()
+    return latencias, errores
+
+
+def ejecutar_benchmark(clientes=200, peticiones=2, hilos=16, usuarios=20, latencia_llm_ms=500.0,
+                       latencia_bd_ms=1.0, modos=MODOS):
+    """
+    Misma carga de conversaciones contra cada servidor disponible.
+
+    Returns:
+        dict: Parámetros y, por modo, peticiones/s, latencias, errores y esperas simultáneas (o "omitido")
+    """
+    entorno = {
+        **os.environ,
+        "PYTHONPATH": str(RAIZ),
+        "DEBUG": "False",
+        "RUTEALO_LLM_BACKEND": "fake",
+        "RUTEALO_FAKE_LATENCIA_MS": str(latencia_llm_ms),
+        "RUTEALO_BENCH_USUARIOS": str(usuarios),
+        "RUTEALO_BENCH_LATENCIA_BD_MS": str(latencia_bd_ms),
+        # Rutas pequeñas: la búsqueda BM25 en la base en memoria recorre el índice sin índices reales
+        "RUTEALO_BENCH_FLASHCARDS": "4",
+        "RUTEALO_WORKERS": "1",
+        "RUTEALO_THREADS": str(hilos),
+    }
+    resultados = {}
+    for modo in modos:
+        if not _disponible(modo):
+            resultados[modo] = {"omitido": f"{modo} no está disponible en este sistema"}
+            continue
+
+        # Importa la app de benchmark fuera del tiempo medido (siembra la base del cliente)
+        from benchmarks.app_memoria import ruta_id  # noqa: F401
+
+        puerto = _puerto_libre()
+        proceso = _iniciar(modo, puerto, 1, hilos, entorno)
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clientes) as pool:
+                salidas = list(pool.map(lambda i: _cliente(puerto, i, usuarios, peticiones), range(clientes)))
+            segundos = time.perf_counter() - inicio
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+        latencias = sorted(l for lat, _ in salidas for l in lat)
+        total = len(latencias)
+        resultados[modo] = {
+            "segundos": round(segundos, 3),
+            "peticiones": total,
+            "peticiones_por_segundo": round(total / segundos, 1),
+            "latencia_p50_ms": round(statistics.median(latencias) * 1000, 1),
+            "latencia_p95_ms": round(latencias[int(total * 0.95) - 1] * 1000, 1),
+            "errores": sum(e for _, e in salidas),
+            "esperas_simultaneas": round(sum(latencias) / segundos, 1),
+        }
+
+    return {
+        "parametros": {
+            "clientes": clientes,
+            "peticiones_por_cliente": peticiones,
+            "hilos": hilos,
+            "usuarios": usuarios,
+            "latencia_llm_ms": latencia_llm_ms,
+            "latencia_bd_ms": latencia_bd_ms,
+        },
+        "modos": resultados,
+    }
+
+
+def imprimir_resumen(resultado):
+    """Tabla legible con las métricas por servidor."""
+    print(f"\n{'Servidor':<10}{'Pet/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'Errores':>9}{'En espera':>11}")
+    print("-" * 59)
+    for modo, d in resultado["modos"].items():
+        if "omitido" in d:
+            print(f"{modo:<10}  {d['omitido']}")
+            continue
+        print(f"{modo:<10}{d['peticiones_por_segundo']:>9.1f}{d['latencia_p50_ms']:>10.1f}"
+              f"{d['latencia_p95_ms']:>10.1f}{d['errores']:>9}{d['esperas_simultaneas']:>11.1f}")
+    base = resultado["modos"].get("waitress", {}).get("peticiones_por_segundo")
+    asgi = resultado["modos"].get("asgi", {}).get("peticiones_por_segundo")
+    if base and asgi:
+        print(f"asgi: x{asgi / base:.1f} respecto a waitress con {resultado['parametros']['hilos']} hilos")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de conversaciones concurrentes: WSGI con hilos vs. ASGI (sin claves)")
+    parser.add_argument("--clientes", type=int, default=200, help="Estudiantes conversando a la vez")
+    parser.add_argument("--peticiones", type=int, default=2, help="Mensajes por estudiante")
+    parser.add_argument("--hilos", type=int, default=16, help="Hilos del servidor WSGI")
+    parser.add_argument("--usuarios", type=int, default=20, help="Estudiantes distintos en la base")
+    parser.add_argument("--latencia-llm-ms", type=float, default=500.0, help="Latencia simulada del modelo por respuesta")
+    parser.add_argument("--latencia-bd-ms", type=float, default=1.0, help="Latencia simulada por operación de BD")
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=list(MODOS))
+    parser.add_argument("--salida", help="Ruta para guardar el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar_benchmark(
+        clientes=args.clientes,
+        peticiones=args.peticiones,
+        hilos=args.hilos,
+        usuarios=args.usuarios,
+        latencia_llm_ms=args.latencia_llm_ms,
+        latencia_bd_ms=args.latencia_bd_ms,
+        modos=args.modos,
+    )
+    imprimir_resumen(resultado)
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultado guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark de envío de exámenes iniciales: uno por uno vs. en lote.
+
+Simula un aula en la que `estudiantes` terminan el diagnóstico a la vez.
+El modo "individual" repite lo que hace /examen-inicial/responder por cada
+estudiante; el modo "lote" usa evaluar_examenes_iniciales_lote (lo que hace
+/api/docente/examenes/lote). Cada modo corre sobre un cliente Mongo en
+memoria nuevo con la misma latencia simulada por operación, y reporta
+segundos, operaciones de BD y evaluaciones por segundo.
+
+Uso:
+    python -m benchmarks.benchmark_lote_examenes --estudiantes 40 --latencia-bd-ms 2 \\
+        --salida resultados.json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
+MODOS = ("individual", "lote")
+
+
+def examen_sintetico(preguntas=12):
+    """Examen inicial con preguntas repartidas entre los niveles Bloom (respuesta correcta "a")."""
+    return {
+        "EXAMENES": {
+            "EXAMEN_INICIAL": [
+                {
+                    "id": i + 1,
+                    "pregunta": f"Pregunta {i + 1}",
+                    "opciones": ["a) Sí", "b) No", "c) Tal vez", "d) Nunca"],
+                    "respuesta_correcta": "a",
+                    "nivel_bloom_evaluado": JERARQUIA_BLOOM[i % len(JERARQUIA_BLOOM)],
+                }
+                for i in range(preguntas)
+            ]
+        }
+    }
+
+
+def hojas_de_respuesta(estudiantes, preguntas=12, semilla=42):
+    """Una hoja por estudiante; cada uno acierta con una probabilidad distinta."""
+    rnd = random.Random(semilla)
+    hojas = []
+    for e in range(estudiantes):
+        habilidad = rnd.random()
+        hojas.append(
+            {
+                "usuario": f"alumno_{e + 1}",
+                "respuestas": [
+                    {"pregunta_id": i + 1, "respuesta": "a" if rnd.random() < habilidad else "b", "tiempo_seg": rnd.randint(5, 90)}
+                    for i in range(preguntas)
+                ],
+            }
+        )
+    return hojas
+
+
+def _preparar(db, hojas, examen):
+    """Examen pendiente y ruta para cada estudiante (estado previo al envío)."""
+    db["examen_inicial"].insert_many(
+        [{"usuario": h["usuario"], "estado": "PENDIENTE", "contenido": examen} for h in hojas]
+    )
+    db["rutas_aprendizaje"].insert_many([{"usuario": h["usuario"], "metadatos_ruta": {}} for h in hojas])
+
+
+def _enviar_individual(db, hojas):
+    """Un envío por estudiante, como /examen-inicial/responder."""
+    from src.models.evaluacion_zdp import evaluar_examen_simple
+    from src.web_utils import finalizar_examenes_iniciales
+
+    niveles = {}
+    for hoja in hojas:
+        examen = db["examen_inicial"].find_one({"usuario": hoja["usuario"]})["contenido"]
+        resultado = evaluar_examen_simple(hoja["usuario"], hoja["respuestas"], examen)
+        finalizar_examenes_iniciales(db, [resultado])
+        niveles[hoja["usuario"]] = resultado.get("nivel_actual")
+    return niveles
+
+
+def _enviar_lote(db, hojas):
+    """Un único envío con todas las hojas, como /api/docente/examenes/lote."""
+    from src.web_utils import evaluar_examenes_iniciales_lote
+
+    salida = evaluar_examenes_iniciales_lote(db, hojas)
+    return {r["usuario"]: r.get("resultado", {}).get("nivel_actual") for r in salida["resultados"]}
+
+
+def ejecutar_benchmark(estudiantes=40, preguntas=12, latencia_bd_ms=0.0, semilla=42):
+    """
+    Envía las mismas hojas de respuesta por ambos caminos.
+
+    Returns:
+        dict: Parámetros, métricas por modo y si ambos modos coinciden
+    """
+    from benchmarks.mongo_memoria import instalar_cliente_memoria
+    from src.config import DB_NAME
+    from src.models.evaluacion_zdp import invalidar_perfil_zdp
+
+    examen = examen_sintetico(preguntas)
+    hojas = hojas_de_respuesta(estudiantes, preguntas, semilla)
+    enviar = {"individual": _enviar_individual, "lote": _enviar_lote}
+
+    modos, niveles = {}, {}
+    for modo in MODOS:
+        cliente = instalar_cliente_memoria(latencia_ms=latencia_bd_ms)
+        db = cliente[DB_NAME]
+        invalidar_perfil_zdp()
+        _preparar(db, hojas, examen)
+        cliente.reiniciar_estadisticas()
+
+        inicio = time.perf_counter()
+        niveles[modo] = enviar[modo](db, hojas)
+        segundos = time.perf_counter() - inicio
+
+        operaciones = cliente.estadisticas()
+        modos[modo] = {
+            "segundos": round(segundos, 4),
+            "evaluaciones_por_segundo": round(estudiantes / segundos, 1) if segundos else None,
+            "operaciones_bd": operaciones["total"],
+            "operaciones_por_tipo": {k: v for k, v in operaciones.items() if k != "total"},
+            "perfiles": db["usuario_perfil"].count_documents({}),
+            "evaluaciones": db["evaluaciones_estudiante"].count_documents({}),
+        }
+
+    return {
+        "parametros": {
+            "estudiantes": estudiantes,
+            "preguntas": preguntas,
+            "latencia_bd_ms": latencia_bd_ms,
+            "semilla": semilla,
+        },
+        "modos": modos,
+        "resultados_iguales": niveles["individual"] == niveles["lote"],
+    }
+
+
+def imprimir_resumen(resultado):
+    """Tabla legible con las métricas por modo."""
+    print(f"\n{'Modo':<12}{'Segundos':>10}{'Eval/s':>10}{'Ops BD':>9}")
+    print("-" * 41)
+    for modo, d in resultado["modos"].items():
+        print(f"{modo:<12}{d['segundos']:>10.3f}{d['evaluaciones_por_segundo'] or 0:>10.1f}{d['operaciones_bd']:>9}")
+    individual, lote = resultado["modos"]["individual"], resultado["modos"]["lote"]
+    if lote["segundos"]:
+        print(f"\nAceleración: x{individual['segundos'] / lote['segundos']:.1f}")
+    print(f"Resultados iguales en ambos modos: {resultado['resultados_iguales']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de envío de exámenes: individual vs. lote (sin claves)")
+    parser.add_argument("--estudiantes", type=int, default=40)
+    parser.add_argument("--preguntas", type=int, default=12)
+    parser.add_argument("--latencia-bd-ms", type=float, default=0.0, help="Latencia simulada por operación de BD")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="Ruta para guardar el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar_benchmark(
+        estudiantes=args.estudiantes,
+        preguntas=args.preguntas,
+        latencia_bd_ms=args.latencia_bd_ms,
+        semilla=args.semilla,
+    )
+    imprimir_resumen(resultado)
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultado guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
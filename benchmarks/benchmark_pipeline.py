@@ -0,0 +1,202 @@
+"""
+Benchmark de extremo a extremo: carga de archivos -> etiquetado Bloom -> ruta.
+
+Corre sin claves ni servidor: el backend generativo es el modelo falso
+(RUTEALO_LLM_BACKEND=fake) y MongoDB se reemplaza por el cliente en memoria.
+Por cada etapa reporta tiempo, llamadas al modelo por tipo, operaciones de
+base de datos y pico de memoria adicional (tracemalloc). El total de
+"segundos" suma las etapas; "segundos_pared" incluye generar el corpus.
+
+Uso:
+    python -m benchmarks.benchmark_pipeline --usuarios 2 --documentos 4 --paginas 8 \\
+        --latencia-ms 50 --desviacion-ms 20 --salida resultados.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+ETAPAS = ("ingesta", "etiquetado", "ruta")
+
+
+def configurar_backend_falso(latencia_ms=0.0, desviacion_ms=0.0, semilla=42):
+    """Activa el modelo falso y descarta los modelos ya creados en el proceso."""
+    os.environ["RUTEALO_LLM_BACKEND"] = "fake"
+    os.environ["RUTEALO_FAKE_LATENCIA_MS"] = str(latencia_ms)
+    os.environ["RUTEALO_FAKE_DESVIACION_MS"] = str(desviacion_ms)
+    os.environ["RUTEALO_FAKE_SEMILLA"] = str(semilla)
+
+    from src.config import ModeloPerezoso
+
+    for modulo in list(sys.modules.values()):
+        modelo = getattr(modulo, "model", None)
+        if isinstance(modelo, ModeloPerezoso):
+            modelo.reiniciar()
+
+
+class _Medidor:
+    """Acumula tiempo, memoria, llamadas al modelo y operaciones de BD por etapa."""
+
+    def __init__(self, cliente, medir_memoria=True):
+        self.cliente = cliente
+        self.medir_memoria = medir_memoria
+        self.etapas = {e: {"segundos": 0.0, "pico_mb": 0.0, "llamadas_llm": {}, "operaciones_bd": 0} for e in ETAPAS}
+
+    def medir(self, etapa, funcion, *args):
+        from src.models.modelo_falso import estadisticas_llm
+
+        llm_antes = estadisticas_llm()["llamadas"]
+        bd_antes = self.cliente.estadisticas()["total"]
+        if self.medir_memoria:
+            tracemalloc.reset_peak()
+            memoria_inicio = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        duracion = time.perf_counter() - inicio
+
+        datos = self.etapas[etapa]
+        datos["segundos"] += duracion
+        if self.medir_memoria:
+            # Pico adicional de la etapa sobre la memoria ya retenida
+            pico = tracemalloc.get_traced_memory()[1] - memoria_inicio
+            datos["pico_mb"] = max(datos["pico_mb"], pico / 2**20)
+        for tipo, n in estadisticas_llm()["llamadas"].items():
+            delta = n - llm_antes.get(tipo, 0)
+            if delta:
+                datos["llamadas_llm"][tipo] = datos["llamadas_llm"].get(tipo, 0) + delta
+        datos["operaciones_bd"] += self.cliente.estadisticas()["total"] - bd_antes
+        return resultado
+
+
+def ejecutar_benchmark(
+    usuarios=1,
+    documentos=4,
+    paginas=6,
+    palabras_por_pagina=120,
+    latencia_ms=0.0,
+    desviacion_ms=0.0,
+    latencia_bd_ms=0.0,
+    semilla=42,
+    medir_memoria=True,
+):
+    """
+    Ejecuta el pipeline completo para `usuarios` estudiantes sintéticos.
+
+    Returns:
+        dict: Parámetros, métricas por etapa y totales
+    """
+    configurar_backend_falso(latencia_ms, desviacion_ms, semilla)
+
+    from benchmarks.mongo_memoria import instalar_cliente_memoria
+    from benchmarks.corpus_sintetico import generar_corpus
+    from src.config import DB_NAME
+    from src.models.modelo_falso import reiniciar_estadisticas_llm, estadisticas_llm
+    from src.web_utils import procesar_archivo_web, auto_etiquetar_bloom, generar_ruta_aprendizaje
+
+    cliente = instalar_cliente_memoria(latencia_ms=latencia_bd_ms)
+    db = cliente[DB_NAME]
+    reiniciar_estadisticas_llm()
+
+    if medir_memoria:
+        tracemalloc.start()
+    medidor = _Medidor(cliente, medir_memoria)
+    inicio_total = time.perf_counter()
+    rutas_generadas = 0
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="rutealo_bench_") as tmp:
+            for u in range(usuarios):
+                usuario = f"bench_{u + 1}"
+                archivos = generar_corpus(
+                    Path(tmp) / usuario, documentos, paginas, palabras_por_pagina, semilla=semilla + u
+                )
+                for archivo in archivos:
+                    medidor.medir("ingesta", procesar_archivo_web, str(archivo), usuario, db)
+                medidor.medir("etiquetado", auto_etiquetar_bloom, usuario, db)
+                medidor.medir("ruta", generar_ruta_aprendizaje, usuario, db)
+                if db["rutas_aprendizaje"].find_one({"usuario": usuario}, {"_id": 1}):
+                    rutas_generadas += 1
+    finally:
+        if medir_memoria:
+            tracemalloc.stop()
+
+    pared = time.perf_counter() - inicio_total
+    return {
+        "parametros": {
+            "usuarios": usuarios,
+            "documentos": documentos,
+            "paginas": paginas,
+            "palabras_por_pagina": palabras_por_pagina,
+            "latencia_ms": latencia_ms,
+            "desviacion_ms": desviacion_ms,
+            "latencia_bd_ms": latencia_bd_ms,
+            "semilla": semilla,
+        },
+        "etapas": {
+            e: {**d, "segundos": round(d["segundos"], 4), "pico_mb": round(d["pico_mb"], 2)}
+            for e, d in medidor.etapas.items()
+        },
+        "totales": {
+            "segundos": round(sum(d["segundos"] for d in medidor.etapas.values()), 4),
+            "segundos_pared": round(pared, 4),
+            "rutas_generadas": rutas_generadas,
+            "llm": estadisticas_llm(),
+            "operaciones_bd": cliente.estadisticas(),
+        },
+    }
+
+
+def imprimir_resumen(resultado):
+    """Tabla legible con las métricas por etapa."""
+    print(f"\n{'Etapa':<12}{'Segundos':>10}{'Pico MB':>10}{'Llamadas LLM':>14}{'Ops BD':>9}")
+    print("-" * 55)
+    for etapa, d in resultado["etapas"].items():
+        llamadas = sum(d["llamadas_llm"].values())
+        print(f"{etapa:<12}{d['segundos']:>10.3f}{d['pico_mb']:>10.2f}{llamadas:>14}{d['operaciones_bd']:>9}")
+    t = resultado["totales"]
+    print("-" * 55)
+    print(f"{'total':<12}{t['segundos']:>10.3f}{'':>10}{t['llm']['total_llamadas']:>14}{t['operaciones_bd']['total']:>9}")
+    print(f"\nLlamadas por tipo: {t['llm']['llamadas']}")
+    print(f"Rutas generadas: {t['rutas_generadas']}/{resultado['parametros']['usuarios']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline carga -> Bloom -> ruta (sin claves)")
+    parser.add_argument("--usuarios", type=int, default=1)
+    parser.add_argument("--documentos", type=int, default=4)
+    parser.add_argument("--paginas", type=int, default=6)
+    parser.add_argument("--palabras-por-pagina", type=int, default=120)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Latencia media simulada del modelo")
+    parser.add_argument("--desviacion-ms", type=float, default=0.0, help="Desviación de la latencia del modelo")
+    parser.add_argument("--latencia-bd-ms", type=float, default=0.0, help="Latencia simulada por operación de BD")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sin-memoria", action="store_true", help="No usar tracemalloc (tiempos más limpios)")
+    parser.add_argument("--salida", help="Ruta para guardar el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar_benchmark(
+        usuarios=args.usuarios,
+        documentos=args.documentos,
+        paginas=args.paginas,
+        palabras_por_pagina=args.palabras_por_pagina,
+        latencia_ms=args.latencia_ms,
+        desviacion_ms=args.desviacion_ms,
+        latencia_bd_ms=args.latencia_bd_ms,
+        semilla=args.semilla,
+        medir_memoria=not args.sin_memoria,
+    )
+    imprimir_resumen(resultado)
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultado guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark de ancho de banda del dashboard: respuestas completas vs. condicionales.
+
+Simula un estudiante cuyo dashboard consulta periódicamente /ruta/estado,
+/ruta/<id>/contenido, /examen-inicial, /rutas/lista y /api/perfil-zdp.
+Cada `cambio_cada` consultas la ruta se actualiza (como /ruta/<id>/actualizar).
+
+- "completo": cliente sin caché ni Accept-Encoding (cada consulta trae el JSON entero).
+- "condicional": cliente que reenvía el último ETag en If-None-Match y acepta gzip/br.
+
+Corre la aplicación Flask real sobre un cliente Mongo en memoria y reporta
+bytes recibidos, respuestas 304 y el ahorro respecto al modo completo.
+
+Uso:
+    python -m benchmarks.benchmark_respuestas --consultas 50 --flashcards 40 --salida resultados.json
+"""
+
+import sys
+import json
+import time
+import datetime
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
+MODOS = ("completo", "condicional")
+USUARIO = "alumno_bench"
+
+
+def _preparar(db, flashcards):
+    """Ruta con `flashcards` flashcards y tests por nivel, examen inicial y perfil evaluado."""
+    estructura = {
+        "flashcards": {
+            nivel: [{"id": i, "frente": f"Concepto {i} de {nivel}", "reverso": "Explicación " * 20} for i in range(flashcards)]
+            for nivel in JERARQUIA_BLOOM
+        },
+        "examenes": {
+            nivel: [{"id": i, "pregunta": f"Pregunta {i} de {nivel}", "opciones": ["a) Sí", "b) No"], "respuesta_correcta": "a"}
+                    for i in range(flashcards // 2)]
+            for nivel in JERARQUIA_BLOOM
+        },
+    }
+    ruta_id = db["rutas_aprendizaje"].insert_one({
+        "usuario": USUARIO,
+        "nombre_ruta": "Ruta de benchmark",
+        "estado": "ACTIVA",
+        "estructura_ruta": estructura,
+        "metadatos_ruta": {"niveles_incluidos": JERARQUIA_BLOOM, "progreso_global": 0},
+        "fecha_creacion": datetime.datetime(2025, 1, 1),
+        "fecha_actualizacion": datetime.datetime(2025, 1, 1),
+    }).inserted_id
+    db["examen_inicial"].insert_one({
+        "usuario": USUARIO,
+        "estado": "PENDIENTE",
+        "contenido": {"EXAMENES": {"EXAMEN_INICIAL": estructura["examenes"]["Recordar"]}},
+        "fecha_generacion": datetime.datetime(2025, 1, 1),
+    })
+    return str(ruta_id)
+
+
+def _consultar(cliente, url, etags, condicional):
+    cabeceras = {}
+    if condicional:
+        cabeceras["Accept-Encoding"] = "br, gzip"
+        if url in etags:
+            cabeceras["If-None-Match"] = etags[url]
+    respuesta = cliente.get(url, headers=cabeceras)
+    if respuesta.headers.get("ETag"):
+        etags[url] = respuesta.headers["ETag"]
+    return respuesta.status_code, len(respuesta.get_data())
+
+
+def ejecutar_benchmark(consultas=50, flashcards=40, cambio_cada=10):
+    """
+    Repite el mismo ciclo de consultas en ambos modos.
+
+    Returns:
+        dict: Parámetros y, por modo, bytes recibidos, respuestas 304 y segundos
+    """
+    from benchmarks.mongo_memoria import instalar_cliente_memoria
+    from src.config import DB_NAME
+
+    instalar_cliente_memoria()
+    from src import app as modulo_app
+    from src.models.evaluacion_zdp import invalidar_perfil_zdp
+    from src.respuestas_http import estadisticas_respuestas, reiniciar_estadisticas_respuestas
+
+    modos = {}
+    for modo in MODOS:
+        db = instalar_cliente_memoria()[DB_NAME]
+        invalidar_perfil_zdp()
+        reiniciar_estadisticas_respuestas()
+        ruta_id = _preparar(db, flashcards)
+        urls = ["/ruta/estado", f"/ruta/{ruta_id}/contenido", "/examen-inicial", "/rutas/lista", "/api/perfil-zdp"]
+
+        cliente = modulo_app.app.test_client()
+        with cliente.session_transaction() as sesion:
+            sesion["usuario"] = USUARIO
+
+        etags, recibidos, no_modificadas = {}, 0, 0
+        inicio = time.perf_counter()
+        for n in range(consultas):
+            if n and n % cambio_cada == 0:
+                db["rutas_aprendizaje"].update_one(
+                    {"usuario": USUARIO},
+                    {"$set": {"metadatos_ruta.progreso_global": n, "fecha_actualizacion": datetime.datetime.utcnow()}},
+                )
+            for url in urls:
+                estado, tamano = _consultar(cliente, url, etags, modo == "condicional")
+                recibidos += tamano
+                no_modificadas += estado == 304
+        segundos = time.perf_counter() - inicio
+
+        modos[modo] = {
+            "segundos": round(segundos, 4),
+            "peticiones": consultas * len(urls),
+            "bytes_recibidos": recibidos,
+            "respuestas_304": no_modificadas,
+            "metricas_servidor": estadisticas_respuestas(),
+        }
+
+    completo = modos["completo"]["bytes_recibidos"]
+    return {
+        "parametros": {"consultas": consultas, "flashcards": flashcards, "cambio_cada": cambio_cada},
+        "modos": modos,
+        "ahorro": round(1 - modos["condicional"]["bytes_recibidos"] / completo, 4) if completo else 0.0,
+    }
+
+
+def imprimir_resumen(resultado):
+    """Tabla legible con las métricas por modo."""
+    print(f"\n{'Modo':<14}{'Peticiones':>11}{'KB recibidos':>14}{'304':>7}{'Segundos':>10}")
+    print("-" * 56)
+    for modo, d in resultado["modos"].items():
+        print(f"{modo:<14}{d['peticiones']:>11}{d['bytes_recibidos'] / 1024:>14.1f}{d['respuestas_304']:>7}{d['segundos']:>10.3f}")
+    print(f"\nAncho de banda ahorrado: {resultado['ahorro']:.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de ETag y compresión de los endpoints del dashboard (sin claves)")
+    parser.add_argument("--consultas", type=int, default=50, help="Ciclos de consulta del dashboard")
+    parser.add_argument("--flashcards", type=int, default=40, help="Flashcards por nivel de la ruta")
+    parser.add_argument("--cambio-cada", type=int, default=10, help="Ciclos entre actualizaciones de la ruta")
+    parser.add_argument("--salida", help="Ruta para guardar el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar_benchmark(consultas=args.consultas, flashcards=args.flashcards, cambio_cada=args.cambio_cada)
+    imprimir_resumen(resultado)
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultado guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Benchmark de carga: servidor de desarrollo de Flask vs. servidores de producción.
+
+Levanta benchmarks/app_memoria.py (MongoDB en memoria con latencia simulada)
+con cada servidor y lanza `clientes` estudiantes concurrentes que consultan
+/ruta/estado, /ruta/<id>/contenido, /rutas/lista y /api/perfil-zdp con
+conexiones keep-alive. Reporta peticiones por segundo, latencia p50/p95 y
+errores.
+
+- "desarrollo": app.run(threaded=True), un proceso (como `python -m src.app` sin depurador)
+- "gunicorn": gunicorn.conf.py con --workers y --hilos (solo Linux/macOS)
+- "waitress": un proceso con workers x hilos hilos (src/wsgi.py)
+
+Los servidores que no estén instalados se omiten.
+
+Uso:
+    python -m benchmarks.benchmark_servidor --clientes 32 --peticiones 50 --workers 4 --hilos 4 \\
+        --latencia-bd-ms 2 --salida resultados.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import functools
+import statistics
+import subprocess
+import http.client
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = Path(__file__).parent.parent
+sys.path.insert(0, str(RAIZ))
+
+MODOS = ("desarrollo", "gunicorn", "waitress")
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _disponible(modo):
+    if modo == "gunicorn":
+        return shutil.which("gunicorn") is not None and os.name != "nt"
+    modulos = {"waitress": ("waitress",), "asgi": ("uvicorn", "asgiref")}.get(modo, ())
+    try:
+        for modulo in modulos:
+            __import__(modulo)
+    except ImportError:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _cookie_sesion(usuario):
+    """Cookie de sesión firmada con SECRET_KEY, como la que deja /login."""
+    from flask import Flask
+    from src.config import SECRET_KEY
+
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    return "session=" + app.session_interface.get_signing_serializer(app).dumps({"usuario": usuario})
+
+
+def _iniciar(modo, puerto, workers, hilos, entorno):
+    bind = f"127.0.0.1:{puerto}"
+    if modo == "gunicorn":
+        comando = ["gunicorn", "-c", "gunicorn.conf.py", "--bind", bind, "--workers", str(workers),
+                   "--threads", str(hilos), "benchmarks.app_memoria:app"]
+    else:
+        comando = [sys.executable, "-m", "benchmarks.app_memoria", modo, bind]
+    proceso = subprocess.Popen(comando, cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor {modo} terminó al iniciar (código {proceso.returncode})")
+        try:
+            conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=2)
+            conexion.request("GET", "/login")
+            if conexion.getresponse().status == 200:
+                conexion.close()
+                return proceso
+        except OSError:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError(f"El servidor {modo} no respondió en 60 s")
+
+
+def _cliente(puerto, i, usuarios, peticiones):
+    """Un estudiante con su propia conexión keep-alive; retorna latencias (s) y errores."""
+    from benchmarks.app_memoria import ruta_id, usuario
+
+    n = i % usuarios
+    cabeceras = {"Cookie": _cookie_sesion(usuario(n))}
+    urls = ["/ruta/estado", f"/ruta/{ruta_id(n)}/contenido", "/rutas/lista", "/api/perfil-zdp"]
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=60)
+    latencias, errores = [], 0
+    for k in range(peticiones):
+        inicio = time.perf_counter()
+        try:
+            conexion.request("GET", urls[k % len(urls)], headers=cabeceras)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores += 1
+        except (OSError, http.client.HTTPException):
+            errores += 1
+            conexion.close()
+            conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=60)
+        latencias.append(time.perf_counter() - inicio)
+    conexion.close()
+    return latencias, errores
+
+
+def ejecutar_benchmark(clientes=32, peticiones=50, workers=4, hilos=4, usuarios=20, latencia_bd_ms=2.0, modos=MODOS):
+    """
+    Misma carga contra cada servidor disponible.
+
+    Returns:
+        dict: Parámetros y, por modo, peticiones/s, latencias y errores (o "omitido")
+    """
+    entorno = {
+        **os.environ,
+        "PYTHONPATH": str(RAIZ),
+        "DEBUG": "False",
+        "RUTEALO_LLM_BACKEND": "fake",
+        "RUTEALO_BENCH_USUARIOS": str(usuarios),
+        "RUTEALO_BENCH_LATENCIA_BD_MS": str(latencia_bd_ms),
+        "RUTEALO_WORKERS": str(workers),
+        "RUTEALO_THREADS": str(hilos),
+    }
+    resultados = {}
+    for modo in modos:
+        if not _disponible(modo):
+            resultados[modo] = {"omitido": f"{modo} no está disponible en este sistema"}
+            continue
+
+        # Importa la app de benchmark fuera del tiempo medido (siembra la base del cliente)
+        from benchmarks.app_memoria import ruta_id  # noqa: F401
+
+        puerto = _puerto_libre()
+        proceso = _iniciar(modo, puerto, workers, hilos, entorno)
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clientes) as pool:
+                salidas = list(pool.map(lambda i: _cliente(puerto, i, usuarios, peticiones), range(clientes)))
+            segundos = time.perf_counter() - inicio
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+        latencias = sorted(l for lat, _ in salidas for l in lat)
+        total = len(latencias)
+        resultados[modo] = {
+            "segundos": round(segundos, 3),
+            "peticiones": total,
+            "peticiones_por_segundo": round(total / segundos, 1),
+            "latencia_p50_ms": round(statistics.median(latencias) * 1000, 2),
+            "latencia_p95_ms": round(latencias[int(total * 0.95) - 1] * 1000, 2),
+            "errores": sum(e for _, e in salidas),
+        }
+
+    return {
+        "parametros": {
+            "clientes": clientes,
+            "peticiones_por_cliente": peticiones,
+            "workers": workers,
+            "hilos": hilos,
+            "usuarios": usuarios,
+            "latencia_bd_ms": latencia_bd_ms,
+        },
+        "modos": resultados,
+    }
+
+
+def imprimir_resumen(resultado):
+    """Tabla legible con las métricas por servidor."""
+    print(f"\n{'Servidor':<12}{'Pet/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'Errores':>9}")
+    print("-" * 48)
+    for modo, d in resultado["modos"].items():
+        if "omitido" in d:
+            print(f"{modo:<12}  {d['omitido']}")
+            continue
+        print(f"{modo:<12}{d['peticiones_por_segundo']:>9.1f}{d['latencia_p50_ms']:>9.1f}"
+              f"{d['latencia_p95_ms']:>9.1f}{d['errores']:>9}")
+    base = resultado["modos"].get("desarrollo", {}).get("peticiones_por_segundo")
+    for modo, d in resultado["modos"].items():
+        if modo != "desarrollo" and base and "peticiones_por_segundo" in d:
+            print(f"{modo}: x{d['peticiones_por_segundo'] / base:.1f} respecto al servidor de desarrollo")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de carga: servidor de desarrollo vs. gunicorn/waitress (sin claves)")
+    parser.add_argument("--clientes", type=int, default=32, help="Estudiantes concurrentes")
+    parser.add_argument("--peticiones", type=int, default=50, help="Peticiones por estudiante")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--hilos", type=int, default=4, help="Hilos por worker")
+    parser.add_argument("--usuarios", type=int, default=20, help="Estudiantes distintos en la base")
+    parser.add_argument("--latencia-bd-ms", type=float, default=2.0, help="Latencia simulada por operación de BD")
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=list(MODOS))
+    parser.add_argument("--salida", help="Ruta para guardar el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar_benchmark(
+        clientes=args.clientes,
+        peticiones=args.peticiones,
+        workers=args.workers,
+        hilos=args.hilos,
+        usuarios=args.usuarios,
+        latencia_bd_ms=args.latencia_bd_ms,
+        modos=args.modos,
+    )
+    imprimir_resumen(resultado)
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultado guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
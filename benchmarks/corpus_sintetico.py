@@ -0,0 +1,133 @@
+"""
+Generador de corpus sintéticos (PDF, DOCX, PPTX) para los benchmarks.
+
+El texto se arma con un vocabulario por tema y una semilla fija, de modo que
+dos corridas con los mismos parámetros producen exactamente los mismos
+archivos. Los PDF se escriben a mano (texto plano Helvetica) para no
+depender de librerías de generación; DOCX y PPTX usan python-docx y
+python-pptx, ya incluidos en requirements.txt.
+"""
+
+import random
+from pathlib import Path
+
+TEMAS = {
+    "bases_de_datos": "tabla indice consulta transaccion normalizacion clave relacion esquema join replica".split(),
+    "machine_learning": "modelo entrenamiento gradiente perdida regularizacion validacion clasificador red capa dato".split(),
+    "biologia": "celula mitocondria proteina membrana enzima gen ribosoma organismo tejido energia".split(),
+    "historia": "revolucion imperio tratado monarquia republica guerra reforma colonia constitucion siglo".split(),
+    "economia": "inflacion mercado demanda oferta interes banco politica fiscal moneda crecimiento".split(),
+}
+
+CONECTORES = "el la los un una se define como permite cuando porque mientras segun ademas".split()
+
+FORMATOS = ("pdf", "docx", "pptx")
+
+
+def generar_parrafo(rng, tema, palabras=60):
+    """Párrafo ASCII con vocabulario del tema y conectores."""
+    vocabulario = TEMAS[tema]
+    oraciones, actual = [], []
+    for i in range(palabras):
+        actual.append(rng.choice(vocabulario) if rng.random() < 0.6 else rng.choice(CONECTORES))
+        if len(actual) >= 12 or i == palabras - 1:
+            oraciones.append(" ".join(actual).capitalize() + ".")
+            actual = []
+    return " ".join(oraciones)
+
+
+def _escapar_pdf(texto):
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def escribir_pdf(ruta, paginas):
+    """Escribe un PDF mínimo con una lista de textos (uno por página)."""
+    objetos = []
+
+    def agregar(contenido):
+        objetos.append(contenido)
+        return len(objetos)
+
+    catalogo = agregar(None)
+    nodo_paginas = agregar(None)
+    fuente = agregar(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    ids_paginas = []
+    for texto in paginas:
+        lineas = [texto[i:i + 90] for i in range(0, len(texto), 90)]
+        cuerpo = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({_escapar_pdf(l)}) '" for l in lineas) + " ET"
+        cuerpo = cuerpo.encode("latin-1")
+        stream = agregar(b"<< /Length %d >>\nstream\n" % len(cuerpo) + cuerpo + b"\nendstream")
+        ids_paginas.append(
+            agregar(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (nodo_paginas, fuente, stream)
+            )
+        )
+
+    objetos[catalogo - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % nodo_paginas
+    kids = b" ".join(b"%d 0 R" % i for i in ids_paginas)
+    objetos[nodo_paginas - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(ids_paginas))
+
+    salida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objetos, start=1):
+        offsets.append(len(salida))
+        salida += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    inicio_xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for off in offsets:
+        salida += b"%010d 00000 n \n" % off
+    salida += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objetos) + 1,
+        catalogo,
+        inicio_xref,
+    )
+    Path(ruta).write_bytes(bytes(salida))
+
+
+def escribir_docx(ruta, paginas):
+    from docx import Document
+
+    doc = Document()
+    for texto in paginas:
+        doc.add_paragraph(texto)
+    doc.save(ruta)
+
+
+def escribir_pptx(ruta, paginas):
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    prs = Presentation()
+    for texto in paginas:
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        caja = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(6))
+        caja.text_frame.text = texto
+    prs.save(ruta)
+
+
+ESCRITORES = {"pdf": escribir_pdf, "docx": escribir_docx, "pptx": escribir_pptx}
+
+
+def generar_corpus(directorio, documentos=4, paginas=6, palabras_por_pagina=120, semilla=42, formatos=FORMATOS):
+    """
+    Genera `documentos` archivos rotando formatos y temas.
+
+    Returns:
+        list[Path]: Rutas de los archivos generados
+    """
+    rng = random.Random(semilla)
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    temas = list(TEMAS)
+
+    rutas = []
+    for i in range(documentos):
+        formato = formatos[i % len(formatos)]
+        tema = temas[i % len(temas)]
+        textos = [generar_parrafo(rng, tema, palabras_por_pagina) for _ in range(paginas)]
+        ruta = directorio / f"{tema}_{i + 1}.{formato}"
+        ESCRITORES[formato](ruta, textos)
+        rutas.append(ruta)
+    return rutas
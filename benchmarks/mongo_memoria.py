@@ -0,0 +1,925 @@
+"""
+Sustituto de MongoDB en memoria para benchmarks sin servidor.
+
+Implementa el subconjunto de la API de pymongo que usa RUTEALO:
+find/find_one (filtros, proyección, sort, skip, limit), insert_one/many
+(con _id único), replace_one, update_one/many ($set, $unset, $inc, $push,
+$addToSet, $setOnInsert, upsert), find_one_and_update, delete_one/many,
+count_documents, bulk_write, aggregate (etapas y expresiones comunes),
+create_collection/list_collections/rename/drop (las opciones como
+`timeseries` se guardan pero no cambian el comportamiento) y create_index
+(sin efecto).
+
+Se inyecta reemplazando el cliente del singleton de src.database:
+
+    from benchmarks.mongo_memoria import instalar_cliente_memoria
+    cliente = instalar_cliente_memoria(latencia_ms=1.0)
+
+Cada operación puede simular una latencia de red fija y se contabiliza por
+colección y tipo (ver ClienteMemoria.estadisticas()). Como MongoClient, avisa
+a los CommandListener registrados con pymongo.monitoring.register
+(CommandStartedEvent/CommandSucceededEvent con el nombre del comando que
+enviaría el driver: find, insert, update, ...).
+
+El mismo cliente queda registrado como AsyncMongoClient del proceso
+(get_async_database) a través de ClienteMemoriaAsincrono: los métodos de
+colección son corrutinas sobre los mismos datos y la latencia se espera con
+asyncio.sleep, sin bloquear el bucle de eventos.
+"""
+
+import re
+import copy
+import math
+import time
+import asyncio
+import threading
+import datetime
+import itertools
+import contextvars
+from collections import Counter
+
+from bson import ObjectId
+from pymongo import ReturnDocument, monitoring
+from pymongo.errors import CollectionInvalid, DuplicateKeyError
+from pymongo.results import (
+    InsertOneResult,
+    InsertManyResult,
+    UpdateResult,
+    DeleteResult,
+    BulkWriteResult,
+)
+
+
+# --- Utilidades de documentos ---
+
+
+def _obtener(doc, ruta):
+    """Valor en una ruta con puntos (a.b.c); listas se recorren por índice."""
+    actual = doc
+    for parte in ruta.split("."):
+        if isinstance(actual, dict):
+            if parte not in actual:
+                return _AUSENTE
+            actual = actual[parte]
+        elif isinstance(actual, list) and parte.isdigit() and int(parte) < len(actual):
+            actual = actual[int(parte)]
+        else:
+            return _AUSENTE
+    return actual
+
+
+def _asignar(doc, ruta, valor):
+    partes = ruta.split(".")
+    for parte in partes[:-1]:
+        doc = doc.setdefault(parte, {})
+    doc[partes[-1]] = valor
+
+
+def _eliminar(doc, ruta):
+    partes = ruta.split(".")
+    for parte in partes[:-1]:
+        doc = doc.get(parte, {})
+    doc.pop(partes[-1], None)
+
+
+class _Ausente:
+    def __repr__(self):
+        return "<ausente>"
+
+
+_AUSENTE = _Ausente()
+
+
+# --- Filtros ---
+
+
+def _comparar_operador(valor, operador, argumento):
+    if operador == "$eq":
+        return _igual(valor, argumento)
+    if operador == "$ne":
+        return not _igual(valor, argumento)
+    if operador == "$in":
+        return any(_igual(valor, a) for a in argumento)
+    if operador == "$nin":
+        return not any(_igual(valor, a) for a in argumento)
+    if operador == "$exists":
+        return (valor is not _AUSENTE) == bool(argumento)
+    if operador == "$regex":
+        return isinstance(valor, str) and re.search(argumento, valor) is not None
+    if operador in ("$gt", "$gte", "$lt", "$lte"):
+        if valor is _AUSENTE or valor is None:
+            return False
+        try:
+            return {
+                "$gt": valor > argumento,
+                "$gte": valor >= argumento,
+                "$lt": valor < argumento,
+                "$lte": valor <= argumento,
+            }[operador]
+        except TypeError:
+            return False
+    if operador == "$size":
+        return isinstance(valor, list) and len(valor) == argumento
+    raise NotImplementedError(f"Operador no soportado: {operador}")
+
+
+def _igual(valor, esperado):
+    if isinstance(valor, list) and not isinstance(esperado, list):
+        return esperado in valor
+    if valor is _AUSENTE:
+        return esperado is None
+    return valor == esperado
+
+
+def coincide(doc, filtro):
+    """True si el documento cumple el filtro (subconjunto de la sintaxis Mongo)."""
+    for clave, condicion in (filtro or {}).items():
+        if clave == "$and":
+            if not all(coincide(doc, f) for f in condicion):
+                return False
+        elif clave == "$or":
+            if not any(coincide(doc, f) for f in condicion):
+                return False
+        elif clave == "$nor":
+            if any(coincide(doc, f) for f in condicion):
+                return False
+        else:
+            valor = _obtener(doc, clave)
+            if isinstance(condicion, dict) and condicion and all(k.startswith("$") for k in condicion):
+                if not all(_comparar_operador(valor, op, arg) for op, arg in condicion.items()):
+                    return False
+            elif not _igual(valor, condicion):
+                return False
+    return True
+
+
+# --- Proyección y orden ---
+
+
+def _proyectar(doc, proyeccion):
+    if not proyeccion:
+        return copy.deepcopy(doc)
+    if isinstance(proyeccion, (list, tuple)):
+        proyeccion = {campo: 1 for campo in proyeccion}
+
+    incluir_id = proyeccion.get("_id", 1)
+    campos = {k: v for k, v in proyeccion.items() if k != "_id"}
+    inclusiones = [k for k, v in campos.items() if v and not isinstance(v, dict)]
+    slices = {k: v["$slice"] for k, v in campos.items() if isinstance(v, dict) and "$slice" in v}
+
+    if inclusiones or (slices and not any(v == 0 for v in campos.values())):
+        resultado = {}
+        for ruta in inclusiones + list(slices):
+            valor = _obtener(doc, ruta)
+            if valor is not _AUSENTE:
+                _asignar(resultado, ruta, copy.deepcopy(valor))
+    else:
+        resultado = copy.deepcopy(doc)
+        for ruta, v in campos.items():
+            if v == 0:
+                _eliminar(resultado, ruta)
+
+    for ruta, corte in slices.items():
+        valor = _obtener(resultado, ruta)
+        if isinstance(valor, list):
+            if isinstance(corte, list):
+                inicio, n = corte
+                _asignar(resultado, ruta, valor[inicio:inicio + n])
+            else:
+                _asignar(resultado, ruta, valor[:corte] if corte >= 0 else valor[corte:])
+
+    if incluir_id and "_id" in doc:
+        resultado["_id"] = doc["_id"]
+    elif not incluir_id:
+        resultado.pop("_id", None)
+    return resultado
+
+
+def _clave_orden(valor):
+    # None/ausente primero, como en Mongo
+    if valor is _AUSENTE or valor is None:
+        return (0, 0)
+    return (1, valor)
+
+
+def _ordenar(docs, orden):
+    if not orden:
+        return docs
+    if isinstance(orden, str):
+        orden = [(orden, 1)]
+    for campo, direccion in reversed(list(orden)):
+        docs = sorted(docs, key=lambda d: _clave_orden(_obtener(d, campo)), reverse=direccion < 0)
+    return docs
+
+
+# --- Actualizaciones ---
+
+
+def _aplicar_actualizacion(doc, actualizacion, es_insercion=False):
+    for operador, campos in actualizacion.items():
+        if operador == "$set":
+            for ruta, valor in campos.items():
+                _asignar(doc, ruta, copy.deepcopy(valor))
+        elif operador == "$setOnInsert":
+            if es_insercion:
+                for ruta, valor in campos.items():
+                    _asignar(doc, ruta, copy.deepcopy(valor))
+        elif operador == "$unset":
+            for ruta in campos:
+                _eliminar(doc, ruta)
+        elif operador == "$inc":
+            for ruta, delta in campos.items():
+                actual = _obtener(doc, ruta)
+                _asignar(doc, ruta, (0 if actual is _AUSENTE else actual) + delta)
+        elif operador == "$max":
+            for ruta, valor in campos.items():
+                actual = _obtener(doc, ruta)
+                if actual is _AUSENTE or valor > actual:
+                    _asignar(doc, ruta, valor)
+        elif operador == "$min":
+            for ruta, valor in campos.items():
+                actual = _obtener(doc, ruta)
+                if actual is _AUSENTE or valor < actual:
+                    _asignar(doc, ruta, valor)
+        elif operador in ("$push", "$addToSet"):
+            for ruta, valor in campos.items():
+                lista = _obtener(doc, ruta)
+                if lista is _AUSENTE:
+                    lista = []
+                    _asignar(doc, ruta, lista)
+                slice_ = None
+                if isinstance(valor, dict) and "$each" in valor:
+                    elementos = valor["$each"]
+                    slice_ = valor.get("$slice")
+                else:
+                    elementos = [valor]
+                for e in elementos:
+                    if operador == "$push" or e not in lista:
+                        lista.append(copy.deepcopy(e))
+                if slice_ is not None:
+                    recortada = lista[slice_:] if slice_ < 0 else lista[:slice_]
+                    _asignar(doc, ruta, recortada)
+        elif operador == "$pull":
+            for ruta, condicion in campos.items():
+                lista = _obtener(doc, ruta)
+                if isinstance(lista, list):
+                    if isinstance(condicion, dict):
+                        _asignar(doc, ruta, [e for e in lista if not coincide(e, condicion)])
+                    else:
+                        _asignar(doc, ruta, [e for e in lista if e != condicion])
+        elif not operador.startswith("$"):
+            raise ValueError("La actualización debe usar operadores ($set, $inc, ...)")
+        else:
+            raise NotImplementedError(f"Operador de actualización no soportado: {operador}")
+
+
+def _documento_base_upsert(filtro):
+    """Campos de igualdad del filtro que se copian al documento insertado."""
+    base = {}
+    for clave, valor in (filtro or {}).items():
+        if clave.startswith("$"):
+            continue
+        if isinstance(valor, dict) and any(k.startswith("$") for k in valor):
+            if "$eq" in valor:
+                _asignar(base, clave, valor["$eq"])
+            continue
+        _asignar(base, clave, copy.deepcopy(valor))
+    return base
+
+
+# --- Agregación (subconjunto) ---
+
+
+def evaluar_expresion(expr, doc, variables=None):
+    """Evalúa una expresión de agregación ($campo, $$variable, operadores comunes)."""
+    variables = variables or {}
+    if isinstance(expr, str):
+        if expr.startswith("$$"):
+            nombre, _, ruta = expr[2:].partition(".")
+            valor = variables.get(nombre, _AUSENTE) if nombre != "ROOT" else doc
+            return _obtener(valor, ruta) if ruta and valor is not _AUSENTE else valor
+        if expr.startswith("$"):
+            return _obtener(doc, expr[1:])
+        return expr
+    if isinstance(expr, list):
+        return [evaluar_expresion(e, doc, variables) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) == 1:
+        operador, arg = next(iter(expr.items()))
+        if operador.startswith("$"):
+            return _OPERADORES_EXPRESION[operador](arg, doc, variables)
+    return {k: _sin_ausente(evaluar_expresion(v, doc, variables)) for k, v in expr.items()}
+
+
+def _sin_ausente(valor):
+    return None if valor is _AUSENTE else valor
+
+
+def _ev(expr, doc, variables):
+    return _sin_ausente(evaluar_expresion(expr, doc, variables))
+
+
+def _op_reduce(arg, doc, variables):
+    acumulado = _ev(arg["initialValue"], doc, variables)
+    for elemento in _ev(arg["input"], doc, variables) or []:
+        acumulado = _ev(arg["in"], doc, {**variables, "value": acumulado, "this": elemento})
+    return acumulado
+
+
+def _op_cond(arg, doc, variables):
+    if isinstance(arg, dict):
+        arg = [arg["if"], arg["then"], arg["else"]]
+    return _ev(arg[1] if _ev(arg[0], doc, variables) else arg[2], doc, variables)
+
+
+def _op_slice(arreglo, inicio, n=None):
+    if arreglo is None:
+        return None
+    if n is None:
+        return arreglo[:inicio] if inicio >= 0 else arreglo[inicio:]
+    return arreglo[inicio:inicio + n]
+
+
+_OPERADORES_EXPRESION = {
+    "$literal": lambda a, d, v: a,
+    "$ifNull": lambda a, d, v: next((x for x in (_ev(e, d, v) for e in a) if x is not None), None),
+    "$concat": lambda a, d, v: "".join(_ev(e, d, v) for e in a),
+    "$concatArrays": lambda a, d, v: [x for e in a for x in (_ev(e, d, v) or [])],
+    "$size": lambda a, d, v: len(_ev(a, d, v)),
+    "$slice": lambda a, d, v: _op_slice(*[_ev(e, d, v) for e in a]),
+    "$eq": lambda a, d, v: _ev(a[0], d, v) == _ev(a[1], d, v),
+    "$ne": lambda a, d, v: _ev(a[0], d, v) != _ev(a[1], d, v),
+    "$gt": lambda a, d, v: _ev(a[0], d, v) > _ev(a[1], d, v),
+    "$gte": lambda a, d, v: _ev(a[0], d, v) >= _ev(a[1], d, v),
+    "$lt": lambda a, d, v: _ev(a[0], d, v) < _ev(a[1], d, v),
+    "$and": lambda a, d, v: all(_ev(e, d, v) for e in a),
+    "$or": lambda a, d, v: any(_ev(e, d, v) for e in a),
+    "$not": lambda a, d, v: not _ev(a[0] if isinstance(a, list) else a, d, v),
+    "$add": lambda a, d, v: sum(_ev(e, d, v) or 0 for e in a),
+    "$multiply": lambda a, d, v: math.prod(_ev(e, d, v) for e in a),
+    "$subtract": lambda a, d, v: _ev(a[0], d, v) - _ev(a[1], d, v),
+    "$divide": lambda a, d, v: _ev(a[0], d, v) / _ev(a[1], d, v),
+    "$cond": _op_cond,
+    "$objectToArray": lambda a, d, v: [{"k": k, "v": x} for k, x in (_ev(a, d, v) or {}).items()],
+    "$arrayToObject": lambda a, d, v: {e["k"]: e["v"] for e in _ev(a, d, v) or []},
+    "$map": lambda a, d, v: [
+        _ev(a["in"], d, {**v, a.get("as", "this"): e}) for e in _ev(a["input"], d, v) or []
+    ],
+    "$filter": lambda a, d, v: [
+        e for e in _ev(a["input"], d, v) or [] if _ev(a["cond"], d, {**v, a.get("as", "this"): e})
+    ],
+    "$reduce": _op_reduce,
+}
+
+
+def _acumular(acumulador, valores):
+    operador, _ = next(iter(acumulador.items()))
+    valores = [x for x in valores if x is not None]
+    if operador == "$sum":
+        return sum(valores)
+    if operador == "$avg":
+        return sum(valores) / len(valores) if valores else None
+    if operador == "$max":
+        return max(valores) if valores else None
+    if operador == "$min":
+        return min(valores) if valores else None
+    if operador == "$first":
+        return valores[0] if valores else None
+    if operador == "$last":
+        return valores[-1] if valores else None
+    if operador == "$push":
+        return valores
+    raise NotImplementedError(f"Acumulador no soportado: {operador}")
+
+
+def ejecutar_pipeline(docs, pipeline):
+    """Aplica las etapas $match, $project, $addFields, $unwind, $group, $sort, $limit, $skip, $count y $facet."""
+    docs = [copy.deepcopy(d) for d in docs]
+    for etapa in pipeline:
+        nombre, arg = next(iter(etapa.items()))
+        if nombre == "$match":
+            docs = [d for d in docs if coincide(d, arg)]
+        elif nombre in ("$project", "$addFields", "$set"):
+            nuevos = []
+            for d in docs:
+                if nombre == "$project":
+                    base = {"_id": d["_id"]} if arg.get("_id", 1) and "_id" in d else {}
+                else:
+                    base = dict(d)
+                for campo, expr in arg.items():
+                    if campo == "_id" and expr in (0, 1, True, False):
+                        continue
+                    if expr in (1, True) and nombre == "$project":
+                        valor = _obtener(d, campo)
+                    else:
+                        valor = evaluar_expresion(expr, d)
+                    if valor is not _AUSENTE:
+                        _asignar(base, campo, valor)
+                nuevos.append(base)
+            docs = nuevos
+        elif nombre == "$unwind":
+            ruta = (arg["path"] if isinstance(arg, dict) else arg)[1:]
+            docs = [{**d, ruta: e} for d in docs for e in (_obtener(d, ruta) or [])]
+        elif nombre == "$group":
+            grupos = {}
+            for d in docs:
+                clave = _sin_ausente(evaluar_expresion(arg["_id"], d))
+                grupos.setdefault(repr(clave), (clave, []))[1].append(d)
+            docs = [
+                {"_id": clave, **{c: _acumular(a, [_ev(next(iter(a.values())), d, {}) for d in miembros])
+                                  for c, a in arg.items() if c != "_id"}}
+                for clave, miembros in grupos.values()
+            ]
+        elif nombre == "$sort":
+            docs = _ordenar(docs, list(arg.items()))
+        elif nombre == "$limit":
+            docs = docs[:arg]
+        elif nombre == "$skip":
+            docs = docs[arg:]
+        elif nombre == "$count":
+            docs = [{arg: len(docs)}]
+        elif nombre == "$facet":
+            docs = [{campo: ejecutar_pipeline(docs, sub) for campo, sub in arg.items()}]
+        else:
+            raise NotImplementedError(f"Etapa no soportada: {nombre}")
+    return docs
+
+
+# --- Cursor, colección, base, cliente ---
+
+
+class CursorMemoria:
+    """Cursor perezoso con sort/skip/limit encadenables."""
+
+    def __init__(self, coleccion, filtro, proyeccion):
+        self._coleccion = coleccion
+        self._filtro = filtro
+        self._proyeccion = proyeccion
+        self._orden = None
+        self._skip = 0
+        self._limit = 0
+        self._iterador = None
+
+    def sort(self, clave, direccion=None):
+        self._orden = [(clave, direccion or 1)] if isinstance(clave, str) else list(clave)
+        return self
+
+    def skip(self, n):
+        self._skip = n
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def _resultados(self):
+        docs = self._coleccion._filtrar(self._filtro)
+        docs = _ordenar(docs, self._orden)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[: self._limit]
+        return [_proyectar(d, self._proyeccion) for d in docs]
+
+    def __iter__(self):
+        if self._iterador is None:
+            self._iterador = iter(self._resultados())
+        return self._iterador
+
+    def __next__(self):
+        return next(iter(self))
+
+    def to_list(self, length=None):
+        return list(self)
+
+
+class ColeccionMemoria:
+    """Colección en memoria con bloqueo por colección."""
+
+    def __init__(self, base, nombre):
+        self.database = base
+        self.name = nombre
+        self.opciones = {}
+        self._docs = []
+        self._lock = threading.RLock()
+
+    # -- internos --
+    def _operacion(self, tipo):
+        self.database.client._registrar(self.name, tipo, self.database.name)
+
+    def _filtrar(self, filtro):
+        with self._lock:
+            return [d for d in self._docs if coincide(d, filtro)]
+
+    def _verificar_id(self, doc):
+        """Como el índice único de _id: un _id explícito repetido falla (los ObjectId nuevos no se revisan)."""
+        if "_id" in doc and any(d["_id"] == doc["_id"] for d in self._docs):
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} dup key: {{ _id: {doc['_id']!r} }}")
+
+    def _insertar(self, doc):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", ObjectId())
+        self._docs.append(doc)
+        return doc["_id"]
+
+    # -- lectura --
+    def find(self, filter=None, projection=None, sort=None, limit=0, skip=0, **kwargs):
+        self._operacion("find")
+        cursor = CursorMemoria(self, filter, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    def find_one(self, filter=None, projection=None, sort=None, **kwargs):
+        self._operacion("find_one")
+        docs = _ordenar(self._filtrar(filter), sort)
+        return _proyectar(docs[0], projection) if docs else None
+
+    def count_documents(self, filter=None, **kwargs):
+        self._operacion("count_documents")
+        return len(self._filtrar(filter))
+
+    def aggregate(self, pipeline, **kwargs):
+        self._operacion("aggregate")
+        with self._lock:
+            docs = list(self._docs)
+        return iter(ejecutar_pipeline(docs, pipeline))
+
+    def estimated_document_count(self, **kwargs):
+        return len(self._docs)
+
+    def distinct(self, key, filter=None, **kwargs):
+        self._operacion("distinct")
+        valores = []
+        for d in self._filtrar(filter):
+            v = _obtener(d, key)
+            for e in v if isinstance(v, list) else [v]:
+                if e is not _AUSENTE and e not in valores:
+                    valores.append(e)
+        return valores
+
+    # -- escritura --
+    def insert_one(self, document, **kwargs):
+        self._operacion("insert_one")
+        with self._lock:
+            self._verificar_id(document)
+            inserted_id = self._insertar(document)
+        document.setdefault("_id", inserted_id)
+        return InsertOneResult(inserted_id, True)
+
+    def insert_many(self, documents, ordered=True, **kwargs):
+        self._operacion("insert_many")
+        ids = []
+        with self._lock:
+            for document in documents:
+                self._verificar_id(document)
+                inserted_id = self._insertar(document)
+                document.setdefault("_id", inserted_id)
+                ids.append(inserted_id)
+        return InsertManyResult(ids, True)
+
+    def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        self._operacion("replace_one")
+        with self._lock:
+            for i, d in enumerate(self._docs):
+                if coincide(d, filter):
+                    nuevo = copy.deepcopy(replacement)
+                    nuevo["_id"] = d["_id"]
+                    self._docs[i] = nuevo
+                    return _resultado_update(1, 1)
+            if upsert:
+                doc = _documento_base_upsert(filter)
+                doc.update(copy.deepcopy(replacement))
+                return _resultado_update(0, 0, self._insertar(doc))
+        return _resultado_update(0, 0)
+
+    def _update(self, filter, update, upsert, multiple):
+        with self._lock:
+            coincidencias = [d for d in self._docs if coincide(d, filter)]
+            if not multiple:
+                coincidencias = coincidencias[:1]
+            for d in coincidencias:
+                _aplicar_actualizacion(d, update)
+            if not coincidencias and upsert:
+                doc = _documento_base_upsert(filter)
+                _aplicar_actualizacion(doc, update, es_insercion=True)
+                return _resultado_update(0, 0, self._insertar(doc))
+            return _resultado_update(len(coincidencias), len(coincidencias))
+
+    def update_one(self, filter, update, upsert=False, **kwargs):
+        self._operacion("update_one")
+        return self._update(filter, update, upsert, multiple=False)
+
+    def update_many(self, filter, update, upsert=False, **kwargs):
+        self._operacion("update_many")
+        return self._update(filter, update, upsert, multiple=True)
+
+    def find_one_and_update(
+        self, filter, update, projection=None, sort=None, upsert=False, return_document=ReturnDocument.BEFORE, **kwargs
+    ):
+        self._operacion("find_one_and_update")
+        with self._lock:
+            docs = _ordenar(self._filtrar(filter), sort)
+            if docs:
+                doc = docs[0]
+                antes = _proyectar(doc, projection)
+                _aplicar_actualizacion(doc, update)
+                return antes if return_document == ReturnDocument.BEFORE else _proyectar(doc, projection)
+            if upsert:
+                doc = _documento_base_upsert(filter)
+                _aplicar_actualizacion(doc, update, es_insercion=True)
+                self._insertar(doc)
+                return None if return_document == ReturnDocument.BEFORE else _proyectar(self._docs[-1], projection)
+        return None
+
+    def delete_one(self, filter, **kwargs):
+        self._operacion("delete_one")
+        with self._lock:
+            for i, d in enumerate(self._docs):
+                if coincide(d, filter):
+                    del self._docs[i]
+                    return DeleteResult({"n": 1}, True)
+        return DeleteResult({"n": 0}, True)
+
+    def delete_many(self, filter, **kwargs):
+        self._operacion("delete_many")
+        with self._lock:
+            antes = len(self._docs)
+            self._docs = [d for d in self._docs if not coincide(d, filter)]
+            return DeleteResult({"n": antes - len(self._docs)}, True)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        """Aplica operaciones de pymongo (InsertOne, UpdateOne, ReplaceOne, ...) en un solo viaje."""
+        self._operacion("bulk_write")
+        resumen = Counter()
+        upserted = {}
+        with self._lock:
+            for i, req in enumerate(requests):
+                tipo = type(req).__name__
+                if tipo == "InsertOne":
+                    self._insertar(req._doc)
+                    resumen["nInserted"] += 1
+                    continue
+                if tipo in ("DeleteOne", "DeleteMany"):
+                    antes = len(self._docs)
+                    if tipo == "DeleteOne":
+                        for j, d in enumerate(self._docs):
+                            if coincide(d, req._filter):
+                                del self._docs[j]
+                                break
+                    else:
+                        self._docs = [d for d in self._docs if not coincide(d, req._filter)]
+                    resumen["nRemoved"] += antes - len(self._docs)
+                    continue
+                if tipo == "ReplaceOne":
+                    r = self.replace_one(req._filter, req._doc, upsert=req._upsert)
+                else:
+                    r = self._update(req._filter, req._doc, req._upsert, multiple=(tipo == "UpdateMany"))
+                resumen["nMatched"] += r.matched_count
+                resumen["nModified"] += r.modified_count
+                if r.upserted_id is not None:
+                    upserted[i] = r.upserted_id
+        return BulkWriteResult(
+            {
+                "nInserted": resumen["nInserted"],
+                "nMatched": resumen["nMatched"],
+                "nModified": resumen["nModified"],
+                "nRemoved": resumen["nRemoved"],
+                "nUpserted": len(upserted),
+                "upserted": [{"index": i, "_id": _id} for i, _id in upserted.items()],
+            },
+            True,
+        )
+
+    # -- administración --
+    def rename(self, nuevo_nombre, **kwargs):
+        self._operacion("rename")
+        self.database._renombrar(self.name, nuevo_nombre)
+
+    def drop(self, **kwargs):
+        self._operacion("drop")
+        self.database.drop_collection(self.name)
+
+    # -- índices (sin efecto, solo para compatibilidad) --
+    def create_index(self, keys, **kwargs):
+        return kwargs.get("name") or "_".join(str(k) for k in (keys if isinstance(keys, list) else [keys]))
+
+    def create_indexes(self, indexes, **kwargs):
+        return [self.create_index(getattr(i, "document", {}).get("key")) for i in indexes]
+
+
+def _resultado_update(matched, modified, upserted_id=None):
+    raw = {"n": matched if upserted_id is None else 1, "nModified": modified}
+    if upserted_id is not None:
+        raw["upserted"] = upserted_id
+    return UpdateResult(raw, True)
+
+
+class BaseMemoria:
+    """Base de datos en memoria (colecciones creadas bajo demanda)."""
+
+    def __init__(self, cliente, nombre):
+        self.client = cliente
+        self.name = nombre
+        self._colecciones = {}
+        self._lock = threading.Lock()
+
+    def get_collection(self, nombre, **kwargs):
+        with self._lock:
+            if nombre not in self._colecciones:
+                self._colecciones[nombre] = ColeccionMemoria(self, nombre)
+            return self._colecciones[nombre]
+
+    def __getitem__(self, nombre):
+        return self.get_collection(nombre)
+
+    def __getattr__(self, nombre):
+        if nombre.startswith("_"):
+            raise AttributeError(nombre)
+        return self.get_collection(nombre)
+
+    def __bool__(self):
+        # Igual que pymongo: evita `if db:` accidentales
+        raise NotImplementedError("Database objects do not implement truth value testing")
+
+    def list_collection_names(self, **kwargs):
+        return list(self._colecciones)
+
+    def list_collections(self, filter=None, **kwargs):
+        for nombre, col in list(self._colecciones.items()):
+            info = {
+                "name": nombre,
+                "type": "timeseries" if col.opciones.get("timeseries") else "collection",
+                "options": copy.deepcopy(col.opciones),
+            }
+            if coincide(info, filter or {}):
+                yield info
+
+    def create_collection(self, nombre, **kwargs):
+        """Como pymongo: falla si la colección ya existe (aquí: si tiene documentos u opciones)."""
+        col = self.get_collection(nombre)
+        if col._docs or col.opciones:
+            raise CollectionInvalid(f"collection {nombre} already exists")
+        col.opciones = dict(kwargs)
+        return col
+
+    def drop_collection(self, nombre, **kwargs):
+        with self._lock:
+            self._colecciones.pop(nombre, None)
+
+    def _renombrar(self, nombre, nuevo_nombre):
+        with self._lock:
+            if self._colecciones.get(nuevo_nombre) is not None and self._colecciones[nuevo_nombre]._docs:
+                raise CollectionInvalid(f"target namespace {nuevo_nombre} exists")
+            col = self._colecciones.pop(nombre)
+            col.name = nuevo_nombre
+            self._colecciones[nuevo_nombre] = col
+
+    def command(self, comando, *args, **kwargs):
+        return {"ok": 1.0}
+
+
+# True mientras una operación se ejecuta desde la vista asíncrona (espera la latencia aparte)
+_operacion_asincrona = contextvars.ContextVar("operacion_asincrona", default=False)
+
+# Comando del servidor que envía pymongo para cada operación (eventos de monitoring)
+COMANDOS = {
+    "find_one": "find",
+    "insert_one": "insert",
+    "insert_many": "insert",
+    "update_one": "update",
+    "update_many": "update",
+    "replace_one": "update",
+    "delete_one": "delete",
+    "delete_many": "delete",
+    "find_one_and_update": "findAndModify",
+    "count_documents": "aggregate",
+    "bulk_write": "bulkWrite",
+    "rename": "renameCollection",
+}
+_ids_peticion = itertools.count(1)
+
+
+class ClienteMemoria:
+    """
+    Cliente compatible con MongoClient para src.database.
+
+    Args:
+        latencia_ms (float): Latencia simulada por operación (ida y vuelta)
+    """
+
+    def __init__(self, latencia_ms=0.0):
+        self.latencia_ms = latencia_ms
+        self._bases = {}
+        self._lock = threading.Lock()
+        self._operaciones = Counter()
+        self.admin = BaseMemoria(self, "admin")
+
+    def __getitem__(self, nombre):
+        with self._lock:
+            if nombre not in self._bases:
+                self._bases[nombre] = BaseMemoria(self, nombre)
+            return self._bases[nombre]
+
+    def get_database(self, nombre, **kwargs):
+        return self[nombre]
+
+    def _registrar(self, coleccion, tipo, base=""):
+        with self._lock:
+            self._operaciones[(coleccion, tipo)] += 1
+        escuchas = monitoring._LISTENERS.command_listeners
+        if escuchas:
+            nombre, peticion, conexion = COMANDOS.get(tipo, tipo), next(_ids_peticion), ("memoria", 27017)
+            for escucha in escuchas:
+                escucha.started(monitoring.CommandStartedEvent({nombre: coleccion}, base, peticion, conexion, peticion))
+        if self.latencia_ms and not _operacion_asincrona.get():
+            time.sleep(self.latencia_ms / 1000)
+        for escucha in escuchas:
+            escucha.succeeded(monitoring.CommandSucceededEvent(
+                datetime.timedelta(milliseconds=self.latencia_ms), {"ok": 1}, nombre, peticion, conexion, peticion,
+                database_name=base,
+            ))
+
+    def estadisticas(self):
+        """Operaciones por colección y tipo: {"coleccion.tipo": n, ..., "total": n}."""
+        with self._lock:
+            resultado = {f"{c}.{t}": n for (c, t), n in sorted(self._operaciones.items())}
+            resultado["total"] = sum(self._operaciones.values())
+        return resultado
+
+    def reiniciar_estadisticas(self):
+        with self._lock:
+            self._operaciones.clear()
+
+    def close(self):
+        pass
+
+
+class ColeccionAsincrona:
+    """Vista asíncrona de una ColeccionMemoria: find_one, insert_one, update_one, ... como corrutinas."""
+
+    def __init__(self, coleccion):
+        self._coleccion = coleccion
+        self.name = coleccion.name
+
+    def __getattr__(self, nombre):
+        if nombre.startswith("_"):
+            raise AttributeError(nombre)
+        metodo = getattr(self._coleccion, nombre)
+        latencia_ms = self._coleccion.database.client.latencia_ms
+
+        async def operacion(*args, **kwargs):
+            if latencia_ms:
+                await asyncio.sleep(latencia_ms / 1000)
+            marca = _operacion_asincrona.set(True)
+            try:
+                return metodo(*args, **kwargs)
+            finally:
+                _operacion_asincrona.reset(marca)
+
+        return operacion
+
+
+class BaseAsincrona:
+    """Vista asíncrona de una BaseMemoria."""
+
+    def __init__(self, base):
+        self._base = base
+        self.name = base.name
+
+    def __getitem__(self, nombre):
+        return ColeccionAsincrona(self._base[nombre])
+
+    def __getattr__(self, nombre):
+        if nombre.startswith("_"):
+            raise AttributeError(nombre)
+        return self[nombre]
+
+
+class ClienteMemoriaAsincrono:
+    """Cliente compatible con AsyncMongoClient sobre los datos de un ClienteMemoria."""
+
+    def __init__(self, cliente):
+        self.sincrono = cliente
+
+    def __getitem__(self, nombre):
+        return BaseAsincrona(self.sincrono[nombre])
+
+    def get_database(self, nombre, **kwargs):
+        return self[nombre]
+
+    async def close(self):
+        pass
+
+
+def instalar_cliente_memoria(latencia_ms=0.0):
+    """Crea un ClienteMemoria y lo registra como cliente (síncrono y asíncrono) de src.database."""
+    from src.database import DatabaseConnection
+
+    cliente = ClienteMemoria(latencia_ms=latencia_ms)
+    DatabaseConnection._client = cliente
+    if DatabaseConnection._instance is not None:
+        DatabaseConnection._instance._client = cliente
+    DatabaseConnection._async_client = ClienteMemoriaAsincrono(cliente)
+    DatabaseConnection._async_pid = None
+    return cliente
@@ -0,0 +1,38 @@
+"""
+Configuración de gunicorn para RUTEALO (ver src/wsgi.py).
+
+    gunicorn -c gunicorn.conf.py src.wsgi:app
+
+Todos los valores salen de src/config.py (variables RUTEALO_*).
+"""
+
+from src.config import (
+    WSGI_BIND,
+    WSGI_WORKERS,
+    WSGI_THREADS,
+    WSGI_MAX_REQUESTS,
+    WSGI_MAX_REQUESTS_JITTER,
+    WSGI_TIMEOUT,
+    WSGI_GRACEFUL_TIMEOUT,
+    WSGI_PRELOAD,
+)
+
+bind = WSGI_BIND
+workers = WSGI_WORKERS
+# gthread: cada worker atiende WSGI_THREADS peticiones a la vez (E/S con Gemini, Whisper y MongoDB)
+worker_class = "gthread"
+threads = WSGI_THREADS
+max_requests = WSGI_MAX_REQUESTS
+max_requests_jitter = WSGI_MAX_REQUESTS_JITTER
+timeout = WSGI_TIMEOUT
+graceful_timeout = WSGI_GRACEFUL_TIMEOUT
+keepalive = 5
+preload_app = WSGI_PRELOAD
+
+
+def post_fork(server, worker):
+    """Con preload_app el worker hereda el estado del maestro: se descarta el MongoClient."""
+    if server.cfg.preload_app:
+        from src.wsgi import reiniciar_tras_fork
+
+        reiniciar_tras_fork()
@@ -0,0 +1,277 @@
+"""
+Control de admisión para los endpoints que generan rutas.
+
+/crear-ruta, /upload y /ruta/<id>/regenerar-test ejecutan el pipeline
+completo (etiquetado Bloom, examen inicial y ruta) con varias llamadas al
+modelo. Un doble clic o un estudiante que insiste no debe poder lanzar
+varias generaciones a la vez ni dejar sin hilos al resto.
+
+- Por usuario: como mucho ADMISION_MAX_POR_USUARIO generaciones en curso,
+  contadas en MongoDB (`admision_trabajos`) para que valga entre procesos.
+  Cada turno es un documento `{_id: "usuario:n", token, expira}`; el _id
+  único hace la reserva atómica y `expira` libera el turno si el proceso
+  muere a mitad (además del índice TTL). Sin turno libre: 429 inmediato.
+- Por proceso: como mucho ADMISION_MAX_GLOBAL generaciones en curso; las
+  siguientes esperan en una cola FIFO de ADMISION_MAX_COLA puestos. Con la
+  cola llena, o tras ADMISION_ESPERA_MAX_S en ella, 429.
+
+Los 429 llevan `Retry-After` estimado con la duración media de las
+generaciones y la profundidad de la cola. Las métricas (en curso, en cola,
+máximo de cola, admitidas, rechazos por motivo, esperas) se acumulan por
+proceso en estadisticas_admision().
+"""
+
+import math
+import time
+import uuid
+import datetime
+import logging
+import threading
+from collections import Counter, deque
+from functools import wraps
+from flask import session
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from src.config import (
+    COLS,
+    ADMISION_MAX_GLOBAL,
+    ADMISION_MAX_POR_USUARIO,
+    ADMISION_MAX_COLA,
+    ADMISION_ESPERA_MAX_S,
+    ADMISION_LEASE_S,
+)
+
+logger = logging.getLogger(__name__)
+
+COL_ADMISION = COLS["ADMISION"]
+
+# Duración supuesta de una generación hasta medir la primera, y peso de cada medida nueva
+DURACION_INICIAL_S = 20.0
+PESO_EWMA = 0.2
+
+MENSAJES_RECHAZO = {
+    "usuario": "Ya tienes una generación en curso. Espera a que termine antes de iniciar otra.",
+    "cola": "El servidor está generando muchas rutas en este momento. Inténtalo de nuevo en unos segundos.",
+    "espera": "El servidor está generando muchas rutas en este momento. Inténtalo de nuevo en unos segundos.",
+}
+
+
+def asegurar_indices(db):
+    """TTL sobre `expira`: borra los turnos de procesos que murieron sin liberarlos."""
+    db[COL_ADMISION].create_index([("expira", ASCENDING)], expireAfterSeconds=0)
+
+
+class AdmisionRechazada(Exception):
+    """La petición no se admite; `motivo` es "usuario", "cola" o "espera"."""
+
+    def __init__(self, motivo, reintentar_en):
+        super().__init__(MENSAJES_RECHAZO[motivo])
+        self.motivo = motivo
+        self.reintentar_en = reintentar_en
+
+
+class ControlAdmision:
+    """
+    Límite de generaciones simultáneas por usuario (MongoDB) y por proceso (cola FIFO).
+
+    Uso:
+        with control.turno(usuario, db):
+            generar_ruta_aprendizaje(usuario, db)
+    """
+
+    def __init__(self, max_global=ADMISION_MAX_GLOBAL, max_por_usuario=ADMISION_MAX_POR_USUARIO,
+                 max_cola=ADMISION_MAX_COLA, espera_max_s=ADMISION_ESPERA_MAX_S, lease_s=ADMISION_LEASE_S):
+        self.max_global = max_global
+        self.max_por_usuario = max_por_usuario
+        self.max_cola = max_cola
+        self.espera_max_s = espera_max_s
+        self.lease_s = lease_s
+        self._condicion = threading.Condition()
+        self._cola = deque()
+        self._en_ejecucion = 0
+        self._max_cola_observada = 0
+        self._duracion_media = DURACION_INICIAL_S
+        self._estadisticas = Counter()
+
+    # --- Turnos por usuario (entre procesos) ---
+
+    def _reservar_usuario(self, usuario, db):
+        """Reserva uno de los turnos del usuario; retorna (_id, token) o None si están todos ocupados."""
+        coleccion = db[COL_ADMISION]
+        token = uuid.uuid4().hex
+        for n in range(self.max_por_usuario):
+            clave = f"{usuario}:{n}"
+            for _ in range(2):
+                ahora = datetime.datetime.utcnow()
+                try:
+                    coleccion.insert_one({
+                        "_id": clave,
+                        "token": token,
+                        "expira": ahora + datetime.timedelta(seconds=self.lease_s),
+                    })
+                    return clave, token
+                except DuplicateKeyError:
+                    # Ocupado: solo se reintenta si el turno ya venció (proceso caído)
+                    if not coleccion.delete_one({"_id": clave, "expira": {"$lt": ahora}}).deleted_count:
+                        break
+        return None
+
+    def _liberar_usuario(self, reserva, db):
+        clave, token = reserva
+        try:
+            db[COL_ADMISION].delete_one({"_id": clave, "token": token})
+        except PyMongoError as e:
+            # El turno vence solo (lease_s / índice TTL)
+            logger.warning(f"⚠️ No se pudo liberar el turno {clave}: {e}")
+
+    # --- Cola del proceso ---
+
+    def _reintentar_en(self, en_cola):
+        """Segundos estimados hasta que haya sitio con `en_cola` peticiones por delante."""
+        return max(1, math.ceil(self._duracion_media * (en_cola + 1) / max(self.max_global, 1)))
+
+    def _entrar(self):
+        """Ocupa un puesto de ejecución, esperando en la cola; retorna los segundos de espera."""
+        with self._condicion:
+            if self._en_ejecucion < self.max_global and not self._cola:
+                self._en_ejecucion += 1
+                return 0.0
+            if len(self._cola) >= self.max_cola:
+                self._estadisticas["rechazados_cola"] += 1
+                raise AdmisionRechazada("cola", self._reintentar_en(len(self._cola)))
+
+            ticket = object()
+            self._cola.append(ticket)
+            self._max_cola_observada = max(self._max_cola_observada, len(self._cola))
+            inicio = time.monotonic()
+            limite = inicio + self.espera_max_s
+            while self._cola[0] is not ticket or self._en_ejecucion >= self.max_global:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._cola.remove(ticket)
+                    self._condicion.notify_all()
+                    self._estadisticas["rechazados_espera"] += 1
+                    raise AdmisionRechazada("espera", self._reintentar_en(len(self._cola)))
+                self._condicion.wait(restante)
+            self._cola.popleft()
+            self._en_ejecucion += 1
+            # El siguiente de la cola puede entrar si aún queda sitio
+            self._condicion.notify_all()
+            return time.monotonic() - inicio
+
+    def _salir(self, duracion):
+        with self._condicion:
+            self._en_ejecucion -= 1
+            self._duracion_media += PESO_EWMA * (duracion - self._duracion_media)
+            self._condicion.notify_all()
+
+    def turno(self, usuario, db):
+        """Context manager que admite la petición o lanza AdmisionRechazada."""
+        return _Turno(self, usuario, db)
+
+    def estadisticas(self):
+        """Estado y contadores de este proceso."""
+        with self._condicion:
+            datos = {clave: 0 for clave in ("admitidos", "rechazados_usuario", "rechazados_cola", "rechazados_espera")}
+            datos.update(self._estadisticas)
+            admitidos = datos.get("admitidos", 0)
+            datos.update({
+                "en_ejecucion": self._en_ejecucion,
+                "en_cola": len(self._cola),
+                "max_cola_observada": self._max_cola_observada,
+                "espera_media_s": round(datos.pop("espera_total_s", 0.0) / admitidos, 3) if admitidos else 0.0,
+                "duracion_media_s": round(self._duracion_media, 3),
+                "max_global": self.max_global,
+                "max_por_usuario": self.max_por_usuario,
+                "max_cola": self.max_cola,
+            })
+        return datos
+
+    def reiniciar_estadisticas(self):
+        with self._condicion:
+            self._estadisticas.clear()
+            self._max_cola_observada = len(self._cola)
+
+
+class _Turno:
+    def __init__(self, control, usuario, db):
+        self.control = control
+        self.usuario = usuario
+        self.db = db
+        self.reserva = None
+        self.inicio = None
+
+    def __enter__(self):
+        control = self.control
+        try:
+            self.reserva = control._reservar_usuario(self.usuario, self.db)
+        except PyMongoError as e:
+            # Sin MongoDB no se puede contar por usuario; sigue valiendo el límite del proceso
+            logger.warning(f"⚠️ Control de admisión por usuario no disponible: {e}")
+        else:
+            if self.reserva is None:
+                with control._condicion:
+                    control._estadisticas["rechazados_usuario"] += 1
+                logger.info(f"🚦 Generación rechazada para {self.usuario}: ya tiene una en curso")
+                raise AdmisionRechazada("usuario", control._reintentar_en(0))
+
+        try:
+            espera = control._entrar()
+        except AdmisionRechazada as e:
+            if self.reserva:
+                control._liberar_usuario(self.reserva, self.db)
+            logger.warning(f"🚦 Generación rechazada para {self.usuario} ({e.motivo}); reintentar en {e.reintentar_en}s")
+            raise
+
+        with control._condicion:
+            control._estadisticas["admitidos"] += 1
+            control._estadisticas["espera_total_s"] += espera
+        self.inicio = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.control._salir(time.monotonic() - self.inicio)
+        if self.reserva:
+            self.control._liberar_usuario(self.reserva, self.db)
+        return False
+
+
+# Control compartido por las rutas de este proceso
+control = ControlAdmision()
+
+
+def estadisticas_admision():
+    return control.estadisticas()
+
+
+def reiniciar_estadisticas_admision():
+    control.reiniciar_estadisticas()
+
+
+def con_admision(db, al_rechazar=None):
+    """
+    Decorador de rutas Flask: ejecuta la vista dentro de un turno de `control`.
+
+    Sin usuario en la sesión la vista se ejecuta tal cual (ella responde el 401).
+    Al rechazar responde `{"error", "reintentar_en"}` con 429 y Retry-After, o
+    lo que retorne `al_rechazar(rechazo)` si se indica.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            usuario = session.get("usuario")
+            if not usuario:
+                return vista(*args, **kwargs)
+            try:
+                with control.turno(usuario, db):
+                    return vista(*args, **kwargs)
+            except AdmisionRechazada as rechazo:
+                if al_rechazar is not None:
+                    return al_rechazar(rechazo)
+                return (
+                    {"error": str(rechazo), "reintentar_en": rechazo.reintentar_en},
+                    429,
+                    {"Retry-After": str(rechazo.reintentar_en)},
+                )
+        return envoltura
+    return decorador
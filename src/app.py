@@ -1,6 +1,8 @@
 import os
 import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+import json
+import threading
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import BadRequest
@@ -10,21 +12,46 @@ from bson.objectid import ObjectId
 # recomendada (por ejemplo `python -m src.app`) o `flask run`.
 # No se incluye aquí un parche runtime que modifique `sys.path`.
 
-from src.config import COLS, RAW_DIR, SECRET_KEY, DEBUG
+from src.config import COLS, RAW_DIR, SECRET_KEY, DEBUG, DOCENTES, AUDIO_MAX_MB, METRICAS_TOKEN
 from src.logging_config import setup_logging, get_logger
-from src.database import get_database_connection
+from src.database import LazyDatabase
 from src.web_utils import (
-    get_db,
     procesar_archivo_web,
     auto_etiquetar_bloom,
     generar_ruta_aprendizaje,
     procesar_multiples_archivos_web,
     obtener_rutas_usuario,
+    obtener_datos_dashboard,
+    obtener_resumen_ruta,
+    obtener_resumen_ruta_activa,
+    ruta_para_estado,
+    obtener_nivel_ruta,
+    resumen_perfil_zdp,
+    cargar_marcos_pedagogicos,
+    finalizar_examenes_iniciales,
+    evaluar_examenes_iniciales_lote,
+    MAX_ENTREGAS_LOTE,
+    PARTES_NIVEL,
+    LIMITE_NIVEL_DEFECTO,
 )
 from src.models.evaluacion_zdp import (
     evaluar_examen_simple as procesar_respuesta_examen_web,
     obtener_perfil_zdp as obtener_perfil_estudiante_zdp,
 )
+from src.models.analitica_cohortes import obtener_analitica, listar_cohortes, normalizar_cohorte, asignar_cohorte
+from src.models.diagnostico_adaptativo import iniciar_diagnostico, responder_diagnostico
+from src.models.historial_evaluaciones import asegurar_colecciones
+from src.models.chatbot_tutor import invalidar_contexto_tutor, precargar_tutor
+from src.models.sesiones_chat import asegurar_indices as asegurar_indices_chat
+from src.models.indice_tutor import asegurar_indices as asegurar_indices_recuperacion, indexar_ruta
+from src.models.cache_respuestas import (
+    asegurar_indices as asegurar_indices_respuestas,
+    estadisticas_cache_respuestas,
+)
+from src.transcripcion import transcribir, ErrorTranscripcion
+from src.respuestas_http import responder_json, estadisticas_respuestas
+from src.admision import con_admision, estadisticas_admision, asegurar_indices as asegurar_indices_admision
+from src.metricas import instalar_metricas, exponer_metricas, TIPO_CONTENIDO as TIPO_METRICAS
 from src.utils import validate_username, validate_password_strength, crear_carpeta_usuario, listar_archivos_usuario, obtener_ruta_archivo
 
 # Configurar logging
@@ -34,21 +61,63 @@ logger = get_logger(__name__)
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
+# Latencia, comandos de MongoDB, tiempo del modelo y bytes por petición (GET /metrics)
+instalar_metricas(app)
 
 # Configurar carpeta de subidas temporal
 UPLOAD_FOLDER = RAW_DIR / "uploads"
 UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
-# Inicializar conexión a base de datos
-try:
-    db_connection = get_database_connection()
-    logger.info("Database connection initialized")
-except Exception as e:
-    logger.error(f"Failed to initialize database: {str(e)}")
-    raise
+# Base de datos perezosa: la conexión se abre en la primera consulta de cada proceso,
+# así los workers de un servidor pre-fork (src/wsgi.py) no comparten el MongoClient
+db = LazyDatabase()
+
+_app_preparada = False
+_lock_preparacion = threading.Lock()
+
+
+def crear_app():
+    """
+    Fábrica WSGI: prepara una vez por proceso lo que las rutas necesitan y retorna la app.
+
+    Precarga los marcos pedagógicos y crea colecciones e índices. La conexión
+    a MongoDB que se abra aquí se descarta sola en los procesos hijos.
+    """
+    global _app_preparada
+    with _lock_preparacion:
+        if _app_preparada:
+            return app
+
+        # Cargar una sola vez los marcos pedagógicos precompilados (evita pandas en la ruta caliente)
+        try:
+            cargar_marcos_pedagogicos()
+        except Exception as e:
+            logger.warning(f"No se pudieron precargar los marcos pedagógicos: {e}")
+
+        # Historial de evaluaciones: resumen time-series + detalle con TTL
+        try:
+            asegurar_colecciones(db)
+        except Exception as e:
+            logger.warning(f"No se pudieron preparar las colecciones del historial de evaluaciones: {e}")
+
+        # Tutor: conversaciones que expiran por inactividad, índice de recuperación y caché de respuestas
+        try:
+            asegurar_indices_chat(db)
+            asegurar_indices_recuperacion(db)
+            asegurar_indices_respuestas(db)
+        except Exception as e:
+            logger.warning(f"No se pudieron preparar los índices del tutor: {e}")
+
+        # Turnos de generación por usuario que vencen si el proceso muere
+        try:
+            asegurar_indices_admision(db)
+        except Exception as e:
+            logger.warning(f"No se pudieron preparar los índices del control de admisión: {e}")
 
-db = get_db()
+        _app_preparada = True
+        logger.info("Aplicación preparada")
+    return app
 
 
 @app.route("/dump", methods=["GET", "POST"])
@@ -146,6 +215,7 @@ def register():
         # Obtener preferencias
         tiempo_diario = request.form.get("tiempo_diario", "").strip()
         dia_descanso = request.form.get("dia_descanso", "").strip()
+        cohorte = request.form.get("cohorte", "")
         
         # Validar términos
         terms = request.form.get("terms")
@@ -200,6 +270,13 @@ def register():
             flash("Debe seleccionar un día de descanso", "danger")
             return redirect(url_for("register"))
 
+        # Validar cohorte (opcional)
+        try:
+            cohorte = normalizar_cohorte(cohorte)
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for("register"))
+
         # Verificar si el usuario ya existe
         if db[COLS["PERFIL"]].find_one({"usuario": usuario}):
             flash("El usuario ya existe", "danger")
@@ -236,6 +313,8 @@ def register():
                 "archivos_subidos": 0,
                 "fecha_registro": datetime.now(timezone.utc),
             }
+            if cohorte:
+                user_doc["cohorte"] = cohorte
             
             db[COLS["PERFIL"]].insert_one(user_doc)
             flash("Registro exitoso. Por favor inicia sesión.", "success")
@@ -306,7 +385,13 @@ def dashboard():
     return render_template("dashboard.html", usuario=session["usuario"], nombre=session["nombre"], archivos=docs)
 
 
+def _carga_rechazada(rechazo):
+    flash(f"{rechazo} (reintenta en {rechazo.reintentar_en} s)", "warning")
+    return redirect(url_for("dashboard"))
+
+
 @app.route("/upload", methods=["POST"])
+@con_admision(db, al_rechazar=_carga_rechazada)
 def upload_file():
     if "usuario" not in session:
         return redirect(url_for("login"))
@@ -444,23 +529,27 @@ def estado_ruta():
     # Perfil ZDP
     perfil = obtener_perfil_estudiante_zdp(usuario)
 
-    # Examen inicial
-    exam_doc = db[COLS["EXAM_INI"]].find_one({"usuario": usuario})
+    # Examen inicial (solo su estado)
+    exam_doc = db[COLS["EXAM_INI"]].find_one({"usuario": usuario}, {"estado": 1, "fecha_generacion": 1})
     examen_pendiente = not exam_doc or exam_doc.get("estado") != "COMPLETADO"
 
-    # Ruta
-    ruta_doc = db[COLS["RUTAS"]].find_one({"usuario": usuario}) or {}
+    # Ruta más reciente: conteos por nivel (el contenido se pide por /ruta/<id>/nivel/<nivel>)
+    ruta_doc = obtener_resumen_ruta_activa(db, usuario) or {}
 
-    return {
+    exam_doc = exam_doc or {}
+    version = (
+        "ruta/estado", usuario, perfil,
+        exam_doc.get("estado"), exam_doc.get("fecha_generacion"),
+        ruta_doc.get("_id"), ruta_doc.get("fecha_actualizacion"),
+        (ruta_doc.get("metadatos_ruta") or {}).get("fecha_evaluacion_zdp"),
+    )
+    return responder_json({
         "usuario": usuario,
         "examen_pendiente": examen_pendiente,
         "examen_generado": bool(exam_doc),
         "perfil_zdp": perfil,
-        "ruta": {
-            "estructura": ruta_doc.get("estructura_ruta"),
-            "metadatos": ruta_doc.get("metadatos_ruta"),
-        },
-    }, 200
+        "ruta": ruta_para_estado(ruta_doc),
+    }, version)
 
 
 @app.route("/ruta/<ruta_id>/contenido")
@@ -477,8 +566,8 @@ def obtener_contenido_ruta(ruta_id):
     except Exception:
         return {"error": "ID de ruta inválido"}, 400
 
-    # Buscar ruta y verificar ownership
-    ruta_doc = db[COLS["RUTAS"]].find_one({"_id": ruta_obj_id, "usuario": usuario})
+    # Buscar ruta y verificar ownership (sin flashcards ni tests: se piden por nivel)
+    ruta_doc = obtener_resumen_ruta(db, ruta_obj_id, usuario)
     if not ruta_doc:
         return {"error": "Ruta no encontrada"}, 404
 
@@ -495,18 +584,55 @@ def obtener_contenido_ruta(ruta_id):
             "preguntas": len(exam_inicial) if isinstance(exam_inicial, list) else 0,
         }
 
-    return {
+    # Versión: cualquier cambio de la ruta actualiza fecha_actualizacion (o fecha_evaluacion_zdp)
+    version = (
+        "ruta/contenido", usuario, ruta_id, ruta_doc.get("fecha_actualizacion"),
+        (ruta_doc.get("metadatos_ruta") or {}).get("fecha_evaluacion_zdp"), test_info,
+    )
+    return responder_json({
         "ruta_id": str(ruta_doc["_id"]),
         "nombre": ruta_doc.get("nombre_ruta", "Sin nombre"),
         "descripcion": ruta_doc.get("descripcion", ""),
         "estado": ruta_doc.get("estado", "ACTIVA"),
-        "estructura": ruta_doc.get("estructura_ruta"),
+        "tiene_estructura": ruta_doc.get("tiene_estructura", False),
+        "resumen_niveles": ruta_doc.get("resumen_niveles", {}),
         "metadatos": ruta_doc.get("metadatos_ruta"),
         "archivos_fuente": ruta_doc.get("archivos_fuente", []),
         "fecha_creacion": ruta_doc.get("fecha_creacion"),
         "fecha_actualizacion": ruta_doc.get("fecha_actualizacion"),
         "test_inicial": test_info,
-    }, 200
+    }, version)
+
+
+@app.route("/ruta/<ruta_id>/nivel/<nivel>")
+def obtener_nivel_de_ruta(ruta_id, nivel):
+    """
+    Flashcards y tests de un nivel de la ruta, paginados.
+
+    Query: parte (flashcards | examenes; por defecto ambas), offset, limit.
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+
+    try:
+        from bson import ObjectId
+        ruta_obj_id = ObjectId(ruta_id)
+    except Exception:
+        return {"error": "ID de ruta inválido"}, 400
+
+    parte = request.args.get("parte")
+    partes = (parte,) if parte else PARTES_NIVEL
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", LIMITE_NIVEL_DEFECTO, type=int)
+
+    try:
+        contenido = obtener_nivel_ruta(db, ruta_obj_id, session["usuario"], nivel, partes, offset, limit)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if contenido is None:
+        return {"error": "Ruta no encontrada"}, 404
+
+    return {"ruta_id": ruta_id, "nivel": nivel, **contenido}, 200
 
 
 @app.route("/examen-inicial")
@@ -519,12 +645,23 @@ def obtener_examen_inicial():
     if not exam_doc:
         return {"error": "No hay examen generado"}, 404
 
-    return {
+    # Cada examen nuevo reemplaza el documento con otra fecha_generacion
+    version = ("examen-inicial", usuario, exam_doc.get("estado"), exam_doc.get("fecha_generacion"))
+    return responder_json({
         "usuario": usuario,
         "estado": exam_doc.get("estado", "PENDIENTE"),
         "contenido": exam_doc.get("contenido", {}),
         "fecha_generacion": exam_doc.get("fecha_generacion"),
-    }, 200
+    }, version)
+
+
+def _finalizar_examen_inicial(usuario, resultado):
+    """
+    Tareas posteriores a evaluar el examen inicial (completo o adaptativo):
+    marca el examen como completado y actualiza la metadata ZDP de la ruta.
+    """
+    resultado.setdefault("usuario", usuario)
+    finalizar_examenes_iniciales(db, [resultado])
 
 
 @app.route("/examen-inicial/responder", methods=["POST"])
@@ -550,44 +687,117 @@ def responder_examen_inicial():
         status = resultado.get("status", 500)
         return {"error": resultado.get("error", "Error evaluando examen")}, status
 
-    # Marcar examen como completado
+    _finalizar_examen_inicial(usuario, resultado)
+    return {"resultado": resultado}, 200
+
+
+@app.route("/api/docente/examenes/lote", methods=["POST"])
+def responder_examenes_lote():
+    """
+    Envío en lote de hojas de respuesta del examen inicial (aula o sesión
+    sin conexión). Solo docentes.
+
+    Request:
+        { "entregas": [{"usuario": str, "respuestas": [{"pregunta_id", "respuesta", "tiempo_seg"}]}] }
+
+    Response:
+        200: {
+            "resultados": [{"usuario", "estado": "OK"|"ERROR", "resultado"|"error", "status"}],
+            "resumen": {"total", "evaluados", "errores"}
+        }
+        400 | 401 | 403 | 413: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+    if session["usuario"] not in DOCENTES:
+        return {"error": "Acceso restringido a docentes"}, 403
+
+    data = request.get_json(silent=True) or {}
+    entregas = data.get("entregas")
+    if not entregas or not isinstance(entregas, list):
+        return {"error": "Faltan entregas"}, 400
+    if len(entregas) > MAX_ENTREGAS_LOTE:
+        return {"error": f"Demasiadas entregas (máx: {MAX_ENTREGAS_LOTE})"}, 413
+
     try:
-        import datetime
+        return evaluar_examenes_iniciales_lote(db, entregas), 200
+    except Exception as e:
+        logger.error(f"Error evaluando lote de exámenes: {e}")
+        return {"error": "Error evaluando exámenes"}, 500
 
-        db[COLS["EXAM_INI"]].update_one(
-            {"usuario": usuario},
-            {"$set": {"estado": "COMPLETADO", "fecha_completado": datetime.datetime.utcnow()}},
+
+@app.route("/examen-inicial/adaptativo/iniciar", methods=["POST"])
+def iniciar_examen_adaptativo():
+    """
+    Inicia el diagnóstico adaptativo: una pregunta a la vez, elegida según
+    las respuestas previas, hasta que la estimación del nivel converge.
+
+    Una sesión en curso se retoma en la pregunta pendiente.
+
+    Response:
+        200: { "pregunta": {...}, "numero": int, "max_preguntas": int }
+        401 | 404 | 409: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+
+    usuario = session["usuario"]
+    exam_doc = db[COLS["EXAM_INI"]].find_one({"usuario": usuario})
+    if not exam_doc:
+        return {"error": "No hay examen inicial generado"}, 404
+    if exam_doc.get("estado") == "COMPLETADO":
+        return {"error": "El examen inicial ya fue completado"}, 409
+
+    try:
+        respuesta = iniciar_diagnostico(
+            db,
+            usuario,
+            exam_doc.get("contenido", {}),
+            exam_doc.get("huellas_contenido"),
+            exam_doc.get("fecha_generacion"),
         )
     except Exception as e:
-        logger.error(f"No se pudo marcar examen como completado para {usuario}: {e}")
-    
-    # NUEVO: Actualizar metadata de ruta con información ZDP
+        logger.error(f"Error iniciando diagnóstico adaptativo para {usuario}: {e}")
+        return {"error": "Error iniciando diagnóstico"}, 500
+
+    if respuesta.get("error"):
+        return {"error": respuesta["error"]}, respuesta.get("status", 500)
+    return respuesta, 200
+
+
+@app.route("/examen-inicial/adaptativo/responder", methods=["POST"])
+def responder_examen_adaptativo():
+    """
+    Registra la respuesta a la pregunta actual del diagnóstico adaptativo.
+
+    Request JSON: { "pregunta_id": int, "respuesta": "a", "tiempo_seg": 30 }
+
+    Response:
+        200: { "completado": false, "pregunta": {...}, "numero": int, "progreso": {...} }
+             o { "completado": true, "resultado": {...} }
+        400 | 401 | 404 | 409: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+
+    usuario = session["usuario"]
+    data = request.get_json(silent=True) or {}
+    if "pregunta_id" not in data or "respuesta" not in data:
+        return {"error": "Faltan pregunta_id o respuesta"}, 400
+
     try:
-        # Extraer niveles competentes del resultado
-        competentes = [
-            nivel for nivel, datos in resultado.get("resumen_por_nivel", {}).items()
-            if datos.get("competente", False)
-        ]
-        
-        zona_proxima = resultado.get("zona_proxima", [])
-        
-        # Actualizar metadata de la ruta del usuario
-        db[COLS["RUTAS"]].update_one(
-            {"usuario": usuario},
-            {
-                "$set": {
-                    "metadatos_ruta.niveles_competentes": competentes,
-                    "metadatos_ruta.zona_proxima": zona_proxima,
-                    "metadatos_ruta.personalizada_zdp": True,
-                    "metadatos_ruta.fecha_evaluacion_zdp": datetime.datetime.utcnow()
-                }
-            }
+        respuesta = responder_diagnostico(
+            db, usuario, data["pregunta_id"], data["respuesta"], data.get("tiempo_seg", 0)
         )
-        logger.info(f"✅ Metadata ZDP actualizada para {usuario}: competentes={competentes}, ZDP={zona_proxima}")
     except Exception as e:
-        logger.error(f"⚠️ No se pudo actualizar metadata ZDP en ruta: {e}")
+        logger.error(f"Error en diagnóstico adaptativo para {usuario}: {e}")
+        return {"error": "Error procesando respuesta"}, 500
 
-    return {"resultado": resultado}, 200
+    if respuesta.get("error"):
+        return {"error": respuesta["error"]}, respuesta.get("status", 500)
+    if respuesta["completado"]:
+        _finalizar_examen_inicial(usuario, respuesta["resultado"])
+    return respuesta, 200
 
 
 # --- NUEVOS ENDPOINTS PARA REDISEÑO DASHBOARD ---
@@ -614,44 +824,146 @@ def obtener_perfil_zdp_api():
     usuario = session["usuario"]
     
     try:
-        perfil = obtener_perfil_estudiante_zdp(usuario)
-        
-        # Si no hay evaluación previa, retornar vacío
-        if not perfil or perfil.get("estado") == "Sin evaluación realizada":
-            return {
-                "nivel_actual": None,
-                "zona_proxima": [],
-                "niveles_competentes": [],
-                "brechas": [],
-                "puntaje_total": 0
-            }, 200
-        
-        # Extraer niveles competentes (>= 70%)
-        competentes = [
-            nivel for nivel, datos in perfil.get("competencias", {}).items()
-            if datos.get("competente", False)
-        ]
-        
-        # Extraer brechas (< 70%)
-        brechas = [
-            nivel for nivel, datos in perfil.get("competencias", {}).items()
-            if not datos.get("competente", False)
-        ]
-        
-        return {
-            "nivel_actual": perfil.get("nivel_actual"),
-            "zona_proxima": perfil.get("zona_proxima", []),
-            "niveles_competentes": competentes,
-            "brechas": brechas,
-            "puntaje_total": perfil.get("puntaje", 0),
-            "recomendaciones": perfil.get("recomendaciones", [])
-        }, 200
+        return responder_json(resumen_perfil_zdp(obtener_perfil_estudiante_zdp(usuario)))
     
     except Exception as e:
         logger.error(f"Error obteniendo perfil ZDP para {usuario}: {e}")
         return {"error": "Error obteniendo perfil ZDP"}, 500
 
 
+@app.route("/api/analitica/cohortes")
+def listar_analitica_cohortes():
+    """
+    Lista las cohortes con analítica materializada (solo docentes).
+
+    Response:
+        200: { "cohortes": [{"cohorte": str, "estudiantes": int}] }
+        401 | 403: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+    if session["usuario"] not in DOCENTES:
+        return {"error": "Acceso restringido a docentes"}, 403
+
+    try:
+        return {"cohortes": listar_cohortes(db)}, 200
+    except Exception as e:
+        logger.error(f"Error listando analítica de cohortes: {e}")
+        return {"error": "Error obteniendo analítica"}, 500
+
+
+@app.route("/api/docente/cohortes/<usuario>", methods=["PUT"])
+def asignar_cohorte_estudiante(usuario):
+    """
+    Asigna la cohorte de un estudiante (solo docentes).
+
+    Mueve su aporte a la analítica de la cohorte nueva.
+
+    Request JSON:
+        { "cohorte": str | null }   (null o "" quita la cohorte)
+
+    Response:
+        200: { "usuario": str, "cohorte_anterior": str | null, "cohorte": str | null }
+        400 | 401 | 403 | 404: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+    if session["usuario"] not in DOCENTES:
+        return {"error": "Acceso restringido a docentes"}, 403
+
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict) or "cohorte" not in datos:
+        return {"error": "Falta el campo cohorte"}, 400
+    if datos["cohorte"] is not None and not isinstance(datos["cohorte"], str):
+        return {"error": "cohorte debe ser texto o null"}, 400
+    try:
+        cohorte = normalizar_cohorte(datos["cohorte"])
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    try:
+        cambio = asignar_cohorte(db, usuario, cohorte)
+    except Exception as e:
+        logger.error(f"Error asignando cohorte a {usuario}: {e}")
+        return {"error": "Error asignando cohorte"}, 500
+
+    if cambio is None:
+        return {"error": "Usuario no encontrado"}, 404
+    return {"usuario": usuario, **cambio}, 200
+
+
+@app.route("/api/analitica/cohortes/<cohorte>")
+def obtener_analitica_cohorte(cohorte):
+    """
+    Distribución de competencias ZDP de una cohorte ("_global" para todas).
+
+    Lee un único documento precalculado: el tiempo de respuesta no depende
+    del número de estudiantes.
+
+    Response:
+        200: {
+            "cohorte": str,
+            "estudiantes": int,
+            "promedio_puntaje": float,
+            "por_nivel": {nivel: {"evaluados", "competentes", "porcentaje_competentes"}},
+            "nivel_actual": {nivel: int},
+            "zona_proxima": {"A+B": int},
+            "zona_proxima_mas_comun": [str]
+        }
+        401 | 403 | 404: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+    if session["usuario"] not in DOCENTES:
+        return {"error": "Acceso restringido a docentes"}, 403
+
+    try:
+        analitica = obtener_analitica(db, cohorte)
+    except Exception as e:
+        logger.error(f"Error obteniendo analítica de {cohorte}: {e}")
+        return {"error": "Error obteniendo analítica"}, 500
+
+    if not analitica:
+        return {"error": "Cohorte sin evaluaciones"}, 404
+    analitica["fecha_actualizacion"] = (
+        analitica["fecha_actualizacion"].isoformat() if analitica["fecha_actualizacion"] else None
+    )
+    return analitica, 200
+
+
+@app.route("/api/dashboard/bootstrap")
+def bootstrap_dashboard():
+    """
+    Datos iniciales del dashboard en una sola petición.
+
+    Reúne lo que devuelven /rutas/lista, /api/perfil-zdp, /ruta/estado,
+    /examen-inicial y /files, compartiendo las consultas de ruta, examen y
+    perfil (ver web_utils.obtener_datos_dashboard).
+
+    Response:
+        200: {
+            "usuario": str,
+            "rutas": [...],
+            "perfil_zdp": {...},        # formato de /api/perfil-zdp
+            "estado": {...},            # formato de /ruta/estado
+            "examen_inicial": {...} | null,  # "contenido" solo si está pendiente
+            "archivos": [...]
+        }
+        401: { "error": "Unauthorized" }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+
+    usuario = session["usuario"]
+
+    try:
+        datos = obtener_datos_dashboard(usuario, db, str(app.config["UPLOAD_FOLDER"]))
+        return {"usuario": usuario, **datos}, 200
+    except Exception as e:
+        logger.error(f"Error armando dashboard para {usuario}: {e}")
+        return {"error": "Error cargando el dashboard"}, 500
+
+
 @app.route("/rutas/lista", methods=["GET"])
 def listar_rutas():
     """
@@ -669,10 +981,10 @@ def listar_rutas():
     try:
         rutas = obtener_rutas_usuario(usuario, db)
         
-        return {
+        return responder_json({
             "rutas": rutas,
             "total": len(rutas)
-        }, 200
+        })
     
     except Exception as e:
         logger.error(f"Error listando rutas para {usuario}: {e}")
@@ -680,6 +992,7 @@ def listar_rutas():
 
 
 @app.route("/crear-ruta", methods=["POST"])
+@con_admision(db)
 def crear_ruta():
     """
     Crea una nueva ruta de aprendizaje con múltiples archivos.
@@ -693,6 +1006,7 @@ def crear_ruta():
         201: { "ruta_id": "...", "nombre_ruta": "...", "estado": "...", "mensaje": "..." }
         400: { "error": "..." }
         409: { "error": "Nombre ya existe" }
+        429: { "error": "...", "reintentar_en": int } + Retry-After (ver src/admision.py)
     """
     if "usuario" not in session:
         return {"error": "Unauthorized"}, 401
@@ -841,6 +1155,7 @@ def crear_ruta():
             ruta_doc,
             upsert=True
         )
+        invalidar_contexto_tutor(usuario)
         
         # Obtener ruta_id
         if resultado.upserted_id:
@@ -939,6 +1254,7 @@ def actualizar_ruta(ruta_id):
         
         if result.matched_count == 0:
             return {"error": "Ruta no encontrada"}, 404
+        invalidar_contexto_tutor(usuario, ruta_id)
         
         return {
             "mensaje": "Ruta actualizada exitosamente",
@@ -979,6 +1295,8 @@ def eliminar_ruta(ruta_id):
         
         if result.deleted_count == 0:
             return {"error": "Ruta no encontrada"}, 404
+        invalidar_contexto_tutor(usuario, ruta_id)
+        indexar_ruta(db, usuario, ruta={})
         
         return {
             "mensaje": "Ruta eliminada exitosamente"
@@ -990,6 +1308,7 @@ def eliminar_ruta(ruta_id):
 
 
 @app.route("/ruta/<ruta_id>/regenerar-test", methods=["POST"])
+@con_admision(db)
 def regenerar_test_ruta(ruta_id):
     """Regenera el test diagnóstico de una ruta con las nuevas preguntas basadas en contenido"""
     if "usuario" not in session:
@@ -1068,10 +1387,13 @@ def shutdown_database(exception=None):
 @app.route('/api/transcribir-audio', methods=['POST'])
 def transcribir_audio():
     """
-    Transcribe audio a texto usando OpenAI Whisper API.
+    Transcribe audio a texto (OpenAI Whisper por defecto).
     Soporta 3 idiomas: Español (es), Inglés (en), Quechua (qu)
+
+    El audio se pasa a mono, se recortan los silencios y las grabaciones
+    largas se transcriben en trozos paralelos (ver src/transcripcion.py).
     """
-    if 'user' not in session:
+    if 'usuario' not in session:
         return jsonify({"error": "No autenticado"}), 401
     
     try:
@@ -1085,132 +1407,295 @@ def transcribir_audio():
         if audio_file.filename == '':
             return jsonify({"error": "Archivo vacío"}), 400
         
-        # Validar tamaño (max 10MB)
+        # Validar tamaño
         audio_file.seek(0, 2)  # Ir al final
         size = audio_file.tell()
         audio_file.seek(0)  # Volver al inicio
         
-        if size > 10 * 1024 * 1024:
-            return jsonify({"error": "Archivo muy grande (máximo 10MB)"}), 413
+        if size > AUDIO_MAX_MB * 1024 * 1024:
+            return jsonify({"error": f"Archivo muy grande (máximo {AUDIO_MAX_MB:g}MB)"}), 413
         
-        # Importar OpenAI solo si se usa el endpoint
         try:
-            from openai import OpenAI
-        except ImportError:
-            return jsonify({
-                "error": "OpenAI no está instalado. Ejecuta: pip install openai>=1.0.0"
-            }), 500
-        
-        # Mapear idiomas a códigos Whisper
-        idioma_map = {
-            'es': 'es',  # Español
-            'en': 'en',  # Inglés
-            'qu': 'qu'   # Quechua
-        }
-        
-        codigo_idioma = idioma_map.get(idioma, 'es')
-        
-        # Obtener API key de OpenAI
-        openai_key = os.getenv('OPENAI_API_KEY')
-        if not openai_key:
-            return jsonify({
-                "error": "OPENAI_API_KEY no configurada."
-            }), 500
-        
-        # Transcribir con Whisper
-        client = OpenAI(api_key=openai_key)
-        
-        try:
-            transcription = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                language=codigo_idioma
-            )
-            
-            logger.info(f"Audio transcrito ({idioma}): {transcription.text[:100]}...")
-            
-            return jsonify({
-                "texto": transcription.text,
-                "idioma_detectado": idioma,
-                "exito": True
-            })
-        
+            resultado = transcribir(audio_file.read(), audio_file.filename, idioma)
+        except ErrorTranscripcion as e:
+            return jsonify({"error": str(e)}), 500
         except Exception as whisper_error:
             logger.error(f"Error en Whisper API: {whisper_error}")
             return jsonify({
                 "error": f"Error transcribiendo audio: {str(whisper_error)}"
             }), 500
         
+        logger.info(
+            f"Audio transcrito ({idioma}, {resultado['trozos']} trozos, "
+            f"{resultado['bytes_recibidos']}B -> {resultado['bytes_enviados']}B): {resultado['texto'][:100]}..."
+        )
+        
+        return jsonify({
+            "texto": resultado["texto"],
+            "idioma_detectado": idioma,
+            "exito": True
+        })
+        
     except Exception as e:
         logger.error(f"Error en transcripción de audio: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+ERRORES_CONTEXTO_CHATBOT = {
+    'es': "No pude cargar el contexto de tu ruta. Verifica que la ruta exista.",
+    'en': "I couldn't load your path context. Verify that the path exists.",
+    'qu': "Manan atinichu kargayta ñanniykita. Qawariykuy ñanniyki kasqanta."
+}
+
+
+def leer_peticion_chatbot(data):
+    """
+    Valida el cuerpo JSON de /api/chatbot (lo comparten Flask y src/asgi.py).
+
+    Returns:
+        dict: mensaje, ruta_id, idioma, historial y sesion_id
+
+    Raises:
+        ValueError: Con el mensaje de error para responder 400
+    """
+    data = data or {}
+    mensaje = data.get('mensaje', '').strip()
+    ruta_id = data.get('ruta_id')
+    idioma = data.get('idioma', 'es')
+
+    # Validaciones
+    if not mensaje:
+        raise ValueError("Mensaje vacío")
+
+    if not ruta_id:
+        raise ValueError("No se especificó ruta_id")
+
+    if idioma not in ['es', 'en', 'qu']:
+        raise ValueError("Idioma no soportado. Use: es, en, qu")
+
+    return {
+        "mensaje": mensaje,
+        "ruta_id": ruta_id,
+        "idioma": idioma,
+        "historial": data.get('historial', []),
+        "sesion_id": data.get('sesion_id'),
+    }
+
+
+def respuesta_chatbot(idioma, resultado):
+    """Cuerpo de la respuesta de /api/chatbot a partir de TutorVirtual.conversar(_async)."""
+    return {
+        "respuesta": resultado["respuesta"],
+        "idioma": idioma,
+        "sesion_id": resultado["sesion_id"],
+        "desde_cache": resultado["desde_cache"],
+        "exito": resultado["exito"]
+    }
+
+
 @app.route('/api/chatbot', methods=['POST'])
 def chatbot():
     """
     Chatbot tutor con contexto de ruta en 3 idiomas.
     Usa Google Gemini para generar respuestas pedagógicas.
+
+    La conversación se guarda en el servidor: el cliente envía el `sesion_id`
+    devuelto por la respuesta anterior (sin él se abre una sesión nueva, que
+    puede sembrarse con `historial`).
+
+    Con el servidor ASGI (src/asgi.py) esta ruta la atiende chatbot_async.
     """
-    if 'user' not in session:
+    if 'usuario' not in session:
         return jsonify({"error": "No autenticado"}), 401
     
     try:
-        data = request.json
-        mensaje = data.get('mensaje', '').strip()
-        ruta_id = data.get('ruta_id')
-        idioma = data.get('idioma', 'es')
-        historial = data.get('historial', [])
-        
-        # Validaciones
-        if not mensaje:
-            return jsonify({"error": "Mensaje vacío"}), 400
-        
-        if not ruta_id:
-            return jsonify({"error": "No se especificó ruta_id"}), 400
-        
-        if idioma not in ['es', 'en', 'qu']:
-            return jsonify({"error": "Idioma no soportado. Use: es, en, qu"}), 400
+        try:
+            datos = leer_peticion_chatbot(request.json)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        idioma = datos["idioma"]
         
         # Importar y crear tutor con contexto
         from src.models.chatbot_tutor import TutorVirtual
         
         tutor = TutorVirtual(
-            ruta_id=ruta_id,
-            usuario=session['user'],
+            ruta_id=datos["ruta_id"],
+            usuario=session['usuario'],
             idioma=idioma
         )
         
         # Verificar que se cargó el contexto
         if not tutor.contexto_ruta:
-            errores = {
-                'es': "No pude cargar el contexto de tu ruta. Verifica que la ruta exista.",
-                'en': "I couldn't load your path context. Verify that the path exists.",
-                'qu': "Manan atinichu kargayta ñanniykita. Qawariykuy ñanniyki kasqanta."
-            }
             return jsonify({
-                "respuesta": errores.get(idioma, errores['es']),
+                "respuesta": ERRORES_CONTEXTO_CHATBOT.get(idioma, ERRORES_CONTEXTO_CHATBOT['es']),
                 "idioma": idioma,
                 "exito": False
             })
         
         # Generar respuesta
-        logger.info(f"Chatbot ({idioma}): {mensaje[:100]}...")
-        respuesta = tutor.responder(mensaje, historial)
+        logger.info(f"Chatbot ({idioma}): {datos['mensaje'][:100]}...")
+        resultado = tutor.conversar(datos["mensaje"], sesion_id=datos["sesion_id"], historial=datos["historial"])
         
-        logger.info(f"Respuesta generada ({idioma}): {respuesta[:100]}...")
+        logger.info(f"Respuesta generada ({idioma}): {resultado['respuesta'][:100]}...")
         
-        return jsonify({
-            "respuesta": respuesta,
-            "idioma": idioma,
-            "exito": True
-        })
+        return jsonify(respuesta_chatbot(idioma, resultado))
         
     except Exception as e:
         logger.error(f"Error en chatbot: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+
+@app.route('/api/chatbot/voz', methods=['POST'])
+def chatbot_voz():
+    """
+    Pregunta por voz en una sola petición: transcribe el audio y responde con el tutor.
+
+    El contexto del tutor se carga en segundo plano mientras se transcribe.
+    La respuesta es NDJSON (un objeto JSON por línea), en este orden:
+      {"tipo": "transcripcion", "texto", "idioma"}
+      {"tipo": "fragmento", "texto"} ... (partes de la respuesta del tutor)
+      {"tipo": "fin", "respuesta", "sesion_id", "exito", "desde_cache"}
+
+    Formulario: audio, ruta_id, idioma, sesion_id (opcional) e historial
+    (JSON, opcional, solo para sesiones nuevas).
+    """
+    if 'usuario' not in session:
+        return jsonify({"error": "No autenticado"}), 401
+    
+    try:
+        if 'audio' not in request.files:
+            return jsonify({"error": "No se envió archivo de audio"}), 400
+        
+        audio_file = request.files['audio']
+        ruta_id = request.form.get('ruta_id')
+        idioma = request.form.get('idioma', 'es')
+        sesion_id = request.form.get('sesion_id') or None
+        
+        if audio_file.filename == '':
+            return jsonify({"error": "Archivo vacío"}), 400
+        
+        if not ruta_id:
+            return jsonify({"error": "No se especificó ruta_id"}), 400
+        
+        if idioma not in ['es', 'en', 'qu']:
+            return jsonify({"error": "Idioma no soportado. Use: es, en, qu"}), 400
+        
+        try:
+            historial = json.loads(request.form.get('historial') or '[]')
+        except ValueError:
+            return jsonify({"error": "historial debe ser una lista JSON"}), 400
+        
+        datos = audio_file.read()
+        if len(datos) > AUDIO_MAX_MB * 1024 * 1024:
+            return jsonify({"error": f"Archivo muy grande (máximo {AUDIO_MAX_MB:g}MB)"}), 413
+        
+        # El contexto de la ruta se prepara mientras se transcribe
+        tutor_futuro = precargar_tutor(ruta_id, session['usuario'], idioma)
+        
+        try:
+            texto = transcribir(datos, audio_file.filename, idioma)["texto"]
+        except ErrorTranscripcion as e:
+            return jsonify({"error": str(e)}), 500
+        except Exception as whisper_error:
+            logger.error(f"Error en Whisper API: {whisper_error}")
+            return jsonify({
+                "error": f"Error transcribiendo audio: {str(whisper_error)}"
+            }), 500
+        
+        if not texto:
+            return jsonify({"error": "No se detectó voz en el audio"}), 400
+        
+        tutor = tutor_futuro.result()
+        logger.info(f"Chatbot por voz ({idioma}): {texto[:100]}...")
+        
+        def eventos():
+            yield json.dumps({"tipo": "transcripcion", "texto": texto, "idioma": idioma}, ensure_ascii=False) + "\n"
+            try:
+                for evento in tutor.conversar_stream(texto, sesion_id=sesion_id, historial=historial):
+                    yield json.dumps(evento, ensure_ascii=False) + "\n"
+            except Exception as e:
+                logger.error(f"Error en chatbot por voz: {e}")
+                yield json.dumps({"tipo": "error", "error": str(e)}, ensure_ascii=False) + "\n"
+        
+        return Response(
+            stream_with_context(eventos()),
+            mimetype="application/x-ndjson",
+            # Sin buffer en proxies para que cada parte llegue en cuanto se genera
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        
+    except Exception as e:
+        logger.error(f"Error en chatbot por voz: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/docente/tutor/cache")
+def estadisticas_cache_tutor():
+    """
+    Métricas de la caché de respuestas del tutor en este proceso.
+
+    Response:
+        200: { "aciertos", "fallos", "guardadas", "omitidas", "tasa_aciertos" }
+        401 | 403: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+    if session["usuario"] not in DOCENTES:
+        return {"error": "Acceso restringido a docentes"}, 403
+    return estadisticas_cache_respuestas(), 200
+
+
+@app.route("/api/docente/respuestas")
+def estadisticas_respuestas_http():
+    """
+    Ancho de banda de los endpoints con ETag y compresión en este proceso.
+
+    Response:
+        200: { "respuestas_200", "respuestas_304", "bytes_json", "bytes_enviados",
+               "bytes_ahorrados_304", "bytes_ahorrados", "ahorro", ... }
+        401 | 403: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+    if session["usuario"] not in DOCENTES:
+        return {"error": "Acceso restringido a docentes"}, 403
+    return estadisticas_respuestas(), 200
+
+
+@app.route("/api/docente/admision")
+def estadisticas_admision_api():
+    """
+    Generaciones de ruta en curso, en cola y rechazadas en este proceso.
+
+    Response:
+        200: { "en_ejecucion", "en_cola", "max_cola_observada", "admitidos",
+               "rechazados_usuario", "rechazados_cola", "rechazados_espera",
+               "espera_media_s", "duracion_media_s", ... }
+        401 | 403: { "error": str }
+    """
+    if "usuario" not in session:
+        return {"error": "Unauthorized"}, 401
+    if session["usuario"] not in DOCENTES:
+        return {"error": "Acceso restringido a docentes"}, 403
+    return estadisticas_admision(), 200
+
+
+@app.route("/metrics")
+def metricas_prometheus():
+    """
+    Métricas del proceso en formato de texto de Prometheus (ver src/metricas.py).
+
+    Con RUTEALO_METRICAS_TOKEN definido exige "Authorization: Bearer <token>".
+
+    Response:
+        200: text/plain (formato de exposición 0.0.4)
+        401: { "error": str }
+    """
+    if METRICAS_TOKEN and request.headers.get("Authorization", "") != f"Bearer {METRICAS_TOKEN}":
+        return {"error": "Unauthorized"}, 401
+    return Response(exponer_metricas(), content_type=TIPO_METRICAS)
+
 if __name__ == "__main__":
     # Compute host/port from environment or defaults so we can print the URL explicitly.
     host = os.getenv("FLASK_RUN_HOST", "127.0.0.1")
@@ -1221,8 +1706,11 @@ if __name__ == "__main__":
     logger.info(f"App will be available at {url}")
     # Also print to stdout to make it obvious in simple terminals
     print(f"==> RUTEALO running at {url} (CTRL+C to stop)")
+    # Servidor de desarrollo: para producción usar src/wsgi.py (gunicorn o waitress)
+    logger.info("Servidor de desarrollo; en producción: gunicorn -c gunicorn.conf.py src.wsgi:app")
 
     try:
+        crear_app()
         app.run(debug=DEBUG, port=port, host=host)
     except KeyboardInterrupt:
         logger.info("App interrupted by user")
@@ -0,0 +1,240 @@
+"""
+Punto de entrada asíncrono (ASGI) para las rutas que esperan al modelo.
+
+    uvicorn src.asgi:app --host 0.0.0.0 --port 8000
+    python -m src.asgi
+
+POST /api/chatbot se atiende con chatbot_async: la espera a Gemini
+(send_message_async) y las lecturas y escrituras de la sesión (cliente
+asíncrono de MongoDB, get_async_database) no ocupan un hilo, así que un
+solo proceso sostiene cientos de conversaciones en curso.
+
+El resto de rutas es la misma app Flask (src/app.py) detrás de un puente
+WSGI con ASGI_HILOS_WSGI hilos. /crear-ruta, /upload y
+/ruta/<id>/regenerar-test siguen ahí y siguen siendo síncronas: su pipeline
+de generación no tiene versión asíncrona; solo dejan de compartir hilos con
+el chatbot.
+"""
+
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from werkzeug.wrappers import Request
+
+from src.config import DEBUG, WSGI_BIND, ASGI_HILOS_WSGI
+from src.database import close_async_client
+from src.metricas import iniciar_medicion, finalizar_medicion
+from src.app import crear_app, leer_peticion_chatbot, respuesta_chatbot, ERRORES_CONTEXTO_CHATBOT
+
+logger = logging.getLogger(__name__)
+
+flask_app = crear_app()
+
+if DEBUG:
+    logger.warning("⚠️ DEBUG=True en el servidor de producción; define DEBUG=False en claves.env")
+
+
+class InstanciaPuente(WsgiToAsgiInstance):
+    """
+    Petición WSGI de PuenteWSGI: ejecuta la app Flask en el pool del puente.
+
+    Sobrescribe run_wsgi_app (en asgiref va a un único hilo compartido) con
+    la misma traducción a mensajes ASGI, usando solo build_environ,
+    start_response y sync_send de la clase base.
+    """
+
+    def __init__(self, aplicacion, duplicate_header_limit, pool):
+        super().__init__(aplicacion, duplicate_header_limit)
+        self.pool = pool
+
+    async def run_wsgi_app(self, body):
+        await SyncToAsync(self._ejecutar_wsgi, thread_sensitive=False, executor=self.pool)(body)
+
+    def _ejecutar_wsgi(self, body):
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:
+            # Demasiadas cabeceras repetidas (duplicate_header_limit)
+            self.sync_send({"type": "http.response.start", "status": 400, "headers": [(b"content-type", b"text/plain")]})
+            self.sync_send({"type": "http.response.body", "body": b"Bad Request: Too many duplicate headers"})
+            return
+
+        enviados = 0
+        for parte in self.wsgi_application(environ, self.start_response):
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            # No enviar más bytes de los que declara Content-Length
+            if self.response_content_length is not None:
+                parte = parte[: self.response_content_length - enviados]
+            self.sync_send({"type": "http.response.body", "body": parte, "more_body": True})
+            enviados += len(parte)
+            if enviados == self.response_content_length:
+                break
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({"type": "http.response.body"})
+
+
+class PuenteWSGI(WsgiToAsgi):
+    """
+    WsgiToAsgi con un pool de hilos propio.
+
+    asgiref ejecuta por defecto todas las peticiones WSGI en un único hilo
+    compartido; aquí cada petición toma uno de los `hilos` del pool.
+    """
+
+    def __init__(self, aplicacion, hilos=ASGI_HILOS_WSGI):
+        super().__init__(aplicacion)
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="puente_wsgi")
+
+    async def __call__(self, scope, receive, send):
+        await InstanciaPuente(self.wsgi_application, self.duplicate_header_limit, self.pool)(scope, receive, send)
+
+
+class Peticion:
+    """Lo necesario de una petición HTTP ASGI: cuerpo y sesión de Flask."""
+
+    def __init__(self, scope, cuerpo):
+        self.scope = scope
+        self.cuerpo = cuerpo
+        cabeceras = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        # La misma cookie firmada que lee Flask (SECRET_KEY, nombre y vigencia de la app)
+        entorno = {"HTTP_COOKIE": cabeceras.get("cookie", "")}
+        self.sesion = flask_app.session_interface.open_session(flask_app, Request(entorno)) or {}
+
+    def json(self):
+        """Cuerpo como JSON (ValueError si no lo es)."""
+        return json.loads(self.cuerpo or b"null")
+
+
+async def _leer_cuerpo(receive):
+    partes = []
+    while True:
+        mensaje = await receive()
+        if mensaje["type"] == "http.disconnect":
+            break
+        partes.append(mensaje.get("body", b""))
+        if not mensaje.get("more_body"):
+            break
+    return b"".join(partes)
+
+
+async def responder_json(send, datos, estado=200):
+    """Envía `datos` como JSON (mismo serializador que jsonify)."""
+    cuerpo = flask_app.json.dumps(datos).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": estado,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())],
+    })
+    await send({"type": "http.response.body", "body": cuerpo})
+
+
+async def chatbot_async(peticion, send):
+    """Versión asíncrona de /api/chatbot (mismas validaciones y respuesta que la ruta Flask)."""
+    usuario = peticion.sesion.get("usuario")
+    if not usuario:
+        return await responder_json(send, {"error": "No autenticado"}, 401)
+
+    try:
+        try:
+            datos = leer_peticion_chatbot(peticion.json())
+        except ValueError as e:
+            return await responder_json(send, {"error": str(e)}, 400)
+        idioma = datos["idioma"]
+
+        from src.models.chatbot_tutor import TutorVirtual
+
+        # El contexto de la ruta suele salir de la caché; si no, es una sola lectura
+        tutor = await asyncio.to_thread(TutorVirtual, datos["ruta_id"], usuario, idioma)
+        if not tutor.contexto_ruta:
+            return await responder_json(send, {
+                "respuesta": ERRORES_CONTEXTO_CHATBOT.get(idioma, ERRORES_CONTEXTO_CHATBOT['es']),
+                "idioma": idioma,
+                "exito": False,
+            })
+
+        logger.info(f"Chatbot async ({idioma}): {datos['mensaje'][:100]}...")
+        resultado = await tutor.conversar_async(datos["mensaje"], sesion_id=datos["sesion_id"], historial=datos["historial"])
+        await responder_json(send, respuesta_chatbot(idioma, resultado))
+
+    except Exception as e:
+        logger.error(f"Error en chatbot async: {e}")
+        await responder_json(send, {"error": str(e)}, 500)
+
+
+# (método, ruta) -> manejador asíncrono; todo lo demás va a Flask
+RUTAS_ASYNC = {
+    ("POST", "/api/chatbot"): chatbot_async,
+}
+
+
+class AplicacionASGI:
+    """Despacha las rutas de RUTAS_ASYNC y delega el resto en la app Flask."""
+
+    def __init__(self, aplicacion_wsgi, rutas=RUTAS_ASYNC):
+        self.wsgi = PuenteWSGI(aplicacion_wsgi)
+        self.rutas = rutas
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._ciclo_de_vida(receive, send)
+
+        manejador = self.rutas.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if manejador is None:
+            return await self.wsgi(scope, receive, send)
+
+        # Mismas métricas que MiddlewareMetricas aplica a las rutas Flask
+        medicion = iniciar_medicion(scope["method"], scope["path"], endpoint=scope["path"])
+
+        async def send_medido(mensaje):
+            if mensaje["type"] == "http.response.start":
+                medicion.estado = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                medicion.bytes += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        try:
+            await manejador(Peticion(scope, await _leer_cuerpo(receive)), send_medido)
+        finally:
+            finalizar_medicion(medicion)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "lifespan.startup":
+                # Pasos síncronos cortos del chatbot (asyncio.to_thread), aparte de las rutas Flask
+                asyncio.get_running_loop().set_default_executor(
+                    ThreadPoolExecutor(max_workers=ASGI_HILOS_WSGI, thread_name_prefix="asgi_sync")
+                )
+                await send({"type": "lifespan.startup.complete"})
+            elif mensaje["type"] == "lifespan.shutdown":
+                await close_async_client()
+                self.wsgi.pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = AplicacionASGI(flask_app)
+
+
+def servir_uvicorn(aplicacion=app, bind=WSGI_BIND):
+    """Sirve la app ASGI con uvicorn (un proceso; para varios usa `uvicorn --workers`)."""
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn no está instalado. Ejecuta: pip install uvicorn")
+
+    host, _, puerto = bind.rpartition(":")
+    logger.info(f"🚀 uvicorn en {bind} ({ASGI_HILOS_WSGI} hilos para las rutas Flask)")
+    uvicorn.run(aplicacion, host=host or "0.0.0.0", port=int(puerto), log_level="warning")
+
+
+if __name__ == "__main__":
+    servir_uvicorn()
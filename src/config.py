@@ -37,6 +37,13 @@ COLS = {
     "PERFIL": "usuario_perfil",
     "EXAM_INI": "examen_inicial",
     "RUTAS": "rutas_aprendizaje",
+    "EVAL": "evaluaciones_estudiante",
+    "EVAL_DET": "evaluaciones_detalle",
+    "EVAL_REEV": "evaluaciones_reevaluadas",
+    "CHAT": "sesiones_chat",
+    "INDICE": "indice_tutor",
+    "RESPUESTAS": "respuestas_tutor",
+    "ADMISION": "admision_trabajos",
 }
 
 # --- GOOGLE GENERATIVE AI ---
@@ -53,24 +60,104 @@ GOOGLE_API_KEY = GOOGLE_API_KEY_RUTEADOR or GOOGLE_API_KEY_IDENTIFICADOR
 SECRET_KEY = os.getenv("SECRET_KEY", "RUTEALO_SECRET_KEY_SUPER_SECRETA")
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 
+# Caché de perfiles ZDP por usuario (segundos de vigencia y máximo de entradas por proceso)
+PERFIL_CACHE_TTL = float(os.getenv("RUTEALO_PERFIL_CACHE_TTL", "300"))
+PERFIL_CACHE_MAX = int(os.getenv("RUTEALO_PERFIL_CACHE_MAX", "2048"))
+
+# Caché del contexto del tutor por (ruta, usuario): vigencia en segundos y máximo de entradas
+TUTOR_CACHE_TTL = float(os.getenv("RUTEALO_TUTOR_CACHE_TTL", "600"))
+TUTOR_CACHE_MAX = int(os.getenv("RUTEALO_TUTOR_CACHE_MAX", "256"))
+# Fragmentos del material que el tutor recupera por pregunta
+TUTOR_PASAJES_K = int(os.getenv("RUTEALO_TUTOR_PASAJES", "5"))
+# Caché de respuestas del tutor: similitud mínima entre preguntas y horas de vigencia
+TUTOR_RESPUESTAS_UMBRAL = float(os.getenv("RUTEALO_TUTOR_RESPUESTAS_UMBRAL", "0.8"))
+TUTOR_RESPUESTAS_HORAS = float(os.getenv("RUTEALO_TUTOR_RESPUESTAS_HORAS", "72"))
+
+# Conversaciones del tutor: horas de inactividad antes de expirar y sesiones Gemini vivas por proceso
+CHAT_SESION_HORAS = float(os.getenv("RUTEALO_CHAT_SESION_HORAS", "24"))
+CHAT_CACHE_MAX = int(os.getenv("RUTEALO_CHAT_CACHE_MAX", "256"))
+
+# Días que se conserva el detalle por pregunta de cada evaluación (el resumen es permanente)
+DETALLE_RETENCION_DIAS = float(os.getenv("RUTEALO_DETALLE_RETENCION_DIAS", "180"))
+
+# Usuarios con acceso a los tableros de docentes (lista separada por comas)
+DOCENTES = {u.strip() for u in os.getenv("RUTEALO_DOCENTES", "").split(",") if u.strip()}
+
 # --- UPLOAD CONFIG ---
 MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50 MB
 ALLOWED_EXTENSIONS = {"pdf", "docx", "pptx"}
 
 # --- GOOGLE GENERATIVE AI CONFIGURATION (Centralizado) ---
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+# google.generativeai se importa solo al crear el primer modelo (arranque rápido)
+import time
+import threading
 
 GENAI_MODEL_NAME = "gemini-2.5-flash"
 GENAI_TEMPERATURE = 0.2  # Balance: determinístico pero creativo
 GENAI_TOP_P = 0.95
 
-# Safety settings estandarizados
-GENAI_SAFETY_SETTINGS = {
-    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-}
+# Backend generativo: "gemini" (producción) o "fake" (benchmarks/pruebas sin claves,
+# ver src/models/modelo_falso.py). Se consulta al crear cada modelo.
+LLM_BACKEND_DEFAULT = "gemini"
+
+
+def get_llm_backend():
+    """Backend generativo activo según RUTEALO_LLM_BACKEND."""
+    return os.getenv("RUTEALO_LLM_BACKEND", LLM_BACKEND_DEFAULT).strip().lower()
+
+
+# --- TRANSCRIPCIÓN DE AUDIO (ver src/transcripcion.py) ---
+# Backend: "openai" (Whisper) o "local" (sustituto determinista para pruebas y benchmarks)
+TRANSCRIPCION_BACKEND_DEFAULT = "openai"
+AUDIO_MAX_MB = float(os.getenv("RUTEALO_AUDIO_MAX_MB", "25"))
+# Duración máxima de cada trozo enviado a Whisper y trozos transcritos en paralelo
+TRANSCRIPCION_TROZO_S = float(os.getenv("RUTEALO_TRANSCRIPCION_TROZO_S", "30"))
+TRANSCRIPCION_PARALELO = int(os.getenv("RUTEALO_TRANSCRIPCION_PARALELO", "4"))
+
+
+def get_transcripcion_backend():
+    """Backend de transcripción activo según RUTEALO_TRANSCRIPCION_BACKEND."""
+    return os.getenv("RUTEALO_TRANSCRIPCION_BACKEND", TRANSCRIPCION_BACKEND_DEFAULT).strip().lower()
+
+
+# --- SERVIDOR DE PRODUCCIÓN (ver src/wsgi.py y gunicorn.conf.py) ---
+WSGI_BIND = os.getenv("RUTEALO_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+# Procesos (gunicorn) e hilos por proceso: las llamadas a Gemini/Whisper esperan red, los hilos las solapan
+WSGI_WORKERS = int(os.getenv("RUTEALO_WORKERS", str(min(2 * (os.cpu_count() or 1) + 1, 9))))
+WSGI_THREADS = int(os.getenv("RUTEALO_THREADS", "4"))
+# Reciclaje: cada worker se reemplaza tras MAX_REQUESTS (+ jitter aleatorio para no reiniciarlos a la vez)
+WSGI_MAX_REQUESTS = int(os.getenv("RUTEALO_MAX_REQUESTS", "1000"))
+WSGI_MAX_REQUESTS_JITTER = int(os.getenv("RUTEALO_MAX_REQUESTS_JITTER", "100"))
+# Timeout de una petición (generar rutas llama varias veces al modelo) y espera del apagado ordenado
+WSGI_TIMEOUT = int(os.getenv("RUTEALO_TIMEOUT", "180"))
+WSGI_GRACEFUL_TIMEOUT = int(os.getenv("RUTEALO_GRACEFUL_TIMEOUT", "30"))
+# Importar la app en el maestro antes del fork (menos memoria); la conexión a MongoDB se rehace en cada worker
+WSGI_PRELOAD = os.getenv("RUTEALO_PRELOAD", "False").lower() == "true"
+# Servidor asíncrono (src/asgi.py): hilos para las rutas Flask que no tienen versión async
+ASGI_HILOS_WSGI = int(os.getenv("RUTEALO_ASGI_HILOS_WSGI", "16"))
+
+
+# --- CONTROL DE ADMISIÓN (ver src/admision.py) ---
+# Generaciones de ruta simultáneas por proceso, por usuario (en todos los procesos) y en cola por proceso
+ADMISION_MAX_GLOBAL = int(os.getenv("RUTEALO_ADMISION_MAX_GLOBAL", "4"))
+ADMISION_MAX_POR_USUARIO = int(os.getenv("RUTEALO_ADMISION_MAX_POR_USUARIO", "1"))
+ADMISION_MAX_COLA = int(os.getenv("RUTEALO_ADMISION_MAX_COLA", "16"))
+# Espera máxima en la cola antes de responder 429 y vigencia del turno de un usuario si el proceso muere
+ADMISION_ESPERA_MAX_S = float(os.getenv("RUTEALO_ADMISION_ESPERA_MAX_S", "30"))
+ADMISION_LEASE_S = float(os.getenv("RUTEALO_ADMISION_LEASE_S", "900"))
+
+
+# --- MÉTRICAS (ver src/metricas.py) ---
+# Peticiones que tardan al menos esto se registran en el log con su desglose (0 = desactivado)
+METRICAS_LENTA_MS = float(os.getenv("RUTEALO_METRICAS_LENTA_MS", "0"))
+# Si se define, GET /metrics exige "Authorization: Bearer <token>"
+METRICAS_TOKEN = os.getenv("RUTEALO_METRICAS_TOKEN", "")
+
+
+# --- RESPUESTAS HTTP (ver src/respuestas_http.py) ---
+# Las respuestas JSON de al menos este tamaño se comprimen (br si está instalado brotli, si no gzip)
+COMPRESION_MIN_BYTES = int(os.getenv("RUTEALO_COMPRESION_MIN_BYTES", "1024"))
+
 
 GENAI_GENERATION_CONFIG = {
     "response_mime_type": "application/json",
@@ -79,6 +166,18 @@ GENAI_GENERATION_CONFIG = {
 }
 
 
+def get_genai_safety_settings():
+    """Safety settings estandarizados (importa los tipos de Gemini bajo demanda)."""
+    from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+    return {
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    }
+
+
 def get_genai_model(api_key_type='default'):
     """
     Retorna la instancia del modelo Gemini configurada con la clave apropiada.
@@ -92,8 +191,13 @@ def get_genai_model(api_key_type='default'):
             - 'chatbot': Para chatbot tutor
     
     Returns:
-        GenerativeModel: Modelo configurado
+        GenerativeModel: Modelo configurado (o ModeloFalso si RUTEALO_LLM_BACKEND=fake)
     """
+    if get_llm_backend() == "fake":
+        from src.models.modelo_falso import crear_modelo_falso
+
+        return crear_modelo_falso()
+
     import google.generativeai as genai
 
     # Seleccionar la clave apropiada
@@ -115,5 +219,153 @@ def get_genai_model(api_key_type='default'):
     return genai.GenerativeModel(
         model_name=GENAI_MODEL_NAME, 
         generation_config=GENAI_GENERATION_CONFIG, 
-        safety_settings=GENAI_SAFETY_SETTINGS
+        safety_settings=get_genai_safety_settings()
     )
+
+
+# Límite global de llamadas concurrentes al modelo (0 = sin límite). Lo respetan
+# todos los ModeloPerezoso del proceso; útil en ejecuciones masivas.
+LLM_MAX_CONCURRENCIA = int(os.getenv("RUTEALO_LLM_MAX_CONCURRENCIA", "0"))
+_semaforo_llm = threading.BoundedSemaphore(LLM_MAX_CONCURRENCIA) if LLM_MAX_CONCURRENCIA > 0 else None
+
+
+def configurar_limite_llm(max_concurrencia):
+    """Fija el límite global de llamadas concurrentes al modelo (0 o None = sin límite)."""
+    global _semaforo_llm
+    _semaforo_llm = threading.BoundedSemaphore(max_concurrencia) if max_concurrencia else None
+
+
+def _limitar_llm(funcion):
+    """Envuelve una llamada al modelo con el semáforo global vigente."""
+
+    def envoltura(*args, **kwargs):
+        semaforo = _semaforo_llm
+        if semaforo is None:
+            return funcion(*args, **kwargs)
+        with semaforo:
+            return funcion(*args, **kwargs)
+
+    return envoltura
+
+
+class ModeloPerezoso:
+    """
+    Proxy de un modelo generativo que se inicializa en el primer uso.
+
+    Permite declarar `model = get_genai_model_lazy()` a nivel de módulo sin
+    importar google.generativeai ni validar claves al importar. Cualquier
+    atributo (generate_content, start_chat, ...) se delega al modelo real;
+    generate_content respeta el límite global de concurrencia. Las llamadas
+    (generate_content, generate_content_async y los send_message de las
+    sesiones de start_chat) se cronometran para src/metricas.py.
+    """
+
+    def __init__(self, fabrica, *args, **kwargs):
+        self._fabrica = fabrica
+        self._args = args
+        self._kwargs = kwargs
+        self._modelo = None
+        self._lock = threading.Lock()
+
+    def obtener(self):
+        """Crea (una sola vez) y retorna el modelo real."""
+        if self._modelo is None:
+            with self._lock:
+                if self._modelo is None:
+                    self._modelo = self._fabrica(*self._args, **self._kwargs)
+        return self._modelo
+
+    def reiniciar(self):
+        """Descarta el modelo creado; se recreará en el próximo uso."""
+        with self._lock:
+            self._modelo = None
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self.obtener(), nombre)
+        if nombre == "generate_content":
+            return _medir_llm(_limitar_llm(atributo))
+        if nombre == "generate_content_async":
+            return _medir_llm_async(atributo)
+        if nombre == "start_chat":
+            return lambda *args, **kwargs: ChatMedido(atributo(*args, **kwargs))
+        return atributo
+
+
+def _registrar_llm(segundos):
+    from src.metricas import registrar_llm
+
+    registrar_llm(segundos)
+
+
+class _StreamMedido:
+    """Respuesta en streaming: el tiempo del modelo se suma mientras se piden los fragmentos."""
+
+    def __init__(self, respuesta, segundos):
+        self._respuesta = respuesta
+        self._segundos = segundos
+
+    def __iter__(self):
+        iterador = iter(self._respuesta)
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    parte = next(iterador)
+                except StopIteration:
+                    return
+                finally:
+                    self._segundos += time.perf_counter() - inicio
+                yield parte
+        finally:
+            _registrar_llm(self._segundos)
+
+    def __getattr__(self, nombre):
+        return getattr(self._respuesta, nombre)
+
+
+def _medir_llm(funcion):
+    """Envuelve una llamada al modelo para las métricas de tiempo (src/metricas.py)."""
+
+    def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = None
+        try:
+            resultado = funcion(*args, **kwargs)
+        finally:
+            segundos = time.perf_counter() - inicio
+            if not (kwargs.get("stream") and resultado is not None):
+                _registrar_llm(segundos)
+        return _StreamMedido(resultado, segundos) if kwargs.get("stream") else resultado
+
+    return envoltura
+
+
+def _medir_llm_async(funcion):
+    async def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return await funcion(*args, **kwargs)
+        finally:
+            _registrar_llm(time.perf_counter() - inicio)
+
+    return envoltura
+
+
+class ChatMedido:
+    """Sesión de chat cuyos send_message/send_message_async cuentan en las métricas del modelo."""
+
+    def __init__(self, chat):
+        self._chat = chat
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._chat, nombre)
+        if nombre == "send_message":
+            return _medir_llm(atributo)
+        if nombre == "send_message_async":
+            return _medir_llm_async(atributo)
+        return atributo
+
+
+def get_genai_model_lazy(api_key_type='default'):
+    """Versión perezosa de get_genai_model (ver ModeloPerezoso)."""
+    return ModeloPerezoso(get_genai_model, api_key_type)
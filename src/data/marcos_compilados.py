@@ -0,0 +1,271 @@
+"""
+Artefacto precompilado de marcos pedagógicos (Bloom, ZDP, Flow).
+
+Los CSV de data/processed se parsean con pandas una sola vez (paso de
+compilación) y se guardan en un JSON versionado con los textos de contexto ya
+renderizados:
+
+- contexto_examen: bloque usado por generar_examen_inicial
+- contexto_por_nivel: bloque por nivel Bloom usado por los generadores
+- contexto_clasificacion: reglas de Bloom para el etiquetado
+
+El artefacto se carga una vez por proceso y se invalida cuando cambia el mtime
+o el tamaño de alguno de los CSV fuente, de modo que la ruta caliente no
+importa pandas ni reconstruye cadenas.
+
+Uso como paso de build:
+    python -m src.data.marcos_compilados
+"""
+
+import os
+import json
+import datetime
+import logging
+import threading
+from pathlib import Path
+
+from src.config import PROCESSED_DIR
+
+logger = logging.getLogger(__name__)
+
+# Incrementar cuando cambie el formato del artefacto o el renderizado
+VERSION_ARTEFACTO = 1
+
+ARCHIVOS_FUENTE = {
+    "bloom": "df_bloom.csv",
+    "zdp": "df_zdp.csv",
+    "flow": "df_flow.csv",
+}
+NOMBRE_ARTEFACTO = "marcos_compilados.json"
+
+JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
+
+_cache_lock = threading.Lock()
+_cache = {"firma": None, "marcos": None}
+
+
+# --- COMPILACIÓN (requiere pandas) ---
+
+
+def _texto(valor):
+    """Normaliza celdas vacías/NaN de pandas a cadena vacía."""
+    if valor is None:
+        return ""
+    texto = str(valor)
+    return "" if texto == "nan" else texto
+
+
+def _leer_csv_marcos(dir_fuentes):
+    """Lee los CSV de marcos con pandas. Devuelve {clave: lista de filas (dict)}."""
+    import pandas as pd
+
+    filas = {}
+    for clave, nombre in ARCHIVOS_FUENTE.items():
+        ruta = Path(dir_fuentes) / nombre
+        if not ruta.exists():
+            filas[clave] = None
+            continue
+        df = pd.read_csv(ruta)
+        filas[clave] = [{col: _texto(v) for col, v in fila.items()} for fila in df.to_dict(orient="records")]
+        logger.info(f"✅ Cargado {nombre}: {len(df)} filas")
+    return filas
+
+
+def _render_contexto_examen(filas):
+    """Contexto pedagógico global para el examen diagnóstico."""
+    contexto = "\n📚 MARCOS TEÓRICOS PARA EVALUACIÓN PEDAGÓGICA:\n"
+
+    # Marco Bloom (procesos cognitivos y tipos de conocimiento)
+    if filas.get("bloom"):
+        contexto += "\n🔷 TAXONOMÍA DE BLOOM (Procesos cognitivos):\n"
+        for row in filas["bloom"]:
+            cat = row.get("cat_bloom") or "N/A"
+            desc = row.get("proc_desc", "")[:200]
+            if desc and desc != "N/A":
+                contexto += f"  • {cat}: {desc}\n"
+
+    # Marco ZDP (principios del aprendizaje desarrollador)
+    if filas.get("zdp"):
+        contexto += "\n🎯 ZONA DE DESARROLLO PRÓXIMO (Principios):\n"
+        for row in filas["zdp"][:6]:
+            principio = row.get("principio_zdp") or "N/A"
+            bloom_sug = row.get("cat_bloom_sugerida") or "N/A"
+            if principio != "N/A":
+                contexto += f"  • {principio} → Evaluar con nivel: {bloom_sug}\n"
+
+    # Marco Flow (dimensiones de experiencia óptima)
+    if filas.get("flow"):
+        contexto += "\n⚡ TEORÍA DEL FLOW (Dimensiones de motivación):\n"
+        for row in filas["flow"][:4]:
+            dimension = row.get("dimension") or "N/A"
+            bloom_sug = row.get("cat_bloom") or "N/A"
+            if dimension != "N/A":
+                contexto += f"  • {dimension} → Nivel: {bloom_sug}\n"
+
+    return contexto
+
+
+def _render_contexto_nivel(nivel_bloom, filas):
+    """Contexto pedagógico de un nivel para flashcards y tests."""
+    contexto = ""
+
+    # Marco Bloom: Procesos cognitivos
+    filas_bloom = [r for r in filas.get("bloom") or [] if r.get("cat_bloom") == nivel_bloom]
+    if filas_bloom:
+        fila = filas_bloom[0]
+        desc = fila.get("proc_desc", "")
+        subprocesos = fila.get("subprocesos", "")
+        tipos_conocimiento = fila.get("tipos_conocimiento", "")
+
+        contexto += f"\n📚 TAXONOMÍA DE BLOOM - {nivel_bloom}:\n"
+        if desc:
+            contexto += f"  • Descripción: {desc}\n"
+        if subprocesos:
+            contexto += f"  • Subprocesos: {subprocesos}\n"
+        if tipos_conocimiento:
+            contexto += f"  • Tipos de conocimiento: {tipos_conocimiento}\n"
+
+    # Marco ZDP: Principios de aprendizaje
+    filas_zdp = [r for r in filas.get("zdp") or [] if r.get("cat_bloom_sugerida") == nivel_bloom]
+    if filas_zdp:
+        contexto += "\n🎯 ZONA DE DESARROLLO PRÓXIMO - Principios aplicables:\n"
+        for i, fila in enumerate(filas_zdp[:3], 1):
+            principio = fila.get("principio_zdp", "")
+            if principio:
+                contexto += f"  {i}. {principio}\n"
+
+    # Marco Flow: Dimensiones de motivación
+    filas_flow = [r for r in filas.get("flow") or [] if r.get("cat_bloom") == nivel_bloom]
+    if filas_flow:
+        contexto += "\n⚡ TEORÍA DEL FLOW - Dimensiones motivacionales:\n"
+        for fila in filas_flow[:2]:
+            dim = fila.get("dimension", "")
+            defi = fila.get("txt_definicion", "")
+            if dim:
+                contexto += f"  • {dim}"
+                if defi:
+                    contexto += f": {defi[:100]}...\n"
+                else:
+                    contexto += "\n"
+
+    return contexto
+
+
+def _render_contexto_clasificacion(filas):
+    """Reglas de Bloom para el clasificador de unidades."""
+    contexto = ""
+    for row in filas.get("bloom") or []:
+        contexto += f"NIVEL: {row.get('cat_bloom') or 'N/A'} | Desc: {row.get('proc_desc', '')}\n"
+    return contexto
+
+
+def _firma_fuentes(dir_fuentes):
+    """Firma (mtime_ns, tamaño) de cada CSV fuente; None si no existe."""
+    firma = {}
+    for nombre in ARCHIVOS_FUENTE.values():
+        try:
+            st = os.stat(Path(dir_fuentes) / nombre)
+            firma[nombre] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            firma[nombre] = None
+    return firma
+
+
+def compilar_marcos(dir_fuentes=PROCESSED_DIR, ruta_artefacto=None):
+    """
+    Compila los CSV de marcos en el artefacto JSON.
+
+    Args:
+        dir_fuentes: Carpeta con df_bloom.csv, df_zdp.csv y df_flow.csv
+        ruta_artefacto: Ruta de salida (default: <dir_fuentes>/marcos_compilados.json).
+            Si es False no se escribe a disco.
+
+    Returns:
+        dict: Artefacto compilado
+    """
+    firma = _firma_fuentes(dir_fuentes)
+    filas = _leer_csv_marcos(dir_fuentes)
+
+    artefacto = {
+        "version": VERSION_ARTEFACTO,
+        "fuentes": firma,
+        "generado": datetime.datetime.utcnow().isoformat(),
+        "filas": {clave: len(f) if f is not None else 0 for clave, f in filas.items()},
+        "contexto_examen": _render_contexto_examen(filas),
+        "contexto_por_nivel": {nivel: _render_contexto_nivel(nivel, filas) for nivel in JERARQUIA_BLOOM},
+        "contexto_clasificacion": _render_contexto_clasificacion(filas),
+    }
+
+    if ruta_artefacto is not False:
+        ruta = Path(ruta_artefacto or Path(dir_fuentes) / NOMBRE_ARTEFACTO)
+        try:
+            tmp = ruta.with_suffix(".tmp")
+            tmp.write_text(json.dumps(artefacto, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, ruta)
+            logger.info(f"✅ Artefacto de marcos compilado en {ruta}")
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo escribir el artefacto de marcos: {e}")
+
+    return artefacto
+
+
+# --- CARGA (ruta caliente, sin pandas) ---
+
+
+def _leer_artefacto(ruta, firma):
+    """Lee el artefacto si existe y corresponde a la versión y fuentes actuales."""
+    try:
+        artefacto = json.loads(Path(ruta).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if artefacto.get("version") != VERSION_ARTEFACTO or artefacto.get("fuentes") != firma:
+        return None
+    return artefacto
+
+
+def obtener_marcos_compilados(dir_fuentes=PROCESSED_DIR, ruta_artefacto=None):
+    """
+    Devuelve el artefacto de marcos, cargado una vez por proceso.
+
+    Solo hace stat() de los CSV en cada llamada; el artefacto se relee o se
+    recompila únicamente si la firma de las fuentes cambió.
+
+    Returns:
+        dict: {"contexto_examen": str, "contexto_por_nivel": {nivel: str}, ...}
+    """
+    firma = _firma_fuentes(dir_fuentes)
+    clave = (str(dir_fuentes), json.dumps(firma, sort_keys=True))
+    marcos = _cache["marcos"]
+    if marcos is not None and _cache["firma"] == clave:
+        return marcos
+
+    with _cache_lock:
+        if _cache["marcos"] is not None and _cache["firma"] == clave:
+            return _cache["marcos"]
+
+        ruta = Path(ruta_artefacto or Path(dir_fuentes) / NOMBRE_ARTEFACTO)
+        marcos = _leer_artefacto(ruta, firma)
+        if marcos is None:
+            logger.info("Artefacto de marcos ausente o desactualizado; recompilando")
+            try:
+                marcos = compilar_marcos(dir_fuentes, ruta)
+            except Exception as e:
+                logger.warning(f"⚠️ Error compilando marcos pedagógicos: {e}")
+                marcos = {"version": VERSION_ARTEFACTO, "contexto_examen": "", "contexto_por_nivel": {}}
+
+        _cache["firma"] = clave
+        _cache["marcos"] = marcos
+        return marcos
+
+
+def limpiar_cache_marcos():
+    """Descarta el artefacto cargado en memoria (útil en tests)."""
+    with _cache_lock:
+        _cache["firma"] = None
+        _cache["marcos"] = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    resultado = compilar_marcos()
+    print(f"Artefacto v{resultado['version']} generado: {resultado['filas']}")
@@ -6,69 +6,104 @@ Centralizes MongoDB connection handling with:
 - Retry logic and health checks
 - Singleton pattern to prevent connection leaks
 - Graceful shutdown
+- Fork safety: the client is created lazily and re-created in a forked
+  worker process (MongoClient must not be shared across fork)
+- An AsyncMongoClient with the same settings for the ASGI entry point
+  (src/asgi.py), also one per process
 """
 
 import os
+import threading
 from typing import Optional
 from pymongo import MongoClient, errors
-from pymongo.errors import ServerSelectionTimeoutError, ConnectionFailure
+from pymongo.errors import ServerSelectionTimeoutError, ConnectionFailure, OperationFailure
 import logging
 
 logger = logging.getLogger(__name__)
 
+# create_index with an existing name but different options
+INDEX_OPTIONS_CONFLICT = 85
+
+
+def client_options() -> dict:
+    """
+    Keyword arguments shared by MongoClient and AsyncMongoClient.
+
+    Uses configuration from src.config:
+    - MONGO_URI: Connection string
+    - MONGODB_POOL_SIZE: Max connections in pool
+    - MONGODB_CONNECT_TIMEOUT: Connection timeout in ms
+    - MONGODB_SOCKET_TIMEOUT: Socket timeout in ms
+    """
+    from src.config import (
+        MONGO_URI,
+        MONGODB_POOL_SIZE,
+        MONGODB_CONNECT_TIMEOUT,
+        MONGODB_SOCKET_TIMEOUT,
+        MONGODB_MAX_POOL_SIZE,
+        MONGODB_MIN_POOL_SIZE,
+    )
+
+    return dict(
+        host=MONGO_URI,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGODB_POOL_SIZE,
+        connectTimeoutMS=MONGODB_CONNECT_TIMEOUT,
+        socketTimeoutMS=MONGODB_SOCKET_TIMEOUT,
+        serverSelectionTimeoutMS=MONGODB_CONNECT_TIMEOUT,
+        retryWrites=True,
+        retryReads=True,
+        w="majority",
+    )
+
 
 class DatabaseConnection:
     """Singleton class for MongoDB connection management with pooling."""
 
     _instance: Optional["DatabaseConnection"] = None
     _client: Optional[MongoClient] = None
+    # Process that created _client (None: installed externally, e.g. in tests)
+    _pid: Optional[int] = None
+    # Async client and its process, independent of the sync one (see get_async_client)
+    _async_client = None
+    _async_pid: Optional[int] = None
+
+    # Serializes the lazy connection: the first requests of a threaded worker
+    # must not each build (and leak) their own MongoClient
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
         return cls._instance
 
     def __init__(self):
-        """Initialize database connection only once."""
-        if self._client is None:
-            self._connect()
+        """Initialize database connection only once per process."""
+        if self._client is None or self._pid not in (None, os.getpid()):
+            with DatabaseConnection._lock:
+                if self._client is not None and self._pid not in (None, os.getpid()):
+                    logger.info("Proceso hijo detectado: se descarta el MongoClient heredado")
+                    self.discard_after_fork()
+                if self._client is None:
+                    self._connect()
 
     def _connect(self) -> None:
         """
         Establish MongoDB connection with pooling and retry logic.
 
-        Uses configuration from src.config:
-        - MONGO_URI: Connection string
-        - MONGODB_POOL_SIZE: Max connections in pool
-        - MONGODB_CONNECT_TIMEOUT: Connection timeout in ms
-        - MONGODB_SOCKET_TIMEOUT: Socket timeout in ms
+        Pool and timeout settings come from client_options().
         """
         try:
-            from src.config import (
-                MONGO_URI,
-                MONGODB_POOL_SIZE,
-                MONGODB_CONNECT_TIMEOUT,
-                MONGODB_SOCKET_TIMEOUT,
-                MONGODB_MAX_POOL_SIZE,
-                MONGODB_MIN_POOL_SIZE,
-            )
-
             logger.info("Iniciando conexión a MongoDB...")
 
             # Conexión simple sin ServerApi (Python 3.13 incompatible)
             # SSL configurado en el URI
-            self._client = MongoClient(
-                MONGO_URI,
-                maxPoolSize=MONGODB_MAX_POOL_SIZE,
-                minPoolSize=MONGODB_MIN_POOL_SIZE,
-                maxIdleTimeMS=MONGODB_POOL_SIZE,
-                connectTimeoutMS=MONGODB_CONNECT_TIMEOUT,
-                socketTimeoutMS=MONGODB_SOCKET_TIMEOUT,
-                serverSelectionTimeoutMS=MONGODB_CONNECT_TIMEOUT,
-                retryWrites=True,
-                retryReads=True,
-                w="majority",
-            )
+            self._client = MongoClient(**client_options())
+
+            self._pid = os.getpid()
 
             # Verify connection with health check
             self._health_check()
@@ -137,6 +172,17 @@ class DatabaseConnection:
         except Exception as e:
             logger.error(f"Error closing connection: {str(e)}")
 
+    def discard_after_fork(self) -> None:
+        """
+        Drop a client inherited from the parent process without closing it.
+
+        Closing would end the parent's sessions over shared sockets; the
+        child simply opens its own client on next use.
+        """
+        self._client = None
+        self._pid = None
+        DatabaseConnection._client = None
+
     def reconnect(self) -> None:
         """Reconnect to database (useful for connection recovery)."""
         self.close()
@@ -153,6 +199,15 @@ class DatabaseConnection:
             return False
 
 
+def _reset_lock_after_fork() -> None:
+    # A lock held by another thread at fork time would never be released in the child
+    DatabaseConnection._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
 def get_database_connection() -> DatabaseConnection:
     """
     Get or create database connection singleton.
@@ -181,6 +236,102 @@ def get_database(db_name: Optional[str] = None):
     return get_database_connection().get_database(db_name)
 
 
+class LazyDatabase:
+    """
+    Module-level stand-in for a Database that resolves it on every access.
+
+    Lets modules declare `db = LazyDatabase()` at import time without
+    connecting: the connection is opened on first use in each process, so a
+    pre-fork server (gunicorn) never shares a MongoClient between workers.
+    """
+
+    def __init__(self, db_name: Optional[str] = None):
+        self._db_name = db_name
+
+    def resolve(self):
+        """Database instance of the current process' connection."""
+        return get_database(self._db_name)
+
+    def __getitem__(self, name):
+        return self.resolve()[name]
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+
+def ensure_ttl_index(collection, field: str, seconds: int, name: str) -> None:
+    """
+    Create a TTL index on `field`, or update its expiry if it already exists.
+
+    When the index exists with another expireAfterSeconds, create_index fails
+    with IndexOptionsConflict (code 85); the expiry is then changed with
+    collMod, without rebuilding the index. Any other failure (privileges,
+    invalid spec) is raised.
+
+    Args:
+        collection: pymongo Collection
+        field: Date field the documents expire on
+        seconds: Seconds after `field` before a document is removed
+        name: Index name
+    """
+    from pymongo import ASCENDING
+
+    try:
+        collection.create_index([(field, ASCENDING)], expireAfterSeconds=seconds, name=name)
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        collection.database.command("collMod", collection.name, index={"name": name, "expireAfterSeconds": seconds})
+
+
+def get_async_client():
+    """
+    AsyncMongoClient of the current process, created on first use.
+
+    Opening it does no I/O (the first command connects), so it is safe to
+    call from a coroutine. A client inherited across fork is dropped, as
+    with the sync client. Use it only from one event loop per process.
+
+    Returns:
+        AsyncMongoClient: Client with the same settings as the sync one
+    """
+    if DatabaseConnection._async_client is not None and DatabaseConnection._async_pid not in (None, os.getpid()):
+        DatabaseConnection._async_client = None
+    if DatabaseConnection._async_client is None:
+        from pymongo import AsyncMongoClient
+
+        DatabaseConnection._async_client = AsyncMongoClient(**client_options())
+        DatabaseConnection._async_pid = os.getpid()
+    return DatabaseConnection._async_client
+
+
+def get_async_database(db_name: Optional[str] = None):
+    """
+    Async counterpart of get_database (collection methods are coroutines).
+
+    Args:
+        db_name: Database name (defaults to DB_NAME from config)
+
+    Returns:
+        AsyncDatabase instance
+    """
+    if db_name is None:
+        from src.config import DB_NAME
+
+        db_name = DB_NAME
+
+    return get_async_client()[db_name]
+
+
+async def close_async_client() -> None:
+    """Close the async client of this process, if one was opened."""
+    client, DatabaseConnection._async_client = DatabaseConnection._async_client, None
+    DatabaseConnection._async_pid = None
+    if client is not None:
+        await client.close()
+        logger.info("Async MongoDB connection closed")
+
+
 def get_mongo_client() -> MongoClient:
     """
     Convenience function to get MongoDB client.
@@ -11,11 +11,22 @@ OBJETIVO: Crear funciones dedicadas que usen marcos pedagógicos (CSV) para gene
 import json
 import re
 import logging
-from src.config import get_genai_model
+from src.config import get_genai_model_lazy
 from src.utils import retry
+from src.seleccion_contenido import seleccionar_contexto
 
 logger = logging.getLogger(__name__)
-model = get_genai_model()
+model = get_genai_model_lazy()
+
+# Presupuesto de contenido por nivel (~8000 caracteres)
+PRESUPUESTO_TOKENS_NIVEL = 2000
+
+# Preguntas de test por nivel según la estrategia ZDP
+PREGUNTAS_POR_ESTRATEGIA = {
+    "scaffolding": 4,
+    "refuerzo": 5,
+    "estandar": 3
+}
 
 
 @retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(Exception,))
@@ -24,9 +35,9 @@ def generar_flashcards_con_teoria(nivel_bloom, textos_nivel, estrategia="estanda
     
     Args:
         nivel_bloom (str): Nivel cognitivo de Bloom
-        textos_nivel (list): Contenido del estudiante para este nivel
+        textos_nivel (list): Contenido del estudiante para este nivel (strings o unidades)
         estrategia (str): 'scaffolding', 'refuerzo' o 'estandar'
-        marcos (dict): Marcos pedagógicos {bloom, zdp, flow} o None
+        marcos (dict): Marcos pedagógicos precompilados o None
     
     Returns:
         list: Flashcards con estructura [{"id": int, "frente": str, "reverso": str, "visto": bool}]
@@ -47,7 +58,7 @@ def generar_flashcards_con_teoria(nivel_bloom, textos_nivel, estrategia="estanda
     # Instrucciones específicas por estrategia
     instrucciones_estrategia = _obtener_instrucciones_flashcards(estrategia)
     
-    texto_combinado = "\n".join(textos_nivel)[:8000]
+    texto_combinado = seleccionar_contexto(textos_nivel, PRESUPUESTO_TOKENS_NIVEL)
     
     prompt = f"""
     Eres un experto en diseño instruccional con especialización en Taxonomía de Bloom.
@@ -104,14 +115,15 @@ def generar_flashcards_con_teoria(nivel_bloom, textos_nivel, estrategia="estanda
 
 
 @retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(Exception,))
-def generar_tests_con_teoria(nivel_bloom, textos_nivel, estrategia="estandar", marcos=None):
+def generar_tests_con_teoria(nivel_bloom, textos_nivel, estrategia="estandar", marcos=None, num_preguntas=None):
     """Genera tests con feedback diferenciado usando marcos pedagógicos.
     
     Args:
         nivel_bloom (str): Nivel cognitivo de Bloom
-        textos_nivel (list): Contenido del estudiante para este nivel
+        textos_nivel (list): Contenido del estudiante para este nivel (strings o unidades)
         estrategia (str): 'scaffolding', 'refuerzo' o 'estandar'
-        marcos (dict): Marcos pedagógicos {bloom, zdp, flow} o None
+        marcos (dict): Marcos pedagógicos precompilados o None
+        num_preguntas (int): Cantidad a generar (por defecto según la estrategia)
     
     Returns:
         list: Tests con estructura [{"id": int, "pregunta": str, "opciones": list, 
@@ -121,11 +133,8 @@ def generar_tests_con_teoria(nivel_bloom, textos_nivel, estrategia="estandar", m
         return []
     
     # Determinar cantidad según estrategia
-    num_preguntas = {
-        "scaffolding": 4,
-        "refuerzo": 5,
-        "estandar": 3
-    }.get(estrategia, 3)
+    if num_preguntas is None:
+        num_preguntas = PREGUNTAS_POR_ESTRATEGIA.get(estrategia, 3)
     
     # Construir contexto pedagógico
     contexto_pedagogico = _construir_contexto_pedagogico(nivel_bloom, marcos)
@@ -133,7 +142,7 @@ def generar_tests_con_teoria(nivel_bloom, textos_nivel, estrategia="estandar", m
     # Instrucciones específicas por estrategia
     instrucciones_estrategia = _obtener_instrucciones_tests(estrategia)
     
-    texto_combinado = "\n".join(textos_nivel)[:8000]
+    texto_combinado = seleccionar_contexto(textos_nivel, PRESUPUESTO_TOKENS_NIVEL)
     
     prompt = f"""
     Eres un experto en evaluación formativa con especialización en feedback pedagógico.
@@ -202,11 +211,11 @@ def generar_tests_con_teoria(nivel_bloom, textos_nivel, estrategia="estandar", m
 
 
 def _construir_contexto_pedagogico(nivel_bloom, marcos):
-    """Construye contexto pedagógico desde marcos CSV.
+    """Devuelve el contexto pedagógico del nivel desde los marcos precompilados.
     
     Args:
         nivel_bloom (str): Nivel cognitivo
-        marcos (dict): {bloom: DataFrame, zdp: DataFrame, flow: DataFrame} o None
+        marcos (dict): Artefacto de src.data.marcos_compilados o None
     
     Returns:
         str: Contexto pedagógico formateado
@@ -214,50 +223,7 @@ def _construir_contexto_pedagogico(nivel_bloom, marcos):
     if not marcos:
         return ""
     
-    contexto = ""
-    
-    # Marco Bloom: Procesos cognitivos
-    if marcos.get("bloom") is not None:
-        fila_bloom = marcos["bloom"][marcos["bloom"]["cat_bloom"] == nivel_bloom]
-        if not fila_bloom.empty:
-            desc = fila_bloom.iloc[0].get("proc_desc", "")
-            subprocesos = fila_bloom.iloc[0].get("subprocesos", "")
-            tipos_conocimiento = fila_bloom.iloc[0].get("tipos_conocimiento", "")
-            
-            contexto += f"\n📚 TAXONOMÍA DE BLOOM - {nivel_bloom}:\n"
-            if desc and desc != "nan":
-                contexto += f"  • Descripción: {desc}\n"
-            if subprocesos and subprocesos != "nan":
-                contexto += f"  • Subprocesos: {subprocesos}\n"
-            if tipos_conocimiento and tipos_conocimiento != "nan":
-                contexto += f"  • Tipos de conocimiento: {tipos_conocimiento}\n"
-    
-    # Marco ZDP: Principios de aprendizaje
-    if marcos.get("zdp") is not None:
-        filas_zdp = marcos["zdp"][marcos["zdp"]["cat_bloom_sugerida"] == nivel_bloom]
-        if not filas_zdp.empty:
-            principios = filas_zdp["principio_zdp"].tolist()
-            contexto += f"\n🎯 ZONA DE DESARROLLO PRÓXIMO - Principios aplicables:\n"
-            for i, principio in enumerate(principios[:3], 1):
-                if principio and principio != "nan":
-                    contexto += f"  {i}. {principio}\n"
-    
-    # Marco Flow: Dimensiones de motivación
-    if marcos.get("flow") is not None:
-        filas_flow = marcos["flow"][marcos["flow"]["cat_bloom"] == nivel_bloom]
-        if not filas_flow.empty:
-            dimensiones = filas_flow["dimension"].tolist()
-            definiciones = filas_flow["txt_definicion"].tolist()
-            contexto += f"\n⚡ TEORÍA DEL FLOW - Dimensiones motivacionales:\n"
-            for dim, defi in zip(dimensiones[:2], definiciones[:2]):
-                if dim and dim != "nan":
-                    contexto += f"  • {dim}"
-                    if defi and defi != "nan":
-                        contexto += f": {defi[:100]}...\n"
-                    else:
-                        contexto += "\n"
-    
-    return contexto
+    return marcos.get("contexto_por_nivel", {}).get(nivel_bloom, "")
 
 
 def _obtener_instrucciones_flashcards(estrategia):
@@ -0,0 +1,347 @@
+"""
+Métricas de rendimiento por petición en formato de texto de Prometheus (GET /metrics).
+
+MiddlewareMetricas envuelve la app WSGI y mide cada petición:
+
+- Latencia por endpoint (la regla de Flask, p. ej. /ruta/<ruta_id>/contenido),
+  incluido el envío de las respuestas en streaming.
+- Comandos de MongoDB, contados con un CommandListener de pymongo
+  (EscuchaMongo) y atribuidos a la petición en curso con una ContextVar
+  (que asyncio.to_thread copia a sus hilos).
+- Llamadas al modelo y tiempo esperándolas (ModeloPerezoso avisa con
+  registrar_llm).
+- Bytes enviados, después de la compresión.
+- Etapas del pipeline decoradas con utils.log_execution_time.
+
+Con METRICAS_LENTA_MS > 0 las peticiones lentas se registran en el log con
+su desglose. Las métricas son del proceso: con varios workers de gunicorn
+cada scrape ve solo el worker que lo atiende.
+"""
+
+import time
+import bisect
+import logging
+import threading
+import contextvars
+from collections import Counter
+from pymongo import monitoring
+from src.config import METRICAS_LENTA_MS
+
+logger = logging.getLogger(__name__)
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LIMITES_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+LIMITES_COMANDOS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500)
+
+# nombre -> (tipo, ayuda, límites del histograma)
+FAMILIAS = {
+    "rutealo_http_peticiones_total": ("counter", "Peticiones HTTP atendidas", None),
+    "rutealo_http_duracion_segundos": ("histogram", "Latencia de las peticiones HTTP", LIMITES_SEGUNDOS),
+    "rutealo_http_respuesta_bytes": ("histogram", "Bytes enviados por respuesta", LIMITES_BYTES),
+    "rutealo_http_mongo_comandos": ("histogram", "Comandos de MongoDB por petición", LIMITES_COMANDOS),
+    "rutealo_http_llm_segundos": ("histogram", "Tiempo esperando al modelo por petición (las que lo llaman)", LIMITES_SEGUNDOS),
+    "rutealo_mongo_comandos_total": ("counter", "Comandos de MongoDB enviados", None),
+    "rutealo_mongo_errores_total": ("counter", "Comandos de MongoDB fallidos", None),
+    "rutealo_mongo_segundos_total": ("counter", "Tiempo en comandos de MongoDB", None),
+    "rutealo_llm_llamadas_total": ("counter", "Llamadas al modelo generativo", None),
+    "rutealo_llm_segundos_total": ("counter", "Tiempo esperando al modelo generativo", None),
+    "rutealo_etapa_segundos": ("histogram", "Duración de las etapas del pipeline", LIMITES_SEGUNDOS),
+}
+
+
+class Histograma:
+    """Cubetas acumulables al exponer (le = límite superior inclusivo)."""
+
+    __slots__ = ("limites", "cubetas", "suma", "total")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cubetas = [0] * len(limites)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        i = bisect.bisect_left(self.limites, valor)
+        if i < len(self.cubetas):
+            self.cubetas[i] += 1
+        self.suma += valor
+        self.total += 1
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(pares, extra=()):
+    todas = tuple(pares) + tuple(extra)
+    if not todas:
+        return ""
+    return "{" + ",".join(f'{clave}="{_escapar(valor)}"' for clave, valor in todas) + "}"
+
+
+def _numero(valor):
+    return str(valor) if isinstance(valor, int) else repr(round(float(valor), 6))
+
+
+class RegistroMetricas:
+    """Contadores e histogramas del proceso, por familia y etiquetas."""
+
+    def __init__(self, familias=FAMILIAS):
+        self.familias = familias
+        self._lock = threading.Lock()
+        self._series = {nombre: {} for nombre in familias}
+
+    def contar(self, nombre, etiquetas=(), valor=1):
+        with self._lock:
+            series = self._series[nombre]
+            series[etiquetas] = series.get(etiquetas, 0) + valor
+
+    def observar(self, nombre, etiquetas, valor):
+        with self._lock:
+            series = self._series[nombre]
+            histograma = series.get(etiquetas)
+            if histograma is None:
+                histograma = series[etiquetas] = Histograma(self.familias[nombre][2])
+            histograma.observar(valor)
+
+    def valor(self, nombre, etiquetas=()):
+        """Valor de un contador (o número de observaciones de un histograma)."""
+        with self._lock:
+            serie = self._series[nombre].get(etiquetas, 0)
+        return serie.total if isinstance(serie, Histograma) else serie
+
+    def reiniciar(self):
+        with self._lock:
+            for series in self._series.values():
+                series.clear()
+
+    def exponer(self):
+        """Texto en el formato de exposición de Prometheus."""
+        lineas = []
+        with self._lock:
+            for nombre, (tipo, ayuda, _) in self.familias.items():
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+                for etiquetas, serie in sorted(self._series[nombre].items()):
+                    if tipo != "histogram":
+                        lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(serie)}")
+                        continue
+                    acumulado = 0
+                    for limite, n in zip(serie.limites, serie.cubetas):
+                        acumulado += n
+                        lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, [('le', _numero(limite))])} {acumulado}")
+                    lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, [('le', '+Inf')])} {serie.total}")
+                    lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(serie.suma)}")
+                    lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {serie.total}")
+        return "\n".join(lineas) + "\n"
+
+
+registro = RegistroMetricas()
+
+
+# --- Medición de la petición en curso ---
+
+class MedicionPeticion:
+    """Desglose de una petición: MongoDB por comando, modelo, etapas y bytes."""
+
+    def __init__(self, metodo, ruta, endpoint=None):
+        self.metodo = metodo
+        self.ruta = ruta
+        self.endpoint = endpoint
+        self.estado = 500
+        self.bytes = 0
+        self.inicio = time.perf_counter()
+        self.mongo = Counter()
+        self.mongo_s = 0.0
+        self.llm_llamadas = 0
+        self.llm_s = 0.0
+        self.etapas = Counter()
+        self.finalizada = False
+
+    def desglose(self, duracion):
+        mongo = ", ".join(f"{c} {n}" for c, n in self.mongo.most_common())
+        etapas = ", ".join(f"{e} {s:.2f}s" for e, s in self.etapas.most_common())
+        return (
+            f"{self.metodo} {self.ruta} {self.estado} en {duracion:.2f}s | "
+            f"mongo {sum(self.mongo.values())} comandos {self.mongo_s:.2f}s ({mongo or '-'}) | "
+            f"llm {self.llm_llamadas} llamadas {self.llm_s:.2f}s | "
+            f"{self.bytes} bytes | etapas: {etapas or '-'}"
+        )
+
+
+_medicion_actual = contextvars.ContextVar("medicion_peticion", default=None)
+
+
+def medicion_actual():
+    """Medición de la petición que se está atendiendo (None fuera de una petición)."""
+    return _medicion_actual.get()
+
+
+def iniciar_medicion(metodo, ruta, endpoint=None):
+    """Empieza a medir una petición en el contexto actual."""
+    medicion = MedicionPeticion(metodo, ruta, endpoint)
+    _medicion_actual.set(medicion)
+    return medicion
+
+
+def finalizar_medicion(medicion):
+    """Registra la petición en las métricas (y en el log si fue lenta); solo la primera vez."""
+    if medicion.finalizada:
+        return None
+    medicion.finalizada = True
+    duracion = time.perf_counter() - medicion.inicio
+    if _medicion_actual.get() is medicion:
+        _medicion_actual.set(None)
+
+    etiquetas = (("endpoint", medicion.endpoint or "sin_ruta"), ("metodo", medicion.metodo))
+    registro.contar("rutealo_http_peticiones_total", etiquetas + (("estado", str(medicion.estado)),))
+    registro.observar("rutealo_http_duracion_segundos", etiquetas, duracion)
+    registro.observar("rutealo_http_respuesta_bytes", etiquetas, medicion.bytes)
+    registro.observar("rutealo_http_mongo_comandos", etiquetas, sum(medicion.mongo.values()))
+    if medicion.llm_llamadas:
+        registro.observar("rutealo_http_llm_segundos", etiquetas, medicion.llm_s)
+
+    if METRICAS_LENTA_MS and duracion * 1000 >= METRICAS_LENTA_MS:
+        logger.warning(f"🐢 Petición lenta: {medicion.desglose(duracion)}")
+    return duracion
+
+
+def registrar_llm(segundos):
+    """Una llamada al modelo que tardó `segundos` (incluida la espera al límite de concurrencia)."""
+    registro.contar("rutealo_llm_llamadas_total")
+    registro.contar("rutealo_llm_segundos_total", valor=segundos)
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.llm_llamadas += 1
+        medicion.llm_s += segundos
+
+
+def registrar_etapa(nombre, segundos):
+    """Duración de una etapa del pipeline (ver utils.log_execution_time)."""
+    registro.observar("rutealo_etapa_segundos", (("etapa", nombre),), segundos)
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.etapas[nombre] += segundos
+
+
+class EscuchaMongo(monitoring.CommandListener):
+    """Cuenta los comandos de MongoDB del proceso y de la petición en curso."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._registrar(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        registro.contar("rutealo_mongo_errores_total", (("comando", event.command_name),))
+        self._registrar(event.command_name, event.duration_micros / 1e6)
+
+    @staticmethod
+    def _registrar(comando, segundos):
+        etiquetas = (("comando", comando),)
+        registro.contar("rutealo_mongo_comandos_total", etiquetas)
+        registro.contar("rutealo_mongo_segundos_total", etiquetas, segundos)
+        medicion = _medicion_actual.get()
+        if medicion is not None:
+            medicion.mongo[comando] += 1
+            medicion.mongo_s += segundos
+
+
+escucha_mongo = EscuchaMongo()
+_escucha_registrada = False
+_lock_registro = threading.Lock()
+
+
+def registrar_escucha_mongo():
+    """Registra EscuchaMongo una vez por proceso (vale para los clientes creados después)."""
+    global _escucha_registrada
+    with _lock_registro:
+        if not _escucha_registrada:
+            monitoring.register(escucha_mongo)
+            _escucha_registrada = True
+
+
+# --- Middleware WSGI ---
+
+class _CuerpoMedido:
+    """Itera el cuerpo de la respuesta contando bytes; la medición termina con el último byte o con close()."""
+
+    def __init__(self, cuerpo, medicion):
+        self._cuerpo = cuerpo
+        self._medicion = medicion
+
+    def __iter__(self):
+        for parte in self._cuerpo:
+            self._medicion.bytes += len(parte)
+            yield parte
+        finalizar_medicion(self._medicion)
+
+    def close(self):
+        try:
+            if hasattr(self._cuerpo, "close"):
+                self._cuerpo.close()
+        finally:
+            finalizar_medicion(self._medicion)
+
+
+class MiddlewareMetricas:
+    """WSGI: mide cada petición desde que llega hasta que se envía el último byte."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        medicion = iniciar_medicion(environ.get("REQUEST_METHOD", ""), environ.get("PATH_INFO", ""))
+
+        def start_response_medido(estado, cabeceras, exc_info=None):
+            medicion.estado = int(estado.split(" ", 1)[0])
+            return start_response(estado, cabeceras, exc_info)
+
+        try:
+            cuerpo = self.wsgi_app(environ, start_response_medido)
+        except BaseException:
+            finalizar_medicion(medicion)
+            raise
+        return _CuerpoMedido(cuerpo, medicion)
+
+
+def instalar_metricas(app):
+    """Envuelve la app Flask con MiddlewareMetricas y etiqueta cada petición con su regla."""
+    from flask import request
+
+    registrar_escucha_mongo()
+    app.wsgi_app = MiddlewareMetricas(app.wsgi_app)
+
+    @app.before_request
+    def _etiquetar_endpoint():
+        medicion = _medicion_actual.get()
+        if medicion is not None and request.url_rule is not None:
+            medicion.endpoint = request.url_rule.rule
+
+
+def exponer_metricas():
+    """Métricas del registro más el estado del control de admisión, en texto de Prometheus."""
+    from src.admision import estadisticas_admision
+
+    admision = estadisticas_admision()
+    lineas = [
+        "# HELP rutealo_admision_en_ejecucion Generaciones de ruta en curso en el proceso",
+        "# TYPE rutealo_admision_en_ejecucion gauge",
+        f"rutealo_admision_en_ejecucion {admision['en_ejecucion']}",
+        "# HELP rutealo_admision_en_cola Generaciones de ruta esperando en la cola",
+        "# TYPE rutealo_admision_en_cola gauge",
+        f"rutealo_admision_en_cola {admision['en_cola']}",
+        "# HELP rutealo_admision_max_cola_observada Profundidad máxima de la cola observada",
+        "# TYPE rutealo_admision_max_cola_observada gauge",
+        f"rutealo_admision_max_cola_observada {admision['max_cola_observada']}",
+        "# HELP rutealo_admision_admitidos_total Generaciones de ruta admitidas",
+        "# TYPE rutealo_admision_admitidos_total counter",
+        f"rutealo_admision_admitidos_total {admision['admitidos']}",
+        "# HELP rutealo_admision_rechazados_total Generaciones de ruta rechazadas con 429",
+        "# TYPE rutealo_admision_rechazados_total counter",
+    ]
+    for motivo in ("usuario", "cola", "espera"):
+        lineas.append(f'rutealo_admision_rechazados_total{{motivo="{motivo}"}} {admision[f"rechazados_{motivo}"]}')
+    return registro.exponer() + "\n".join(lineas) + "\n"
@@ -0,0 +1,372 @@
+"""
+Analítica materializada de cohortes para los tableros de docentes.
+
+Cada cohorte (usuario_perfil.cohorte; "sin_cohorte" si no tiene) tiene un
+documento en `analitica_cohortes` con contadores del estado ZDP vigente de
+sus estudiantes:
+
+    {
+        "_id": "2025-I",
+        "estudiantes": 120,
+        "suma_puntaje": 6480.5,
+        "por_nivel": {"Aplicar": {"evaluados": 118, "competentes": 73}, ...},
+        "nivel_actual": {"Comprender": 40, ...},
+        "zona_proxima": {"Aplicar+Analizar": 35, "ninguna": 4, ...},
+        "fecha_actualizacion": datetime,
+    }
+
+Hay además un documento "_global" con la suma de todas las cohortes.
+
+Mantenimiento:
+- Incremental: en cada evaluación nueva se resta el aporte del perfil anterior
+  y se suma el del nuevo con un único `$inc` (registrar_evaluacion; por lotes,
+  registrar_evaluaciones agrupa un `$inc` por cohorte). Re-evaluar
+  a un estudiante no lo cuenta dos veces.
+- Cambio de cohorte: asignar_cohorte mueve el aporte del estudiante de la
+  cohorte anterior a la nueva (el documento global no cambia).
+- Completo: reconstruir_analitica recalcula todo desde usuario_perfil con un
+  pipeline de agregación (útil tras migraciones o re-evaluaciones masivas).
+
+La lectura (obtener_analitica) es un find_one por _id: su costo no depende
+del tamaño de la cohorte.
+
+Uso:
+    python -m src.models.analitica_cohortes --reconstruir
+"""
+
+import re
+import sys
+import json
+import argparse
+import datetime
+import logging
+from collections import Counter, defaultdict
+
+from pymongo import ReplaceOne, UpdateOne, ReturnDocument
+
+from src.config import DB_NAME, COLS
+from src.database import get_database
+
+logger = logging.getLogger(__name__)
+
+COL_ANALITICA = "analitica_cohortes"
+
+SIN_COHORTE = "sin_cohorte"
+GLOBAL = "_global"
+SIN_NIVEL = "sin_nivel"
+ZONA_VACIA = "ninguna"
+
+# Nombres de cohorte admitidos: "2025-I", "Grupo A", "sec_3"...
+PATRON_COHORTE = re.compile(r"^[\w\- ]{1,50}$")
+
+# Campos de usuario_perfil necesarios para calcular el aporte de un estudiante
+PROYECCION_PERFIL = {
+    "_id": 0,
+    "cohorte": 1,
+    "competencias": 1,
+    "nivel_actual": 1,
+    "zona_proxima": 1,
+    "puntaje_ultimo_examen": 1,
+}
+
+
+# --- APORTE DE UN ESTUDIANTE ---
+
+
+def cohorte_de(perfil):
+    return (perfil or {}).get("cohorte") or SIN_COHORTE
+
+
+def clave_zona(zona_proxima):
+    """Clave estable para una zona próxima: "Aplicar+Analizar" o "ninguna"."""
+    return "+".join(zona_proxima) if zona_proxima else ZONA_VACIA
+
+
+def contribucion(perfil):
+    """
+    Contadores (en notación de puntos) que aporta un perfil evaluado.
+
+    Un perfil sin competencias (nunca evaluado) no aporta nada.
+    """
+    if not perfil or not perfil.get("competencias"):
+        return Counter()
+
+    aporte = Counter(
+        {
+            "estudiantes": 1,
+            "suma_puntaje": perfil.get("puntaje_ultimo_examen") or 0,
+            f"nivel_actual.{perfil.get('nivel_actual') or SIN_NIVEL}": 1,
+            f"zona_proxima.{clave_zona(perfil.get('zona_proxima'))}": 1,
+        }
+    )
+    for nivel, datos in perfil["competencias"].items():
+        aporte[f"por_nivel.{nivel}.evaluados"] += 1
+        aporte[f"por_nivel.{nivel}.competentes"] += 1 if datos.get("competente") else 0
+    return aporte
+
+
+def _deltas(*pares):
+    """
+    Incrementos por documento de analítica al pasar cada perfil previo al nuevo.
+
+    Recibe uno o varios pares (perfil_previo, perfil_nuevo); los aportes de
+    todos se suman en un solo incremento por cohorte.
+    """
+    deltas = defaultdict(Counter)
+    for perfil_previo, perfil_nuevo in pares:
+        for signo, perfil in ((-1, perfil_previo), (1, perfil_nuevo)):
+            for clave, valor in contribucion(perfil).items():
+                for destino in (cohorte_de(perfil), GLOBAL):
+                    deltas[destino][clave] += signo * valor
+    # Quitar incrementos nulos (p.ej. el mismo nivel antes y después)
+    return {
+        destino: {k: v for k, v in incs.items() if v}
+        for destino, incs in deltas.items()
+        if any(incs.values())
+    }
+
+
+def registrar_evaluacion(db, perfil_previo, perfil_nuevo):
+    """
+    Aplica al documento de la cohorte (y al global) el cambio de un perfil.
+
+    Args:
+        db: Base de datos
+        perfil_previo (dict|None): Perfil antes de la evaluación (campos de PROYECCION_PERFIL)
+        perfil_nuevo (dict): Perfil después de la evaluación
+    """
+    registrar_evaluaciones(db, [(perfil_previo, perfil_nuevo)])
+
+
+def registrar_evaluaciones(db, pares):
+    """
+    Variante por lotes de registrar_evaluacion: un único bulk_write con un
+    `$inc` por cohorte afectada, sin importar cuántos perfiles cambiaron.
+
+    Args:
+        db: Base de datos
+        pares (list): Pares (perfil_previo, perfil_nuevo)
+
+    Returns:
+        int: Documentos de analítica actualizados
+    """
+    ahora = datetime.datetime.utcnow()
+    operaciones = [
+        UpdateOne(
+            {"_id": destino},
+            {"$inc": incrementos, "$set": {"fecha_actualizacion": ahora}},
+            upsert=True,
+        )
+        for destino, incrementos in _deltas(*pares).items()
+    ]
+    if operaciones:
+        db[COL_ANALITICA].bulk_write(operaciones, ordered=False)
+    return len(operaciones)
+
+
+def normalizar_cohorte(cohorte):
+    """
+    Valida un nombre de cohorte; retorna None si viene vacío (sin cohorte).
+
+    Raises:
+        ValueError: Si el nombre no es válido o es reservado
+    """
+    cohorte = (cohorte or "").strip()
+    if not cohorte:
+        return None
+    if not PATRON_COHORTE.match(cohorte) or cohorte in (SIN_COHORTE, GLOBAL):
+        raise ValueError("Cohorte inválida: usa hasta 50 letras, números, espacios, '-' o '_'")
+    return cohorte
+
+
+def asignar_cohorte(db, usuario, cohorte):
+    """
+    Asigna (o quita, con None) la cohorte de un estudiante y mueve su aporte
+    a la analítica de la cohorte nueva.
+
+    Args:
+        db: Base de datos
+        usuario (str): Usuario del estudiante
+        cohorte (str|None): Cohorte nueva (ya normalizada)
+
+    Returns:
+        dict|None: {"cohorte_anterior", "cohorte"} o None si el usuario no existe
+    """
+    cambio = {"$set": {"cohorte": cohorte}} if cohorte else {"$unset": {"cohorte": ""}}
+    previo = db[COLS["PERFIL"]].find_one_and_update(
+        {"usuario": usuario}, cambio, projection=PROYECCION_PERFIL, return_document=ReturnDocument.BEFORE
+    )
+    if previo is None:
+        return None
+
+    nuevo = {**previo, "cohorte": cohorte}
+    if cohorte_de(previo) != cohorte_de(nuevo):
+        registrar_evaluacion(db, previo, nuevo)
+        logger.info(f"👥 {usuario}: cohorte {cohorte_de(previo)} -> {cohorte_de(nuevo)}")
+    return {"cohorte_anterior": previo.get("cohorte"), "cohorte": cohorte}
+
+
+# --- RECONSTRUCCIÓN COMPLETA ---
+
+# Cada perfil evaluado se convierte en una lista de pares {k, v} equivalente a
+# contribucion(); luego se suman por (cohorte, k).
+_CLAVE_ZONA_AGG = {
+    "$cond": [
+        {"$gt": [{"$size": {"$ifNull": ["$zona_proxima", []]}}, 0]},
+        {
+            "$reduce": {
+                "input": "$zona_proxima",
+                "initialValue": "",
+                "in": {
+                    "$concat": ["$$value", {"$cond": [{"$eq": ["$$value", ""]}, "", "+"]}, "$$this"]
+                },
+            }
+        },
+        ZONA_VACIA,
+    ]
+}
+
+PIPELINE_RECONSTRUCCION = [
+    {"$match": {"competencias": {"$exists": True, "$ne": {}}}},
+    {
+        "$project": {
+            "_id": 0,
+            "cohorte": {"$ifNull": ["$cohorte", SIN_COHORTE]},
+            "aportes": {
+                "$concatArrays": [
+                    [
+                        {"k": "estudiantes", "v": 1},
+                        {"k": "suma_puntaje", "v": {"$ifNull": ["$puntaje_ultimo_examen", 0]}},
+                        {"k": {"$concat": ["nivel_actual.", {"$ifNull": ["$nivel_actual", SIN_NIVEL]}]}, "v": 1},
+                        {"k": {"$concat": ["zona_proxima.", _CLAVE_ZONA_AGG]}, "v": 1},
+                    ],
+                    {
+                        "$map": {
+                            "input": {"$objectToArray": "$competencias"},
+                            "as": "c",
+                            "in": {"k": {"$concat": ["por_nivel.", "$$c.k", ".evaluados"]}, "v": 1},
+                        }
+                    },
+                    {
+                        "$map": {
+                            "input": {"$objectToArray": "$competencias"},
+                            "as": "c",
+                            "in": {
+                                "k": {"$concat": ["por_nivel.", "$$c.k", ".competentes"]},
+                                "v": {"$cond": [{"$eq": ["$$c.v.competente", True]}, 1, 0]},
+                            },
+                        }
+                    },
+                ]
+            },
+        }
+    },
+    {"$unwind": "$aportes"},
+    {"$group": {"_id": {"cohorte": "$cohorte", "k": "$aportes.k"}, "v": {"$sum": "$aportes.v"}}},
+]
+
+
+def _anidar(contadores):
+    """{"por_nivel.Aplicar.evaluados": 3} -> {"por_nivel": {"Aplicar": {"evaluados": 3}}}"""
+    doc = {}
+    for clave, valor in contadores.items():
+        actual = doc
+        *padres, hoja = clave.split(".")
+        for parte in padres:
+            actual = actual.setdefault(parte, {})
+        actual[hoja] = valor
+    return doc
+
+
+def reconstruir_analitica(db=None):
+    """
+    Recalcula todos los documentos de analítica desde usuario_perfil.
+
+    Returns:
+        dict: Cohortes reconstruidas y documentos obsoletos eliminados
+    """
+    if db is None:
+        db = get_database(DB_NAME)
+
+    por_cohorte = defaultdict(Counter)
+    for fila in db[COLS["PERFIL"]].aggregate(PIPELINE_RECONSTRUCCION, allowDiskUse=True):
+        cohorte, clave = fila["_id"]["cohorte"], fila["_id"]["k"]
+        por_cohorte[cohorte][clave] += fila["v"]
+        por_cohorte[GLOBAL][clave] += fila["v"]
+
+    ahora = datetime.datetime.utcnow()
+    col = db[COL_ANALITICA]
+    operaciones = [
+        ReplaceOne({"_id": cohorte}, {**_anidar(contadores), "fecha_actualizacion": ahora}, upsert=True)
+        for cohorte, contadores in por_cohorte.items()
+    ]
+    if operaciones:
+        col.bulk_write(operaciones, ordered=False)
+    eliminados = col.delete_many({"_id": {"$nin": list(por_cohorte)}}).deleted_count
+
+    logger.info(f"📊 Analítica reconstruida: {len(por_cohorte) - (1 if por_cohorte else 0)} cohortes")
+    return {"cohortes": sorted(c for c in por_cohorte if c != GLOBAL), "eliminados": eliminados}
+
+
+# --- LECTURA ---
+
+
+def formatear_analitica(doc):
+    """Convierte los contadores en las distribuciones que muestra el tablero."""
+    estudiantes = doc.get("estudiantes", 0)
+    por_nivel = {}
+    for nivel, datos in (doc.get("por_nivel") or {}).items():
+        evaluados = datos.get("evaluados", 0)
+        if evaluados <= 0:
+            continue
+        competentes = datos.get("competentes", 0)
+        por_nivel[nivel] = {
+            "evaluados": evaluados,
+            "competentes": competentes,
+            "porcentaje_competentes": round(competentes / evaluados * 100, 2),
+        }
+
+    zonas = {z: n for z, n in (doc.get("zona_proxima") or {}).items() if n > 0}
+    zona_mas_comun = max(sorted(zonas), key=zonas.get) if zonas else None
+
+    return {
+        "cohorte": doc["_id"],
+        "estudiantes": estudiantes,
+        "promedio_puntaje": round(doc.get("suma_puntaje", 0) / estudiantes, 2) if estudiantes else 0,
+        "por_nivel": por_nivel,
+        "nivel_actual": {n: c for n, c in (doc.get("nivel_actual") or {}).items() if c > 0},
+        "zona_proxima": zonas,
+        "zona_proxima_mas_comun": zona_mas_comun.split("+") if zona_mas_comun not in (None, ZONA_VACIA) else [],
+        "fecha_actualizacion": doc.get("fecha_actualizacion"),
+    }
+
+
+def obtener_analitica(db, cohorte):
+    """Analítica de una cohorte (GLOBAL para todas). None si no existe."""
+    doc = db[COL_ANALITICA].find_one({"_id": cohorte})
+    return formatear_analitica(doc) if doc else None
+
+
+def listar_cohortes(db):
+    """Cohortes con analítica y su número de estudiantes."""
+    docs = db[COL_ANALITICA].find({"_id": {"$ne": GLOBAL}}, {"estudiantes": 1})
+    return sorted(({"cohorte": d["_id"], "estudiantes": d.get("estudiantes", 0)} for d in docs), key=lambda c: c["cohorte"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analítica materializada de cohortes")
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcular todo desde usuario_perfil")
+    parser.add_argument("--cohorte", help="Mostrar la analítica de una cohorte")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = get_database(DB_NAME)
+    if args.reconstruir:
+        print(json.dumps(reconstruir_analitica(db), indent=2, ensure_ascii=False))
+    if args.cohorte:
+        print(json.dumps(obtener_analitica(db, args.cohorte), indent=2, ensure_ascii=False, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
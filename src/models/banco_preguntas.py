@@ -0,0 +1,411 @@
+"""
+Banco de preguntas reutilizable con estadísticas por ítem.
+
+Las preguntas generadas por el modelo (examen diagnóstico y tests de nivel)
+se guardan en `banco_preguntas` en lugar de descartarse en la siguiente
+regeneración. Cada ítem lleva:
+
+- `huellas_contenido`: huellas (SHA-1) de los documentos de los que se generó.
+  Un ítem es elegible para un usuario mientras todos sus documentos fuente
+  sigan presentes y sin cambios en su material (usuarios con el mismo
+  documento comparten ítems).
+- `nivel_bloom` y `tipo` ("diagnostico" o "test_nivel").
+- `estadisticas`: contadores que se actualizan con `$inc` desde
+  `respuestas_procesadas` de cada evaluación. De ellos se derivan el p-valor
+  (proporción de aciertos) y la discriminación (correlación punto-biserial
+  entre acertar el ítem y el resto del examen).
+- `exposiciones`: veces que el ítem se incluyó en un examen o test.
+
+El ensamblado toma primero ítems del banco (menos expuestos primero, sin los
+de discriminación negativa) y llama al modelo solo si faltan preguntas o hay
+documentos que ningún ítem cubre.
+
+Con MIN_RESPUESTAS_ESTADISTICAS respuestas un ítem queda calibrado: de su
+p-valor y su discriminación se derivan los parámetros 2PL (`irt_a`, `irt_b`)
+que usa el diagnóstico adaptativo, cuyo pool son los ítems diagnósticos del
+banco sobre el material del estudiante (pool_diagnostico). Si el material ya
+tiene un pool calibrado, el pool adaptativo se limita a los ítems calibrados.
+El examen diagnóstico fijo conserva siempre su cuota por nivel: se puntúa
+con el umbral de competencia de EvaluadorZDP.
+"""
+
+import copy
+import math
+import hashlib
+import datetime
+import logging
+from collections import defaultdict
+from statistics import NormalDist
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+COL_BANCO = "banco_preguntas"
+
+TIPO_DIAGNOSTICO = "diagnostico"
+TIPO_TEST_NIVEL = "test_nivel"
+
+# Tamaño del examen diagnóstico ensamblado y cuota por nivel (de Recordar a Crear)
+TAMANO_EXAMEN_INICIAL = 12
+MINIMO_EXAMEN_INICIAL = 10
+CUOTA_DIAGNOSTICO = {"Recordar": 3, "Comprender": 3, "Aplicar": 2, "Analizar": 2, "Evaluar": 1, "Crear": 1}
+ORDEN_NIVELES = list(CUOTA_DIAGNOSTICO)
+
+# Respuestas mínimas antes de confiar en la discriminación de un ítem
+MIN_RESPUESTAS_ESTADISTICAS = 20
+
+# Con al menos MIN_POOL_CALIBRADO ítems calibrados el diagnóstico adaptativo
+# usa solo ítems calibrados (el examen fijo no cambia)
+MIN_POOL_CALIBRADO = 12
+
+# Tamaño máximo del pool del diagnóstico adaptativo
+MAX_POOL_ADAPTATIVO = 60
+
+# Rangos de los parámetros 2PL derivados (escala logística, θ ~ N(0, 1))
+RANGO_IRT_A = (0.3, 3.0)
+RANGO_IRT_B = (-4.0, 4.0)
+ESCALA_LOGISTICA = 1.702
+
+# Campos de la pregunta que no forman parte de su identidad
+CAMPOS_VOLATILES = ("id", "realizado", "banco_id")
+
+
+# --- HUELLAS ---
+
+
+def huellas_documentos(unidades):
+    """Huella SHA-1 por documento a partir del texto de sus unidades (acepta strings)."""
+    por_documento = defaultdict(hashlib.sha1)
+    for unidad in unidades:
+        if isinstance(unidad, str):
+            unidad = {"texto": unidad}
+        por_documento[unidad.get("documento") or ""].update(unidad["texto"].encode("utf-8"))
+    return {doc: h.hexdigest() for doc, h in por_documento.items()}
+
+
+def huella_pregunta(pregunta):
+    """Identidad de una pregunta: enunciado, opciones y respuesta normalizados."""
+    partes = [pregunta.get("pregunta", ""), *pregunta.get("opciones", []), pregunta.get("respuesta_correcta", "")]
+    normalizado = "\n".join(" ".join(str(p).lower().split()) for p in partes)
+    return hashlib.sha1(normalizado.encode("utf-8")).hexdigest()
+
+
+# --- ESTADÍSTICAS ---
+
+
+def estadisticas_item(item):
+    """p-valor y discriminación (punto-biserial) a partir de los contadores."""
+    e = item.get("estadisticas") or {}
+    n = e.get("respuestas", 0)
+    if not n:
+        return {"respuestas": 0, "p_valor": None, "discriminacion": None}
+
+    sx, sy, syy, sxy = e.get("aciertos", 0), e.get("suma_resto", 0.0), e.get("suma_resto2", 0.0), e.get("suma_resto_acierto", 0.0)
+    varianza_x = n * sx - sx * sx
+    varianza_y = n * syy - sy * sy
+    discriminacion = None
+    if varianza_x > 0 and varianza_y > 1e-12:
+        discriminacion = round((n * sxy - sx * sy) / math.sqrt(varianza_x * varianza_y), 4)
+    return {"respuestas": n, "p_valor": round(sx / n, 4), "discriminacion": discriminacion}
+
+
+def _acotar(valor, rango):
+    return min(max(valor, rango[0]), rango[1])
+
+
+def parametros_irt(item):
+    """
+    Parámetros 2PL {"irt_a", "irt_b"} de un ítem calibrado; {} si aún no lo está.
+
+    Aproximación clásica (Lord, 1980) con habilidad normal estándar: la
+    punto-biserial se convierte en biserial r_b, y
+        b = -Φ⁻¹(p) / r_b        a = 1.702 · r_b / √(1 - r_b²)
+    """
+    stats = estadisticas_item(item)
+    if stats["respuestas"] < MIN_RESPUESTAS_ESTADISTICAS or not stats["discriminacion"] or stats["discriminacion"] <= 0:
+        return {}
+
+    normal = NormalDist()
+    p = _acotar(stats["p_valor"], (0.02, 0.98))
+    z = normal.inv_cdf(p)
+    biserial = _acotar(stats["discriminacion"] * math.sqrt(p * (1 - p)) / normal.pdf(z), (0.05, 0.95))
+    a = ESCALA_LOGISTICA * biserial / math.sqrt(1 - biserial * biserial)
+    return {
+        "irt_a": round(_acotar(a, RANGO_IRT_A), 3),
+        "irt_b": round(_acotar(-z / biserial, RANGO_IRT_B), 3),
+    }
+
+
+def registrar_respuestas(db, respuestas_procesadas):
+    """
+    Actualiza los contadores de los ítems del banco respondidos en una evaluación.
+
+    Para la discriminación se usa el resto del examen (proporción de aciertos
+    en las demás preguntas) como criterio.
+    """
+    return registrar_respuestas_lote(db, [respuestas_procesadas])
+
+
+def _operaciones_respuestas(respuestas_procesadas):
+    """Un `$inc` por ítem del banco respondido en una evaluación."""
+    respondidas = [r for r in respuestas_procesadas if r.get("banco_id")]
+    total = len(respuestas_procesadas)
+    aciertos_total = sum(1 for r in respuestas_procesadas if r.get("es_correcto"))
+    operaciones = []
+    for r in respondidas:
+        x = 1 if r.get("es_correcto") else 0
+        resto = (aciertos_total - x) / (total - 1) if total > 1 else 0.0
+        operaciones.append(
+            UpdateOne(
+                {"_id": r["banco_id"]},
+                {
+                    "$inc": {
+                        "estadisticas.respuestas": 1,
+                        "estadisticas.aciertos": x,
+                        "estadisticas.suma_resto": resto,
+                        "estadisticas.suma_resto2": resto * resto,
+                        "estadisticas.suma_resto_acierto": resto * x,
+                    }
+                },
+            )
+        )
+    return operaciones
+
+
+def registrar_respuestas_lote(db, evaluaciones):
+    """
+    Actualiza los contadores del banco para varias evaluaciones en un solo bulk_write.
+
+    Args:
+        db: Base de datos
+        evaluaciones (list): Listas `respuestas_procesadas`, una por evaluación
+    """
+    operaciones = [op for respuestas in evaluaciones for op in _operaciones_respuestas(respuestas)]
+    if not operaciones:
+        return 0
+    db[COL_BANCO].bulk_write(operaciones, ordered=False)
+    return len(operaciones)
+
+
+# --- LECTURA Y ESCRITURA DEL BANCO ---
+
+
+def _es_usable(item):
+    """Descarta ítems con suficientes respuestas y discriminación negativa."""
+    stats = estadisticas_item(item)
+    if stats["respuestas"] < MIN_RESPUESTAS_ESTADISTICAS or stats["discriminacion"] is None:
+        return True
+    return stats["discriminacion"] >= 0
+
+
+def items_elegibles(db, tipo, huellas, nivel=None):
+    """Ítems del banco cuyos documentos fuente están todos en `huellas`."""
+    disponibles = set(huellas)
+    if not disponibles:
+        return []
+    consulta = {"tipo": tipo, "huellas_contenido": {"$in": list(disponibles)}}
+    if nivel:
+        consulta["nivel_bloom"] = nivel
+    return [
+        item
+        for item in db[COL_BANCO].find(consulta)
+        if set(item["huellas_contenido"]) <= disponibles and _es_usable(item)
+    ]
+
+
+def guardar_preguntas(db, tipo, preguntas, huellas, nivel=None):
+    """
+    Agrega preguntas generadas al banco (idempotente por huella de pregunta).
+
+    Returns:
+        list: Ítems guardados (con _id), en el orden recibido
+    """
+    ahora = datetime.datetime.utcnow()
+    items, operaciones = [], []
+    for pregunta in preguntas:
+        contenido = {k: v for k, v in pregunta.items() if k not in CAMPOS_VOLATILES}
+        nivel_item = nivel or contenido.get("nivel_bloom_evaluado") or "Recordar"
+        item = {
+            "_id": huella_pregunta(contenido),
+            "tipo": tipo,
+            "nivel_bloom": nivel_item,
+            "huellas_contenido": sorted(set(huellas)),
+            "pregunta": contenido,
+        }
+        operaciones.append(
+            UpdateOne(
+                {"_id": item["_id"]},
+                {
+                    "$setOnInsert": {
+                        **{k: v for k, v in item.items() if k != "_id"},
+                        "estadisticas": {"respuestas": 0, "aciertos": 0},
+                        "exposiciones": 0,
+                        "fecha_creacion": ahora,
+                    }
+                },
+                upsert=True,
+            )
+        )
+        items.append(item)
+    if operaciones:
+        db[COL_BANCO].bulk_write(operaciones, ordered=False)
+    return items
+
+
+def _registrar_exposicion(db, items):
+    ids = [item["_id"] for item in items]
+    if ids:
+        db[COL_BANCO].update_many(
+            {"_id": {"$in": ids}},
+            {"$inc": {"exposiciones": 1}, "$set": {"ultima_exposicion": datetime.datetime.utcnow()}},
+        )
+
+
+def _seleccionar(candidatos, cantidad, excluir=()):
+    """Los menos expuestos primero (control de exposición)."""
+    vistos = set(excluir)
+    elegidos = []
+    for item in sorted(candidatos, key=lambda i: (i.get("exposiciones", 0), i["_id"])):
+        if item["_id"] not in vistos and len(elegidos) < cantidad:
+            elegidos.append(item)
+            vistos.add(item["_id"])
+    return elegidos
+
+
+def _como_pregunta(item, numero):
+    pregunta = copy.deepcopy(item["pregunta"])
+    pregunta["id"] = numero
+    pregunta["banco_id"] = item["_id"]
+    return pregunta
+
+
+def _documentos_sin_cubrir(huellas, items):
+    cubiertas = {h for item in items for h in item["huellas_contenido"]}
+    return set(huellas) - cubiertas
+
+
+# --- ENSAMBLADO ---
+
+
+def ensamblar_examen_inicial(db, contenido_total, unidades, generar):
+    """
+    Examen diagnóstico desde el banco; genera con el modelo solo si faltan
+    preguntas o hay documentos nuevos sin cubrir.
+
+    Args:
+        db: Base de datos
+        contenido_total (str): Texto completo del usuario
+        unidades (list): Unidades {"texto", "documento", "nivel"}
+        generar (callable): generar(contenido_total, unidades) -> examen con el
+            formato de web_utils.generar_examen_inicial
+
+    Returns:
+        dict: {"EXAMENES": {"EXAMEN_INICIAL": [...]}} o {} si no hay preguntas
+    """
+    huellas = list(huellas_documentos(unidades).values())
+    candidatos = items_elegibles(db, TIPO_DIAGNOSTICO, huellas)
+
+    if len(candidatos) < MINIMO_EXAMEN_INICIAL or _documentos_sin_cubrir(huellas, candidatos):
+        generado = generar(contenido_total, unidades)
+        nuevas = generado.get("EXAMENES", {}).get("EXAMEN_INICIAL", []) if generado else []
+        if nuevas:
+            nuevos = guardar_preguntas(db, TIPO_DIAGNOSTICO, nuevas, huellas)
+            ids = {c["_id"] for c in candidatos}
+            # Las recién generadas cubren el material nuevo: van primero
+            candidatos = [dict(i, exposiciones=-1) for i in nuevos if i["_id"] not in ids] + candidatos
+            logger.info(f"🏦 Banco: {len(nuevas)} preguntas diagnósticas nuevas")
+        else:
+            logger.info("🏦 Banco: no se generaron preguntas nuevas; se usa lo disponible")
+    else:
+        logger.info(f"🏦 Banco: examen diagnóstico ensamblado sin llamar al modelo ({len(candidatos)} disponibles)")
+
+    por_nivel = defaultdict(list)
+    for item in candidatos:
+        por_nivel[item["nivel_bloom"]].append(item)
+
+    elegidos = []
+    for nivel in ORDEN_NIVELES:
+        elegidos += _seleccionar(por_nivel[nivel], CUOTA_DIAGNOSTICO[nivel])
+    elegidos += _seleccionar(candidatos, TAMANO_EXAMEN_INICIAL - len(elegidos), excluir=[i["_id"] for i in elegidos])
+
+    if not elegidos:
+        return {}
+    elegidos.sort(key=lambda i: ORDEN_NIVELES.index(i["nivel_bloom"]) if i["nivel_bloom"] in ORDEN_NIVELES else 0)
+    _registrar_exposicion(db, elegidos)
+    return {"EXAMENES": {"EXAMEN_INICIAL": [_como_pregunta(item, n) for n, item in enumerate(elegidos, start=1)]}}
+
+
+def pool_diagnostico(db, preguntas_examen, huellas=None, maximo=MAX_POOL_ADAPTATIVO):
+    """
+    Pool del diagnóstico adaptativo: las preguntas del examen más los ítems
+    diagnósticos del banco sobre el mismo material, con `irt_a`/`irt_b` en
+    los calibrados. Con MIN_POOL_CALIBRADO calibrados o más, solo esos.
+
+    Args:
+        db: Base de datos
+        preguntas_examen (list): Preguntas del examen inicial del usuario
+        huellas (list|None): Huellas del material; si faltan (exámenes
+            anteriores) se usan las de los ítems del banco del examen
+        maximo (int): Tamaño máximo del pool
+
+    Returns:
+        list: Preguntas con "id" único (las del banco se numeran tras las del examen)
+    """
+    ids_banco = [p["banco_id"] for p in preguntas_examen if p.get("banco_id")]
+    en_examen = {item["_id"]: item for item in db[COL_BANCO].find({"_id": {"$in": ids_banco}})} if ids_banco else {}
+    if huellas is None:
+        huellas = {h for item in en_examen.values() for h in item["huellas_contenido"]}
+
+    pool = []
+    for pregunta in preguntas_examen:
+        item = en_examen.get(pregunta.get("banco_id"))
+        pool.append({**pregunta, **(parametros_irt(item) if item else {})})
+
+    # Calibrados primero, luego los menos expuestos
+    extra = [
+        (parametros_irt(item), item)
+        for item in items_elegibles(db, TIPO_DIAGNOSTICO, huellas)
+        if item["_id"] not in en_examen
+    ]
+    extra.sort(key=lambda par: (not par[0], par[1].get("exposiciones", 0), par[1]["_id"]))
+
+    siguiente = max((p["id"] for p in pool if isinstance(p.get("id"), int)), default=0) + 1
+    calibrados = sum(1 for p in pool if "irt_b" in p) + sum(1 for irt, _ in extra if irt)
+    if calibrados >= MIN_POOL_CALIBRADO:
+        pool = [p for p in pool if "irt_b" in p]
+        extra = [(irt, item) for irt, item in extra if irt]
+    for numero, (irt, item) in enumerate(extra[: max(maximo - len(pool), 0)], start=siguiente):
+        pool.append({**_como_pregunta(item, numero), **irt})
+    return pool
+
+
+def ensamblar_tests_nivel(db, nivel_bloom, textos_nivel, cantidad, generar):
+    """
+    Tests de un nivel desde el banco; el generador solo produce las que faltan.
+
+    Args:
+        generar (callable): generar(num_preguntas) -> list de preguntas nuevas
+    """
+    huellas = list(huellas_documentos(textos_nivel).values())
+    candidatos = items_elegibles(db, TIPO_TEST_NIVEL, huellas, nivel_bloom)
+    sin_cubrir = _documentos_sin_cubrir(huellas, candidatos)
+
+    faltan = max(cantidad - len(candidatos), 1 if sin_cubrir else 0)
+    nuevos = []
+    if faltan:
+        nuevas = generar(faltan) or []
+        nuevos = guardar_preguntas(db, TIPO_TEST_NIVEL, nuevas, huellas, nivel_bloom)
+        logger.info(f"🏦 Banco {nivel_bloom}: {len(candidatos)} reutilizadas, {len(nuevas)} generadas")
+
+    ids_nuevos = {i["_id"] for i in nuevos}
+    elegidos = nuevos[:cantidad] + _seleccionar(
+        [c for c in candidatos if c["_id"] not in ids_nuevos], cantidad - min(len(nuevos), cantidad)
+    )
+    _registrar_exposicion(db, elegidos)
+    tests = []
+    for numero, item in enumerate(elegidos, start=1):
+        pregunta = _como_pregunta(item, numero)
+        pregunta["realizado"] = False
+        tests.append(pregunta)
+    return tests
@@ -0,0 +1,162 @@
+"""
+Caché semántica de respuestas del chatbot tutor.
+
+Muchos estudiantes con el mismo material hacen la misma pregunta con otras
+palabras ("¿qué es la normalización?", "explícame la normalización"). Cada
+respuesta generada se guarda en `respuestas_tutor` bajo la clave
+
+    (huella del material, idioma, firma de la pregunta)
+
+- Huella: firma del material indexado del usuario (indice_tutor.huella_material);
+  dos estudiantes que subieron los mismos archivos comparten respuestas.
+- Firma: términos normalizados de la pregunta (sin tildes, plurales,
+  stopwords ni palabras interrogativas) más su MinHash, dividido en bandas
+  LSH. Las bandas permiten encontrar candidatas con un índice multikey; la
+  similitud final es el Jaccard exacto de los términos, que debe superar
+  TUTOR_RESPUESTAS_UMBRAL.
+
+Las preguntas que dependen de la conversación ("dame otro ejemplo de eso")
+no tienen firma: su respuesta no sirve fuera de esa conversación.
+
+Las respuestas expiran con un índice TTL (TUTOR_RESPUESTAS_HORAS) y las
+métricas de aciertos se acumulan por proceso (estadisticas_cache_respuestas).
+"""
+
+import re
+import random
+import hashlib
+import datetime
+import logging
+from pymongo import ASCENDING
+from src.config import COLS, TUTOR_RESPUESTAS_UMBRAL, TUTOR_RESPUESTAS_HORAS
+from src.database import ensure_ttl_index
+from src.models.indice_tutor import terminos
+from src.utils import ContadoresProceso
+
+logger = logging.getLogger(__name__)
+
+COL_RESPUESTAS = COLS["RESPUESTAS"]
+
+# MinHash de 32 permutaciones en 8 bandas de 4 filas (candidatas desde Jaccard ~0.5)
+NUM_PERMUTACIONES = 32
+FILAS_POR_BANDA = 4
+_PRIMO = (1 << 61) - 1
+_rng = random.Random(1729)
+_COEFICIENTES = [(_rng.randrange(1, _PRIMO), _rng.randrange(0, _PRIMO)) for _ in range(NUM_PERMUTACIONES)]
+
+# Formas de preguntar que no cambian el tema (se normalizan igual que las preguntas)
+PALABRAS_PREGUNTA = set(terminos(
+    "explica explícame explicar significa significado define definición dime puedes podrías "
+    "quiero saber concepto entiendo entender ayuda ayúdame "
+    "what explain means meaning definition tell about please could would"
+))
+
+# Palabras que remiten a mensajes anteriores de la conversación
+MARCADORES_CONTEXTO = {
+    "eso", "esto", "ese", "esa", "este", "esta", "anterior", "otro", "otra", "ejemplo", "ejemplos", "mas", "más",
+    "that", "this", "it", "another", "example", "examples", "previous", "more",
+}
+_RE_PALABRA = re.compile(r"\w+", re.UNICODE)
+
+_estadisticas = ContadoresProceso()
+
+
+def asegurar_indices(db, horas=TUTOR_RESPUESTAS_HORAS):
+    """Índice de búsqueda por bandas y TTL de las respuestas."""
+    coleccion = db[COL_RESPUESTAS]
+    coleccion.create_index([("huella", ASCENDING), ("idioma", ASCENDING), ("bandas", ASCENDING)])
+    segundos = int(horas * 3600)
+    ensure_ttl_index(coleccion, "fecha_creacion", segundos, "ttl_respuestas")
+
+
+def _hash(termino):
+    return int.from_bytes(hashlib.blake2b(termino.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(conjunto):
+    """Firma MinHash (NUM_PERMUTACIONES valores) de un conjunto de términos."""
+    hashes = [_hash(t) for t in conjunto]
+    return [min((a * h + b) % _PRIMO for h in hashes) for a, b in _COEFICIENTES]
+
+
+def firmar_pregunta(pregunta):
+    """
+    Firma de una pregunta, o None si no tiene términos de contenido o
+    depende de la conversación.
+
+    Returns:
+        dict: {"terminos": [...] ordenados, "bandas": ["<banda>:<hash>", ...]}
+    """
+    if MARCADORES_CONTEXTO.intersection(_RE_PALABRA.findall(pregunta.lower())):
+        return None
+    conjunto = {t for t in terminos(pregunta) if t not in PALABRAS_PREGUNTA}
+    if not conjunto:
+        return None
+    firma = minhash(conjunto)
+    bandas = [
+        f"{i}:{hashlib.md5(repr(firma[i:i + FILAS_POR_BANDA]).encode()).hexdigest()[:12]}"
+        for i in range(0, NUM_PERMUTACIONES, FILAS_POR_BANDA)
+    ]
+    return {"terminos": sorted(conjunto), "bandas": bandas}
+
+
+def jaccard(a, b):
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def buscar_respuesta(db, huella, idioma, firma, umbral=TUTOR_RESPUESTAS_UMBRAL):
+    """
+    Respuesta guardada para una pregunta similar, o None.
+
+    Returns:
+        dict | None: {"respuesta": str, "similitud": float}
+    """
+    candidatas = db[COL_RESPUESTAS].find(
+        {"huella": huella, "idioma": idioma, "bandas": {"$in": firma["bandas"]}},
+        {"terminos": 1, "respuesta": 1},
+    )
+    mejor = max(
+        ((jaccard(firma["terminos"], c.get("terminos", [])), c) for c in candidatas),
+        key=lambda par: par[0],
+        default=(0.0, None),
+    )
+    if mejor[1] is None or mejor[0] < umbral:
+        _estadisticas.sumar(fallos=1)
+        return None
+    _estadisticas.sumar(aciertos=1)
+    return {"respuesta": mejor[1]["respuesta"], "similitud": round(mejor[0], 3)}
+
+
+def guardar_respuesta(db, huella, idioma, firma, respuesta):
+    """Guarda la respuesta de una pregunta (una sola entrada por términos exactos)."""
+    db[COL_RESPUESTAS].update_one(
+        {"huella": huella, "idioma": idioma, "terminos": firma["terminos"]},
+        {
+            "$setOnInsert": {
+                "bandas": firma["bandas"],
+                "respuesta": respuesta,
+                "fecha_creacion": datetime.datetime.utcnow(),
+            }
+        },
+        upsert=True,
+    )
+    _estadisticas.sumar(guardadas=1)
+
+
+def registrar_omision():
+    """Pregunta que no pasa por la caché (sin firma o sin material indexado)."""
+    _estadisticas.sumar(omitidas=1)
+
+
+def estadisticas_cache_respuestas():
+    """Métricas del proceso: aciertos, fallos, guardadas, omitidas y tasa de aciertos."""
+    datos = {clave: 0 for clave in ("aciertos", "fallos", "guardadas", "omitidas")}
+    datos.update(_estadisticas.copia())
+    consultas = datos["aciertos"] + datos["fallos"]
+    datos["tasa_aciertos"] = round(datos["aciertos"] / consultas, 4) if consultas else 0.0
+    return datos
+
+
+def reiniciar_estadisticas_cache_respuestas():
+    _estadisticas.limpiar()
@@ -2,22 +2,234 @@
 Chatbot tutor inteligente con contexto de ruta y soporte multilingüe.
 
 Utiliza Google Gemini para generar respuestas pedagógicas basadas en:
-- Material de la ruta del estudiante
-- Flashcards y exámenes generados
+- Fragmentos del material, flashcards y tests relevantes a cada pregunta
 - Historial conversacional
 - Idioma seleccionado (Español, Inglés, Quechua)
+
+El contexto fijo de cada ruta (nombre, temas y nivel ZDP) se cachea por
+(ruta_id, usuario) con límite LRU y TTL, junto con el prompt base de cada
+idioma, que se construye una sola vez por contexto. Las escrituras sobre la
+ruta o los materiales del usuario llaman a invalidar_contexto_tutor; como
+eso solo alcanza al proceso que escribe, cada acierto compara además la
+versión de la ruta (fecha_actualizacion) con una lectura proyectada.
+
+El material no se copia entero en el prompt: cada pregunta se acompaña solo
+de los k fragmentos que devuelve el índice BM25 (src/models/indice_tutor.py).
+
+Antes de llamar al modelo, conversar busca una respuesta ya generada para
+una pregunta similar sobre el mismo material e idioma
+(src/models/cache_respuestas.py).
+
+Las conversaciones se guardan en el servidor (src/models/sesiones_chat.py):
+TutorVirtual.conversar envía al modelo el prompt base, el resumen de los
+mensajes antiguos y solo los turnos recientes, y reutiliza la sesión de chat
+de Gemini mientras la conversación no se pliegue ni cambie en otro proceso.
+conversar_stream hace lo mismo entregando la respuesta a medida que el
+modelo la genera, y conversar_async (servidor ASGI, src/asgi.py) espera al
+modelo y a MongoDB sin ocupar un hilo.
 """
 
-import google.generativeai as genai
-from src.config import GOOGLE_API_KEY_CHATBOT
-from src.database import get_database
+from src.config import (
+    GOOGLE_API_KEY_CHATBOT,
+    TUTOR_CACHE_TTL,
+    TUTOR_CACHE_MAX,
+    TUTOR_PASAJES_K,
+    CHAT_SESION_HORAS,
+    CHAT_CACHE_MAX,
+    ModeloPerezoso,
+    get_llm_backend,
+)
+from src.database import get_database, get_async_database
+from src.models.indice_tutor import buscar_pasajes, huella_material
+from src.models.cache_respuestas import (
+    firmar_pregunta,
+    buscar_respuesta,
+    guardar_respuesta,
+    registrar_omision,
+)
+from src.models.sesiones_chat import (
+    crear_sesion,
+    obtener_sesion,
+    registrar_intercambio,
+    requiere_plegado,
+    plegar_turnos,
+    crear_sesion_async,
+    obtener_sesion_async,
+    registrar_intercambio_async,
+    plegar_turnos_async,
+    prompt_resumen,
+    resumen_extractivo,
+)
+from src.utils import CacheLRU
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Configurar Gemini con clave especializada para chatbot
-genai.configure(api_key=GOOGLE_API_KEY_CHATBOT)
-model = genai.GenerativeModel('gemini-1.5-pro')
+# Contexto por (ruta_id, usuario): {"contexto": dict, "prompts": {idioma: str}}
+_cache_contextos = CacheLRU(max_elementos=TUTOR_CACHE_MAX, ttl_segundos=TUTOR_CACHE_TTL)
+
+# Sesión de Gemini por conversación: {"chat", "version", "prompt"}
+_cache_chats = CacheLRU(max_elementos=CHAT_CACHE_MAX, ttl_segundos=CHAT_SESION_HORAS * 3600)
+
+# Hilos que preparan tutores en segundo plano (precargar_tutor)
+TUTOR_PRECARGA_HILOS = 4
+
+# Respuesta del modelo al prompt base en la historia inicial de cada chat
+ACUSES_PROMPT = {
+    'es': "Entendido. Estoy listo para ayudarte con tu ruta.",
+    'en': "Understood. I'm ready to help you with your learning path.",
+    'qu': "Allinmi. Ñanniykipi yanapanaypaq listo kani.",
+}
+
+# Encabezados de los fragmentos recuperados y de la pregunta en cada mensaje
+ENCABEZADOS_PASAJES = {
+    'es': ("📚 FRAGMENTOS RELEVANTES DE TU MATERIAL", "💬 PREGUNTA DEL ESTUDIANTE"),
+    'en': ("📚 RELEVANT EXCERPTS FROM YOUR MATERIAL", "💬 STUDENT QUESTION"),
+    'qu': ("📚 MATERIALNIYKIMANTA RAKIKUNA", "💬 YACHAQPA TAPUYNIN"),
+}
+
+
+def invalidar_contexto_tutor(usuario=None, ruta_id=None):
+    """
+    Descarta contextos cacheados del tutor.
+
+    Sin argumentos limpia todo; con usuario descarta todas sus rutas; con
+    usuario y ruta_id solo esa ruta.
+    """
+    if usuario is None:
+        _cache_contextos.limpiar()
+    elif ruta_id is not None:
+        _cache_contextos.invalidar((str(ruta_id), usuario))
+    else:
+        _cache_contextos.invalidar_donde(lambda clave: clave[1] == usuario)
+
+
+# Campos que cambian con cualquier escritura de la ruta (versión del contexto cacheado)
+PROYECCION_VERSION_RUTA = {"_id": 0, "fecha_actualizacion": 1, "metadatos_ruta.fecha_evaluacion_zdp": 1}
+
+
+def _filtro_ruta(ruta_id, usuario):
+    from bson import ObjectId
+
+    try:
+        filtro_id = ObjectId(ruta_id)
+    except Exception:
+        # Si no es un ObjectId válido, buscar como string
+        filtro_id = ruta_id
+    return {"_id": filtro_id, "usuario": usuario}
+
+
+def _version_ruta(ruta):
+    """Versión de la ruta: la generación escribe fecha_actualizacion y el examen inicial fecha_evaluacion_zdp."""
+    return (ruta.get("fecha_actualizacion"), (ruta.get("metadatos_ruta") or {}).get("fecha_evaluacion_zdp"))
+
+
+def _contexto_desde_ruta(ruta):
+    # Temas de la ruta: el frente de las flashcards (el contenido se recupera por pregunta)
+    flashcards = ruta.get('estructura_ruta', {}).get('flashcards', {})
+    temas = []
+    for nivel, cards in flashcards.items():
+        for card in cards:
+            frente = card.get('frente', '') or card.get('pregunta', '')
+            if frente:
+                temas.append(f"• {frente[:120]}")
+
+    return {
+        "nombre_ruta": ruta.get('nombre_ruta') or ruta.get('nombre', 'Ruta sin nombre'),
+        "descripcion": ruta.get('descripcion', ''),
+        "temas": temas[:20],
+        "nivel_actual": ruta.get('metadatos_ruta', {}).get('nivel_actual_estudiante'),
+        "zona_proxima": ruta.get('metadatos_ruta', {}).get('zona_proxima', [])
+    }
+
+
+def cargar_contexto_ruta(db, ruta_id, usuario):
+    """Arma el contexto fijo del tutor desde la ruta (sin caché)."""
+    ruta = db.rutas_aprendizaje.find_one(_filtro_ruta(ruta_id, usuario))
+    if not ruta:
+        logger.warning(f"No se encontró ruta con ID: {ruta_id}")
+        return None
+    return _contexto_desde_ruta(ruta)
+
+
+def obtener_contexto_tutor(db, ruta_id, usuario):
+    """
+    Entrada cacheada {"contexto", "prompts", "version"} de una ruta, o None si no existe.
+
+    invalidar_contexto_tutor solo alcanza a la caché de este proceso: con
+    varios workers la ruta puede cambiar en otro, así que cada acierto
+    compara la versión guardada con un find_one proyectado de la ruta.
+    Las rutas inexistentes no se cachean (pueden crearse en otro proceso).
+    """
+    clave = (str(ruta_id), usuario)
+    filtro = _filtro_ruta(ruta_id, usuario)
+    entrada = _cache_contextos.obtener(clave)
+    if entrada is not CacheLRU.AUSENTE:
+        vigente = db.rutas_aprendizaje.find_one(filtro, PROYECCION_VERSION_RUTA)
+        if vigente is not None and _version_ruta(vigente) == entrada["version"]:
+            return entrada
+        _cache_contextos.invalidar(clave)
+
+    generacion = _cache_contextos.generacion()
+    ruta = db.rutas_aprendizaje.find_one(filtro)
+    if not ruta:
+        logger.warning(f"No se encontró ruta con ID: {ruta_id}")
+        return None
+    entrada = {"contexto": _contexto_desde_ruta(ruta), "prompts": {}, "version": _version_ruta(ruta)}
+    _cache_contextos.guardar(clave, entrada, generacion)
+    return entrada
+
+
+def _crear_modelo_chatbot():
+    """Configura Gemini con la clave especializada para chatbot."""
+    if get_llm_backend() == "fake":
+        from src.models.modelo_falso import crear_modelo_falso
+
+        return crear_modelo_falso()
+
+    import google.generativeai as genai
+
+    genai.configure(api_key=GOOGLE_API_KEY_CHATBOT)
+    return genai.GenerativeModel('gemini-1.5-pro')
+
+
+# Se inicializa en el primer mensaje, no al importar el módulo
+model = ModeloPerezoso(_crear_modelo_chatbot)
+
+_pool_precarga = None
+_lock_pool_precarga = threading.Lock()
+
+
+def precargar_tutor(ruta_id, usuario, idioma='es'):
+    """
+    Crea el TutorVirtual en segundo plano: contexto, prompt base y huella del material.
+
+    Permite preparar el tutor mientras se hace otro trabajo de la misma
+    petición (p. ej. transcribir la pregunta por voz).
+
+    Returns:
+        Future: Resuelve al TutorVirtual listo para conversar
+    """
+    global _pool_precarga
+    if _pool_precarga is None:
+        with _lock_pool_precarga:
+            if _pool_precarga is None:
+                _pool_precarga = ThreadPoolExecutor(max_workers=TUTOR_PRECARGA_HILOS, thread_name_prefix="precarga_tutor")
+
+    def crear():
+        tutor = TutorVirtual(ruta_id, usuario, idioma)
+        if tutor.contexto_ruta:
+            try:
+                tutor._prompt_base()
+                tutor._huella_material()
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo precargar el tutor: {e}")
+        return tutor
+
+    return _pool_precarga.submit(crear)
 
 
 class TutorVirtual:
@@ -36,62 +248,31 @@ class TutorVirtual:
         self.usuario = usuario
         self.idioma = idioma
         self.db = get_database()
+        self._entrada = None
+        self._huella = None
         self.contexto_ruta = self._cargar_contexto()
-    
+
     def _cargar_contexto(self):
-        """Carga material de la ruta desde MongoDB"""
+        """Contexto de la ruta (desde la caché por ruta y usuario)"""
         try:
-            # Buscar ruta por ID (string o ObjectId)
-            from bson import ObjectId
-            try:
-                ruta = self.db.rutas_aprendizaje.find_one({"_id": ObjectId(self.ruta_id)})
-            except:
-                # Si falla, intentar como string
-                ruta = self.db.rutas_aprendizaje.find_one({"_id": self.ruta_id})
-            
-            if not ruta:
-                logger.warning(f"No se encontró ruta con ID: {self.ruta_id}")
-                return None
-            
-            # Extraer conceptos clave de flashcards
-            flashcards = ruta.get('estructura_ruta', {}).get('flashcards', {})
-            conceptos = []
-            for nivel, cards in flashcards.items():
-                for card in cards:
-                    frente = card.get('frente', '') or card.get('pregunta', '')
-                    reverso = card.get('reverso', '') or card.get('respuesta', '')
-                    if frente and reverso:
-                        conceptos.append(f"• {frente}: {reverso[:200]}")  # Primeros 200 chars
-            
-            # Extraer preguntas de exámenes para contexto
-            examenes = ruta.get('estructura_ruta', {}).get('examenes', {})
-            preguntas_exam = []
-            for nivel, exams in examenes.items():
-                for exam in exams[:3]:  # Solo primeras 3 por nivel
-                    pregunta = exam.get('pregunta', '')
-                    if pregunta:
-                        preguntas_exam.append(f"• {pregunta}")
-            
-            # Material crudo original del usuario
-            materiales = list(self.db.materiales_crudos.find({"usuario": self.usuario}).limit(5))
-            contenido_raw = "\n\n".join([
-                f"--- {m.get('nombre_archivo', 'Material')} ---\n{m.get('contenido_extraido', '')[:3000]}"
-                for m in materiales
-            ])
-            
-            return {
-                "nombre_ruta": ruta.get('nombre', 'Ruta sin nombre'),
-                "descripcion": ruta.get('descripcion', ''),
-                "conceptos_clave": conceptos[:25],  # Top 25
-                "preguntas_ejemplo": preguntas_exam[:15],  # Top 15
-                "material_original": contenido_raw[:8000],  # Primeros 8k chars
-                "nivel_actual": ruta.get('metadatos_ruta', {}).get('nivel_actual_estudiante'),
-                "zona_proxima": ruta.get('metadatos_ruta', {}).get('zona_proxima', [])
-            }
-        
+            self._entrada = obtener_contexto_tutor(self.db, self.ruta_id, self.usuario)
         except Exception as e:
             logger.error(f"Error cargando contexto de ruta: {e}")
-            return None
+            self._entrada = None
+        return self._entrada["contexto"] if self._entrada else None
+
+    def _prompt_base(self):
+        """Prompt del idioma actual; se construye una vez por contexto cacheado"""
+        constructores = {
+            'es': self._prompt_espanol,
+            'en': self._prompt_ingles,
+            'qu': self._prompt_quechua
+        }
+        idioma = self.idioma if self.idioma in constructores else 'es'
+        prompts = self._entrada["prompts"]
+        if idioma not in prompts:
+            prompts[idioma] = constructores[idioma]()
+        return prompts[idioma]
     
     def responder(self, mensaje, historial=[]):
         """
@@ -107,14 +288,8 @@ class TutorVirtual:
         if not self.contexto_ruta:
             return "❌ Error: No pude cargar el contexto de tu ruta. Por favor, verifica que la ruta exista."
         
-        # Construir prompt según idioma
-        prompts_idioma = {
-            'es': self._prompt_espanol(),
-            'en': self._prompt_ingles(),
-            'qu': self._prompt_quechua()
-        }
-        
-        prompt_base = prompts_idioma.get(self.idioma, prompts_idioma['es'])
+        # Prompt según idioma (cacheado junto con el contexto)
+        prompt_base = self._prompt_base()
         
         # Agregar historial para contexto conversacional
         historial_texto = ""
@@ -128,8 +303,7 @@ class TutorVirtual:
 
 {historial_texto}
 
-💬 PREGUNTA ACTUAL DEL ESTUDIANTE:
-{mensaje}
+{self._mensaje_con_pasajes(mensaje)}
 
 Responde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}.
 """
@@ -140,12 +314,226 @@ Responde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}.
         
         except Exception as e:
             logger.error(f"Error generando respuesta del chatbot: {e}")
-            errores_idioma = {
-                'es': f"❌ Lo siento, tuve un problema al generar la respuesta: {str(e)}",
-                'en': f"❌ Sorry, I had a problem generating the response: {str(e)}",
-                'qu': f"❌ Pampachakuway, huk sasachakuy karqan: {str(e)}"
-            }
-            return errores_idioma.get(self.idioma, errores_idioma['es'])
+            return self._mensaje_error(e)
+
+    def conversar(self, mensaje, sesion_id=None, historial=None):
+        """
+        Responde dentro de una conversación guardada en el servidor.
+
+        Si `sesion_id` no existe (o expiró) se crea una sesión nueva, sembrada
+        con `historial` cuando el cliente lo envía.
+
+        Args:
+            mensaje (str): Pregunta del estudiante
+            sesion_id (str): Sesión devuelta por la llamada anterior
+            historial (list): Mensajes previos del cliente (solo para sesiones nuevas)
+
+        Returns:
+            dict: {"respuesta": str, "sesion_id": str, "exito": bool, "desde_cache": bool}
+        """
+        for evento in self.conversar_stream(mensaje, sesion_id, historial, stream=False):
+            if evento["tipo"] == "fin":
+                return {clave: evento[clave] for clave in ("respuesta", "sesion_id", "exito", "desde_cache")}
+
+    def conversar_stream(self, mensaje, sesion_id=None, historial=None, stream=True):
+        """
+        Igual que conversar, pero entrega la respuesta por partes a medida que el modelo la genera.
+
+        Yields:
+            dict: {"tipo": "fragmento", "texto": str} por cada parte y, al final,
+                  {"tipo": "fin", "respuesta", "sesion_id", "exito", "desde_cache"}
+        """
+        if not self.contexto_ruta:
+            yield {"tipo": "fin", "respuesta": self.responder(mensaje), "sesion_id": sesion_id, "exito": False, "desde_cache": False}
+            return
+
+        sesion = obtener_sesion(self.db, sesion_id, self.usuario, self.ruta_id) if sesion_id else None
+        if sesion is None:
+            sesion = crear_sesion(self.db, self.usuario, self.ruta_id, historial)
+
+        respuesta, clave_cache = self._buscar_respuesta_cacheada(mensaje)
+        desde_cache = respuesta is not None
+        if desde_cache:
+            yield {"tipo": "fragmento", "texto": respuesta}
+        else:
+            partes, completa = [], False
+            try:
+                entrada = self._chat_de_sesion(sesion)
+                chat, consulta = entrada["chat"], self._mensaje_con_pasajes(mensaje)
+                generada = chat.send_message(consulta, stream=True) if stream else chat.send_message(consulta)
+                for parte in (generada if stream else [generada]):
+                    if parte.text:
+                        partes.append(parte.text)
+                        yield {"tipo": "fragmento", "texto": parte.text}
+                completa = True
+            except Exception as e:
+                logger.error(f"Error generando respuesta del chatbot: {e}")
+                yield {"tipo": "fin", "respuesta": self._mensaje_error(e), "sesion_id": sesion["_id"], "exito": False, "desde_cache": False}
+                return
+            finally:
+                if not completa:
+                    # Error o cliente desconectado a mitad de respuesta: la sesión de Gemini quedó incompleta
+                    _cache_chats.invalidar(sesion["_id"])
+            respuesta = "".join(partes)
+            self._guardar_respuesta_cacheada(clave_cache, respuesta)
+
+        registrar_intercambio(self.db, sesion, mensaje, respuesta)
+        if not desde_cache:
+            # Con una respuesta cacheada la sesión de Gemini no la vio: se reconstruye en el próximo mensaje
+            entrada["version"] = sesion["version"]
+        if requiere_plegado(sesion) and plegar_turnos(self.db, sesion, self._resumir):
+            # El próximo mensaje arranca una sesión de Gemini desde el resumen
+            _cache_chats.invalidar(sesion["_id"])
+
+        yield {"tipo": "fin", "respuesta": respuesta, "sesion_id": sesion["_id"], "exito": True, "desde_cache": desde_cache}
+
+    async def conversar_async(self, mensaje, sesion_id=None, historial=None):
+        """
+        Igual que conversar, pero sin ocupar un hilo mientras espera al modelo.
+
+        La sesión se lee y escribe con el cliente asíncrono de MongoDB y la
+        respuesta se pide con send_message_async. La caché de respuestas y los
+        fragmentos BM25 (casi siempre en memoria) corren en el pool por defecto.
+
+        Returns:
+            dict: {"respuesta": str, "sesion_id": str, "exito": bool, "desde_cache": bool}
+        """
+        if not self.contexto_ruta:
+            respuesta = await asyncio.to_thread(self.responder, mensaje)
+            return {"respuesta": respuesta, "sesion_id": sesion_id, "exito": False, "desde_cache": False}
+
+        db = get_async_database()
+        sesion = await obtener_sesion_async(db, sesion_id, self.usuario, self.ruta_id) if sesion_id else None
+        if sesion is None:
+            sesion = await crear_sesion_async(db, self.usuario, self.ruta_id, historial)
+
+        respuesta, clave_cache = await asyncio.to_thread(self._buscar_respuesta_cacheada, mensaje)
+        desde_cache = respuesta is not None
+        if not desde_cache:
+            completa = False
+            try:
+                entrada = self._chat_de_sesion(sesion)
+                consulta = await asyncio.to_thread(self._mensaje_con_pasajes, mensaje)
+                respuesta = (await entrada["chat"].send_message_async(consulta)).text
+                completa = True
+            except Exception as e:
+                logger.error(f"Error generando respuesta del chatbot: {e}")
+                return {"respuesta": self._mensaje_error(e), "sesion_id": sesion["_id"], "exito": False, "desde_cache": False}
+            finally:
+                if not completa:
+                    _cache_chats.invalidar(sesion["_id"])
+            await asyncio.to_thread(self._guardar_respuesta_cacheada, clave_cache, respuesta)
+
+        await registrar_intercambio_async(db, sesion, mensaje, respuesta)
+        if not desde_cache:
+            entrada["version"] = sesion["version"]
+        if requiere_plegado(sesion) and await plegar_turnos_async(db, sesion, self._resumir_async):
+            _cache_chats.invalidar(sesion["_id"])
+
+        return {"respuesta": respuesta, "sesion_id": sesion["_id"], "exito": True, "desde_cache": desde_cache}
+
+    def _buscar_respuesta_cacheada(self, mensaje):
+        """(respuesta cacheada o None, clave para guardar la nueva respuesta o None)"""
+        try:
+            firma = firmar_pregunta(mensaje)
+            huella = self._huella_material() if firma else None
+            if not huella:
+                registrar_omision()
+                return None, None
+            clave = (huella, firma)
+            encontrada = buscar_respuesta(self.db, huella, self.idioma, firma)
+            return (encontrada["respuesta"] if encontrada else None), clave
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo consultar la caché de respuestas del tutor: {e}")
+            return None, None
+
+    def _guardar_respuesta_cacheada(self, clave, respuesta):
+        if clave is None:
+            return
+        try:
+            huella, firma = clave
+            guardar_respuesta(self.db, huella, self.idioma, firma, respuesta)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar la respuesta del tutor en caché: {e}")
+
+    def _huella_material(self):
+        """Huella del material del usuario, leída una vez por tutor (el material puede cambiar en otro proceso)"""
+        if self._huella is None:
+            self._huella = huella_material(self.db, self.usuario)
+        return self._huella
+
+    def _chat_de_sesion(self, sesion):
+        """Sesión de Gemini en memoria si sigue al día; si no, una nueva desde la sesión guardada"""
+        prompt = self._prompt_base()
+        entrada = _cache_chats.obtener(sesion["_id"])
+        if entrada is not CacheLRU.AUSENTE and entrada["version"] == sesion["version"] and entrada["prompt"] is prompt:
+            return entrada
+
+        instrucciones = prompt
+        if sesion.get("resumen"):
+            instrucciones += f"\n\n📝 RESUMEN DE LA CONVERSACIÓN HASTA AHORA:\n{sesion['resumen']}"
+        instrucciones += f"\n\nResponde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}."
+
+        historia = [
+            {"role": "user", "parts": [instrucciones]},
+            {"role": "model", "parts": [ACUSES_PROMPT.get(self.idioma, ACUSES_PROMPT['es'])]},
+        ]
+        for turno in sesion.get("turnos", []):
+            rol = "user" if turno["tipo"] == "usuario" else "model"
+            if historia[-1]["role"] == rol:
+                historia[-1]["parts"].append(turno["texto"])
+            else:
+                historia.append({"role": rol, "parts": [turno["texto"]]})
+        if historia[-1]["role"] == "user":
+            # Pregunta sin respuesta (historial sembrado): el nuevo mensaje la reemplaza
+            historia.pop()
+
+        entrada = {"chat": model.start_chat(history=historia), "version": sesion["version"], "prompt": prompt}
+        _cache_chats.guardar(sesion["_id"], entrada)
+        return entrada
+
+    def _mensaje_con_pasajes(self, mensaje):
+        """Pregunta precedida de los fragmentos del índice más relevantes para ella"""
+        try:
+            pasajes = buscar_pasajes(self.db, self.usuario, mensaje, k=TUTOR_PASAJES_K)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron recuperar fragmentos para el tutor: {e}")
+            pasajes = []
+        titulo_pasajes, titulo_pregunta = ENCABEZADOS_PASAJES.get(self.idioma, ENCABEZADOS_PASAJES['es'])
+        if not pasajes:
+            return f"{titulo_pregunta}:\n{mensaje}"
+
+        fragmentos = "\n".join(f"[{i}] ({p['etiqueta']}) {p['texto']}" for i, p in enumerate(pasajes, start=1))
+        return f"{titulo_pasajes}:\n{fragmentos}\n\n{titulo_pregunta}:\n{mensaje}"
+
+    def _resumir(self, resumen, turnos):
+        """Nuevo resumen de la conversación; sin modelo disponible usa el extractivo"""
+        try:
+            texto = model.generate_content(prompt_resumen(resumen, turnos)).text.strip()
+            if texto:
+                return texto
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo resumir la conversación con el modelo: {e}")
+        return resumen_extractivo(resumen, turnos)
+
+    async def _resumir_async(self, resumen, turnos):
+        """_resumir con generate_content_async"""
+        try:
+            texto = (await model.generate_content_async(prompt_resumen(resumen, turnos))).text.strip()
+            if texto:
+                return texto
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo resumir la conversación con el modelo: {e}")
+        return resumen_extractivo(resumen, turnos)
+
+    def _mensaje_error(self, error):
+        """Mensaje de error en el idioma del tutor"""
+        errores_idioma = {
+            'es': f"❌ Lo siento, tuve un problema al generar la respuesta: {str(error)}",
+            'en': f"❌ Sorry, I had a problem generating the response: {str(error)}",
+            'qu': f"❌ Pampachakuway, huk sasachakuy karqan: {str(error)}"
+        }
+        return errores_idioma.get(self.idioma, errores_idioma['es'])
     
     def _nombre_idioma(self):
         """Retorna nombre del idioma"""
@@ -155,8 +543,7 @@ Responde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}.
     def _prompt_espanol(self):
         """Prompt en español"""
         ctx = self.contexto_ruta
-        conceptos_texto = "\n".join(ctx['conceptos_clave']) if ctx['conceptos_clave'] else "• No hay conceptos cargados aún"
-        preguntas_texto = "\n".join(ctx['preguntas_ejemplo'][:10]) if ctx['preguntas_ejemplo'] else "• No hay preguntas cargadas"
+        temas_texto = "\n".join(ctx['temas']) if ctx['temas'] else "• No hay temas cargados aún"
         
         return f"""Eres un TUTOR PEDAGÓGICO EXPERTO, amable y motivador que ayuda a estudiantes universitarios.
 
@@ -166,14 +553,10 @@ Responde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}.
 • Nivel Bloom actual: {ctx['nivel_actual'] or 'Por determinar'}
 • Zona de Desarrollo Próximo (ZDP): {', '.join(ctx['zona_proxima']) if ctx['zona_proxima'] else 'Por evaluar'}
 
-📚 CONCEPTOS CLAVE DE LA RUTA (flashcards):
-{conceptos_texto}
-
-❓ PREGUNTAS DE EVALUACIÓN (ejemplos del examen):
-{preguntas_texto}
+📚 TEMAS DE LA RUTA (flashcards):
+{temas_texto}
 
-📄 MATERIAL ORIGINAL DEL ESTUDIANTE (extracto):
-{ctx['material_original']}
+📄 Cada pregunta llega acompañada de los FRAGMENTOS RELEVANTES del material, flashcards y tests del estudiante.
 
 🎯 TU ROL COMO TUTOR:
 1. Responde SOLO preguntas relacionadas con el material de la ruta
@@ -187,13 +570,12 @@ Responde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}.
 6. Usa emojis ocasionalmente para hacer la conversación más amigable 💡
 7. IMPORTANTE: Responde SIEMPRE en ESPAÑOL claro y académico
 
-⚠️ NO inventes información que no esté en el material. Si no sabes algo, admítelo honestamente."""
+⚠️ NO inventes información que no esté en los fragmentos del material. Si no sabes algo, admítelo honestamente."""
     
     def _prompt_ingles(self):
         """Prompt en inglés"""
         ctx = self.contexto_ruta
-        conceptos_texto = "\n".join(ctx['conceptos_clave']) if ctx['conceptos_clave'] else "• No concepts loaded yet"
-        preguntas_texto = "\n".join(ctx['preguntas_ejemplo'][:10]) if ctx['preguntas_ejemplo'] else "• No questions loaded"
+        temas_texto = "\n".join(ctx['temas']) if ctx['temas'] else "• No topics loaded yet"
         
         return f"""You are an EXPERT PEDAGOGICAL TUTOR, friendly and motivating, helping university students.
 
@@ -203,14 +585,10 @@ Responde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}.
 • Current Bloom level: {ctx['nivel_actual'] or 'To be determined'}
 • Zone of Proximal Development (ZPD): {', '.join(ctx['zona_proxima']) if ctx['zona_proxima'] else 'To be evaluated'}
 
-📚 KEY CONCEPTS FROM THE PATH (flashcards):
-{conceptos_texto}
-
-❓ ASSESSMENT QUESTIONS (exam examples):
-{preguntas_texto}
+📚 TOPICS OF THE PATH (flashcards):
+{temas_texto}
 
-📄 STUDENT'S ORIGINAL MATERIAL (excerpt):
-{ctx['material_original']}
+📄 Each question comes with the RELEVANT EXCERPTS from the student's material, flashcards and tests.
 
 🎯 YOUR ROLE AS TUTOR:
 1. Answer ONLY questions related to the path material
@@ -224,12 +602,12 @@ Responde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}.
 6. Use emojis occasionally to make the conversation more engaging 💡
 7. IMPORTANT: ALWAYS respond in clear academic ENGLISH
 
-⚠️ DO NOT invent information that isn't in the material. If you don't know something, admit it honestly."""
+⚠️ DO NOT invent information that isn't in the material excerpts. If you don't know something, admit it honestly."""
     
     def _prompt_quechua(self):
         """Prompt en quechua (con respaldo en español)"""
         ctx = self.contexto_ruta
-        conceptos_texto = "\n".join(ctx['conceptos_clave'][:15]) if ctx['conceptos_clave'] else "• Mana yachaykunaqa kanchu"
+        temas_texto = "\n".join(ctx['temas'][:15]) if ctx['temas'] else "• Mana yachaykunaqa kanchu"
         
         return f"""Qamqa YACHACHIQ EXPERTOM kanki, sumaq sunquyuq, yanapakunapaq universidadmanta yachaqkunata.
 
@@ -240,10 +618,9 @@ Responde de forma pedagógica, clara y motivadora en {self._nombre_idioma()}.
 • Zona de Desarrollo Próximo: {', '.join(ctx['zona_proxima']) if ctx['zona_proxima'] else 'Mana yachasqa'}
 
 📚 HATUN YACHAYKUNAA (flashcards):
-{conceptos_texto}
+{temas_texto}
 
-📄 YACHAQPA MATERIALNIN:
-{ctx['material_original'][:2000]}
+📄 Sapa tapuywanmi hamun yachaqpa MATERIALNINMANTA RAKIKUNA (fragmentos relevantes).
 
 🎯 LLAMKAYNIKIQA:
 1. Kutichiyta SAPALLA tapuykunata materialwan tupachisqa
@@ -0,0 +1,345 @@
+"""
+Diagnóstico adaptativo (CAT) para el examen inicial.
+
+En lugar de responder las 10-12 preguntas del examen y puntuarlas al final,
+el estudiante responde una pregunta a la vez:
+
+1. La habilidad θ se modela con un modelo logístico de dos parámetros (2PL):
+   P(correcta | θ) = 1 / (1 + exp(-a (θ - b))).
+   Cada pregunta trae su discriminación `a` y dificultad `b` (campos
+   "irt_a"/"irt_b" si está calibrada; si no, valores por nivel Bloom).
+   El pool son las preguntas del examen inicial más los ítems diagnósticos
+   del banco sobre el mismo material (banco_preguntas.pool_diagnostico),
+   calibrados a partir de sus estadísticas de respuesta.
+2. Tras cada respuesta se recalcula la posterior de θ sobre una grilla
+   (prior normal estándar) y su estimación EAP con su desviación estándar.
+3. La siguiente pregunta es la de máxima información de Fisher en θ estimado.
+4. Se detiene cuando la estimación converge: desviación posterior por debajo
+   de ERROR_OBJETIVO o probabilidad posterior del nivel Bloom estimado por
+   encima de CONFIANZA_NIVEL (tras MIN_PREGUNTAS), o al agotar el banco.
+
+El nivel Bloom se deriva de θ: un nivel es competente si un estudiante con
+esa habilidad acertaría una pregunta típica del nivel con probabilidad
+>= UMBRAL_COMPETENCIA. El resultado final tiene la misma forma que
+EvaluadorZDP.evaluar_examen y se guarda por la misma vía (perfil, analítica).
+
+El estado de cada sesión vive en la colección `diagnostico_adaptativo`; una
+sesión en curso se retoma mientras el examen inicial no cambie.
+"""
+
+import math
+import datetime
+import logging
+
+import numpy as np
+
+from src.models.banco_preguntas import pool_diagnostico
+from src.models.evaluacion_zdp import (
+    EvaluadorZDP,
+    JERARQUIA_BLOOM,
+    UMBRAL_COMPETENCIA,
+    PESOS_NIVEL,
+    generar_recomendaciones,
+)
+
+logger = logging.getLogger(__name__)
+
+COL_SESIONES = "diagnostico_adaptativo"
+
+# Parámetros por defecto de una pregunta no calibrada: dificultad creciente por nivel
+DISCRIMINACION_DEFECTO = 2.0
+DIFICULTAD_POR_NIVEL = {nivel: -2.5 + i for i, nivel in enumerate(JERARQUIA_BLOOM)}
+
+# Grilla de θ y prior normal estándar
+GRILLA_THETA = np.linspace(-4.0, 4.0, 161)
+PRIOR = np.exp(-0.5 * GRILLA_THETA**2)
+PRIOR /= PRIOR.sum()
+
+# Criterios de parada
+MIN_PREGUNTAS = 4
+MAX_PREGUNTAS = 12
+ERROR_OBJETIVO = 0.45
+CONFIANZA_NIVEL = 0.9
+
+# θ por encima de b + MARGEN_COMPETENCIA acierta una pregunta típica con P >= umbral
+MARGEN_COMPETENCIA = math.log((UMBRAL_COMPETENCIA / 100) / (1 - UMBRAL_COMPETENCIA / 100)) / DISCRIMINACION_DEFECTO
+
+# Campos que no se envían al estudiante
+CAMPOS_PRIVADOS = ("respuesta_correcta", "explicacion", "irt_a", "irt_b")
+
+
+# --- MODELO 2PL ---
+
+
+def parametros_item(pregunta):
+    """(a, b) de una pregunta: calibrados si existen, si no por nivel Bloom."""
+    nivel = pregunta.get("nivel_bloom_evaluado", "Recordar")
+    a = pregunta.get("irt_a") or DISCRIMINACION_DEFECTO
+    b = pregunta.get("irt_b")
+    if b is None:
+        b = DIFICULTAD_POR_NIVEL.get(nivel, 0.0)
+    return float(a), float(b)
+
+
+def probabilidad_acierto(theta, a, b):
+    return 1.0 / (1.0 + np.exp(-a * (theta - b)))
+
+
+def informacion(theta, a, b):
+    """Información de Fisher de un ítem 2PL en θ."""
+    p = probabilidad_acierto(theta, a, b)
+    return a * a * p * (1.0 - p)
+
+
+def posterior(respuestas):
+    """
+    Posterior de θ sobre GRILLA_THETA.
+
+    Args:
+        respuestas (list): [(a, b, es_correcto), ...]
+    """
+    log_post = np.log(PRIOR)
+    for a, b, correcto in respuestas:
+        p = np.clip(probabilidad_acierto(GRILLA_THETA, a, b), 1e-9, 1 - 1e-9)
+        log_post += np.log(p) if correcto else np.log(1.0 - p)
+    post = np.exp(log_post - log_post.max())
+    return post / post.sum()
+
+
+def estimar(post):
+    """Estimación EAP y desviación estándar posterior."""
+    theta = float(np.dot(GRILLA_THETA, post))
+    sd = float(math.sqrt(max(np.dot((GRILLA_THETA - theta) ** 2, post), 0.0)))
+    return theta, sd
+
+
+def _cortes_nivel():
+    """θ mínimo para ser competente en cada nivel."""
+    return np.array([DIFICULTAD_POR_NIVEL[n] + MARGEN_COMPETENCIA for n in JERARQUIA_BLOOM])
+
+
+def indice_nivel(theta):
+    """Índice del nivel actual para θ (-1 si no es competente en ninguno)."""
+    return int(np.searchsorted(_cortes_nivel(), theta, side="right")) - 1
+
+
+def probabilidad_nivel(post, idx):
+    """Masa posterior de que θ esté en la banda del nivel idx (-1 = ninguno)."""
+    cortes = _cortes_nivel()
+    inferior = -np.inf if idx < 0 else cortes[idx]
+    superior = cortes[idx + 1] if idx + 1 < len(cortes) else np.inf
+    banda = (GRILLA_THETA >= inferior) & (GRILLA_THETA < superior)
+    return float(post[banda].sum())
+
+
+def seleccionar_siguiente(pool, respondidas, theta):
+    """Pregunta no respondida con máxima información en θ (None si no quedan)."""
+    candidatas = [p for p in pool if p["id"] not in respondidas]
+    if not candidatas:
+        return None
+    return max(candidatas, key=lambda p: informacion(theta, *parametros_item(p)))
+
+
+def debe_detenerse(n_respondidas, sd, prob_nivel, quedan):
+    if quedan == 0 or n_respondidas >= MAX_PREGUNTAS:
+        return True
+    if n_respondidas < MIN_PREGUNTAS:
+        return False
+    return sd <= ERROR_OBJETIVO or prob_nivel >= CONFIANZA_NIVEL
+
+
+# --- RESULTADO ---
+
+
+def construir_resultado(usuario, pool, respuestas, theta, sd):
+    """Resultado con la misma forma que EvaluadorZDP.evaluar_examen."""
+    preguntas = {p["id"]: p for p in pool}
+    idx_actual = indice_nivel(theta)
+
+    aciertos, totales = {}, {}
+    procesadas = []
+    for r in respuestas:
+        pregunta = preguntas[r["pregunta_id"]]
+        nivel = pregunta.get("nivel_bloom_evaluado", "Recordar")
+        totales[nivel] = totales.get(nivel, 0) + 1
+        aciertos[nivel] = aciertos.get(nivel, 0) + (1 if r["es_correcto"] else 0)
+        procesadas.append(
+            {
+                "pregunta_id": r["pregunta_id"],
+                "pregunta": pregunta.get("pregunta"),
+                "nivel_bloom": nivel,
+                "respuesta_estudiante": r["respuesta"],
+                "respuesta_correcta": pregunta.get("respuesta_correcta", "").lower().strip(),
+                "es_correcto": r["es_correcto"],
+                "tiempo_segundos": r.get("tiempo_seg", 0),
+                "banco_id": pregunta.get("banco_id"),
+            }
+        )
+
+    resumen, puntaje_total = {}, 0.0
+    for i, nivel in enumerate(JERARQUIA_BLOOM):
+        if nivel not in totales:
+            continue
+        porcentaje = aciertos[nivel] / totales[nivel] * 100
+        resumen[nivel] = {
+            "aciertos": aciertos[nivel],
+            "total": totales[nivel],
+            "porcentaje": round(porcentaje, 2),
+            # La competencia se infiere de θ, no de las pocas preguntas del nivel
+            "competente": i <= idx_actual,
+        }
+        puntaje_total += porcentaje * PESOS_NIVEL[i]
+
+    if idx_actual >= 0:
+        nivel_actual = JERARQUIA_BLOOM[idx_actual]
+        zona_proxima = JERARQUIA_BLOOM[idx_actual + 1 : idx_actual + 3]
+    else:
+        nivel_actual = JERARQUIA_BLOOM[0]
+        zona_proxima = JERARQUIA_BLOOM[:2]
+
+    competentes = JERARQUIA_BLOOM[: idx_actual + 1]
+    brechas = [n for n in resumen if n not in competentes]
+    return {
+        "usuario": usuario,
+        "fecha_evaluacion": datetime.datetime.utcnow(),
+        "modo": "adaptativo",
+        "respuestas_procesadas": procesadas,
+        "resumen_por_nivel": resumen,
+        "puntaje_total": round(puntaje_total, 2),
+        "nivel_actual": nivel_actual,
+        "zona_proxima": zona_proxima,
+        "recomendaciones": generar_recomendaciones(competentes, brechas, zona_proxima),
+        "theta": round(theta, 3),
+        "error_estandar": round(sd, 3),
+    }
+
+
+# --- SESIONES ---
+
+
+def pregunta_publica(pregunta):
+    """Pregunta sin respuesta correcta ni parámetros de calibración."""
+    return {k: v for k, v in pregunta.items() if k not in CAMPOS_PRIVADOS}
+
+
+def _estado(sesion):
+    respuestas = sesion.get("respuestas", [])
+    preguntas = {p["id"]: p for p in sesion["pool"]}
+    post = posterior([(*parametros_item(preguntas[r["pregunta_id"]]), r["es_correcto"]) for r in respuestas])
+    theta, sd = estimar(post)
+    return post, theta, sd
+
+
+def _inicio(sesion):
+    """Respuesta de iniciar_diagnostico para la pregunta actual de la sesión."""
+    actual = next(p for p in sesion["pool"] if p["id"] == sesion["pregunta_actual"])
+    return {
+        "pregunta": pregunta_publica(actual),
+        "numero": len(sesion.get("respuestas", [])) + 1,
+        "max_preguntas": min(MAX_PREGUNTAS, len(sesion["pool"])),
+    }
+
+
+def iniciar_diagnostico(db, usuario, examen, huellas=None, version=None):
+    """
+    Crea la sesión adaptativa del usuario, o retoma la que tiene en curso
+    para la misma versión del examen.
+
+    Args:
+        db: Base de datos
+        usuario (str): Usuario
+        examen (dict): Contenido del examen inicial
+        huellas (list|None): Huellas del material del examen (ver pool_diagnostico)
+        version: Identifica el examen (fecha_generacion); un examen nuevo reinicia la sesión
+
+    Returns:
+        dict: {"pregunta": {...}, "numero": int, "max_preguntas": int} o {"error", "status"}
+    """
+    col = db[COL_SESIONES]
+    en_curso = col.find_one({"usuario": usuario, "estado": "EN_CURSO", "version_examen": version})
+    if en_curso and en_curso.get("pregunta_actual") is not None:
+        return _inicio(en_curso)
+
+    preguntas = [p for p in examen.get("EXAMENES", {}).get("EXAMEN_INICIAL", []) if "id" in p]
+    pool = pool_diagnostico(db, preguntas, huellas)
+    if not pool:
+        return {"error": "El examen no tiene preguntas", "status": 404}
+
+    sesion = {
+        "usuario": usuario,
+        "estado": "EN_CURSO",
+        "version_examen": version,
+        "pool": pool,
+        "respuestas": [],
+        "pregunta_actual": seleccionar_siguiente(pool, set(), 0.0)["id"],
+        "fecha_inicio": datetime.datetime.utcnow(),
+    }
+    col.replace_one({"usuario": usuario}, sesion, upsert=True)
+    logger.info(
+        f"🎯 Diagnóstico adaptativo de {usuario}: pool de {len(pool)} preguntas "
+        f"({sum(1 for p in pool if 'irt_b' in p)} calibradas)"
+    )
+    return _inicio(sesion)
+
+
+def responder_diagnostico(db, usuario, pregunta_id, respuesta, tiempo_seg=0):
+    """
+    Registra la respuesta a la pregunta actual y decide si continuar.
+
+    Returns:
+        dict: {"completado": False, "pregunta", "numero", "progreso"} mientras
+        continúa; {"completado": True, "resultado"} al terminar; o {"error", "status"}
+    """
+    col = db[COL_SESIONES]
+    sesion = col.find_one({"usuario": usuario, "estado": "EN_CURSO"})
+    if not sesion:
+        return {"error": "No hay diagnóstico adaptativo en curso", "status": 404}
+    if pregunta_id != sesion.get("pregunta_actual"):
+        return {"error": "La respuesta no corresponde a la pregunta actual", "status": 409}
+
+    pregunta = next(p for p in sesion["pool"] if p["id"] == pregunta_id)
+    valor = str(respuesta or "").lower().strip()
+    registro = {
+        "pregunta_id": pregunta_id,
+        "respuesta": valor,
+        "es_correcto": valor == pregunta.get("respuesta_correcta", "").lower().strip(),
+        "tiempo_seg": tiempo_seg,
+    }
+    sesion["respuestas"].append(registro)
+
+    post, theta, sd = _estado(sesion)
+    respondidas = {r["pregunta_id"] for r in sesion["respuestas"]}
+    quedan = len(sesion["pool"]) - len(respondidas)
+    prob_nivel = probabilidad_nivel(post, indice_nivel(theta))
+    progreso = {"theta": round(theta, 3), "error_estandar": round(sd, 3), "confianza_nivel": round(prob_nivel, 3)}
+
+    if debe_detenerse(len(respondidas), sd, prob_nivel, quedan):
+        siguiente = None
+        cambios = {"estado": "COMPLETADO", "pregunta_actual": None, "fecha_fin": datetime.datetime.utcnow()}
+    else:
+        siguiente = seleccionar_siguiente(sesion["pool"], respondidas, theta)
+        cambios = {"pregunta_actual": siguiente["id"]}
+
+    # La condición sobre pregunta_actual evita registrar dos veces un envío repetido
+    res = col.update_one(
+        {"_id": sesion["_id"], "pregunta_actual": pregunta_id},
+        {"$push": {"respuestas": registro}, "$set": {**cambios, **progreso}},
+    )
+    if res.modified_count == 0:
+        return {"error": "La respuesta ya fue registrada", "status": 409}
+
+    if siguiente is not None:
+        return {
+            "completado": False,
+            "pregunta": pregunta_publica(siguiente),
+            "numero": len(respondidas) + 1,
+            "progreso": progreso,
+        }
+
+    resultado = construir_resultado(usuario, sesion["pool"], sesion["respuestas"], theta, sd)
+    EvaluadorZDP().registrar_resultado(usuario, resultado)
+    logger.info(
+        f"🎯 Diagnóstico adaptativo de {usuario}: {len(respondidas)} preguntas, "
+        f"θ={theta:.2f}±{sd:.2f}, nivel={resultado['nivel_actual']}"
+    )
+    return {"completado": True, "resultado": resultado}
@@ -2,11 +2,10 @@ import os
 import json
 import pandas as pd
 import logging
-import google.generativeai as genai
 import re
 import tkinter as tk
 from tkinter import simpledialog
-from src.config import DB_NAME, COLS, get_genai_model
+from src.config import DB_NAME, COLS, get_genai_model_lazy
 from src.database import get_database
 import gridfs
 from PIL import Image
@@ -17,8 +16,8 @@ logger = logging.getLogger(__name__)
 # --- 1. CONFIGURACIÓN (Centralizada en src.config) ---
 COLLECTION_RAW = COLS["RAW"]
 
-# Modelo Gemini (configuración centralizada)
-model = get_genai_model()
+# Modelo Gemini (configuración centralizada, se inicializa en el primer uso)
+model = get_genai_model_lazy()
 
 # --- 2. INTERFAZ DE USUARIO Y CONEXIÓN ---
 
@@ -49,19 +48,11 @@ def conectar_bd():
 
 
 def cargar_instrucciones_bloom():
-    """Carga el CSV de reglas pedagógicas."""
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    ruta_csv = os.path.join(base_dir, "data", "processed", "df_bloom.csv")
-
-    if not os.path.exists(ruta_csv):
-        return ""
+    """Devuelve las reglas pedagógicas de Bloom desde el artefacto de marcos precompilado."""
+    from src.data.marcos_compilados import obtener_marcos_compilados
 
     try:
-        df = pd.read_csv(ruta_csv)
-        contexto = ""
-        for _, row in df.iterrows():
-            contexto += f"NIVEL: {row.get('cat_bloom', 'N/A')} | Desc: {row.get('proc_desc', '')}\n"
-        return contexto
+        return obtener_marcos_compilados().get("contexto_clasificacion", "")
     except Exception:
         return ""
 
@@ -14,23 +14,35 @@ Este módulo:
 """
 
 import os
+import copy
 import json
 import datetime
-import google.generativeai as genai
+
+from pymongo import ReturnDocument, UpdateOne
 
 # Configuración centralizada en src.config
 from src.config import (
     DB_NAME,
-    get_genai_model,
+    COLS,
+    PERFIL_CACHE_TTL,
+    PERFIL_CACHE_MAX,
+    get_genai_model_lazy,
 )
 from src.database import get_database
-from src.utils import retry
+from src.utils import retry, CacheLRU
+from src.models.analitica_cohortes import (
+    PROYECCION_PERFIL,
+    registrar_evaluacion,
+    registrar_evaluaciones,
+)
+from src.models.banco_preguntas import registrar_respuestas, registrar_respuestas_lote
+from src.models.historial_evaluaciones import guardar_evaluaciones, aplicar_reevaluaciones
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Modelo Gemini (configuración centralizada)
-model = get_genai_model()
+# Modelo Gemini (configuración centralizada, se inicializa en el primer uso)
+model = get_genai_model_lazy()
 
 # Jerarquía de Bloom (del más simple al más complejo)
 JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
@@ -38,6 +50,139 @@ JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "
 # Umbral de competencia (% de aciertos)
 UMBRAL_COMPETENCIA = 70  # Si el estudiante acierta >= 70%, se considera competente
 
+# Peso de cada nivel en el puntaje total (ponderado por dificultad)
+PESOS_NIVEL = [(i + 1) / len(JERARQUIA_BLOOM) for i in range(len(JERARQUIA_BLOOM))]
+
+
+def generar_recomendaciones(competentes, brechas, zona_proxima):
+    """Genera recomendaciones pedagógicas basadas en ZDP."""
+    recomendaciones = []
+
+    if competentes:
+        recomendaciones.append(
+            {
+                "tipo": "fortalezas",
+                "mensaje": f"El estudiante domina los siguientes niveles: {', '.join(competentes)}",
+                "accion": "Omitir o acelerar estos temas en la ruta",
+            }
+        )
+
+    if brechas:
+        recomendaciones.append(
+            {
+                "tipo": "brechas",
+                "mensaje": f"Necesita refuerzo en: {', '.join(brechas)}",
+                "accion": "Enfatizar estos niveles con ejercicios prácticos y tutorización",
+            }
+        )
+
+    if zona_proxima:
+        recomendaciones.append(
+            {
+                "tipo": "zona_proxima",
+                "mensaje": f"Próximos objetivos de aprendizaje (ZDP): {', '.join(zona_proxima)}",
+                "accion": "Trabajar estos niveles con apoyo estructurado",
+            }
+        )
+
+    return recomendaciones
+
+
+# --- PERFIL ZDP CACHEADO ---
+
+# El resumen vigente vive en usuario_perfil (lo escribe _guardar_resultado_evaluacion);
+# se cachea por usuario para no leer el perfil completo en cada sondeo del dashboard.
+# Cada entrada es (version, resumen), con version = usuario_perfil.fecha_actualizacion:
+# con varios workers otro proceso puede haber escrito el perfil sin invalidar esta
+# caché, así que cada acierto compara la versión con un find_one proyectado.
+_cache_perfiles = CacheLRU(max_elementos=PERFIL_CACHE_MAX, ttl_segundos=PERFIL_CACHE_TTL)
+
+PROYECCION_RESUMEN = {
+    "_id": 0,
+    "nivel_actual": 1,
+    "zona_proxima": 1,
+    "puntaje_ultimo_examen": 1,
+    "competencias": 1,
+    "recomendaciones": 1,
+    "fecha_actualizacion": 1,
+}
+
+PROYECCION_VERSION_PERFIL = {"_id": 0, "fecha_actualizacion": 1}
+
+
+def invalidar_perfil_zdp(usuario=None):
+    """Descarta el perfil cacheado de un usuario (o de todos si usuario es None)."""
+    if usuario is None:
+        _cache_perfiles.limpiar()
+    else:
+        _cache_perfiles.invalidar(usuario)
+
+
+def _resumen_desde_perfil(doc):
+    """Resumen ZDP a partir del documento de usuario_perfil (None si no fue evaluado)."""
+    if not doc or not doc.get("competencias"):
+        return None
+
+    competencias = doc["competencias"]
+    recomendaciones = doc.get("recomendaciones")
+    if recomendaciones is None:
+        # Perfiles guardados antes de persistir las recomendaciones
+        competentes = [n for n in JERARQUIA_BLOOM if competencias.get(n, {}).get("competente")]
+        brechas = [n for n in JERARQUIA_BLOOM if n in competencias and not competencias[n].get("competente")]
+        recomendaciones = generar_recomendaciones(competentes, brechas, doc.get("zona_proxima", []))
+
+    return {
+        "nivel_actual": doc.get("nivel_actual"),
+        "zona_proxima": doc.get("zona_proxima", []),
+        "puntaje_total": doc.get("puntaje_ultimo_examen", 0),
+        "resumen_por_nivel": competencias,
+        "recomendaciones": recomendaciones,
+    }
+
+
+def obtener_resumen_perfil(usuario, db=None):
+    """
+    Resumen ZDP vigente del estudiante, sin recorrer evaluaciones_estudiante.
+
+    Con el resumen en caché solo se lee fecha_actualizacion del perfil; si
+    cambió (otro worker lo escribió) se vuelve a leer el perfil.
+
+    Returns:
+        dict: {nivel_actual, zona_proxima, puntaje_total, resumen_por_nivel,
+        recomendaciones} o None si aún no tiene evaluación
+    """
+    if db is None:
+        db = get_database(DB_NAME)
+    col_perfil = db[COLS["PERFIL"]]
+
+    entrada = _cache_perfiles.obtener(usuario)
+    if entrada is not CacheLRU.AUSENTE:
+        vigente = col_perfil.find_one({"usuario": usuario}, PROYECCION_VERSION_PERFIL) or {}
+        if vigente.get("fecha_actualizacion") != entrada[0]:
+            entrada = CacheLRU.AUSENTE
+
+    if entrada is CacheLRU.AUSENTE:
+        generacion = _cache_perfiles.generacion()
+        doc = col_perfil.find_one({"usuario": usuario}, PROYECCION_RESUMEN) or {}
+        entrada = (doc.get("fecha_actualizacion"), _resumen_desde_perfil(doc))
+        _cache_perfiles.guardar(usuario, entrada, generacion)
+    # Copia: los llamadores pueden modificar el resultado
+    return copy.deepcopy(entrada[1])
+
+
+def cambios_perfil(resultado):
+    """Campos de usuario_perfil que resume una evaluación."""
+    return {
+        "nivel_actual": resultado["nivel_actual"],
+        "zona_proxima": resultado["zona_proxima"],
+        "puntaje_ultimo_examen": resultado["puntaje_total"],
+        "competencias": resultado["resumen_por_nivel"],
+        "ultima_evaluacion": resultado["fecha_evaluacion"],
+        "recomendaciones": resultado["recomendaciones"],
+        # Versión del perfil para las cachés de otros procesos (obtener_resumen_perfil)
+        "fecha_actualizacion": datetime.datetime.utcnow(),
+    }
+
 
 class EvaluadorZDP:
     """Clase para evaluar exámenes y calcular scoring basado en ZDP."""
@@ -65,9 +210,15 @@ class EvaluadorZDP:
         Returns:
             dict: Resultado de evaluación con puntuaciones por nivel Bloom
         """
-        if not self.db:
+        if self.db is None:
             return {"error": "No hay conexión a BD"}
 
+        resultado = self.calcular_resultado(usuario, respuestas_estudiante, examen_original)
+        self._guardar_resultado_evaluacion(usuario, resultado)
+        return resultado
+
+    def calcular_resultado(self, usuario, respuestas_estudiante, examen_original):
+        """Puntúa un examen sin escribir en la BD (misma lógica que evaluar_examen)."""
         resultado = {
             "usuario": usuario,
             "fecha_evaluacion": datetime.datetime.utcnow(),
@@ -119,6 +270,7 @@ class EvaluadorZDP:
                     "respuesta_correcta": respuesta_correcta,
                     "es_correcto": es_correcto,
                     "tiempo_segundos": tiempo_seg,
+                    "banco_id": pregunta.get("banco_id"),
                 }
             )
 
@@ -141,8 +293,7 @@ class EvaluadorZDP:
                 }
 
                 # Sumar puntaje total (ponderado por dificultad)
-                peso = (JERARQUIA_BLOOM.index(nivel) + 1) / len(JERARQUIA_BLOOM)
-                puntaje_total += porcentaje * peso
+                puntaje_total += porcentaje * PESOS_NIVEL[JERARQUIA_BLOOM.index(nivel)]
 
                 if porcentaje >= UMBRAL_COMPETENCIA:
                     niveles_completados.append(nivel)
@@ -166,82 +317,157 @@ class EvaluadorZDP:
             niveles_completados, brechas_identificadas, resultado["zona_proxima"]
         )
 
-        # 5. Guardar en BD
-        self._guardar_resultado_evaluacion(usuario, resultado)
-
         return resultado
 
     def _generar_recomendaciones(self, competentes, brechas, zona_proxima):
         """Genera recomendaciones pedagógicas basadas en ZDP."""
-        recomendaciones = []
+        return generar_recomendaciones(competentes, brechas, zona_proxima)
 
-        if competentes:
-            recomendaciones.append(
-                {
-                    "tipo": "fortalezas",
-                    "mensaje": f"El estudiante domina los siguientes niveles: {', '.join(competentes)}",
-                    "accion": "Omitir o acelerar estos temas en la ruta",
-                }
-            )
-
-        if brechas:
-            recomendaciones.append(
-                {
-                    "tipo": "brechas",
-                    "mensaje": f"Necesita refuerzo en: {', '.join(brechas)}",
-                    "accion": "Enfatizar estos niveles con ejercicios prácticos y tutorización",
-                }
-            )
-
-        if zona_proxima:
-            recomendaciones.append(
-                {
-                    "tipo": "zona_proxima",
-                    "mensaje": f"Próximos objetivos de aprendizaje (ZDP): {', '.join(zona_proxima)}",
-                    "accion": "Trabajar estos niveles con apoyo estructurado",
-                }
-            )
-
-        return recomendaciones
+    def registrar_resultado(self, usuario, resultado):
+        """Guarda un resultado calculado fuera de evaluar_examen (p.ej. diagnóstico adaptativo)."""
+        self._guardar_resultado_evaluacion(usuario, resultado)
 
     def _guardar_resultado_evaluacion(self, usuario, resultado):
         """Guarda el resultado de evaluación en MongoDB."""
-        if not self.db:
+        if self.db is None:
             return
 
         try:
-            # Guardar en colección de evaluaciones
-            col_evaluaciones = self.db.get_collection("evaluaciones_estudiante")
-            col_evaluaciones.insert_one(resultado)
+            # Guardar resumen (time-series) y detalle compacto de la evaluación
+            guardar_evaluaciones(self.db, [resultado])
 
-            # Actualizar perfil del estudiante
+            # Actualizar perfil del estudiante (se recupera el estado anterior
+            # de forma atómica para actualizar la analítica por diferencia)
             col_perfil = self.db.get_collection("usuario_perfil")
-            col_perfil.update_one(
+            cambios = cambios_perfil(resultado)
+            perfil_previo = col_perfil.find_one_and_update(
                 {"usuario": usuario},
-                {
-                    "$set": {
-                        "nivel_actual": resultado["nivel_actual"],
-                        "zona_proxima": resultado["zona_proxima"],
-                        "puntaje_ultimo_examen": resultado["puntaje_total"],
-                        "competencias": resultado["resumen_por_nivel"],
-                        "ultima_evaluacion": resultado["fecha_evaluacion"],
-                    }
-                },
+                {"$set": cambios},
+                projection=PROYECCION_PERFIL,
                 upsert=True,
+                return_document=ReturnDocument.BEFORE,
             )
+            invalidar_perfil_zdp(usuario)
             logger.info(f"✅ Evaluación guardada para {usuario}")
         except Exception as e:
             logger.error(f"❌ Error guardando evaluación: {e}")
+            return
+
+        try:
+            perfil_nuevo = {"cohorte": (perfil_previo or {}).get("cohorte"), **cambios}
+            registrar_evaluacion(self.db, perfil_previo, perfil_nuevo)
+        except Exception as e:
+            logger.error(f"⚠️ No se pudo actualizar la analítica de cohortes: {e}")
+
+        try:
+            registrar_respuestas(self.db, resultado.get("respuestas_procesadas", []))
+        except Exception as e:
+            logger.error(f"⚠️ No se pudieron actualizar las estadísticas del banco de preguntas: {e}")
+
+    def evaluar_lote(self, entregas):
+        """
+        Evalúa varios exámenes (p.ej. un aula completa) y los guarda juntos.
+
+        La puntuación es la misma de evaluar_examen; la persistencia usa
+        guardar_resultados_lote.
+
+        Args:
+            entregas (list): [{"usuario": str, "respuestas": list, "examen": dict}, ...]
+
+        Returns:
+            list: Un resultado por entrega, en el mismo orden. Las entregas que
+            no se pudieron puntuar tienen {"usuario": ..., "error": ...}.
+        """
+        if self.db is None:
+            return [{"usuario": e.get("usuario"), "error": "No hay conexión a BD"} for e in entregas]
+
+        resultados = []
+        for entrega in entregas:
+            try:
+                resultados.append(
+                    self.calcular_resultado(entrega["usuario"], entrega["respuestas"], entrega["examen"])
+                )
+            except Exception as e:
+                logger.error(f"❌ Error evaluando examen de {entrega.get('usuario')}: {e}")
+                resultados.append({"usuario": entrega.get("usuario"), "error": str(e)})
+
+        validos = [r for r in resultados if "error" not in r]
+        if validos and not self.guardar_resultados_lote(validos):
+            return [
+                r if "error" in r else {"usuario": r["usuario"], "error": "No se pudo guardar la evaluación"}
+                for r in resultados
+            ]
+        return resultados
+
+    def guardar_resultados_lote(self, resultados):
+        """
+        Guarda varios resultados con un número fijo de operaciones:
+
+        - insert_many del resumen y del detalle (guardar_evaluaciones)
+        - un find de los perfiles previos y un bulk_write de los nuevos
+        - un bulk_write de analítica (un `$inc` por cohorte) y otro del banco
+
+        A diferencia de la ruta individual, los perfiles previos no se leen
+        con find_one_and_update: si otra escritura cambia un perfil entre el
+        find y el bulk_write, la analítica se corrige con reconstruir_analitica.
+
+        Returns:
+            bool: True si se guardaron las evaluaciones y los perfiles
+        """
+        if self.db is None or not resultados:
+            return False
+
+        try:
+            guardar_evaluaciones(self.db, resultados)
+
+            col_perfil = self.db.get_collection("usuario_perfil")
+            usuarios = list(dict.fromkeys(r["usuario"] for r in resultados))
+            vigentes = {
+                p["usuario"]: p
+                for p in col_perfil.find({"usuario": {"$in": usuarios}}, {**PROYECCION_PERFIL, "usuario": 1})
+            }
+
+            # Un mismo usuario puede aparecer varias veces: cada evaluación
+            # parte del perfil que dejó la anterior (gana la última).
+            operaciones, pares = [], []
+            for resultado in resultados:
+                usuario = resultado["usuario"]
+                cambios = cambios_perfil(resultado)
+                previo = vigentes.get(usuario)
+                nuevo = {"cohorte": (previo or {}).get("cohorte"), **cambios}
+                pares.append((previo, nuevo))
+                vigentes[usuario] = nuevo
+                operaciones.append(UpdateOne({"usuario": usuario}, {"$set": cambios}, upsert=True))
+            col_perfil.bulk_write(operaciones, ordered=True)
+
+            for usuario in usuarios:
+                invalidar_perfil_zdp(usuario)
+            logger.info(f"✅ {len(resultados)} evaluaciones guardadas en lote")
+        except Exception as e:
+            logger.error(f"❌ Error guardando evaluaciones en lote: {e}")
+            return False
+
+        try:
+            registrar_evaluaciones(self.db, pares)
+        except Exception as e:
+            logger.error(f"⚠️ No se pudo actualizar la analítica de cohortes: {e}")
+
+        try:
+            registrar_respuestas_lote(self.db, [r.get("respuestas_procesadas", []) for r in resultados])
+        except Exception as e:
+            logger.error(f"⚠️ No se pudieron actualizar las estadísticas del banco de preguntas: {e}")
+
+        return True
 
     def obtener_evaluacion_estudiante(self, usuario):
-        """Obtiene la evaluación más reciente de un estudiante."""
-        if not self.db:
+        """Obtiene el resumen de la evaluación más reciente de un estudiante."""
+        if self.db is None:
             return None
 
         try:
-            col_evaluaciones = self.db.get_collection("evaluaciones_estudiante")
+            col_evaluaciones = self.db.get_collection(COLS["EVAL"])
             resultado = col_evaluaciones.find_one({"usuario": usuario}, sort=[("fecha_evaluacion", -1)])
-            return resultado
+            return aplicar_reevaluaciones(self.db, [resultado])[0] if resultado else None
         except Exception as e:
             logger.error(f"❌ Error obteniendo evaluación: {e}")
             return None
@@ -258,7 +484,7 @@ class EvaluadorZDP:
             } o None si no hay evaluación
         """
         try:
-            evaluacion = self.obtener_evaluacion_estudiante(usuario)
+            evaluacion = obtener_resumen_perfil(usuario, self.db)
             
             if not evaluacion:
                 logger.info(f"No hay evaluación previa para {usuario}, generando ruta completa")
@@ -410,7 +636,7 @@ def evaluar_examen_simple(usuario, respuestas, examen):
 
 def obtener_perfil_zdp(usuario):
     """
-    Obtiene el perfil ZDP actual del estudiante.
+    Obtiene el perfil ZDP actual del estudiante (desde usuario_perfil, cacheado).
     
     Args:
         usuario (str): ID del estudiante
@@ -418,8 +644,11 @@ def obtener_perfil_zdp(usuario):
     Returns:
         dict: Perfil ZDP completo o dict indicando sin evaluación
     """
-    evaluador = EvaluadorZDP()
-    evaluacion = evaluador.obtener_evaluacion_estudiante(usuario)
+    try:
+        evaluacion = obtener_resumen_perfil(usuario)
+    except Exception as e:
+        logger.error(f"❌ Error obteniendo perfil ZDP: {e}")
+        evaluacion = None
     if evaluacion:
         return {
             "usuario": usuario,
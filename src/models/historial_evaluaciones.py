@@ -0,0 +1,350 @@
+"""
+Historial compacto de evaluaciones con niveles de retención.
+
+Cada evaluación se guarda en dos partes que comparten el mismo `_id`:
+
+- Resumen (`evaluaciones_estudiante`, colección time-series con
+  timeField=fecha_evaluacion y metaField=usuario): puntaje, nivel actual,
+  zona próxima y aciertos/total por nivel Bloom. Es permanente.
+
+      {"_id", "usuario", "fecha_evaluacion", "puntaje_total", "nivel_actual",
+       "zona_proxima", "resumen_por_nivel", "modo"?, "theta"?, "error_estandar"?}
+
+- Detalle (`evaluaciones_detalle`): las respuestas como arreglos paralelos
+  que referencian la pregunta por id (sin copiar el enunciado):
+
+      {"_id", "usuario", "fecha_evaluacion",
+       "preguntas": [3, 7, ...], "banco_ids": ["a1f...", null, ...],
+       "niveles": [0, 2, ...],            # índice Bloom (-1 = desconocido)
+       "respuestas": ["a", "c", ...], "correctas": ["a", "b", ...],
+       "aciertos": [1, 0, ...], "tiempos": [45, 30, ...]}
+
+  Un índice TTL elimina el detalle con más de DETALLE_RETENCION_DIAS; a
+  partir de ahí la evaluación queda reducida a su resumen por nivel (las
+  estadísticas de los ítems del banco ya se acumularon al guardarla).
+  compactar_historial hace lo mismo bajo demanda.
+
+Actualizar documentos de una colección time-series requiere MongoDB 7.0 o
+superior. En servidores anteriores las re-evaluaciones (reevaluacion_cohorte)
+se guardan en `evaluaciones_reevaluadas` con el mismo `_id`, y la lectura del
+historial superpone esos valores al resumen (aplicar_reevaluaciones).
+
+Las recomendaciones no se guardan en el historial: se derivan del resumen
+por nivel y la vigente está en usuario_perfil.
+
+Uso:
+    python -m src.models.historial_evaluaciones --migrar
+    python -m src.models.historial_evaluaciones --compactar --dias 90
+"""
+
+import sys
+import json
+import argparse
+import datetime
+import logging
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from src.config import DB_NAME, COLS, DETALLE_RETENCION_DIAS
+from src.database import get_database, ensure_ttl_index
+
+logger = logging.getLogger(__name__)
+
+COL_RESUMEN = COLS["EVAL"]
+COL_DETALLE = COLS["EVAL_DET"]
+COL_REEVALUADAS = COLS["EVAL_REEV"]
+COL_LEGADO = f"{COL_RESUMEN}_legado"
+
+# Versión mínima del servidor para update/delete sobre colecciones time-series
+VERSION_ACTUALIZAR_TIMESERIES = (7, 0)
+
+NIVELES_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
+_INDICE_NIVEL = {nivel: i for i, nivel in enumerate(NIVELES_BLOOM)}
+
+OPCIONES_TIMESERIES = {"timeField": "fecha_evaluacion", "metaField": "usuario", "granularity": "hours"}
+
+# Campos del resultado de evaluar_examen que se conservan en el resumen
+CAMPOS_RESUMEN = (
+    "usuario",
+    "fecha_evaluacion",
+    "modo",
+    "puntaje_total",
+    "nivel_actual",
+    "zona_proxima",
+    "resumen_por_nivel",
+    "theta",
+    "error_estandar",
+    "parametros_scoring",
+)
+
+TAMANO_LOTE = 1000
+
+
+# --- FORMATO COMPACTO ---
+
+
+def compactar_respuestas(respuestas_procesadas):
+    """Convierte `respuestas_procesadas` en arreglos paralelos sin enunciados."""
+    respuestas = respuestas_procesadas or []
+    detalle = {
+        "preguntas": [r.get("pregunta_id") for r in respuestas],
+        "niveles": [_INDICE_NIVEL.get(r.get("nivel_bloom"), -1) for r in respuestas],
+        "respuestas": [r.get("respuesta_estudiante") for r in respuestas],
+        "correctas": [r.get("respuesta_correcta") for r in respuestas],
+        "aciertos": [1 if r.get("es_correcto") else 0 for r in respuestas],
+        "tiempos": [r.get("tiempo_segundos", 0) for r in respuestas],
+    }
+    # Los exámenes que no vienen del banco no necesitan la columna
+    if any(r.get("banco_id") for r in respuestas):
+        detalle["banco_ids"] = [r.get("banco_id") for r in respuestas]
+    return detalle
+
+
+def expandir_detalle(detalle):
+    """Inverso de compactar_respuestas (sin el texto de las preguntas)."""
+    if not detalle:
+        return []
+    banco_ids = detalle.get("banco_ids") or [None] * len(detalle["preguntas"])
+    return [
+        {
+            "pregunta_id": pregunta_id,
+            "banco_id": banco_id,
+            "nivel_bloom": NIVELES_BLOOM[nivel] if 0 <= nivel < len(NIVELES_BLOOM) else None,
+            "respuesta_estudiante": respuesta,
+            "respuesta_correcta": correcta,
+            "es_correcto": bool(acierto),
+            "tiempo_segundos": tiempo,
+        }
+        for pregunta_id, banco_id, nivel, respuesta, correcta, acierto, tiempo in zip(
+            detalle["preguntas"],
+            banco_ids,
+            detalle["niveles"],
+            detalle["respuestas"],
+            detalle["correctas"],
+            detalle["aciertos"],
+            detalle["tiempos"],
+        )
+    ]
+
+
+def documentos_evaluacion(resultado, evaluacion_id=None):
+    """
+    Separa un resultado de evaluar_examen en (resumen, detalle).
+
+    Ambos documentos comparten `_id`; el detalle es None si no hay respuestas.
+    """
+    evaluacion_id = evaluacion_id or resultado.get("_id") or ObjectId()
+    resumen = {"_id": evaluacion_id, **{c: resultado[c] for c in CAMPOS_RESUMEN if c in resultado}}
+    if not resultado.get("respuestas_procesadas"):
+        return resumen, None
+    detalle = {
+        "_id": evaluacion_id,
+        "usuario": resultado.get("usuario"),
+        "fecha_evaluacion": resultado.get("fecha_evaluacion"),
+        **compactar_respuestas(resultado["respuestas_procesadas"]),
+    }
+    return resumen, detalle
+
+
+# --- ESCRITURA Y LECTURA ---
+
+
+def guardar_evaluaciones(db, resultados):
+    """
+    Guarda resumen y detalle de varias evaluaciones (un insert_many por colección).
+
+    A cada resultado se le agrega `evaluacion_id` (str) para la respuesta de la API.
+
+    Returns:
+        list: _id de las evaluaciones guardadas
+    """
+    resumenes, detalles = [], []
+    for resultado in resultados:
+        resumen, detalle = documentos_evaluacion(resultado)
+        resultado["evaluacion_id"] = str(resumen["_id"])
+        resumenes.append(resumen)
+        if detalle:
+            detalles.append(detalle)
+
+    if resumenes:
+        db[COL_RESUMEN].insert_many(resumenes, ordered=False)
+    if detalles:
+        db[COL_DETALLE].insert_many(detalles, ordered=False)
+    return [r["_id"] for r in resumenes]
+
+
+def obtener_detalle(db, evaluacion_id):
+    """Respuestas de una evaluación (None si el detalle ya expiró)."""
+    if isinstance(evaluacion_id, str) and ObjectId.is_valid(evaluacion_id):
+        evaluacion_id = ObjectId(evaluacion_id)
+    detalle = db[COL_DETALLE].find_one({"_id": evaluacion_id})
+    return expandir_detalle(detalle) if detalle else None
+
+
+def aplicar_reevaluaciones(db, resumenes):
+    """
+    Superpone a los resúmenes los valores re-evaluados guardados aparte
+    (servidores sin actualización de time-series). Modifica y retorna la lista.
+    """
+    if not resumenes or db[COL_REEVALUADAS].estimated_document_count() == 0:
+        return resumenes
+    reevaluados = {
+        doc["_id"]: doc
+        for doc in db[COL_REEVALUADAS].find({"_id": {"$in": [r["_id"] for r in resumenes]}})
+    }
+    for resumen in resumenes:
+        resumen.update(reevaluados.get(resumen["_id"], {}))
+    return resumenes
+
+
+def historial_usuario(db, usuario, limite=20):
+    """Resúmenes más recientes de un estudiante, con sus re-evaluaciones."""
+    cursor = db[COL_RESUMEN].find({"usuario": usuario}).sort("fecha_evaluacion", DESCENDING)
+    return aplicar_reevaluaciones(db, list(cursor.limit(limite)))
+
+
+# --- COLECCIONES, RETENCIÓN Y MIGRACIÓN ---
+
+
+def _info_coleccion(db, nombre):
+    return next(iter(db.list_collections(filter={"name": nombre})), None)
+
+
+def asegurar_colecciones(db, dias_retencion=DETALLE_RETENCION_DIAS):
+    """
+    Crea la colección time-series de resúmenes y los índices del detalle.
+
+    Si `evaluaciones_estudiante` ya existe como colección normal con datos
+    (formato anterior) se deja intacta y se avisa que hay que migrar.
+
+    Returns:
+        bool: True si el resumen está en una colección time-series
+    """
+    info = _info_coleccion(db, COL_RESUMEN)
+    if info is not None and info.get("type") != "timeseries":
+        if db[COL_RESUMEN].estimated_document_count():
+            logger.warning(
+                f"⚠️ {COL_RESUMEN} tiene el formato anterior; ejecute "
+                "`python -m src.models.historial_evaluaciones --migrar`"
+            )
+        else:
+            db.drop_collection(COL_RESUMEN)
+            info = None
+    if info is None:
+        db.create_collection(COL_RESUMEN, timeseries=OPCIONES_TIMESERIES)
+
+    detalle = db[COL_DETALLE]
+    detalle.create_index([("usuario", ASCENDING), ("fecha_evaluacion", DESCENDING)])
+    segundos = int(dias_retencion * 86400)
+    ensure_ttl_index(detalle, "fecha_evaluacion", segundos, "ttl_detalle")
+    return (_info_coleccion(db, COL_RESUMEN) or {}).get("type") == "timeseries"
+
+
+def version_servidor(db):
+    """(mayor, menor) de la versión de MongoDB, o None si el servidor no la informa."""
+    try:
+        version = db.command("buildInfo").get("versionArray")
+    except OperationFailure:
+        return None
+    return tuple(version[:2]) if version else None
+
+
+def admite_actualizar_resumenes(db):
+    """
+    True si los resúmenes pueden actualizarse en sitio: colección normal, o
+    time-series en un servidor con versión conocida >= VERSION_ACTUALIZAR_TIMESERIES.
+    """
+    if (_info_coleccion(db, COL_RESUMEN) or {}).get("type") != "timeseries":
+        return True
+    version = version_servidor(db)
+    return version is not None and version >= VERSION_ACTUALIZAR_TIMESERIES
+
+
+def compactar_historial(db, dias=DETALLE_RETENCION_DIAS, ahora=None):
+    """
+    Elimina el detalle con más de `dias` (lo mismo que hace el índice TTL,
+    útil para aplicar un nuevo plazo de inmediato).
+
+    Returns:
+        dict: {"detalles_eliminados": int, "limite": datetime}
+    """
+    limite = (ahora or datetime.datetime.utcnow()) - datetime.timedelta(days=dias)
+    eliminados = db[COL_DETALLE].delete_many({"fecha_evaluacion": {"$lt": limite}}).deleted_count
+    logger.info(f"🧹 {eliminados} detalles de evaluación anteriores a {limite:%Y-%m-%d} eliminados")
+    return {"detalles_eliminados": eliminados, "limite": limite}
+
+
+def migrar_historial(db, dias=DETALLE_RETENCION_DIAS, conservar_legado=False, lote=TAMANO_LOTE, ahora=None):
+    """
+    Convierte `evaluaciones_estudiante` del formato anterior (resultado
+    completo con enunciados) al resumen time-series + detalle compacto.
+
+    La colección anterior se renombra a `evaluaciones_estudiante_legado`, se
+    copia por lotes conservando los _id y se elimina al terminar (salvo
+    `conservar_legado`). Solo se genera detalle para evaluaciones dentro
+    del plazo de retención.
+
+    Returns:
+        dict: Resumen de la migración
+    """
+    info = _info_coleccion(db, COL_RESUMEN)
+    if info is None or info.get("type") == "timeseries":
+        asegurar_colecciones(db, dias)
+        return {"migradas": 0, "detalles": 0, "mensaje": "Nada que migrar"}
+
+    db[COL_RESUMEN].rename(COL_LEGADO)
+    asegurar_colecciones(db, dias)
+
+    limite = (ahora or datetime.datetime.utcnow()) - datetime.timedelta(days=dias)
+    migradas = detalles_creados = 0
+    resumenes, detalles = [], []
+
+    def _vaciar():
+        if resumenes:
+            db[COL_RESUMEN].insert_many(resumenes, ordered=False)
+        if detalles:
+            db[COL_DETALLE].insert_many(detalles, ordered=False)
+        resumenes.clear()
+        detalles.clear()
+
+    for doc in db[COL_LEGADO].find({}):
+        resumen, detalle = documentos_evaluacion(doc, doc["_id"])
+        resumenes.append(resumen)
+        fecha = doc.get("fecha_evaluacion")
+        if detalle and fecha is not None and fecha >= limite:
+            detalles.append(detalle)
+            detalles_creados += 1
+        migradas += 1
+        if len(resumenes) >= lote:
+            _vaciar()
+    _vaciar()
+
+    if not conservar_legado:
+        db.drop_collection(COL_LEGADO)
+    logger.info(f"✅ {migradas} evaluaciones migradas ({detalles_creados} con detalle)")
+    return {"migradas": migradas, "detalles": detalles_creados, "legado_conservado": conservar_legado}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historial compacto de evaluaciones")
+    parser.add_argument("--migrar", action="store_true", help="Convertir evaluaciones_estudiante al formato compacto")
+    parser.add_argument("--conservar-legado", action="store_true", help="No eliminar la colección anterior al migrar")
+    parser.add_argument("--compactar", action="store_true", help="Eliminar el detalle más antiguo que --dias")
+    parser.add_argument("--dias", type=float, default=DETALLE_RETENCION_DIAS, help="Días de retención del detalle")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = get_database(DB_NAME)
+    if args.migrar:
+        print(json.dumps(migrar_historial(db, args.dias, args.conservar_legado), indent=2, ensure_ascii=False))
+    if args.compactar:
+        print(json.dumps(compactar_historial(db, args.dias), indent=2, ensure_ascii=False, default=str))
+    if not (args.migrar or args.compactar):
+        asegurar_colecciones(db, args.dias)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Índice de recuperación local del chatbot tutor (BM25 sobre MongoDB).
+
+Cada fragmento indexable es un documento de `indice_tutor`:
+
+    {usuario, fuente, tipo, etiqueta, texto, terminos: [...], tf: {termino: n}, longitud}
+
+- Material: las unidades de `unidades_contenido` se dividen en fragmentos
+  de ~200 tokens (fuente "material:<nombre_archivo>").
+- Ruta: una entrada por flashcard y por pregunta de test (fuente "ruta").
+
+El índice se actualiza por fuente al ingerir un archivo o generar la ruta
+(solo se reemplazan los fragmentos de esa fuente), y un documento de
+estadísticas por usuario lleva el número de fragmentos y la longitud total
+que necesita BM25. En cada pregunta, buscar_pasajes trae únicamente los
+fragmentos que contienen algún término de la consulta (índice multikey
+sobre `terminos`), proyectando solo las frecuencias de esos términos, y
+luego el texto de los k mejores.
+
+Cada usuario tiene una única ruta generada con todo su material, por lo que
+el índice se organiza por usuario.
+
+Las estadísticas guardan además una huella por archivo de material;
+huella_material las combina en una firma del contenido del usuario (igual
+para estudiantes que subieron el mismo material), que usa la caché de
+respuestas del tutor.
+"""
+
+import math
+import heapq
+import hashlib
+import datetime
+import logging
+import unicodedata
+from collections import Counter
+from pymongo import ASCENDING
+from src.config import COLS, TUTOR_PASAJES_K
+from src.seleccion_contenido import CARACTERES_POR_TOKEN, _fragmentar, tokenizar
+
+logger = logging.getLogger(__name__)
+
+COL_INDICE = COLS["INDICE"]
+FUENTE_RUTA = "ruta"
+TOKENS_POR_PASAJE = 200
+
+# Parámetros estándar de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def asegurar_indices(db):
+    """Índices de búsqueda por término y de reemplazo por fuente."""
+    db[COL_INDICE].create_index([("usuario", ASCENDING), ("terminos", ASCENDING)])
+    db[COL_INDICE].create_index([("usuario", ASCENDING), ("fuente", ASCENDING)])
+
+
+def fuente_material(nombre_archivo):
+    return f"material:{nombre_archivo}"
+
+
+def _id_estadisticas(usuario):
+    return f"estadisticas:{usuario}"
+
+
+def _md5(texto):
+    return hashlib.md5(texto.encode("utf-8")).hexdigest()
+
+
+def _normalizar(termino):
+    """Sin tildes y sin plural simple, para que "células" encuentre "célula"."""
+    termino = "".join(c for c in unicodedata.normalize("NFD", termino) if unicodedata.category(c) != "Mn")
+    if len(termino) > 5 and termino.endswith("es"):
+        return termino[:-2]
+    if len(termino) > 4 and termino.endswith("s"):
+        return termino[:-1]
+    return termino
+
+
+def terminos(texto):
+    """Términos normalizados de un texto (con repeticiones)."""
+    return [_normalizar(t) for t in tokenizar(texto)]
+
+
+def fragmentos_material(nombre_archivo, unidades):
+    """Pasajes {tipo, etiqueta, texto} de las unidades de un material."""
+    max_chars = TOKENS_POR_PASAJE * CARACTERES_POR_TOKEN
+    pasajes = []
+    for unidad in unidades or []:
+        etiqueta = f"{nombre_archivo} · {unidad.get('tipo_unidad', 'unidad')} {unidad.get('indice', '')}".strip()
+        for fragmento in _fragmentar(unidad.get("contenido_texto") or "", max_chars):
+            pasajes.append({"tipo": "material", "etiqueta": etiqueta, "texto": fragmento})
+    return pasajes
+
+
+def _opcion_correcta(pregunta):
+    """Texto de la opción correcta ("b) Mitocondria" -> "Mitocondria"), o ""."""
+    letra = str(pregunta.get("respuesta_correcta") or "").strip().lower()
+    if not letra:
+        return ""
+    for opcion in pregunta.get("opciones") or []:
+        if isinstance(opcion, str) and opcion.strip().lower().startswith(f"{letra})"):
+            return opcion.split(")", 1)[1].strip()
+    return ""
+
+
+def fragmentos_ruta(ruta):
+    """Pasajes {tipo, etiqueta, texto} de las flashcards y tests de una ruta."""
+    estructura = (ruta or {}).get("estructura_ruta") or {}
+    pasajes = []
+    for nivel, cards in (estructura.get("flashcards") or {}).items():
+        for card in cards or []:
+            frente = card.get("frente") or card.get("pregunta") or ""
+            reverso = card.get("reverso") or card.get("respuesta") or ""
+            if frente and reverso:
+                pasajes.append({"tipo": "flashcard", "etiqueta": f"Flashcard · {nivel}", "texto": f"{frente}: {reverso}"})
+    for nivel, preguntas in (estructura.get("examenes") or {}).items():
+        for pregunta in preguntas or []:
+            enunciado = pregunta.get("pregunta")
+            if not enunciado:
+                continue
+            correcta = _opcion_correcta(pregunta)
+            texto = f"{enunciado} Respuesta: {correcta}" if correcta else enunciado
+            pasajes.append({"tipo": "examen", "etiqueta": f"Test · {nivel}", "texto": texto})
+    return pasajes
+
+
+def indexar_fuente(db, usuario, fuente, pasajes, completo=False):
+    """
+    Reemplaza los fragmentos de una fuente del usuario y ajusta las estadísticas.
+
+    Args:
+        db: Database - Instancia MongoDB
+        usuario: str - Propietario
+        fuente: str - FUENTE_RUTA o fuente_material(nombre)
+        pasajes: list - Pasajes {tipo, etiqueta, texto}
+        completo: bool - Marca el índice del usuario como construido desde cero
+
+    Returns:
+        int: Fragmentos indexados
+    """
+    coleccion = db[COL_INDICE]
+    filtro = {"usuario": usuario, "fuente": fuente}
+    anteriores = list(coleccion.find(filtro, {"longitud": 1}))
+    if anteriores:
+        coleccion.delete_many(filtro)
+
+    documentos = []
+    for pasaje in pasajes:
+        tf = Counter(terminos(pasaje["texto"]))
+        if tf:
+            documentos.append(
+                {**pasaje, **filtro, "terminos": list(tf), "tf": dict(tf), "longitud": sum(tf.values())}
+            )
+    if documentos:
+        coleccion.insert_many(documentos)
+
+    cambios = {"usuario": usuario, "fecha_actualizacion": datetime.datetime.utcnow()}
+    if completo:
+        cambios["completo"] = True
+    actualizacion = {
+        "$inc": {
+            "n_fragmentos": len(documentos) - len(anteriores),
+            "longitud_total": sum(d["longitud"] for d in documentos) - sum(a.get("longitud", 0) for a in anteriores),
+        },
+        "$set": cambios,
+    }
+    if fuente != FUENTE_RUTA:
+        # La ruta la genera el modelo para cada estudiante: solo el material entra en la huella
+        campo = f"huellas.{_md5(fuente)[:16]}"
+        if documentos:
+            cambios[campo] = _md5("\n".join(d["texto"] for d in documentos))
+        else:
+            actualizacion["$unset"] = {campo: ""}
+    coleccion.update_one({"_id": _id_estadisticas(usuario)}, actualizacion, upsert=True)
+    return len(documentos)
+
+
+def huella_material(db, usuario):
+    """Firma del material indexado del usuario, o None si aún no tiene material indexado."""
+    estadisticas = db[COL_INDICE].find_one({"_id": _id_estadisticas(usuario)}, {"huellas": 1})
+    huellas = sorted(((estadisticas or {}).get("huellas") or {}).values())
+    return _md5("|".join(huellas))[:16] if huellas else None
+
+
+def indexar_material(db, usuario, nombre_archivo, unidades):
+    """Indexa (o re-indexa) un material recién ingerido."""
+    return indexar_fuente(db, usuario, fuente_material(nombre_archivo), fragmentos_material(nombre_archivo, unidades))
+
+
+def indexar_ruta(db, usuario, ruta=None):
+    """Indexa las flashcards y tests de la ruta del usuario (la lee si no se pasa)."""
+    if ruta is None:
+        ruta = db[COLS["RUTAS"]].find_one({"usuario": usuario}, {"estructura_ruta": 1})
+    return indexar_fuente(db, usuario, FUENTE_RUTA, fragmentos_ruta(ruta))
+
+
+def reconstruir_indice(db, usuario):
+    """
+    Indexa todo el material y la ruta del usuario.
+
+    Se usa la primera vez que se busca para un usuario cuyo material se
+    ingirió antes de existir el índice.
+
+    Returns:
+        int: Fragmentos indexados
+    """
+    total = 0
+    for material in db[COLS["RAW"]].find({"usuario_propietario": usuario}, {"nombre_archivo": 1, "unidades_contenido": 1}):
+        total += indexar_material(db, usuario, material.get("nombre_archivo", ""), material.get("unidades_contenido"))
+    ruta = db[COLS["RUTAS"]].find_one({"usuario": usuario}, {"estructura_ruta": 1})
+    total += indexar_fuente(db, usuario, FUENTE_RUTA, fragmentos_ruta(ruta), completo=True)
+    logger.info(f"🔎 Índice del tutor reconstruido para {usuario}: {total} fragmentos")
+    return total
+
+
+def buscar_pasajes(db, usuario, consulta, k=TUTOR_PASAJES_K):
+    """
+    Los k fragmentos del usuario más relevantes para la consulta (BM25).
+
+    Returns:
+        list: [{"tipo", "etiqueta", "texto", "puntaje"}] de mayor a menor puntaje
+    """
+    consulta_terminos = list(dict.fromkeys(terminos(consulta)))
+    if not consulta_terminos or k <= 0:
+        return []
+
+    coleccion = db[COL_INDICE]
+    estadisticas = coleccion.find_one({"_id": _id_estadisticas(usuario)})
+    if not (estadisticas or {}).get("completo"):
+        reconstruir_indice(db, usuario)
+        estadisticas = coleccion.find_one({"_id": _id_estadisticas(usuario)}) or {}
+    n = estadisticas.get("n_fragmentos", 0)
+    if n <= 0:
+        return []
+    longitud_media = estadisticas.get("longitud_total", 0) / n or 1.0
+
+    proyeccion = {"longitud": 1, **{f"tf.{t}": 1 for t in consulta_terminos}}
+    candidatos = list(coleccion.find({"usuario": usuario, "terminos": {"$in": consulta_terminos}}, proyeccion))
+    df = Counter(t for candidato in candidatos for t in candidato.get("tf", {}))
+    idf = {t: math.log((max(n, d) - d + 0.5) / (d + 0.5) + 1) for t, d in df.items()}
+
+    puntajes = []
+    for candidato in candidatos:
+        norma = BM25_K1 * (1 - BM25_B + BM25_B * candidato.get("longitud", 0) / longitud_media)
+        puntaje = sum(idf[t] * f * (BM25_K1 + 1) / (f + norma) for t, f in candidato.get("tf", {}).items())
+        puntajes.append((puntaje, candidato["_id"]))
+    mejores = heapq.nlargest(k, puntajes, key=lambda par: par[0])
+    if not mejores:
+        return []
+
+    textos = {
+        d["_id"]: d
+        for d in coleccion.find({"_id": {"$in": [i for _, i in mejores]}}, {"tipo": 1, "etiqueta": 1, "texto": 1})
+    }
+    return [
+        {"tipo": textos[i]["tipo"], "etiqueta": textos[i]["etiqueta"], "texto": textos[i]["texto"], "puntaje": round(p, 4)}
+        for p, i in mejores
+        if i in textos
+    ]
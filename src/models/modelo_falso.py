@@ -0,0 +1,322 @@
+"""
+Backend generativo falso y determinista para benchmarks y pruebas sin claves.
+
+Se activa con RUTEALO_LLM_BACKEND=fake (ver src.config.get_genai_model). Imita
+la interfaz usada de google.generativeai (generate_content, start_chat,
+send_message, .text) y responde JSON válido según el tipo de prompt:
+
+- Clasificación Bloom      -> {"Categoria_Bloom", "Justificacion", "Keywords"}
+- Examen diagnóstico       -> {"EXAMENES": {"EXAMEN_INICIAL": [...]}}
+- Flashcards por nivel     -> {"FLASHCARDS": [...]}
+- Tests por nivel          -> {"EXAMENES": [...]}
+- Ruta personalizada       -> {"ruta_personalizada": {...}}
+- Cualquier otro (chatbot) -> texto plano
+
+La latencia simulada sigue una distribución lognormal configurable
+(media y desviación en ms) con semilla fija, para que dos corridas con la
+misma configuración sean comparables. Con stream=True la respuesta se
+entrega en partes: la primera llega tras FRACCION_PRIMER_FRAGMENTO de la
+latencia y el resto se reparte entre las demás. Las llamadas se contabilizan
+por tipo en estadísticas globales del proceso.
+
+generate_content_async y send_message_async esperan la latencia con
+asyncio.sleep (como el cliente async de Gemini), sin ocupar un hilo.
+"""
+
+import os
+import re
+import json
+import math
+import time
+import asyncio
+import random
+import hashlib
+import threading
+from collections import Counter
+
+JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
+
+# Distribución del examen diagnóstico (2-3 por nivel básico, menos en los superiores)
+DISTRIBUCION_EXAMEN = ["Recordar"] * 3 + ["Comprender"] * 2 + ["Aplicar"] * 2 + ["Analizar"] * 2 + ["Evaluar", "Crear"]
+
+# Respuestas con stream=True: número de partes y parte de la latencia antes de la primera
+PARTES_STREAM = 8
+FRACCION_PRIMER_FRAGMENTO = 0.3
+
+_lock_estadisticas = threading.Lock()
+_estadisticas = {"llamadas": Counter(), "caracteres_prompt": 0, "caracteres_respuesta": 0, "latencia_s": 0.0}
+
+
+def estadisticas_llm():
+    """Copia de las estadísticas acumuladas de todas las instancias falsas."""
+    with _lock_estadisticas:
+        return {
+            "llamadas": dict(_estadisticas["llamadas"]),
+            "total_llamadas": sum(_estadisticas["llamadas"].values()),
+            "caracteres_prompt": _estadisticas["caracteres_prompt"],
+            "caracteres_respuesta": _estadisticas["caracteres_respuesta"],
+            "latencia_s": round(_estadisticas["latencia_s"], 4),
+        }
+
+
+def reiniciar_estadisticas_llm():
+    """Pone a cero las estadísticas globales."""
+    with _lock_estadisticas:
+        _estadisticas["llamadas"].clear()
+        _estadisticas["caracteres_prompt"] = 0
+        _estadisticas["caracteres_respuesta"] = 0
+        _estadisticas["latencia_s"] = 0.0
+
+
+class RespuestaFalsa:
+    """Respuesta con el atributo .text como la de Gemini (iterable por partes si se pidió stream)."""
+
+    def __init__(self, text, partes=None, pausa_s=0.0):
+        self.text = text
+        self._partes = partes if partes is not None else [text]
+        self._pausa_s = pausa_s
+
+    def __iter__(self):
+        for i, parte in enumerate(self._partes):
+            if i and self._pausa_s:
+                time.sleep(self._pausa_s)
+            yield RespuestaFalsa(parte)
+
+
+class ChatFalso:
+    """Sesión de chat mínima (start_chat/send_message)."""
+
+    def __init__(self, modelo, history=None):
+        self._modelo = modelo
+        self.history = list(history or [])
+
+    def send_message(self, mensaje, stream=False, **kwargs):
+        respuesta = self._modelo.generate_content(mensaje, stream=stream)
+        self._agregar(mensaje, respuesta)
+        return respuesta
+
+    async def send_message_async(self, mensaje, **kwargs):
+        respuesta = await self._modelo.generate_content_async(mensaje)
+        self._agregar(mensaje, respuesta)
+        return respuesta
+
+    def _agregar(self, mensaje, respuesta):
+        self.history.append({"role": "user", "parts": [str(mensaje)]})
+        self.history.append({"role": "model", "parts": [respuesta.text]})
+
+
+class ModeloFalso:
+    """
+    Modelo generativo falso con latencia simulada.
+
+    Args:
+        latencia_ms (float): Media de la latencia simulada por llamada
+        desviacion_ms (float): Desviación estándar (0 = latencia constante)
+        semilla (int): Semilla del generador de latencias y contenidos
+    """
+
+    def __init__(self, latencia_ms=0.0, desviacion_ms=0.0, semilla=42):
+        self.latencia_ms = float(latencia_ms)
+        self.desviacion_ms = float(desviacion_ms)
+        self.semilla = semilla
+        self._rng = random.Random(semilla)
+        self._lock = threading.Lock()
+
+    def _muestrear_latencia(self):
+        """Latencia en segundos (lognormal con la media y desviación pedidas)."""
+        if self.latencia_ms <= 0:
+            return 0.0
+        if self.desviacion_ms <= 0:
+            return self.latencia_ms / 1000
+        varianza = math.log(1 + (self.desviacion_ms / self.latencia_ms) ** 2)
+        mu = math.log(self.latencia_ms) - varianza / 2
+        with self._lock:
+            muestra = self._rng.lognormvariate(mu, math.sqrt(varianza))
+        return muestra / 1000
+
+    def _generar(self, contenido):
+        """(prompt, tipo, texto, latencia en s) de una llamada."""
+        prompt = _a_texto(contenido)
+        tipo = clasificar_prompt(prompt)
+        texto = _RESPONDEDORES[tipo](prompt, _semilla_prompt(prompt, self.semilla))
+        return prompt, tipo, texto, self._muestrear_latencia()
+
+    def generate_content(self, contenido, stream=False, **kwargs):
+        prompt, tipo, texto, espera = self._generar(contenido)
+        antes = espera * FRACCION_PRIMER_FRAGMENTO if stream else espera
+        if antes:
+            time.sleep(antes)
+
+        _contabilizar(tipo, prompt, texto, espera)
+        if stream:
+            partes = _partir(texto, PARTES_STREAM)
+            return RespuestaFalsa(texto, partes, (espera - antes) / max(1, len(partes) - 1))
+        return RespuestaFalsa(texto)
+
+    async def generate_content_async(self, contenido, **kwargs):
+        prompt, tipo, texto, espera = self._generar(contenido)
+        if espera:
+            await asyncio.sleep(espera)
+
+        _contabilizar(tipo, prompt, texto, espera)
+        return RespuestaFalsa(texto)
+
+    def start_chat(self, history=None, **kwargs):
+        return ChatFalso(self, history)
+
+
+def crear_modelo_falso():
+    """Crea un ModeloFalso configurado por variables de entorno.
+
+    - RUTEALO_FAKE_LATENCIA_MS: media de latencia por llamada (default 0)
+    - RUTEALO_FAKE_DESVIACION_MS: desviación estándar (default 0)
+    - RUTEALO_FAKE_SEMILLA: semilla (default 42)
+    """
+    return ModeloFalso(
+        latencia_ms=float(os.getenv("RUTEALO_FAKE_LATENCIA_MS", "0")),
+        desviacion_ms=float(os.getenv("RUTEALO_FAKE_DESVIACION_MS", "0")),
+        semilla=int(os.getenv("RUTEALO_FAKE_SEMILLA", "42")),
+    )
+
+
+def _contabilizar(tipo, prompt, texto, espera):
+    with _lock_estadisticas:
+        _estadisticas["llamadas"][tipo] += 1
+        _estadisticas["caracteres_prompt"] += len(prompt)
+        _estadisticas["caracteres_respuesta"] += len(texto)
+        _estadisticas["latencia_s"] += espera
+
+
+# --- Clasificación de prompts y respuestas por tipo ---
+
+
+def _a_texto(contenido):
+    if isinstance(contenido, (list, tuple)):
+        return "\n".join(p for p in contenido if isinstance(p, str))
+    return str(contenido)
+
+
+def _partir(texto, n):
+    """Divide el texto en hasta n partes consecutivas, cortando en espacios."""
+    palabras = re.split(r"(?<= )", texto)
+    tamano = max(1, math.ceil(len(palabras) / n))
+    return ["".join(palabras[i:i + tamano]) for i in range(0, len(palabras), tamano)]
+
+
+def _semilla_prompt(prompt, semilla):
+    """Semilla estable por prompt (misma entrada -> misma salida)."""
+    return int(hashlib.md5(f"{semilla}:{prompt}".encode("utf-8")).hexdigest()[:8], 16)
+
+
+def clasificar_prompt(prompt):
+    """Determina qué esquema de respuesta espera el prompt."""
+    if "Categoria_Bloom" in prompt:
+        return "clasificacion_bloom"
+    if "EXAMEN_INICIAL" in prompt:
+        return "examen_diagnostico"
+    if '"FLASHCARDS"' in prompt:
+        return "flashcards"
+    if '"EXAMENES"' in prompt:
+        return "tests_nivel"
+    if "ruta_personalizada" in prompt:
+        return "ruta_personalizada"
+    return "texto"
+
+
+def _cantidad(prompt, patron, defecto):
+    m = re.search(patron, prompt)
+    return int(m.group(1)) if m else defecto
+
+
+def _nivel_en_prompt(prompt):
+    m = re.search(r"NIVEL COGNITIVO:\s*(\w+)", prompt)
+    return m.group(1) if m else "Recordar"
+
+
+def _responder_bloom(prompt, semilla):
+    nivel = JERARQUIA_BLOOM[semilla % len(JERARQUIA_BLOOM)]
+    return json.dumps(
+        {"Categoria_Bloom": nivel, "Justificacion": f"Clasificación simulada como {nivel}", "Keywords": ["simulado"]},
+        ensure_ascii=False,
+    )
+
+
+def _opciones(n_opciones=4):
+    return [f"{letra}) Opción {letra}" for letra in "abcd"[:n_opciones]]
+
+
+def _responder_examen(prompt, semilla):
+    rng = random.Random(semilla)
+    preguntas = []
+    for i, nivel in enumerate(DISTRIBUCION_EXAMEN, start=1):
+        preguntas.append(
+            {
+                "id": i,
+                "pregunta": f"Pregunta simulada {i} de nivel {nivel}",
+                "opciones": _opciones() + ["e) No lo sé / Omitir"],
+                "respuesta_correcta": rng.choice("abcd"),
+                "nivel_bloom_evaluado": nivel,
+            }
+        )
+    return json.dumps({"EXAMENES": {"EXAMEN_INICIAL": preguntas}}, ensure_ascii=False)
+
+
+def _responder_flashcards(prompt, semilla):
+    nivel = _nivel_en_prompt(prompt)
+    n = _cantidad(prompt, r"Genera (\d+) FLASHCARDS", 3)
+    flashcards = [
+        {"id": i, "frente": f"Concepto {i} ({nivel})", "reverso": f"Teoría simulada del concepto {i}.", "visto": False}
+        for i in range(1, n + 1)
+    ]
+    return json.dumps({"FLASHCARDS": flashcards}, ensure_ascii=False)
+
+
+def _responder_tests(prompt, semilla):
+    rng = random.Random(semilla)
+    nivel = _nivel_en_prompt(prompt)
+    n = _cantidad(prompt, r"Genera (\d+) PREGUNTAS", 3)
+    tests = []
+    for i in range(1, n + 1):
+        correcta = rng.choice("abcd")
+        tests.append(
+            {
+                "id": i,
+                "pregunta": f"Pregunta {i} de nivel {nivel}",
+                "opciones": _opciones(),
+                "respuesta_correcta": correcta,
+                "feedback": {l: ("¡Correcto!" if l == correcta else "Incorrecto.") for l in "abcd"},
+                "realizado": False,
+            }
+        )
+    return json.dumps({"EXAMENES": tests}, ensure_ascii=False)
+
+
+def _responder_ruta(prompt, semilla):
+    return json.dumps(
+        {
+            "ruta_personalizada": {
+                "niveles_trabajar": JERARQUIA_BLOOM[:2],
+                "niveles_omitir": [],
+                "bloques": [
+                    {"nivel": n, "duracion_min": 45, "actividades": ["lectura", "práctica"], "apoyo_requerido": "guía"}
+                    for n in JERARQUIA_BLOOM[:2]
+                ],
+                "observaciones": "Ruta simulada",
+            }
+        },
+        ensure_ascii=False,
+    )
+
+
+def _responder_texto(prompt, semilla):
+    return "Respuesta simulada del tutor: revisa las flashcards del nivel actual y vuelve a intentarlo."
+
+
+_RESPONDEDORES = {
+    "clasificacion_bloom": _responder_bloom,
+    "examen_diagnostico": _responder_examen,
+    "flashcards": _responder_flashcards,
+    "tests_nivel": _responder_tests,
+    "ruta_personalizada": _responder_ruta,
+    "texto": _responder_texto,
+}
@@ -3,11 +3,10 @@ import json
 import datetime
 import tkinter as tk
 from tkinter import messagebox, ttk
-import google.generativeai as genai
 import logging
 
 # Cargar variables de entorno desde src.config
-from src.config import DB_NAME, COLS, get_genai_model
+from src.config import DB_NAME, COLS, get_genai_model_lazy
 from src.database import get_database
 from src.utils import retry
 
@@ -28,8 +27,8 @@ COL_PERFIL = "usuario_perfil"  # Perfil del estudiante
 COL_EXAM_INI = "examen_inicial"  # Diagnóstico (ZDP)
 COL_RUTAS = "rutas_aprendizaje"  # Ruta (Flow + Bloom)
 
-# Modelo Gemini (configuración centralizada)
-model = get_genai_model()
+# Modelo Gemini (configuración centralizada, se inicializa en el primer uso)
+model = get_genai_model_lazy()
 
 # Jerarquía estricta de Bloom para la ruta
 JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
@@ -110,7 +109,7 @@ def obtener_datos_usuario_gui():
 # --- 4. MOTOR DE PROMPTING: LÓGICA ---
 # NOTA: Las siguientes funciones ahora se importan de web_utils para centralizar lógica:
 # - obtener_contexto_usuario(db, usuario)
-# - generar_examen_inicial(contenido_total)
+# - generar_examen_inicial(contenido_total, unidades=None)
 # - generar_ruta_aprendizaje(usuario, db)
 # - cargar_marcos_pedagogicos()
 
@@ -132,6 +131,7 @@ def procesar_motor():
     logger.info(f"🚀 Iniciando Motor de Prompting para: {usuario_id}")
 
     # 2. Guardar/Actualizar Perfil (USUARIO_PERFIL)
+    ahora = datetime.datetime.utcnow()
     perfil_doc = {
         "usuario": usuario_id,
         "datos_personales": {
@@ -145,7 +145,8 @@ def procesar_motor():
             "dia_descanso": datos_usuario["dia_descanso"],
         },
         "nivel_actual_bloom": "No iniciado",  # Se actualiza tras examen inicial
-        "ultima_actualizacion": datetime.datetime.utcnow(),
+        "ultima_actualizacion": ahora,
+        "fecha_actualizacion": ahora,
     }
     db[COL_PERFIL].replace_one({"usuario": usuario_id}, perfil_doc, upsert=True)
     logger.info("✅ Perfil guardado.")
@@ -0,0 +1,361 @@
+"""
+Re-evaluación vectorizada de cohortes (ZDP) con NumPy.
+
+Cuando se ajusta UMBRAL_COMPETENCIA o los pesos por nivel, las evaluaciones
+guardadas en `evaluaciones_estudiante` deben recalcularse. En lugar de
+re-ejecutar EvaluadorZDP.evaluar_examen documento por documento, este módulo:
+
+1. Carga las respuestas desde el detalle compacto (`evaluaciones_detalle`)
+   como matrices (estudiantes × preguntas): el nivel Bloom de cada pregunta
+   (-1 = relleno) y si la respuesta fue correcta. Las evaluaciones cuyo
+   detalle ya expiró conservan su resumen sin cambios.
+2. Calcula para toda la cohorte, sin bucles por estudiante: aciertos y total
+   por nivel, porcentajes, competencia, puntaje total ponderado, nivel
+   actual y zona próxima.
+3. Escribe los resultados con bulk_write por lotes (resúmenes de las
+   evaluaciones y, para la evaluación más reciente de cada usuario, su
+   perfil) y reconstruye la analítica materializada de cohortes. Sobre una
+   colección time-series, actualizar resúmenes requiere MongoDB 7.0 o
+   superior: con un servidor anterior (se consulta buildInfo antes de
+   escribir) los resúmenes re-evaluados se guardan en
+   `evaluaciones_reevaluadas` con el mismo _id y el historial los superpone.
+
+Los resultados son idénticos a los de evaluar_examen con los mismos parámetros.
+
+Uso:
+    python -m src.models.reevaluacion_cohorte --umbral 75 --dry-run
+    python -m src.models.reevaluacion_cohorte --pesos 1,1,2,2,3,3
+"""
+
+import sys
+import json
+import argparse
+import datetime
+import logging
+
+import numpy as np
+from pymongo import UpdateOne, ReplaceOne
+
+from src.config import DB_NAME, COLS
+from src.database import get_database
+from src.models.analitica_cohortes import reconstruir_analitica
+from src.models.historial_evaluaciones import (
+    COL_REEVALUADAS,
+    admite_actualizar_resumenes,
+    aplicar_reevaluaciones,
+)
+from src.models.evaluacion_zdp import (
+    JERARQUIA_BLOOM,
+    UMBRAL_COMPETENCIA,
+    PESOS_NIVEL,
+    generar_recomendaciones,
+    invalidar_perfil_zdp,
+)
+
+logger = logging.getLogger(__name__)
+
+COL_EVALUACIONES = COLS["EVAL"]
+COL_DETALLE = COLS["EVAL_DET"]
+TAMANO_LOTE = 1000
+
+N_NIVELES = len(JERARQUIA_BLOOM)
+
+PROYECCION_DETALLE = {
+    "usuario": 1,
+    "fecha_evaluacion": 1,
+    "niveles": 1,
+    "respuestas": 1,
+    "correctas": 1,
+    "aciertos": 1,
+}
+
+
+class MatrizRespuestas:
+    """
+    Respuestas de una cohorte en forma matricial.
+
+    Attributes:
+        ids (list): _id de cada evaluación (fila)
+        usuarios (list): Usuario de cada fila
+        fechas (list): fecha_evaluacion de cada fila
+        niveles (np.ndarray): int8 (S × Q), índice Bloom de cada pregunta o -1
+        correctas (np.ndarray): bool (S × Q)
+    """
+
+    def __init__(self, ids, usuarios, fechas, niveles, correctas):
+        self.ids = ids
+        self.usuarios = usuarios
+        self.fechas = fechas
+        self.niveles = niveles
+        self.correctas = correctas
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def construir_matriz(evaluaciones):
+    """
+    Convierte documentos de evaluaciones_detalle en una MatrizRespuestas.
+
+    La corrección se recalcula con respuesta == correcta (igual que
+    evaluar_examen); si faltan, se usa el arreglo de aciertos.
+    """
+    evaluaciones = list(evaluaciones)
+    n_preguntas = max((len(e.get("niveles") or []) for e in evaluaciones), default=0)
+
+    niveles = np.full((len(evaluaciones), n_preguntas), -1, dtype=np.int8)
+    correctas = np.zeros((len(evaluaciones), n_preguntas), dtype=bool)
+    ids, usuarios, fechas = [], [], []
+
+    for fila, ev in enumerate(evaluaciones):
+        ids.append(ev.get("_id"))
+        usuarios.append(ev.get("usuario"))
+        fechas.append(ev.get("fecha_evaluacion"))
+        n = len(ev.get("niveles") or [])
+        if not n:
+            continue
+        niveles[fila, :n] = ev["niveles"]
+        respuestas, claves = ev.get("respuestas"), ev.get("correctas")
+        if respuestas and claves and None not in respuestas and None not in claves:
+            correctas[fila, :n] = [r == c for r, c in zip(respuestas, claves)]
+        else:
+            correctas[fila, :n] = [bool(a) for a in ev.get("aciertos") or [0] * n]
+
+    return MatrizRespuestas(ids, usuarios, fechas, niveles, correctas)
+
+
+def puntuar_cohorte(niveles, correctas, umbral=UMBRAL_COMPETENCIA, pesos=PESOS_NIVEL):
+    """
+    Scoring ZDP vectorizado para toda la cohorte.
+
+    Args:
+        niveles (np.ndarray): int (S × Q), índice Bloom por pregunta o -1
+        correctas (np.ndarray): bool (S × Q)
+        umbral (float): Porcentaje mínimo para considerar competente un nivel
+        pesos (sequence): Peso de cada nivel en el puntaje total
+
+    Returns:
+        dict: Arrays "aciertos", "totales", "porcentajes", "evaluados",
+        "competentes" (S × 6), "puntaje_total" (S) e "idx_nivel_actual" (S)
+    """
+    pesos = np.asarray(pesos, dtype=float)
+    if pesos.shape != (N_NIVELES,):
+        raise ValueError(f"Se esperaban {N_NIVELES} pesos, se recibieron {pesos.size}")
+
+    # One-hot (S × Q × 6) -> conteos por nivel (S × 6)
+    una_caliente = niveles[:, :, None] == np.arange(N_NIVELES)
+    totales = una_caliente.sum(axis=1)
+    aciertos = (una_caliente & correctas[:, :, None]).sum(axis=1)
+
+    evaluados = totales > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        porcentajes = np.where(evaluados, aciertos / np.maximum(totales, 1) * 100, 0.0)
+    competentes = evaluados & (porcentajes >= umbral)
+
+    # Suma en el orden de la jerarquía, como evaluar_examen
+    puntaje_total = np.zeros(len(niveles))
+    for i in range(N_NIVELES):
+        puntaje_total = puntaje_total + np.where(evaluados[:, i], porcentajes[:, i] * pesos[i], 0.0)
+
+    # Nivel actual = nivel competente más alto (0 si ninguno)
+    hay_competencia = competentes.any(axis=1)
+    idx_nivel_actual = np.where(hay_competencia, N_NIVELES - 1 - np.argmax(competentes[:, ::-1], axis=1), 0)
+
+    return {
+        "aciertos": aciertos,
+        "totales": totales,
+        "porcentajes": porcentajes,
+        "evaluados": evaluados,
+        "competentes": competentes,
+        "puntaje_total": puntaje_total,
+        "idx_nivel_actual": idx_nivel_actual,
+        "hay_competencia": hay_competencia,
+    }
+
+
+def resultado_estudiante(puntajes, fila):
+    """Campos de evaluación (formato de evaluar_examen) para una fila de la cohorte."""
+    resumen, competentes, brechas = {}, [], []
+    for i in np.flatnonzero(puntajes["evaluados"][fila]):
+        nivel = JERARQUIA_BLOOM[i]
+        competente = bool(puntajes["competentes"][fila, i])
+        resumen[nivel] = {
+            "aciertos": int(puntajes["aciertos"][fila, i]),
+            "total": int(puntajes["totales"][fila, i]),
+            "porcentaje": round(float(puntajes["porcentajes"][fila, i]), 2),
+            "competente": competente,
+        }
+        (competentes if competente else brechas).append(nivel)
+
+    idx = int(puntajes["idx_nivel_actual"][fila])
+    if puntajes["hay_competencia"][fila]:
+        zona_proxima = JERARQUIA_BLOOM[idx + 1 : idx + 3]
+    else:
+        zona_proxima = JERARQUIA_BLOOM[:2]
+
+    return {
+        "resumen_por_nivel": resumen,
+        "puntaje_total": round(float(puntajes["puntaje_total"][fila]), 2),
+        "nivel_actual": JERARQUIA_BLOOM[idx],
+        "zona_proxima": zona_proxima,
+        "recomendaciones": generar_recomendaciones(competentes, brechas, zona_proxima),
+    }
+
+
+def _ultima_por_usuario(matriz):
+    """Fila de la evaluación más reciente de cada usuario."""
+    ultima = {}
+    for fila, (usuario, fecha) in enumerate(zip(matriz.usuarios, matriz.fechas)):
+        previa = ultima.get(usuario)
+        if previa is None or (fecha is not None and (matriz.fechas[previa] is None or fecha >= matriz.fechas[previa])):
+            ultima[usuario] = fila
+    return ultima
+
+
+def _escribir_lotes(coleccion, operaciones, lote):
+    modificados = 0
+    for inicio in range(0, len(operaciones), lote):
+        res = coleccion.bulk_write(operaciones[inicio : inicio + lote], ordered=False)
+        modificados += res.modified_count
+    return modificados
+
+
+def reevaluar_cohorte(
+    db=None,
+    filtro=None,
+    umbral=UMBRAL_COMPETENCIA,
+    pesos=PESOS_NIVEL,
+    actualizar_perfiles=True,
+    dry_run=False,
+    lote=TAMANO_LOTE,
+):
+    """
+    Re-puntúa las evaluaciones guardadas con nuevos parámetros.
+
+    Args:
+        db: Base de datos (por defecto la configurada)
+        filtro (dict): Consulta por usuario y/o fecha_evaluacion (campos comunes
+            al resumen y al detalle)
+        umbral (float): Nuevo umbral de competencia
+        pesos (sequence): Nuevos pesos por nivel
+        actualizar_perfiles (bool): Actualizar usuario_perfil con la evaluación más reciente
+        dry_run (bool): Calcular sin escribir; retorna los cambios de nivel
+        lote (int): Operaciones por bulk_write
+
+    Returns:
+        dict: Resumen (evaluaciones, sin_detalle, cambios de nivel_actual, escrituras)
+    """
+    if db is None:
+        db = get_database(DB_NAME)
+
+    col_eval = db[COL_EVALUACIONES]
+    matriz = construir_matriz(db[COL_DETALLE].find(filtro or {}, PROYECCION_DETALLE))
+    sin_detalle = max(col_eval.count_documents(filtro or {}) - len(matriz), 0)
+
+    if not len(matriz):
+        return {
+            "evaluaciones": 0,
+            "sin_detalle": sin_detalle,
+            "cambios_nivel": 0,
+            "escrituras_evaluaciones": 0,
+            "escrituras_perfiles": 0,
+        }
+
+    previos = {
+        ev["_id"]: ev.get("nivel_actual")
+        for ev in aplicar_reevaluaciones(db, list(col_eval.find({"_id": {"$in": matriz.ids}}, {"nivel_actual": 1})))
+    }
+    niveles_previos = [previos.get(_id) for _id in matriz.ids]
+
+    puntajes = puntuar_cohorte(matriz.niveles, matriz.correctas, umbral, pesos)
+    resultados = [resultado_estudiante(puntajes, fila) for fila in range(len(matriz))]
+    cambios = sum(1 for previo, r in zip(niveles_previos, resultados) if previo != r["nivel_actual"])
+
+    resumen = {
+        "evaluaciones": len(matriz),
+        "sin_detalle": sin_detalle,
+        "usuarios": len(set(matriz.usuarios)),
+        "cambios_nivel": cambios,
+        "umbral": umbral,
+        "pesos": [float(p) for p in pesos],
+        "escrituras_evaluaciones": 0,
+        "escrituras_perfiles": 0,
+    }
+    if dry_run:
+        return resumen
+
+    parametros = {"umbral": umbral, "pesos": resumen["pesos"], "fecha": datetime.datetime.utcnow()}
+    # El historial no guarda recomendaciones (se derivan del resumen por nivel)
+    campos = [
+        {**{k: v for k, v in r.items() if k != "recomendaciones"}, "parametros_scoring": parametros}
+        for r in resultados
+    ]
+    if admite_actualizar_resumenes(db):
+        destino = col_eval
+        ops_eval = [UpdateOne({"_id": _id}, {"$set": c}) for _id, c in zip(matriz.ids, campos)]
+    else:
+        # Time-series en MongoDB < 7.0: no admite update; se guarda aparte
+        destino = db[COL_REEVALUADAS]
+        ops_eval = [
+            ReplaceOne({"_id": _id}, {"usuario": usuario, "fecha_evaluacion": fecha, **c}, upsert=True)
+            for _id, usuario, fecha, c in zip(matriz.ids, matriz.usuarios, matriz.fechas, campos)
+        ]
+        logger.info(f"ℹ️ {COL_EVALUACIONES} es time-series y el servidor no admite update: se escribe en {COL_REEVALUADAS}")
+    resumen["destino_evaluaciones"] = destino.name
+    resumen["escrituras_evaluaciones"] = _escribir_lotes(destino, ops_eval, lote)
+
+    if actualizar_perfiles:
+        ahora = datetime.datetime.utcnow()
+        ops_perfil = []
+        for usuario, fila in _ultima_por_usuario(matriz).items():
+            r = resultados[fila]
+            ops_perfil.append(
+                UpdateOne(
+                    {"usuario": usuario},
+                    {
+                        "$set": {
+                            "nivel_actual": r["nivel_actual"],
+                            "zona_proxima": r["zona_proxima"],
+                            "puntaje_ultimo_examen": r["puntaje_total"],
+                            "competencias": r["resumen_por_nivel"],
+                            "recomendaciones": r["recomendaciones"],
+                            "fecha_actualizacion": ahora,
+                        }
+                    },
+                )
+            )
+        resumen["escrituras_perfiles"] = _escribir_lotes(db[COLS["PERFIL"]], ops_perfil, lote)
+        # Los contadores materializados y la caché de perfiles dependen del perfil vigente
+        reconstruir_analitica(db)
+        invalidar_perfil_zdp()
+
+    logger.info(
+        f"✅ Re-evaluadas {resumen['evaluaciones']} evaluaciones "
+        f"({resumen['cambios_nivel']} cambios de nivel, umbral={umbral})"
+    )
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-puntúa las evaluaciones ZDP guardadas")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_COMPETENCIA, help="Umbral de competencia (%%)")
+    parser.add_argument("--pesos", help="Seis pesos separados por coma (Recordar..Crear)")
+    parser.add_argument("--filtro", help="Consulta Mongo (JSON) por usuario/fecha_evaluacion")
+    parser.add_argument("--sin-perfiles", action="store_true", help="No actualizar usuario_perfil")
+    parser.add_argument("--dry-run", action="store_true", help="Calcular sin escribir")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    resumen = reevaluar_cohorte(
+        filtro=json.loads(args.filtro) if args.filtro else None,
+        umbral=args.umbral,
+        pesos=[float(p) for p in args.pesos.split(",")] if args.pesos else PESOS_NIVEL,
+        actualizar_perfiles=not args.sin_perfiles,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Regeneración masiva de rutas de aprendizaje (sin interfaz gráfica).
+
+Cuando cambian los prompts o los CSV de marcos pedagógicos hay que
+reconstruir la ruta de todos los estudiantes. Este módulo:
+
+1. Lista los usuarios de `usuario_perfil` (con filtros por cohorte, por
+   consulta Mongo arbitraria o por lista explícita).
+2. Regenera cada ruta con generar_ruta_aprendizaje en un pool de hilos o
+   procesos, con un límite global de llamadas concurrentes al modelo.
+3. Guarda un checkpoint JSON tras cada usuario, de modo que una ejecución
+   interrumpida (o con fallos) continúa donde quedó. El checkpoint lleva la
+   huella de la selección de usuarios y se borra cuando una ejecución
+   termina sin fallidos pendientes: la siguiente regeneración (p. ej. tras
+   otro cambio de prompts) vuelve a procesar a todos.
+
+Uso:
+    python -m src.models.regenerar_rutas --hilos 8 --max-llm 4
+    python -m src.models.regenerar_rutas --cohorte 2025-I --dry-run
+    python -m src.models.regenerar_rutas --filtro '{"archivos_subidos": {"$gt": 0}}'
+    python -m src.models.regenerar_rutas --usuarios ana,luis --reiniciar
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from src.config import DB_NAME, COLS, DATA_DIR, LLM_MAX_CONCURRENCIA, configurar_limite_llm
+from src.database import get_database
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DEFAULT = DATA_DIR / "regeneracion_rutas.checkpoint.json"
+
+
+# --- SELECCIÓN DE USUARIOS ---
+
+
+def construir_filtro(cohorte=None, filtro=None, usuarios=None):
+    """Combina los filtros de la línea de comandos en una consulta Mongo."""
+    condiciones = []
+    if filtro:
+        condiciones.append(filtro)
+    if cohorte:
+        condiciones.append({"cohorte": cohorte})
+    if usuarios:
+        condiciones.append({"usuario": {"$in": list(usuarios)}})
+    if not condiciones:
+        return {}
+    return condiciones[0] if len(condiciones) == 1 else {"$and": condiciones}
+
+
+def huella_seleccion(consulta):
+    """Identifica una selección de usuarios (la consulta Mongo normalizada)."""
+    crudo = json.dumps(consulta, sort_keys=True, default=str, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(crudo, digest_size=8).hexdigest()
+
+
+def listar_usuarios(db, cohorte=None, filtro=None, usuarios=None):
+    """Usuarios de usuario_perfil que cumplen los filtros, ordenados por nombre."""
+    consulta = construir_filtro(cohorte, filtro, usuarios)
+    docs = db[COLS["PERFIL"]].find(consulta, {"usuario": 1, "_id": 0})
+    return sorted({d["usuario"] for d in docs if d.get("usuario")})
+
+
+# --- CHECKPOINT ---
+
+
+class Checkpoint:
+    """
+    Progreso persistido en JSON (escritura atómica tras cada usuario).
+
+    Estructura: {"seleccion": huella, "completados": {usuario: {...}},
+    "fallidos": {usuario: error}, "actualizado": iso}
+
+    Solo sirve para reanudar la misma selección de usuarios: un checkpoint de
+    otra selección se ignora al cargar.
+    """
+
+    def __init__(self, ruta, seleccion=None):
+        self.ruta = Path(ruta)
+        self.seleccion = seleccion
+        self.completados = {}
+        self.fallidos = {}
+        self._lock = threading.Lock()
+
+    def cargar(self):
+        if self.ruta.exists():
+            try:
+                datos = json.loads(self.ruta.read_text(encoding="utf-8"))
+                if datos.get("seleccion") != self.seleccion:
+                    logger.warning(f"⚠️ El checkpoint {self.ruta} es de otra selección de usuarios; se empieza de cero")
+                    return self
+                self.completados = datos.get("completados", {})
+                self.fallidos = datos.get("fallidos", {})
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"⚠️ Checkpoint ilegible ({e}); se empieza de cero")
+        return self
+
+    def reiniciar(self):
+        self.completados, self.fallidos = {}, {}
+        if self.ruta.exists():
+            self.ruta.unlink()
+
+    def registrar(self, usuario, exito, detalle):
+        with self._lock:
+            if exito:
+                self.completados[usuario] = detalle
+                self.fallidos.pop(usuario, None)
+            else:
+                self.fallidos[usuario] = detalle
+            self._guardar()
+
+    def _guardar(self):
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta.with_suffix(".tmp")
+        datos = {
+            "seleccion": self.seleccion,
+            "completados": self.completados,
+            "fallidos": self.fallidos,
+            "actualizado": datetime.datetime.utcnow().isoformat(),
+        }
+        temporal.write_text(json.dumps(datos, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(temporal, self.ruta)
+
+
+# --- EJECUCIÓN ---
+
+
+def regenerar_usuario(usuario, db=None):
+    """
+    Regenera la ruta de un usuario.
+
+    Returns:
+        tuple: (usuario, exito, detalle)
+    """
+    from src.web_utils import generar_ruta_aprendizaje
+
+    inicio = time.perf_counter()
+    try:
+        if db is None:
+            db = get_database(DB_NAME)
+        mensaje = generar_ruta_aprendizaje(usuario, db)
+        return usuario, True, {"mensaje": mensaje, "segundos": round(time.perf_counter() - inicio, 2)}
+    except Exception as e:
+        logger.error(f"❌ Error regenerando ruta de {usuario}: {e}")
+        return usuario, False, str(e)
+
+
+def _inicializar_proceso(max_llm):
+    """Inicializador de cada proceso del pool: límite LLM propio y conexión nueva."""
+    configurar_limite_llm(max_llm)
+
+
+def _contar_materiales(db, usuarios):
+    """Materiales con Bloom completado por usuario (para --dry-run)."""
+    col_raw = db[COLS["RAW"]]
+    return {
+        u: col_raw.count_documents({"usuario_propietario": u, "estado_procesamiento": "BLOOM_COMPLETADO"})
+        for u in usuarios
+    }
+
+
+def ejecutar_regeneracion(
+    db=None,
+    cohorte=None,
+    filtro=None,
+    usuarios=None,
+    trabajadores=4,
+    max_llm=4,
+    usar_procesos=False,
+    checkpoint=CHECKPOINT_DEFAULT,
+    reiniciar=False,
+    reintentar_fallidos=True,
+    dry_run=False,
+):
+    """
+    Regenera las rutas de los usuarios seleccionados.
+
+    Args:
+        db: Base de datos (por defecto la configurada)
+        cohorte (str): Valor de usuario_perfil.cohorte
+        filtro (dict): Consulta Mongo adicional sobre usuario_perfil
+        usuarios (list): Lista explícita de usuarios
+        trabajadores (int): Hilos o procesos del pool
+        max_llm (int): Llamadas concurrentes máximas al modelo (0 = sin límite).
+            Con procesos se reparte entre ellos.
+        usar_procesos (bool): Usar ProcessPoolExecutor en lugar de hilos
+        checkpoint (str|Path): Archivo de progreso (se borra al terminar sin fallidos)
+        reiniciar (bool): Ignorar y borrar el checkpoint previo
+        reintentar_fallidos (bool): Volver a intentar usuarios fallidos del checkpoint
+        dry_run (bool): Solo listar lo que se haría, sin llamar al modelo
+
+    Returns:
+        dict: Resumen con listas de procesados, omitidos, fallidos y duración
+    """
+    if db is None:
+        db = get_database(DB_NAME)
+
+    todos = listar_usuarios(db, cohorte, filtro, usuarios)
+    progreso = Checkpoint(checkpoint, huella_seleccion(construir_filtro(cohorte, filtro, usuarios)))
+    if reiniciar:
+        progreso.reiniciar()
+    else:
+        progreso.cargar()
+
+    ya_procesados = set(progreso.completados)
+    if not reintentar_fallidos:
+        ya_procesados |= set(progreso.fallidos)
+    omitidos = [u for u in todos if u in ya_procesados]
+    pendientes = [u for u in todos if u not in ya_procesados]
+
+    logger.info(
+        f"🛤️ Regeneración de rutas: {len(todos)} usuarios, {len(pendientes)} pendientes, "
+        f"{len(omitidos)} ya procesados"
+    )
+
+    if dry_run:
+        return {
+            "dry_run": True,
+            "usuarios": todos,
+            "pendientes": pendientes,
+            "omitidos": omitidos,
+            "materiales": _contar_materiales(db, pendientes),
+        }
+
+    inicio = time.perf_counter()
+    procesados, fallidos = [], []
+
+    if usar_procesos:
+        max_llm_proceso = max(1, max_llm // trabajadores) if max_llm else 0
+        ejecutor = ProcessPoolExecutor(
+            max_workers=trabajadores,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_proceso,
+            initargs=(max_llm_proceso,),
+        )
+        argumentos_extra = ()  # cada proceso abre su propia conexión
+    else:
+        configurar_limite_llm(max_llm)
+        ejecutor = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="regenerar_ruta")
+        argumentos_extra = (db,)
+
+    try:
+        with ejecutor:
+            futuros = [ejecutor.submit(regenerar_usuario, u, *argumentos_extra) for u in pendientes]
+            try:
+                for i, futuro in enumerate(as_completed(futuros), start=1):
+                    usuario, exito, detalle = futuro.result()
+                    progreso.registrar(usuario, exito, detalle)
+                    (procesados if exito else fallidos).append(usuario)
+                    logger.info(f"{'✅' if exito else '❌'} [{i}/{len(pendientes)}] {usuario}")
+            except KeyboardInterrupt:
+                # Lo ya registrado queda en el checkpoint; la próxima ejecución continúa
+                logger.warning("⏹️ Interrumpido: cancelando usuarios pendientes")
+                ejecutor.shutdown(wait=True, cancel_futures=True)
+                raise
+    finally:
+        if not usar_procesos:
+            configurar_limite_llm(LLM_MAX_CONCURRENCIA)
+
+    if not progreso.fallidos:
+        # Ejecución terminada: el checkpoint solo sirve para reanudar, no para la próxima regeneración
+        progreso.reiniciar()
+        logger.info("🧹 Regeneración completa; checkpoint eliminado")
+
+    return {
+        "dry_run": False,
+        "procesados": sorted(procesados),
+        "fallidos": sorted(fallidos),
+        "omitidos": omitidos,
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenera las rutas de aprendizaje de todos los usuarios")
+    parser.add_argument("--cohorte", help="Solo usuarios con usuario_perfil.cohorte igual a este valor")
+    parser.add_argument("--filtro", help="Consulta Mongo (JSON) adicional sobre usuario_perfil")
+    parser.add_argument("--usuarios", help="Lista de usuarios separados por coma")
+    parser.add_argument("--hilos", type=int, default=4, help="Trabajadores del pool")
+    parser.add_argument("--procesos", action="store_true", help="Usar procesos en lugar de hilos")
+    parser.add_argument("--max-llm", type=int, default=4, help="Llamadas concurrentes máximas al modelo (0 = sin límite)")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_DEFAULT), help="Archivo de progreso")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignorar el checkpoint previo")
+    parser.add_argument("--no-reintentar", action="store_true", help="No reintentar usuarios fallidos")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar qué se regeneraría sin llamar al modelo")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    resumen = ejecutar_regeneracion(
+        cohorte=args.cohorte,
+        filtro=json.loads(args.filtro) if args.filtro else None,
+        usuarios=[u.strip() for u in args.usuarios.split(",") if u.strip()] if args.usuarios else None,
+        trabajadores=args.hilos,
+        max_llm=args.max_llm,
+        usar_procesos=args.procesos,
+        checkpoint=args.checkpoint,
+        reiniciar=args.reiniciar,
+        reintentar_fallidos=not args.no_reintentar,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+    return 0 if not resumen.get("fallidos") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Memoria conversacional del chatbot tutor guardada en el servidor.
+
+Cada conversación es un documento de `sesiones_chat`:
+
+    {_id: "<uuid>", usuario, ruta_id, resumen, turnos: [{tipo, texto}],
+     turnos_resumidos, version, fecha_creacion, fecha_actualizacion}
+
+`turnos` conserva solo los mensajes recientes: cuando supera
+TURNOS_RECIENTES + LOTE_RESUMEN, los más antiguos se pliegan en `resumen`
+(el resumen anterior se actualiza con ellos), de modo que el prompt queda
+acotado sin importar cuánto dure la conversación. Un índice TTL sobre
+`fecha_actualizacion` descarta las sesiones inactivas.
+
+`version` cuenta las escrituras de la sesión: el plegado solo se aplica si
+nadie agregó turnos entre la lectura y la escritura, y el tutor la usa para
+saber si su sesión de Gemini en memoria sigue al día.
+
+Las funciones *_async hacen lo mismo con una base de get_async_database
+(ver TutorVirtual.conversar_async).
+"""
+
+import uuid
+import datetime
+import logging
+from src.config import COLS, CHAT_SESION_HORAS
+from src.database import ensure_ttl_index
+
+logger = logging.getLogger(__name__)
+
+COL_SESIONES = COLS["CHAT"]
+
+# Mensajes (del estudiante o del tutor) que se envían literalmente al modelo
+TURNOS_RECIENTES = 6
+# Mensajes antiguos que se acumulan antes de plegarlos en el resumen
+LOTE_RESUMEN = 4
+RESUMEN_MAX_CHARS = 1500
+TEXTO_TURNO_MAX = 4000
+
+
+def asegurar_indices(db, horas=CHAT_SESION_HORAS):
+    """Índice TTL que expira las sesiones tras `horas` sin mensajes."""
+    segundos = int(horas * 3600)
+    ensure_ttl_index(db[COL_SESIONES], "fecha_actualizacion", segundos, "ttl_sesiones")
+
+
+def normalizar_turnos(historial):
+    """
+    Convierte un historial enviado por el cliente a turnos de sesión.
+
+    Acepta {"tipo", "texto"} y el formato del dashboard {"rol", "contenido"}.
+    """
+    turnos = []
+    for mensaje in historial or []:
+        if not isinstance(mensaje, dict):
+            continue
+        texto = str(mensaje.get("texto") or mensaje.get("contenido") or "").strip()
+        if not texto:
+            continue
+        tipo = "usuario" if (mensaje.get("tipo") or mensaje.get("rol")) == "usuario" else "tutor"
+        turnos.append({"tipo": tipo, "texto": texto[:TEXTO_TURNO_MAX]})
+    return turnos
+
+
+def _nueva_sesion(usuario, ruta_id, historial):
+    ahora = datetime.datetime.utcnow()
+    return {
+        "_id": uuid.uuid4().hex,
+        "usuario": usuario,
+        "ruta_id": str(ruta_id),
+        "resumen": "",
+        "turnos": normalizar_turnos(historial),
+        "turnos_resumidos": 0,
+        "version": 0,
+        "fecha_creacion": ahora,
+        "fecha_actualizacion": ahora,
+    }
+
+
+def _filtro_sesion(sesion_id, usuario, ruta_id):
+    filtro = {"_id": str(sesion_id), "usuario": usuario}
+    if ruta_id is not None:
+        filtro["ruta_id"] = str(ruta_id)
+    return filtro
+
+
+def _intercambio(sesion, mensaje, respuesta):
+    """(filtro, actualización, función que aplica el cambio a la sesión leída)"""
+    ahora = datetime.datetime.utcnow()
+    nuevos = [
+        {"tipo": "usuario", "texto": mensaje[:TEXTO_TURNO_MAX]},
+        {"tipo": "tutor", "texto": respuesta[:TEXTO_TURNO_MAX]},
+    ]
+
+    def aplicar():
+        sesion["turnos"] = sesion.get("turnos", []) + nuevos
+        sesion["version"] = sesion.get("version", 0) + 1
+        sesion["fecha_actualizacion"] = ahora
+        return sesion
+
+    actualizacion = {"$push": {"turnos": {"$each": nuevos}}, "$inc": {"version": 1}, "$set": {"fecha_actualizacion": ahora}}
+    return {"_id": sesion["_id"]}, actualizacion, aplicar
+
+
+def crear_sesion(db, usuario, ruta_id, historial=None):
+    """
+    Crea una sesión nueva, opcionalmente sembrada con un historial del cliente.
+
+    Returns:
+        dict: Documento de la sesión
+    """
+    sesion = _nueva_sesion(usuario, ruta_id, historial)
+    db[COL_SESIONES].insert_one(sesion)
+    return sesion
+
+
+def obtener_sesion(db, sesion_id, usuario, ruta_id=None):
+    """Sesión del usuario (y de la ruta, si se indica) o None si no existe o expiró."""
+    return db[COL_SESIONES].find_one(_filtro_sesion(sesion_id, usuario, ruta_id))
+
+
+def registrar_intercambio(db, sesion, mensaje, respuesta):
+    """
+    Agrega la pregunta y la respuesta a la sesión (una sola escritura).
+
+    Returns:
+        dict: La sesión con los turnos y la versión actualizados
+    """
+    filtro, actualizacion, aplicar = _intercambio(sesion, mensaje, respuesta)
+    db[COL_SESIONES].update_one(filtro, actualizacion)
+    return aplicar()
+
+
+async def crear_sesion_async(db, usuario, ruta_id, historial=None):
+    """crear_sesion con una base asíncrona."""
+    sesion = _nueva_sesion(usuario, ruta_id, historial)
+    await db[COL_SESIONES].insert_one(sesion)
+    return sesion
+
+
+async def obtener_sesion_async(db, sesion_id, usuario, ruta_id=None):
+    """obtener_sesion con una base asíncrona."""
+    return await db[COL_SESIONES].find_one(_filtro_sesion(sesion_id, usuario, ruta_id))
+
+
+async def registrar_intercambio_async(db, sesion, mensaje, respuesta):
+    """registrar_intercambio con una base asíncrona."""
+    filtro, actualizacion, aplicar = _intercambio(sesion, mensaje, respuesta)
+    await db[COL_SESIONES].update_one(filtro, actualizacion)
+    return aplicar()
+
+
+def requiere_plegado(sesion):
+    """True si la sesión acumula más mensajes de los que se envían literalmente."""
+    return len(sesion.get("turnos", [])) > TURNOS_RECIENTES + LOTE_RESUMEN
+
+
+def plegar_turnos(db, sesion, resumir):
+    """
+    Pliega los turnos antiguos en el resumen si la sesión superó el límite.
+
+    Args:
+        db: Database - Instancia MongoDB
+        sesion: dict - Sesión tal como se leyó (se actualiza en el lugar)
+        resumir: callable(resumen, turnos) -> str - Nuevo resumen
+
+    Returns:
+        bool: True si se plegó (la sesión cambió de versión)
+    """
+    if not requiere_plegado(sesion):
+        return False
+
+    antiguos = sesion["turnos"][:-TURNOS_RECIENTES]
+    resumen = resumir(sesion.get("resumen", ""), antiguos)[:RESUMEN_MAX_CHARS]
+    filtro, actualizacion = _plegado(sesion, resumen)
+    return _aplicar_plegado(sesion, resumen, db[COL_SESIONES].update_one(filtro, actualizacion))
+
+
+async def plegar_turnos_async(db, sesion, resumir):
+    """plegar_turnos con una base asíncrona; `resumir` es una corrutina."""
+    if not requiere_plegado(sesion):
+        return False
+
+    antiguos = sesion["turnos"][:-TURNOS_RECIENTES]
+    resumen = (await resumir(sesion.get("resumen", ""), antiguos))[:RESUMEN_MAX_CHARS]
+    filtro, actualizacion = _plegado(sesion, resumen)
+    return _aplicar_plegado(sesion, resumen, await db[COL_SESIONES].update_one(filtro, actualizacion))
+
+
+def _plegado(sesion, resumen):
+    """(filtro, actualización) que reemplaza los turnos antiguos por el resumen si la versión no cambió"""
+    antiguos, recientes = sesion["turnos"][:-TURNOS_RECIENTES], sesion["turnos"][-TURNOS_RECIENTES:]
+    return {"_id": sesion["_id"], "version": sesion["version"]}, {
+        "$set": {"resumen": resumen, "turnos": recientes, "fecha_actualizacion": datetime.datetime.utcnow()},
+        "$inc": {"version": 1, "turnos_resumidos": len(antiguos)},
+    }
+
+
+def _aplicar_plegado(sesion, resumen, resultado):
+    if not resultado.matched_count:
+        # Otro proceso escribió en la sesión; se plegará en el próximo mensaje
+        logger.info(f"Sesión {sesion['_id']} modificada en paralelo; se omite el plegado")
+        return False
+
+    antiguos = sesion["turnos"][:-TURNOS_RECIENTES]
+    sesion["resumen"] = resumen
+    sesion["turnos"] = sesion["turnos"][-TURNOS_RECIENTES:]
+    sesion["version"] += 1
+    sesion["turnos_resumidos"] = sesion.get("turnos_resumidos", 0) + len(antiguos)
+    return True
+
+
+def prompt_resumen(resumen, turnos):
+    """Prompt para actualizar el resumen con los turnos que salen de la ventana."""
+    conversacion = "\n".join(
+        f"{'Estudiante' if t['tipo'] == 'usuario' else 'Tutor'}: {t['texto']}" for t in turnos
+    )
+    return f"""Actualiza el resumen de una conversación de tutoría.
+
+RESUMEN ACTUAL:
+{resumen or '(vacío)'}
+
+NUEVOS MENSAJES:
+{conversacion}
+
+Escribe el resumen actualizado en texto plano y en el idioma de la conversación, en menos de {RESUMEN_MAX_CHARS // 6} palabras.
+Conserva los temas consultados, las dudas pendientes y lo que el estudiante ya entendió."""
+
+
+def resumen_extractivo(resumen, turnos):
+    """Respaldo sin modelo: agrega las preguntas del estudiante y conserva lo más reciente."""
+    preguntas = [f"- {t['texto'][:160]}" for t in turnos if t["tipo"] == "usuario"]
+    texto = "\n".join(filter(None, [resumen, *preguntas]))
+    return texto[-RESUMEN_MAX_CHARS:]
@@ -0,0 +1,130 @@
+"""
+Respuestas JSON condicionales y comprimidas para los endpoints que el dashboard consulta seguido.
+
+- ETag débil calculado a partir de la versión del documento (fecha_actualizacion,
+  fecha_generacion, estado...) o, si el endpoint no tiene versión, del cuerpo.
+- `If-None-Match` con el mismo ETag se responde con 304 sin cuerpo; con
+  versión ni siquiera se serializa el JSON.
+- Los cuerpos de al menos COMPRESION_MIN_BYTES se envían con Content-Encoding
+  br (si el paquete brotli está instalado) o gzip, según Accept-Encoding.
+  El ETag es débil, así que sigue valiendo para cualquier codificación.
+- Métricas del proceso: bytes del JSON, bytes enviados y bytes que se
+  ahorraron con los 304 (tamaño de la última respuesta con ese ETag).
+"""
+
+import gzip
+import json
+import hashlib
+import logging
+from flask import Response, current_app, request
+from src.config import COMPRESION_MIN_BYTES
+from src.utils import CacheLRU, ContadoresProceso
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli se usa gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 5
+CACHE_CONTROL = "private, no-cache"
+
+# Tamaño de la última respuesta enviada con cada ETag (para medir el ahorro de los 304)
+_tamanos = CacheLRU(max_elementos=4096, ttl_segundos=3600)
+
+_estadisticas = ContadoresProceso()
+
+
+def estadisticas_respuestas():
+    """Métricas acumuladas del proceso, con el ahorro total de ancho de banda."""
+    datos = _estadisticas.copia()
+    sin_optimizar = datos.get("bytes_json", 0) + datos.get("bytes_ahorrados_304", 0)
+    ahorrados = sin_optimizar - datos.get("bytes_enviados", 0)
+    datos["bytes_ahorrados"] = ahorrados
+    datos["ahorro"] = round(ahorrados / sin_optimizar, 4) if sin_optimizar else 0.0
+    return datos
+
+
+def reiniciar_estadisticas_respuestas():
+    _estadisticas.limpiar()
+    _tamanos.limpiar()
+
+
+def _registrar(**valores):
+    _estadisticas.sumar(**valores)
+
+
+def etag_debil(*version):
+    """Etiqueta estable para una versión (valores serializables o fechas)."""
+    crudo = json.dumps(version, default=str, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(crudo, digest_size=12).hexdigest()
+
+
+def _codificacion_aceptada():
+    opciones = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(opciones)
+
+
+def comprimir(respuesta):
+    """
+    Comprime el cuerpo de una respuesta 200 si supera COMPRESION_MIN_BYTES y el cliente lo acepta.
+
+    Las respuestas en streaming o ya codificadas se devuelven sin cambios.
+    """
+    if respuesta.status_code != 200 or respuesta.is_streamed or "Content-Encoding" in respuesta.headers:
+        return respuesta
+
+    cuerpo = respuesta.get_data()
+    respuesta.vary.add("Accept-Encoding")
+    codificacion = _codificacion_aceptada() if len(cuerpo) >= COMPRESION_MIN_BYTES else None
+    if codificacion == "br":
+        respuesta.set_data(brotli.compress(cuerpo, quality=CALIDAD_BROTLI))
+    elif codificacion == "gzip":
+        respuesta.set_data(gzip.compress(cuerpo, compresslevel=NIVEL_GZIP, mtime=0))
+    if codificacion:
+        respuesta.headers["Content-Encoding"] = codificacion
+        _registrar(**{f"respuestas_{codificacion}": 1})
+
+    _registrar(respuestas_200=1, bytes_json=len(cuerpo), bytes_enviados=respuesta.content_length or 0)
+    return respuesta
+
+
+def responder_json(datos, version=None, estado=200):
+    """
+    Respuesta JSON con ETag débil, 304 condicional y compresión.
+
+    Args:
+        datos: dict - Cuerpo de la respuesta
+        version: tuple | None - Valores que cambian siempre que cambia `datos`
+            (p. ej. usuario y fecha_actualizacion). Sin versión, el ETag se
+            calcula del JSON serializado.
+        estado: int - Código HTTP (solo las 200 llevan ETag)
+
+    Returns:
+        flask.Response
+    """
+    cuerpo = None
+    if version is not None:
+        etag = etag_debil(*version)
+    else:
+        cuerpo = current_app.json.dumps(datos).encode("utf-8")
+        etag = hashlib.blake2b(cuerpo, digest_size=12).hexdigest()
+
+    if estado == 200 and request.if_none_match.contains_weak(etag):
+        tamano = _tamanos.obtener(etag)
+        _registrar(respuestas_304=1, bytes_ahorrados_304=0 if tamano is CacheLRU.AUSENTE else tamano)
+        no_modificado = Response(status=304)
+        no_modificado.set_etag(etag, weak=True)
+        no_modificado.headers["Cache-Control"] = CACHE_CONTROL
+        return no_modificado
+
+    if cuerpo is None:
+        cuerpo = current_app.json.dumps(datos).encode("utf-8")
+    respuesta = Response(cuerpo, status=estado, mimetype="application/json")
+    if estado == 200:
+        respuesta.set_etag(etag, weak=True)
+        respuesta.headers["Cache-Control"] = CACHE_CONTROL
+        _tamanos.guardar(etag, len(cuerpo))
+    return comprimir(respuesta)
@@ -0,0 +1,238 @@
+"""
+Selección de contenido con cobertura para los prompts.
+
+En lugar de truncar el material a los primeros N caracteres, construye un
+contexto con presupuesto fijo de tokens que cubre todos los documentos y
+niveles Bloom del estudiante:
+
+1. Divide cada unidad en fragmentos de tamaño acotado.
+2. Puntúa cada fragmento con TF-IDF local por su representatividad
+   (similitud con el centroide de su documento).
+3. Elige fragmentos con MMR (relevancia - redundancia) más un bono por
+   documento/nivel aún no cubierto, descartando casi-duplicados, hasta
+   agotar el presupuesto.
+4. Devuelve los fragmentos elegidos en el orden original de los documentos.
+
+Todo es local (sin llamadas a la IA) y sin dependencias externas.
+"""
+
+import math
+import re
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Aproximación estándar: ~4 caracteres por token
+CARACTERES_POR_TOKEN = 4
+TOKENS_POR_FRAGMENTO = 300
+
+BONO_DOCUMENTO_NUEVO = 0.3
+BONO_NIVEL_NUEVO = 0.15
+
+# Fragmentos casi idénticos a uno ya elegido (encabezados repetidos, copias) se descartan
+UMBRAL_DUPLICADO = 0.9
+
+STOPWORDS = {
+    # Español
+    "de", "la", "que", "el", "en", "y", "a", "los", "del", "se", "las", "por", "un", "para",
+    "con", "no", "una", "su", "al", "lo", "como", "más", "pero", "sus", "le", "ya", "o",
+    "este", "esta", "son", "entre", "cuando", "muy", "sin", "sobre", "también", "me", "hasta",
+    "hay", "donde", "desde", "todo", "nos", "durante", "todos", "uno", "les", "ni", "otros",
+    "ese", "eso", "ante", "ellos", "esto", "antes", "algunos", "qué", "unos", "otra", "otras",
+    "otro", "tanto", "esa", "estos", "mucho", "cual", "poco", "ella", "estar", "estas", "es",
+    "ser", "han", "fue", "era", "puede", "pueden", "cada", "así", "sea", "tiene",
+    # Inglés
+    "the", "of", "and", "to", "in", "is", "for", "on", "that", "with", "as", "are", "by",
+    "this", "be", "an", "or", "from", "at", "it", "its", "can", "which", "was", "were",
+}
+
+_RE_TERMINO = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+
+
+def estimar_tokens(texto):
+    """Estimación rápida de tokens de un texto."""
+    return (len(texto) + CARACTERES_POR_TOKEN - 1) // CARACTERES_POR_TOKEN
+
+
+def tokenizar(texto):
+    """Términos normalizados (minúsculas, sin stopwords ni números)."""
+    return [t for t in _RE_TERMINO.findall(texto.lower()) if t not in STOPWORDS]
+
+
+def _fragmentar(texto, max_chars):
+    """Divide un texto en fragmentos de hasta max_chars respetando párrafos/oraciones."""
+    texto = texto.strip()
+    if len(texto) <= max_chars:
+        return [texto] if texto else []
+
+    piezas = []
+    for parrafo in re.split(r"\n\s*\n|\n", texto):
+        parrafo = parrafo.strip()
+        if not parrafo:
+            continue
+        if len(parrafo) <= max_chars:
+            piezas.append(parrafo)
+            continue
+        for oracion in re.split(r"(?<=[.!?;])\s+", parrafo):
+            while len(oracion) > max_chars:
+                piezas.append(oracion[:max_chars])
+                oracion = oracion[max_chars:]
+            if oracion:
+                piezas.append(oracion)
+
+    fragmentos, actual = [], ""
+    for pieza in piezas:
+        if actual and len(actual) + 1 + len(pieza) > max_chars:
+            fragmentos.append(actual)
+            actual = pieza
+        else:
+            actual = f"{actual}\n{pieza}" if actual else pieza
+    if actual:
+        fragmentos.append(actual)
+    return fragmentos
+
+
+def _normalizar_unidades(unidades):
+    """Acepta strings o dicts {"texto", "documento", "nivel"}."""
+    normalizadas = []
+    for u in unidades:
+        if isinstance(u, str):
+            normalizadas.append({"texto": u, "documento": None, "nivel": None})
+        else:
+            normalizadas.append(
+                {
+                    "texto": u.get("texto", "") or "",
+                    "documento": u.get("documento"),
+                    "nivel": u.get("nivel"),
+                }
+            )
+    return normalizadas
+
+
+def _vectores_tfidf(fragmentos):
+    """Vectores TF-IDF normalizados (dict término -> peso) por fragmento."""
+    conteos = [Counter(tokenizar(f["texto"])) for f in fragmentos]
+    df = Counter()
+    for c in conteos:
+        df.update(c.keys())
+    n = len(fragmentos)
+    idf = {t: math.log((n + 1) / (d + 1)) + 1 for t, d in df.items()}
+
+    vectores = []
+    for c in conteos:
+        v = {t: (1 + math.log(tf)) * idf[t] for t, tf in c.items()}
+        norma = math.sqrt(sum(p * p for p in v.values())) or 1.0
+        vectores.append({t: p / norma for t, p in v.items()})
+    return vectores
+
+
+def _coseno(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(p * b.get(t, 0.0) for t, p in a.items())
+
+
+def _centroides(fragmentos, vectores):
+    """Centroide normalizado por documento."""
+    sumas = {}
+    for f, v in zip(fragmentos, vectores):
+        acc = sumas.setdefault(f["documento"], Counter())
+        for t, p in v.items():
+            acc[t] += p
+    centroides = {}
+    for doc, acc in sumas.items():
+        norma = math.sqrt(sum(p * p for p in acc.values())) or 1.0
+        centroides[doc] = {t: p / norma for t, p in acc.items()}
+    return centroides
+
+
+def seleccionar_contexto(unidades, presupuesto_tokens, lambda_diversidad=0.7, tokens_por_fragmento=TOKENS_POR_FRAGMENTO):
+    """
+    Construye un contexto representativo y diverso dentro de un presupuesto de tokens.
+
+    Args:
+        unidades (list): Strings o dicts {"texto", "documento", "nivel"} en orden de documento
+        presupuesto_tokens (int): Máximo de tokens estimados del contexto resultante
+        lambda_diversidad (float): Peso de la relevancia frente a la redundancia (MMR)
+        tokens_por_fragmento (int): Tamaño máximo de cada fragmento
+
+    Returns:
+        str: Contexto seleccionado, agrupado por documento en orden original
+    """
+    unidades = [u for u in _normalizar_unidades(unidades) if u["texto"].strip()]
+    if not unidades:
+        return ""
+
+    max_chars = tokens_por_fragmento * CARACTERES_POR_TOKEN
+    fragmentos = []
+    for idx_u, u in enumerate(unidades):
+        for idx_f, texto in enumerate(_fragmentar(u["texto"], max_chars)):
+            fragmentos.append(
+                {
+                    "texto": texto,
+                    "documento": u["documento"],
+                    "nivel": u["nivel"],
+                    "orden": (idx_u, idx_f),
+                    "tokens": estimar_tokens(texto) + 1,
+                }
+            )
+
+    # Si todo cabe, no hay nada que seleccionar
+    if sum(f["tokens"] for f in fragmentos) <= presupuesto_tokens:
+        return _ensamblar(fragmentos)
+
+    vectores = _vectores_tfidf(fragmentos)
+    centroides = _centroides(fragmentos, vectores)
+    relevancia = [_coseno(v, centroides[f["documento"]]) for f, v in zip(fragmentos, vectores)]
+
+    seleccionados = []
+    max_similitud = [0.0] * len(fragmentos)
+    docs_cubiertos, niveles_cubiertos = set(), set()
+    restante = presupuesto_tokens
+    disponibles = set(range(len(fragmentos)))
+
+    while disponibles:
+        mejor, mejor_puntaje = None, -math.inf
+        for i in disponibles:
+            f = fragmentos[i]
+            if f["tokens"] > restante or max_similitud[i] >= UMBRAL_DUPLICADO:
+                continue
+            puntaje = lambda_diversidad * relevancia[i] - (1 - lambda_diversidad) * max_similitud[i]
+            if f["documento"] not in docs_cubiertos:
+                puntaje += BONO_DOCUMENTO_NUEVO
+            if f["nivel"] is not None and f["nivel"] not in niveles_cubiertos:
+                puntaje += BONO_NIVEL_NUEVO
+            if puntaje > mejor_puntaje:
+                mejor, mejor_puntaje = i, puntaje
+        if mejor is None:
+            break
+
+        f = fragmentos[mejor]
+        seleccionados.append(f)
+        disponibles.discard(mejor)
+        restante -= f["tokens"]
+        docs_cubiertos.add(f["documento"])
+        niveles_cubiertos.add(f["nivel"])
+        for i in disponibles:
+            sim = _coseno(vectores[i], vectores[mejor])
+            if sim > max_similitud[i]:
+                max_similitud[i] = sim
+
+    logger.debug(
+        f"Selección de contenido: {len(seleccionados)}/{len(fragmentos)} fragmentos, "
+        f"{len(docs_cubiertos)} documentos, {presupuesto_tokens - restante}/{presupuesto_tokens} tokens"
+    )
+    return _ensamblar(seleccionados)
+
+
+def _ensamblar(fragmentos):
+    """Une fragmentos en orden original con un encabezado por documento."""
+    partes = []
+    doc_actual = object()
+    for f in sorted(fragmentos, key=lambda f: f["orden"]):
+        if f["documento"] is not None and f["documento"] != doc_actual:
+            partes.append(f"--- {f['documento']} ---")
+        doc_actual = f["documento"]
+        partes.append(f["texto"])
+    return "\n".join(partes)
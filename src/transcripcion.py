@@ -0,0 +1,304 @@
+"""
+Servicio de transcripción de audio para el chatbot tutor.
+
+Etapas:
+1. Decodificación a PCM mono de 16 kHz (WAV con la biblioteca estándar;
+   cualquier otro formato con ffmpeg si está instalado).
+2. Detección de voz por energía en ventanas de 30 ms: se recortan los
+   silencios de los extremos y los silencios internos largos se acortan.
+3. División en trozos de hasta TRANSCRIPCION_TROZO_S segundos, cortando en
+   los silencios (un tramo de voz más largo se corta a la fuerza).
+4. Codificación de cada trozo a Opus mono de 24 kbps con ffmpeg (WAV de
+   16 kHz si no hay ffmpeg o con el backend local).
+5. Transcripción de los trozos en paralelo, con un pool de hilos y un
+   cliente OpenAI compartidos por el proceso, y unión en orden.
+
+Si la grabación no se puede decodificar (p. ej. webm sin ffmpeg) se envía
+tal cual en una sola petición.
+
+El backend se elige con RUTEALO_TRANSCRIPCION_BACKEND: "openai" (Whisper) o
+"local", un sustituto determinista sin red para pruebas y benchmarks.
+"""
+
+import io
+import os
+import time
+import wave
+import shutil
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.config import (
+    ModeloPerezoso,
+    TRANSCRIPCION_TROZO_S,
+    TRANSCRIPCION_PARALELO,
+    get_transcripcion_backend,
+)
+from src.utils import ContadoresProceso
+
+logger = logging.getLogger(__name__)
+
+FRECUENCIA = 16000
+VENTANA_MS = 30
+# Ventanas por debajo de este nivel (dBFS) se consideran silencio
+SILENCIO_DBFS = -40
+# Silencio mínimo para separar tramos de voz y relleno que se conserva a cada lado
+SILENCIO_MIN_MS = 400
+RELLENO_MS = 180
+BITRATE_OPUS = "24k"
+
+IDIOMAS_WHISPER = {"es": "es", "en": "en", "qu": "qu"}
+
+
+class ErrorTranscripcion(Exception):
+    """Error de configuración del backend de transcripción."""
+
+
+_estadisticas = ContadoresProceso()
+
+
+def estadisticas_transcripcion():
+    """Copia de las métricas acumuladas del proceso."""
+    return _estadisticas.copia()
+
+
+def reiniciar_estadisticas_transcripcion():
+    _estadisticas.limpiar()
+
+
+def _registrar(**valores):
+    _estadisticas.sumar(**valores)
+
+
+# --- Backends ---
+
+
+def _crear_cliente_openai():
+    try:
+        from openai import OpenAI
+    except ImportError:
+        raise ErrorTranscripcion("OpenAI no está instalado. Ejecuta: pip install openai>=1.0.0")
+
+    clave = os.getenv("OPENAI_API_KEY")
+    if not clave:
+        raise ErrorTranscripcion("OPENAI_API_KEY no configurada.")
+    # Un solo cliente por proceso: reutiliza su pool de conexiones HTTP (keep-alive)
+    return OpenAI(api_key=clave, max_retries=2, timeout=120)
+
+
+# Se crea en la primera transcripción, no al importar el módulo
+cliente_openai = ModeloPerezoso(_crear_cliente_openai)
+
+
+def _transcribir_openai(audio, nombre, idioma):
+    respuesta = cliente_openai.audio.transcriptions.create(
+        model="whisper-1",
+        file=(nombre, audio),
+        language=IDIOMAS_WHISPER.get(idioma, "es"),
+    )
+    return respuesta.text
+
+
+def _transcribir_local(audio, nombre, idioma):
+    """Sustituto determinista: describe la duración del trozo (o su tamaño si no es WAV)."""
+    latencia_ms = float(os.getenv("RUTEALO_TRANSCRIPCION_LATENCIA_MS", "0"))
+    if latencia_ms:
+        time.sleep(latencia_ms / 1000)
+    try:
+        with wave.open(io.BytesIO(audio)) as lector:
+            return f"[{idioma}:{round(lector.getnframes() * 1000 / lector.getframerate())}ms]"
+    except (wave.Error, EOFError):
+        return f"[{idioma}:{len(audio)}B]"
+
+
+_BACKENDS = {"openai": _transcribir_openai, "local": _transcribir_local}
+
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def _obtener_pool():
+    """Pool de hilos compartido: limita los trozos en vuelo de todo el proceso."""
+    global _pool
+    if _pool is None:
+        with _lock_pool:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=TRANSCRIPCION_PARALELO, thread_name_prefix="transcripcion")
+    return _pool
+
+
+# --- Audio ---
+
+
+def _ffmpeg():
+    return shutil.which("ffmpeg")
+
+
+def _decodificar_wav(datos):
+    with wave.open(io.BytesIO(datos)) as lector:
+        canales, ancho, frecuencia = lector.getnchannels(), lector.getsampwidth(), lector.getframerate()
+        crudo = lector.readframes(lector.getnframes())
+    if ancho != 2:
+        raise ValueError(f"WAV de {ancho * 8} bits")
+
+    muestras = np.frombuffer(crudo, dtype="<i2").astype(np.float32)
+    if canales > 1:
+        muestras = muestras.reshape(-1, canales).mean(axis=1)
+    if frecuencia != FRECUENCIA and len(muestras):
+        n_salida = int(len(muestras) * FRECUENCIA / frecuencia)
+        muestras = np.interp(np.linspace(0, len(muestras) - 1, n_salida), np.arange(len(muestras)), muestras)
+    return np.clip(muestras, -32768, 32767).astype(np.int16)
+
+
+def decodificar(datos):
+    """PCM int16 mono a FRECUENCIA Hz, o None si no hay forma de decodificar el audio."""
+    if datos[:4] == b"RIFF" and datos[8:12] == b"WAVE":
+        try:
+            return _decodificar_wav(datos)
+        except (wave.Error, EOFError, ValueError) as e:
+            logger.info(f"WAV no decodificable con la biblioteca estándar ({e}); se intenta con ffmpeg")
+
+    ffmpeg = _ffmpeg()
+    if not ffmpeg:
+        return None
+    proceso = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-ac", "1", "-ar", str(FRECUENCIA), "-f", "s16le", "pipe:1"],
+        input=datos, capture_output=True, timeout=120,
+    )
+    if proceso.returncode != 0:
+        logger.warning(f"⚠️ ffmpeg no pudo decodificar el audio: {proceso.stderr[-200:]!r}")
+        return None
+    return np.frombuffer(proceso.stdout, dtype=np.int16)
+
+
+def segmentos_de_voz(pcm):
+    """
+    Tramos con voz [(inicio, fin)] en muestras.
+
+    Los tramos separados por menos de SILENCIO_MIN_MS se unen y cada tramo
+    conserva RELLENO_MS de silencio a cada lado.
+    """
+    ventana = FRECUENCIA * VENTANA_MS // 1000
+    n = len(pcm) // ventana
+    if n == 0:
+        return []
+
+    tramas = pcm[: n * ventana].astype(np.float32).reshape(n, ventana)
+    voz = np.sqrt((tramas ** 2).mean(axis=1)) > 32768 * 10 ** (SILENCIO_DBFS / 20)
+    cambios = np.diff(np.concatenate(([0], voz.astype(np.int8), [0])))
+    inicios, fines = np.flatnonzero(cambios == 1), np.flatnonzero(cambios == -1)
+
+    tramos = []
+    for inicio, fin in zip(inicios, fines):
+        if tramos and inicio - tramos[-1][1] < SILENCIO_MIN_MS // VENTANA_MS:
+            tramos[-1][1] = fin
+        else:
+            tramos.append([inicio, fin])
+
+    relleno = RELLENO_MS // VENTANA_MS
+    return [(max(0, inicio - relleno) * ventana, min(n, fin + relleno) * ventana) for inicio, fin in tramos]
+
+
+def agrupar_trozos(segmentos, max_muestras):
+    """Agrupa tramos consecutivos en trozos de hasta max_muestras (cortando los tramos más largos)."""
+    trozos, actual, largo = [], [], 0
+    for inicio, fin in segmentos:
+        while fin - inicio > max_muestras:
+            if actual:
+                trozos.append(actual)
+                actual, largo = [], 0
+            trozos.append([(inicio, inicio + max_muestras)])
+            inicio += max_muestras
+        if actual and largo + (fin - inicio) > max_muestras:
+            trozos.append(actual)
+            actual, largo = [], 0
+        actual.append((inicio, fin))
+        largo += fin - inicio
+    if actual:
+        trozos.append(actual)
+    return trozos
+
+
+def codificar(pcm, comprimir=True):
+    """Trozo listo para subir: (bytes, nombre). Opus/OGG con ffmpeg, WAV 16 kHz si no."""
+    ffmpeg = _ffmpeg() if comprimir else None
+    if ffmpeg:
+        proceso = subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "s16le", "-ar", str(FRECUENCIA), "-ac", "1",
+             "-i", "pipe:0", "-c:a", "libopus", "-b:a", BITRATE_OPUS, "-f", "ogg", "pipe:1"],
+            input=pcm.tobytes(), capture_output=True, timeout=120,
+        )
+        if proceso.returncode == 0:
+            return proceso.stdout, "audio.ogg"
+        logger.warning(f"⚠️ ffmpeg no pudo codificar a Opus; se envía WAV: {proceso.stderr[-200:]!r}")
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as escritor:
+        escritor.setnchannels(1)
+        escritor.setsampwidth(2)
+        escritor.setframerate(FRECUENCIA)
+        escritor.writeframes(pcm.tobytes())
+    return buffer.getvalue(), "audio.wav"
+
+
+def transcribir(datos, nombre="audio.webm", idioma="es", backend=None):
+    """
+    Transcribe una grabación completa.
+
+    Args:
+        datos (bytes): Audio tal como lo envió el navegador
+        nombre (str): Nombre del archivo (extensión usada si se envía sin procesar)
+        idioma (str): 'es', 'en' o 'qu'
+        backend (str): "openai" o "local" (por defecto RUTEALO_TRANSCRIPCION_BACKEND)
+
+    Returns:
+        dict: {"texto", "trozos", "duracion_s", "duracion_voz_s", "bytes_recibidos", "bytes_enviados"}
+
+    Raises:
+        ErrorTranscripcion: Backend desconocido o sin configurar
+    """
+    backend = backend or get_transcripcion_backend()
+    transcribir_trozo = _BACKENDS.get(backend)
+    if transcribir_trozo is None:
+        raise ErrorTranscripcion(f"Backend de transcripción desconocido: {backend}")
+
+    pcm = decodificar(datos)
+    if pcm is None:
+        # Sin decodificador: la grabación original en una sola petición
+        tareas = [lambda: (datos, nombre)]
+        duracion = duracion_voz = None
+    else:
+        trozos = agrupar_trozos(segmentos_de_voz(pcm), int(TRANSCRIPCION_TROZO_S * FRECUENCIA))
+        comprimir = backend != "local"
+        tareas = [
+            lambda trozo=trozo: codificar(np.concatenate([pcm[inicio:fin] for inicio, fin in trozo]), comprimir)
+            for trozo in trozos
+        ]
+        duracion = round(len(pcm) / FRECUENCIA, 2)
+        duracion_voz = round(sum(fin - inicio for trozo in trozos for inicio, fin in trozo) / FRECUENCIA, 2)
+
+    enviados = []
+
+    def procesar(tarea):
+        audio, nombre_trozo = tarea()
+        enviados.append(len(audio))
+        return transcribir_trozo(audio, nombre_trozo, idioma)
+
+    if len(tareas) == 1:
+        textos = [procesar(tareas[0])]
+    else:
+        # map conserva el orden de los trozos aunque terminen en otro orden
+        textos = list(_obtener_pool().map(procesar, tareas))
+
+    _registrar(peticiones=1, trozos=len(tareas), bytes_recibidos=len(datos), bytes_enviados=sum(enviados))
+    return {
+        "texto": " ".join(t.strip() for t in textos if t and t.strip()),
+        "trozos": len(tareas),
+        "duracion_s": duracion,
+        "duracion_voz_s": duracion_voz,
+        "bytes_recibidos": len(datos),
+        "bytes_enviados": sum(enviados),
+    }
@@ -5,6 +5,8 @@ Centraliza lógica transversal para mantener código limpio en modelos y rutas.
 
 import time
 import logging
+import threading
+from collections import Counter, OrderedDict
 from functools import wraps
 from typing import Callable, Any, Optional, Type, Tuple
 
@@ -210,26 +212,157 @@ def ensure_directory(path: Any) -> None:
 
 
 def log_execution_time(func: Callable) -> Callable:
-    """Decorador que registra el tiempo de ejecución de una función."""
+    """
+    Decorador que registra el tiempo de ejecución de una función.
+
+    La duración también se suma como etapa a las métricas (src/metricas.py):
+    histograma por función y desglose de la petición en curso.
+    """
 
     @wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        import time
+        from src.metricas import registrar_etapa
 
-        start = time.time()
+        start = time.perf_counter()
         try:
             result = func(*args, **kwargs)
-            duration = time.time() - start
-            logger.debug(f"[PERF] {func.__name__} completó en {duration:.4f}s")
-            return result
         except Exception as e:
-            duration = time.time() - start
+            duration = time.perf_counter() - start
+            registrar_etapa(func.__name__, duration)
             logger.error(f"[PERF] {func.__name__} falló después de {duration:.4f}s: {str(e)}")
             raise
+        duration = time.perf_counter() - start
+        registrar_etapa(func.__name__, duration)
+        logger.debug(f"[PERF] {func.__name__} completó en {duration:.4f}s")
+        return result
 
     return wrapper
 
 
+# ============================================================================
+# CACHÉ LRU CON TTL
+# ============================================================================
+
+
+class CacheLRU:
+    """
+    Caché en memoria del proceso con expulsión LRU y expiración por TTL.
+
+    Segura entre hilos. Con varios workers cada proceso tiene su propia copia:
+    la invalidación explícita solo afecta al proceso que escribe, el TTL acota
+    cuánto tiempo pueden ver los demás un valor desactualizado.
+
+    Example:
+        cache = CacheLRU(max_elementos=1024, ttl_segundos=60)
+        valor = cache.obtener("ana")
+        if valor is CacheLRU.AUSENTE:
+            generacion = cache.generacion()
+            valor = cargar("ana")
+            cache.guardar("ana", valor, generacion)
+    """
+
+    AUSENTE = object()
+
+    def __init__(self, max_elementos: int = 1024, ttl_segundos: float = 300):
+        self.max_elementos = max_elementos
+        self.ttl_segundos = ttl_segundos
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: Any) -> Any:
+        """Valor vigente para la clave o CacheLRU.AUSENTE (None es un valor válido)."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    del self._datos[clave]
+                self.fallos += 1
+                return self.AUSENTE
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def generacion(self) -> int:
+        """Contador de invalidaciones; tomarlo antes de leer la fuente para guardar()."""
+        return self._generacion
+
+    def guardar(self, clave: Any, valor: Any, generacion: Optional[int] = None) -> None:
+        """
+        Guarda un valor. Si se pasa `generacion` y hubo una invalidación desde
+        entonces, el valor (posiblemente leído antes de la escritura) se descarta.
+        """
+        with self._lock:
+            if generacion is not None and generacion != self._generacion:
+                return
+            self._datos[clave] = (time.monotonic() + self.ttl_segundos, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_elementos:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave: Any) -> None:
+        with self._lock:
+            self._generacion += 1
+            self._datos.pop(clave, None)
+
+    def invalidar_donde(self, predicado) -> int:
+        """Descarta todas las claves que cumplen `predicado(clave)`; retorna cuántas."""
+        with self._lock:
+            self._generacion += 1
+            claves = [c for c in self._datos if predicado(c)]
+            for clave in claves:
+                del self._datos[clave]
+            return len(claves)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._generacion += 1
+            self._datos.clear()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def estadisticas(self) -> dict:
+        """Aciertos, fallos y tamaño actual."""
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+                "elementos": len(self._datos),
+            }
+
+
+class ContadoresProceso:
+    """
+    Contadores de métricas del proceso, seguros entre hilos.
+
+    Example:
+        contadores = ContadoresProceso()
+        contadores.sumar(aciertos=1, bytes_enviados=512)
+        contadores.copia()  # {"aciertos": 1, "bytes_enviados": 512}
+    """
+
+    def __init__(self):
+        self._valores = Counter()
+        self._lock = threading.Lock()
+
+    def sumar(self, **valores) -> None:
+        with self._lock:
+            self._valores.update(valores)
+
+    def copia(self) -> dict:
+        with self._lock:
+            return dict(self._valores)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._valores.clear()
+
+
 # ============================================================================
 # EXAM RESPONSE VALIDATORS
 # ============================================================================
@@ -1,25 +1,25 @@
 import os
 import datetime
-import gridfs
-import pypdf
 import logging
-from docx import Document
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
 from werkzeug.utils import secure_filename
-from src.config import DB_NAME, COLS, RAW_DIR, get_genai_model
+from src.config import DB_NAME, COLS, RAW_DIR, get_genai_model_lazy
 from src.database import get_database
-from src.utils import retry, validate_exam_responses, validate_exam_structure
+from src.utils import retry, log_execution_time, validate_exam_responses, validate_exam_structure, listar_archivos_usuario
+from src.seleccion_contenido import seleccionar_contexto
+from src.models.banco_preguntas import ensamblar_examen_inicial, ensamblar_tests_nivel, huellas_documentos
+from src.models.chatbot_tutor import invalidar_contexto_tutor
+from src.models.indice_tutor import indexar_material, indexar_ruta
+from src.models.evaluacion_zdp import obtener_perfil_zdp
+from pymongo import UpdateOne
 
 # Importaciones para IA y lógica de negocio
-import pandas as pd
 import json
 import re
 
 logger = logging.getLogger(__name__)
 
-# --- CONFIGURACIÓN GENERATIVA (Centralizada) ---
-model = get_genai_model()
+# --- CONFIGURACIÓN GENERATIVA (Centralizada, se inicializa en el primer uso) ---
+model = get_genai_model_lazy()
 
 # Constantes de Lógica Educativa
 JERARQUIA_BLOOM = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
@@ -27,6 +27,12 @@ COL_EXAM_INI = "examen_inicial"
 COL_RUTAS = "rutas_aprendizaje"
 COL_RAW = "materiales_crudos"
 
+# Presupuesto del material en el prompt del examen diagnóstico (~15000 caracteres)
+PRESUPUESTO_TOKENS_EXAMEN = 3750
+
+# Máximo de hojas de respuesta por envío en lote (un aula completa)
+MAX_ENTREGAS_LOTE = 200
+
 
 # --- CONEXIÓN BD ---
 def get_db(db_name: str = DB_NAME):
@@ -45,9 +51,71 @@ def guardar_imagen_gridfs(fs, img_bytes, nombre_archivo, pagina_idx, img_idx, ex
     return {"gridfs_id": file_id, "nombre_archivo": filename}
 
 
+# --- EXTRACTORES POR FORMATO (las librerías se importan en el primer uso) ---
+def _extraer_pdf(ruta_archivo):
+    import pypdf
+
+    reader = pypdf.PdfReader(ruta_archivo)
+    return [
+        {
+            "indice": i + 1,
+            "tipo_unidad": "pagina",
+            "contenido_texto": page.extract_text() or "",
+            "imagenes": [],
+            "metadata_bloom": None,
+        }
+        for i, page in enumerate(reader.pages)
+    ]
+
+
+def _extraer_docx(ruta_archivo):
+    from docx import Document
+
+    doc = Document(ruta_archivo)
+    texto = "\n".join([p.text for p in doc.paragraphs])
+    return [
+        {
+            "indice": 1,
+            "tipo_unidad": "documento_completo",
+            "contenido_texto": texto,
+            "imagenes": [],
+            "metadata_bloom": None,
+        }
+    ]
+
+
+def _extraer_pptx(ruta_archivo):
+    from pptx import Presentation
+
+    prs = Presentation(ruta_archivo)
+    unidades = []
+    for i, slide in enumerate(prs.slides):
+        texto = ""
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                texto += shape.text + "\n"
+        unidades.append(
+            {
+                "indice": i + 1,
+                "tipo_unidad": "diapositiva",
+                "contenido_texto": texto,
+                "imagenes": [],
+                "metadata_bloom": None,
+            }
+        )
+    return unidades
+
+
+EXTRACTORES = {
+    ".pdf": _extraer_pdf,
+    ".docx": _extraer_docx,
+    ".pptx": _extraer_pptx,
+}
+
+
+@log_execution_time
 def procesar_archivo_web(ruta_archivo, usuario, db):
     """Procesa un archivo subido y lo guarda en MongoDB."""
-    fs = gridfs.GridFS(db)
     collection = db[COLS["RAW"]]
 
     nombre = os.path.basename(ruta_archivo)
@@ -57,49 +125,9 @@ def procesar_archivo_web(ruta_archivo, usuario, db):
     logger.info(f"🌐 Procesando web: {nombre} para {usuario}")
 
     try:
-        if ext == ".pdf":
-            reader = pypdf.PdfReader(ruta_archivo)
-            for i, page in enumerate(reader.pages):
-                texto = page.extract_text() or ""
-                unidades_contenido.append(
-                    {
-                        "indice": i + 1,
-                        "tipo_unidad": "pagina",
-                        "contenido_texto": texto,
-                        "imagenes": [],
-                        "metadata_bloom": None,
-                    }
-                )
-
-        elif ext == ".docx":
-            doc = Document(ruta_archivo)
-            texto = "\n".join([p.text for p in doc.paragraphs])
-            unidades_contenido.append(
-                {
-                    "indice": 1,
-                    "tipo_unidad": "documento_completo",
-                    "contenido_texto": texto,
-                    "imagenes": [],
-                    "metadata_bloom": None,
-                }
-            )
-
-        elif ext == ".pptx":
-            prs = Presentation(ruta_archivo)
-            for i, slide in enumerate(prs.slides):
-                texto = ""
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        texto += shape.text + "\n"
-                unidades_contenido.append(
-                    {
-                        "indice": i + 1,
-                        "tipo_unidad": "diapositiva",
-                        "contenido_texto": texto,
-                        "imagenes": [],
-                        "metadata_bloom": None,
-                    }
-                )
+        extractor = EXTRACTORES.get(ext)
+        if extractor:
+            unidades_contenido = extractor(ruta_archivo)
 
         if unidades_contenido:
             doc_data = {
@@ -111,6 +139,11 @@ def procesar_archivo_web(ruta_archivo, usuario, db):
                 "estado_procesamiento": "PENDIENTE",
             }
             collection.replace_one({"nombre_archivo": nombre, "usuario_propietario": usuario}, doc_data, upsert=True)
+            try:
+                indexar_material(db, usuario, nombre, unidades_contenido)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo indexar {nombre} para el tutor: {e}")
+            invalidar_contexto_tutor(usuario)
             return True, len(unidades_contenido)
 
     except Exception as e:
@@ -121,6 +154,7 @@ def procesar_archivo_web(ruta_archivo, usuario, db):
 
 
 # --- LÓGICA DE ETIQUETADO BLOOM (Automática) ---
+@log_execution_time
 def auto_etiquetar_bloom(usuario, db):
     """Busca documentos PENDIENTES del usuario y les aplica Bloom con Gemini."""
     col = db[COLS["RAW"]]
@@ -167,21 +201,28 @@ def auto_etiquetar_bloom(usuario, db):
         )
         count += 1
 
+    if count:
+        invalidar_contexto_tutor(usuario)
     return count
 
 
 # --- NUEVA LÓGICA: GENERADOR DE RUTAS (MOTOR PROMPTING ADAPTADO) ---
 
 
-def obtener_contexto_usuario(db, usuario):
-    """Recopila todo el texto procesado de este usuario, agrupado por categoría Bloom."""
+def obtener_unidades_usuario(db, usuario):
+    """Unidades procesadas del usuario con su documento y nivel Bloom, en orden de documento.
+
+    Returns:
+        list: [{"texto": str, "documento": str, "nivel": str}, ...]
+    """
     # Buscamos en la colección RAW usando la constante definida o importada
     col_raw = db[COLS["RAW"]]
-    docs = col_raw.find({"usuario_propietario": usuario, "estado_procesamiento": "BLOOM_COMPLETADO"})
-
-    contenido_por_nivel = {nivel: [] for nivel in JERARQUIA_BLOOM}
-    contenido_total = ""
+    docs = col_raw.find(
+        {"usuario_propietario": usuario, "estado_procesamiento": "BLOOM_COMPLETADO"},
+        {"nombre_archivo": 1, "unidades_contenido": 1},
+    )
 
+    unidades = []
     for doc in docs:
         for unidad in doc.get("unidades_contenido", []):
             cat = unidad.get("Categoria_Bloom", "Otro")
@@ -190,53 +231,46 @@ def obtener_contexto_usuario(db, usuario):
             # Mapeo simple por si la IA usó sinónimos o mayúsculas
             for nivel in JERARQUIA_BLOOM:
                 if nivel.lower() in cat.lower():
-                    contenido_por_nivel[nivel].append(texto)
-                    contenido_total += texto + "\n"
+                    unidades.append({"texto": texto, "documento": doc.get("nombre_archivo"), "nivel": nivel})
                     break
 
+    return unidades
+
+
+def _agrupar_por_nivel(unidades):
+    """Agrupa unidades por nivel Bloom y concatena el texto total."""
+    contenido_por_nivel = {nivel: [] for nivel in JERARQUIA_BLOOM}
+    contenido_total = ""
+    for unidad in unidades:
+        contenido_por_nivel[unidad["nivel"]].append(unidad)
+        contenido_total += unidad["texto"] + "\n"
     return contenido_por_nivel, contenido_total
 
 
+def obtener_contexto_usuario(db, usuario):
+    """Recopila todo el texto procesado de este usuario, agrupado por categoría Bloom.
+
+    Cada nivel contiene las unidades ({"texto", "documento", "nivel"}) para que
+    la selección de contenido pueda cubrir todos los documentos.
+    """
+    return _agrupar_por_nivel(obtener_unidades_usuario(db, usuario))
+
+
 def cargar_marcos_pedagogicos():
-    """Carga los CSV con teoría pedagógica (ZDP, Bloom, Flow) para guiar la generación del examen."""
-    import pandas as pd
-    import os
-    
-    base_path = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
-    
-    marcos = {
-        "bloom": None,
-        "zdp": None,
-        "flow": None
-    }
-    
-    try:
-        # Cargar df_bloom.csv
-        bloom_path = os.path.join(base_path, "df_bloom.csv")
-        if os.path.exists(bloom_path):
-            marcos["bloom"] = pd.read_csv(bloom_path)
-            logger.info(f"✅ Cargado df_bloom.csv: {len(marcos['bloom'])} filas")
-        
-        # Cargar df_zdp.csv
-        zdp_path = os.path.join(base_path, "df_zdp.csv")
-        if os.path.exists(zdp_path):
-            marcos["zdp"] = pd.read_csv(zdp_path)
-            logger.info(f"✅ Cargado df_zdp.csv: {len(marcos['zdp'])} filas")
-        
-        # Cargar df_flow.csv
-        flow_path = os.path.join(base_path, "df_flow.csv")
-        if os.path.exists(flow_path):
-            marcos["flow"] = pd.read_csv(flow_path)
-            logger.info(f"✅ Cargado df_flow.csv: {len(marcos['flow'])} filas")
-    
-    except Exception as e:
-        logger.warning(f"⚠️ Error cargando marcos pedagógicos: {e}")
-    
-    return marcos
+    """Devuelve los marcos pedagógicos (ZDP, Bloom, Flow) precompilados.
+
+    Los CSV se compilan a un artefacto con los contextos ya renderizados
+    (ver src/data/marcos_compilados.py); aquí solo se reutiliza la copia
+    cargada en memoria, sin pandas.
+    """
+    from src.data.marcos_compilados import obtener_marcos_compilados
 
+    return obtener_marcos_compilados()
 
+
+@log_execution_time
 @retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(Exception,))
-def generar_examen_inicial(contenido_total):
+def generar_examen_inicial(contenido_total, unidades=None):
     """Genera un examen diagnóstico CON PREGUNTAS REALES SOBRE EL MATERIAL del usuario.
     
     NUEVA ESTRATEGIA (Diciembre 2025):
@@ -245,45 +279,18 @@ def generar_examen_inicial(contenido_total):
     - Según las respuestas correctas/incorrectas, determina el nivel Bloom del estudiante
     - Incluye opción "e) No lo sé / Omitir" obligatoria
     
+    El material se resume con selección por cobertura (todos los documentos y
+    niveles dentro de PRESUPUESTO_TOKENS_EXAMEN) en lugar de truncarlo.
+
     Se reintenta automáticamente si falla.
     """
     if not contenido_total:
         return {}
 
-    # Cargar marcos pedagógicos desde CSV
-    marcos = cargar_marcos_pedagogicos()
-    
-    # Construir contexto pedagógico desde CSV para guiar la IA
-    contexto_pedagogico = "\n📚 MARCOS TEÓRICOS PARA EVALUACIÓN PEDAGÓGICA:\n"
-    
-    # Marco Bloom (procesos cognitivos y tipos de conocimiento)
-    if marcos["bloom"] is not None and len(marcos["bloom"]) > 0:
-        contexto_pedagogico += "\n🔷 TAXONOMÍA DE BLOOM (Procesos cognitivos):\n"
-        for _, row in marcos["bloom"].iterrows():
-            cat = row.get("cat_bloom", "N/A")
-            desc = str(row.get("proc_desc", ""))[:200]  # Primeros 200 chars
-            if desc and desc != "N/A" and desc != "nan":
-                contexto_pedagogico += f"  • {cat}: {desc}\n"
-    
-    # Marco ZDP (principios del aprendizaje desarrollador)
-    if marcos["zdp"] is not None and len(marcos["zdp"]) > 0:
-        contexto_pedagogico += "\n🎯 ZONA DE DESARROLLO PRÓXIMO (Principios):\n"
-        zdp_sample = marcos["zdp"].head(6)  # Primeros 6 principios
-        for _, row in zdp_sample.iterrows():
-            principio = row.get("principio_zdp", "N/A")
-            bloom_sug = row.get("cat_bloom_sugerida", "N/A")
-            if principio != "N/A":
-                contexto_pedagogico += f"  • {principio} → Evaluar con nivel: {bloom_sug}\n"
-    
-    # Marco Flow (dimensiones de experiencia óptima)
-    if marcos["flow"] is not None and len(marcos["flow"]) > 0:
-        contexto_pedagogico += "\n⚡ TEORÍA DEL FLOW (Dimensiones de motivación):\n"
-        flow_sample = marcos["flow"].head(4)
-        for _, row in flow_sample.iterrows():
-            dimension = row.get("dimension", "N/A")
-            bloom_sug = row.get("cat_bloom", "N/A")
-            if dimension != "N/A":
-                contexto_pedagogico += f"  • {dimension} → Nivel: {bloom_sug}\n"
+    material = seleccionar_contexto(unidades or [contenido_total], PRESUPUESTO_TOKENS_EXAMEN)
+
+    # Contexto pedagógico precompilado desde los CSV para guiar la IA
+    contexto_pedagogico = cargar_marcos_pedagogicos().get("contexto_examen", "")
 
     prompt = f"""
     Eres un profesor universitario experto en evaluación pedagógica con doctorado en Ciencias de la Educación.
@@ -293,7 +300,7 @@ def generar_examen_inicial(contenido_total):
     {contexto_pedagogico}
     
     📄 MATERIAL DEL ESTUDIANTE (contenido que subió):
-    {contenido_total[:15000]}
+    {material}
     
     ⚠️ IMPORTANTE: Debes hacer preguntas SOBRE EL CONTENIDO ESPECÍFICO del material, NO preguntas meta-cognitivas.
     
@@ -429,14 +436,15 @@ def generar_examen_inicial(contenido_total):
 
 
 @retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(Exception,))
-def generar_bloque_ruta(nivel_bloom, textos_nivel, perfil_zdp=None, marcos=None):
+def generar_bloque_ruta(nivel_bloom, textos_nivel, perfil_zdp=None, marcos=None, db=None):
     """Genera Flashcards y Exámenes para un nivel específico de Bloom usando funciones especializadas.
     
     Args:
         nivel_bloom (str): Nivel cognitivo a generar
         textos_nivel (list): Contenido del usuario para este nivel
         perfil_zdp (dict): Perfil ZDP del estudiante (opcional)
-        marcos (dict): Marcos pedagógicos de CSV (opcional)
+        marcos (dict): Marcos pedagógicos precompilados (opcional)
+        db: Base de datos; si se indica, los tests salen primero del banco de preguntas
     
     Returns:
         dict: {"FLASHCARDS": [...], "EXAMENES": [...]} o None si debe omitirse
@@ -447,7 +455,11 @@ def generar_bloque_ruta(nivel_bloom, textos_nivel, perfil_zdp=None, marcos=None)
         return None
 
     # Importar funciones especializadas
-    from src.generadores_pedagogicos import generar_flashcards_con_teoria, generar_tests_con_teoria
+    from src.generadores_pedagogicos import (
+        generar_flashcards_con_teoria,
+        generar_tests_con_teoria,
+        PREGUNTAS_POR_ESTRATEGIA,
+    )
 
     # Determinar estrategia según perfil ZDP
     estrategia = "estandar"
@@ -482,12 +494,21 @@ def generar_bloque_ruta(nivel_bloom, textos_nivel, perfil_zdp=None, marcos=None)
             marcos=marcos
         )
         
-        tests = generar_tests_con_teoria(
-            nivel_bloom=nivel_bloom,
-            textos_nivel=textos_nivel,
-            estrategia=estrategia,
-            marcos=marcos
-        )
+        def generar_tests(num_preguntas=None):
+            return generar_tests_con_teoria(
+                nivel_bloom=nivel_bloom,
+                textos_nivel=textos_nivel,
+                estrategia=estrategia,
+                marcos=marcos,
+                num_preguntas=num_preguntas,
+            )
+
+        if db is not None:
+            tests = ensamblar_tests_nivel(
+                db, nivel_bloom, textos_nivel, PREGUNTAS_POR_ESTRATEGIA.get(estrategia, 3), generar_tests
+            )
+        else:
+            tests = generar_tests()
         
         # Validar que se generó contenido
         if not flashcards and not tests:
@@ -504,7 +525,20 @@ def generar_bloque_ruta(nivel_bloom, textos_nivel, perfil_zdp=None, marcos=None)
         return None
 
 
+@log_execution_time
 def generar_ruta_aprendizaje(usuario, db):
+    """Genera (o regenera) examen inicial y ruta del usuario; actualiza el contexto y el índice del tutor."""
+    try:
+        return _generar_ruta_aprendizaje(usuario, db)
+    finally:
+        invalidar_contexto_tutor(usuario)
+        try:
+            indexar_ruta(db, usuario)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo indexar la ruta de {usuario} para el tutor: {e}")
+
+
+def _generar_ruta_aprendizaje(usuario, db):
     """
     Orquestador principal: Lee todo el material del usuario y (re)genera la ruta completa.
     Retorna un mensaje de estado.
@@ -512,7 +546,8 @@ def generar_ruta_aprendizaje(usuario, db):
     logger.info(f"🛤️ Iniciando generación de ruta para: {usuario}")
 
     # 1. Obtener Contexto Global
-    contenido_bloom, contenido_total_raw = obtener_contexto_usuario(db, usuario)
+    unidades = obtener_unidades_usuario(db, usuario)
+    contenido_bloom, contenido_total_raw = _agrupar_por_nivel(unidades)
     col_examen = db[COL_EXAM_INI]
     col_ruta = db[COL_RUTAS]
 
@@ -543,14 +578,17 @@ def generar_ruta_aprendizaje(usuario, db):
         return "Ruta generada con materiales base mínimos (sin Bloom). Carga más contenido para personalizarla."
 
     # 2. Generar/Actualizar Examen Inicial (ZDP)
-    # Siempre regeneramos para incluir el nuevo material en el diagnóstico
-    examen_ini_data = generar_examen_inicial(contenido_total_raw)
+    # Se ensambla desde el banco de preguntas; el modelo solo se llama si hay
+    # material nuevo sin cubrir o faltan preguntas
+    examen_ini_data = ensamblar_examen_inicial(db, contenido_total_raw, unidades, generar_examen_inicial)
 
     if examen_ini_data:
         doc_examen_ini = {
             "usuario": usuario,
             "contenido": examen_ini_data,
             "estado": "PENDIENTE",
+            # Material del examen: de él sale el pool del diagnóstico adaptativo
+            "huellas_contenido": sorted(huellas_documentos(unidades).values()),
             "fecha_generacion": datetime.datetime.utcnow(),
         }
         # Guardamos en la colección correspondiente
@@ -566,7 +604,7 @@ def generar_ruta_aprendizaje(usuario, db):
     else:
         logger.info("📝 Sin perfil ZDP previo, generando ruta completa")
 
-    # NUEVO: Cargar marcos pedagógicos (CSV)
+    # Marcos pedagógicos precompilados (una sola carga por proceso)
     marcos = cargar_marcos_pedagogicos()
 
     # 3. Generar Ruta de Aprendizaje ADAPTATIVA (Flow + ZDP)
@@ -584,7 +622,7 @@ def generar_ruta_aprendizaje(usuario, db):
 
         # NUEVO: Pasar perfil_zdp y marcos a generar_bloque_ruta
         logger.debug(f"   ⚡ Procesando Nivel: {nivel}...")
-        bloque_generado = generar_bloque_ruta(nivel, textos, perfil_zdp, marcos)
+        bloque_generado = generar_bloque_ruta(nivel, textos, perfil_zdp, marcos, db)
 
         if bloque_generado is None:
             # Nivel omitido (competente)
@@ -789,6 +827,7 @@ def _crear_ruta_minima(usuario):
 # --- FUNCIONES NUEVAS PARA REDISEÑO DASHBOARD ---
 
 
+@log_execution_time
 def procesar_multiples_archivos_web(archivos_rutas: list, usuario: str, db) -> tuple:
     """
     Procesa múltiples archivos en una operación.
@@ -861,6 +900,35 @@ def procesar_multiples_archivos_web(archivos_rutas: list, usuario: str, db) -> t
     return éxito, resultados, msg_resumen
 
 
+# Campos que necesita el listado de rutas
+PROYECCION_LISTA_RUTAS = {
+    "_id": 1,
+    "nombre_ruta": 1,
+    "descripcion": 1,
+    "estado": 1,
+    "progreso_global": 1,
+    "fecha_actualizacion": 1,
+    "archivos_fuente": 1,
+    "metadatos_ruta.niveles_incluidos": 1
+}
+
+
+def _resumen_ruta(ruta: dict) -> dict:
+    """Entrada del listado de rutas a partir de un documento proyectado."""
+    niveles = ruta.get("metadatos_ruta", {}).get("niveles_incluidos", [])
+    archivos = ruta.get("archivos_fuente", [])
+    return {
+        "ruta_id": str(ruta["_id"]),
+        "nombre_ruta": ruta.get("nombre_ruta", "Sin nombre"),
+        "descripcion": ruta.get("descripcion", ""),
+        "estado": ruta.get("estado", "ACTIVA"),
+        "progreso": ruta.get("progreso_global", 0),
+        "archivos_count": len(archivos),
+        "niveles_completados": len(niveles),
+        "fecha_actualizacion": ruta.get("fecha_actualizacion")
+    }
+
+
 def obtener_rutas_usuario(usuario: str, db) -> list:
     """
     Obtiene lista de rutas del usuario con metadata.
@@ -875,38 +943,374 @@ def obtener_rutas_usuario(usuario: str, db) -> list:
     col = db[COLS["RUTAS"]]
     
     try:
-        rutas_cursor = col.find(
-            {"usuario": usuario},
-            {
-                "_id": 1,
-                "nombre_ruta": 1,
-                "descripcion": 1,
-                "estado": 1,
-                "progreso_global": 1,
-                "fecha_actualizacion": 1,
-                "archivos_fuente": 1,
-                "metadatos_ruta.niveles_incluidos": 1
-            }
-        ).sort("fecha_actualizacion", -1)
-        
-        rutas_list = []
-        for ruta in rutas_cursor:
-            niveles = ruta.get("metadatos_ruta", {}).get("niveles_incluidos", [])
-            archivos = ruta.get("archivos_fuente", [])
-            
-            rutas_list.append({
-                "ruta_id": str(ruta["_id"]),
-                "nombre_ruta": ruta.get("nombre_ruta", "Sin nombre"),
-                "descripcion": ruta.get("descripcion", ""),
-                "estado": ruta.get("estado", "ACTIVA"),
-                "progreso": ruta.get("progreso_global", 0),
-                "archivos_count": len(archivos),
-                "niveles_completados": len(niveles),
-                "fecha_actualizacion": ruta.get("fecha_actualizacion")
-            })
-        
-        return rutas_list
+        rutas_cursor = col.find({"usuario": usuario}, PROYECCION_LISTA_RUTAS).sort("fecha_actualizacion", -1)
+        return [_resumen_ruta(ruta) for ruta in rutas_cursor]
     
     except Exception as e:
         logger.error(f"Error obteniendo rutas para {usuario}: {e}")
         return []
+
+
+# Partes de un nivel de la ruta y tamaño de página de /ruta/<id>/nivel/<nivel>
+PARTES_NIVEL = ("flashcards", "examenes")
+LIMITE_NIVEL_DEFECTO = 10
+LIMITE_NIVEL_MAX = 50
+
+
+def _conteos_por_nivel(parte):
+    """Expresión {nivel: $size} de estructura_ruta.<parte>."""
+    return {"$arrayToObject": {"$map": {
+        "input": {"$objectToArray": {"$ifNull": [f"$estructura_ruta.{parte}", {}]}},
+        "as": "nivel",
+        "in": {"k": "$$nivel.k", "v": {"$size": {"$ifNull": ["$$nivel.v", []]}}},
+    }}}
+
+
+# Ruta sin flashcards ni tests: metadatos y conteos por nivel calculados en el servidor
+PROYECCION_RESUMEN_RUTA = {
+    "nombre_ruta": 1,
+    "descripcion": 1,
+    "estado": 1,
+    "metadatos_ruta": 1,
+    "archivos_fuente": 1,
+    "fecha_creacion": 1,
+    "fecha_actualizacion": 1,
+    "tiene_estructura": {"$ne": [{"$ifNull": ["$estructura_ruta", None]}, None]},
+    "conteos": {parte: _conteos_por_nivel(parte) for parte in PARTES_NIVEL},
+}
+
+
+def _con_resumen_niveles(ruta):
+    """Convierte los conteos de PROYECCION_RESUMEN_RUTA en "resumen_niveles"."""
+    conteos_partes = ruta.pop("conteos", {}) or {}
+    niveles = {}
+    for parte in PARTES_NIVEL:
+        for nivel, total in (conteos_partes.get(parte) or {}).items():
+            niveles.setdefault(nivel, {p: 0 for p in PARTES_NIVEL})[parte] = total
+    ruta["resumen_niveles"] = niveles
+    return ruta
+
+
+def obtener_resumen_ruta(db, ruta_obj_id, usuario: str) -> dict:
+    """
+    Ruta sin su contenido: metadatos y número de flashcards y tests por nivel.
+
+    Los conteos se calculan en el servidor de MongoDB ($size), sin leer ni
+    serializar las flashcards y los tests.
+
+    Args:
+        db: Database - Instancia MongoDB
+        ruta_obj_id: ObjectId - ID de la ruta
+        usuario: str - Propietario
+
+    Returns:
+        dict | None - Documento de la ruta con "resumen_niveles": {nivel: {"flashcards": n, "examenes": n}}
+    """
+    docs = list(db[COLS["RUTAS"]].aggregate([
+        {"$match": {"_id": ruta_obj_id, "usuario": usuario}},
+        {"$project": PROYECCION_RESUMEN_RUTA},
+    ]))
+    return _con_resumen_niveles(docs[0]) if docs else None
+
+
+def obtener_resumen_ruta_activa(db, usuario: str) -> dict:
+    """
+    Resumen (como obtener_resumen_ruta) de la ruta más reciente del usuario.
+
+    Returns:
+        dict | None - Documento de la ruta con "resumen_niveles", o None si no tiene rutas
+    """
+    docs = list(db[COLS["RUTAS"]].aggregate([
+        {"$match": {"usuario": usuario}},
+        {"$sort": {"fecha_actualizacion": -1}},
+        {"$limit": 1},
+        {"$project": PROYECCION_RESUMEN_RUTA},
+    ]))
+    return _con_resumen_niveles(docs[0]) if docs else None
+
+
+def ruta_para_estado(ruta):
+    """
+    Ruta activa tal como la reciben /ruta/estado y el bootstrap del dashboard:
+    id, metadatos y conteos por nivel (el contenido se pide por /ruta/<id>/nivel/<nivel>).
+    """
+    if not ruta:
+        return {"id": None, "metadatos": None, "niveles": {}}
+    return {
+        "id": str(ruta["_id"]),
+        "metadatos": ruta.get("metadatos_ruta"),
+        "niveles": ruta.get("resumen_niveles", {}),
+    }
+
+
+def obtener_nivel_ruta(db, ruta_obj_id, usuario: str, nivel: str, partes=PARTES_NIVEL,
+                       offset: int = 0, limit: int = LIMITE_NIVEL_DEFECTO) -> dict:
+    """
+    Una página de las flashcards y/o tests de un nivel de la ruta.
+
+    Solo se leen los elementos pedidos: la proyección usa $slice sobre
+    estructura_ruta.<parte>.<nivel> y $size para el total.
+
+    Args:
+        db: Database - Instancia MongoDB
+        ruta_obj_id: ObjectId - ID de la ruta
+        usuario: str - Propietario
+        nivel: str - Nivel Bloom (de JERARQUIA_BLOOM)
+        partes: tuple - Subconjunto de PARTES_NIVEL
+        offset: int - Primer elemento
+        limit: int - Elementos por parte (hasta LIMITE_NIVEL_MAX)
+
+    Returns:
+        dict | None - {parte: {"items": [...], "total": n, "offset": n, "limit": n}}, o None si la ruta no existe
+
+    Raises:
+        ValueError: Nivel o parte desconocidos (se interpolan en la ruta del campo)
+    """
+    if nivel not in JERARQUIA_BLOOM:
+        raise ValueError(f"Nivel Bloom inválido: {nivel}")
+    partes = tuple(partes)
+    if not partes or any(parte not in PARTES_NIVEL for parte in partes):
+        raise ValueError(f"Parte inválida: {', '.join(partes)}")
+    offset = max(0, int(offset))
+    limit = min(max(1, int(limit)), LIMITE_NIVEL_MAX)
+
+    proyeccion = {"_id": 0}
+    for parte in partes:
+        campo = {"$ifNull": [f"$estructura_ruta.{parte}.{nivel}", []]}
+        proyeccion[parte] = {"$slice": [campo, offset, limit]}
+        proyeccion[f"total_{parte}"] = {"$size": campo}
+
+    docs = list(db[COLS["RUTAS"]].aggregate([
+        {"$match": {"_id": ruta_obj_id, "usuario": usuario}},
+        {"$project": proyeccion},
+    ]))
+    if not docs:
+        return None
+    return {
+        parte: {
+            "items": docs[0].get(parte) or [],
+            "total": docs[0].get(f"total_{parte}", 0),
+            "offset": offset,
+            "limit": limit,
+        }
+        for parte in partes
+    }
+
+
+def resumen_perfil_zdp(perfil: dict) -> dict:
+    """
+    Perfil ZDP en el formato del panel del dashboard (/api/perfil-zdp).
+
+    Args:
+        perfil: dict - Resultado de evaluacion_zdp.obtener_perfil_zdp
+
+    Returns:
+        dict - {nivel_actual, zona_proxima, niveles_competentes, brechas, puntaje_total, recomendaciones}
+    """
+    # Si no hay evaluación previa, retornar vacío
+    if not perfil or perfil.get("estado") == "Sin evaluación realizada":
+        return {
+            "nivel_actual": None,
+            "zona_proxima": [],
+            "niveles_competentes": [],
+            "brechas": [],
+            "puntaje_total": 0
+        }
+
+    competencias = perfil.get("competencias") or {}
+    return {
+        "nivel_actual": perfil.get("nivel_actual"),
+        "zona_proxima": perfil.get("zona_proxima", []),
+        # Niveles competentes (>= 70%) y brechas (< 70%)
+        "niveles_competentes": [nivel for nivel, datos in competencias.items() if datos.get("competente", False)],
+        "brechas": [nivel for nivel, datos in competencias.items() if not datos.get("competente", False)],
+        "puntaje_total": perfil.get("puntaje", 0),
+        "recomendaciones": perfil.get("recomendaciones", [])
+    }
+
+
+def obtener_datos_dashboard(usuario: str, db, carpeta_uploads: str = None) -> dict:
+    """
+    Todo lo que el dashboard necesita al cargar, en una sola pasada.
+
+    Reemplaza las llamadas separadas a /rutas/lista, /api/perfil-zdp,
+    /ruta/estado, /examen-inicial y /files:
+    - Rutas: un aggregate con $facet devuelve el listado (solo campos de
+      resumen) y los conteos por nivel de la ruta más reciente; su contenido
+      se pide por nivel a /ruta/<id>/nivel/<nivel>.
+    - Examen inicial: un find_one; las preguntas solo se envían si el examen
+      está pendiente.
+    - Perfil ZDP: se consulta una vez (caché por usuario) y sirve tanto al
+      panel del perfil como a la vista de la ruta.
+
+    Args:
+        usuario: str - ID del usuario
+        db: Database - Instancia MongoDB
+        carpeta_uploads: str - Carpeta base de archivos subidos
+
+    Returns:
+        dict - {rutas, perfil_zdp, estado, examen_inicial, archivos}
+    """
+    perfil = obtener_perfil_zdp(usuario)
+
+    facetas = list(db[COLS["RUTAS"]].aggregate([
+        {"$match": {"usuario": usuario}},
+        {"$sort": {"fecha_actualizacion": -1}},
+        {"$facet": {
+            "lista": [{"$project": PROYECCION_LISTA_RUTAS}],
+            "activa": [{"$limit": 1}, {"$project": PROYECCION_RESUMEN_RUTA}],
+        }},
+    ]))
+    facetas = facetas[0] if facetas else {}
+    activa = (facetas.get("activa") or [None])[0]
+
+    exam_doc = db[COLS["EXAM_INI"]].find_one(
+        {"usuario": usuario}, {"estado": 1, "contenido": 1, "fecha_generacion": 1}
+    )
+    examen_pendiente = not exam_doc or exam_doc.get("estado") != "COMPLETADO"
+
+    examen = None
+    if exam_doc:
+        examen = {
+            "estado": exam_doc.get("estado", "PENDIENTE"),
+            "fecha_generacion": exam_doc.get("fecha_generacion"),
+        }
+        if examen_pendiente:
+            examen["contenido"] = exam_doc.get("contenido", {})
+
+    archivos = [
+        {"nombre": a["nombre"], "size_mb": a["size_mb"], "fecha": a["fecha"]}
+        for a in listar_archivos_usuario(usuario, carpeta_uploads)
+    ]
+
+    return {
+        "rutas": [_resumen_ruta(ruta) for ruta in facetas.get("lista", [])],
+        "perfil_zdp": resumen_perfil_zdp(perfil),
+        "estado": {
+            "examen_pendiente": examen_pendiente,
+            "examen_generado": bool(exam_doc),
+            "perfil_zdp": perfil,
+            "ruta": ruta_para_estado(activa and _con_resumen_niveles(activa)),
+        },
+        "examen_inicial": examen,
+        "archivos": archivos,
+    }
+
+
+# --- CIERRE DEL EXAMEN INICIAL (individual y por lotes) ---
+def finalizar_examenes_iniciales(db, resultados):
+    """
+    Tareas posteriores a evaluar exámenes iniciales (completos o adaptativos):
+    marca los exámenes como completados y actualiza la metadata ZDP de las rutas.
+
+    Usa un update_many y un bulk_write sin importar cuántos resultados lleguen.
+
+    Args:
+        db: Database - Instancia MongoDB
+        resultados: list - Resultados de EvaluadorZDP (con "usuario")
+    """
+    ahora = datetime.datetime.utcnow()
+    usuarios = list(dict.fromkeys(r["usuario"] for r in resultados))
+    if not usuarios:
+        return
+
+    # Marcar exámenes como completados
+    try:
+        db[COLS["EXAM_INI"]].update_many(
+            {"usuario": {"$in": usuarios}},
+            {"$set": {"estado": "COMPLETADO", "fecha_completado": ahora}},
+        )
+    except Exception as e:
+        logger.error(f"No se pudo marcar examen como completado para {usuarios}: {e}")
+
+    # Actualizar metadata de rutas con información ZDP
+    try:
+        operaciones = []
+        for resultado in resultados:
+            competentes = [
+                nivel for nivel, datos in resultado.get("resumen_por_nivel", {}).items()
+                if datos.get("competente", False)
+            ]
+            operaciones.append(
+                UpdateOne(
+                    {"usuario": resultado["usuario"]},
+                    {
+                        "$set": {
+                            "metadatos_ruta.niveles_competentes": competentes,
+                            "metadatos_ruta.zona_proxima": resultado.get("zona_proxima", []),
+                            "metadatos_ruta.personalizada_zdp": True,
+                            "metadatos_ruta.fecha_evaluacion_zdp": ahora,
+                        }
+                    },
+                )
+            )
+        db[COLS["RUTAS"]].bulk_write(operaciones, ordered=True)
+        for usuario in usuarios:
+            invalidar_contexto_tutor(usuario)
+        logger.info(f"✅ Metadata ZDP actualizada para {len(usuarios)} usuario(s)")
+    except Exception as e:
+        logger.error(f"⚠️ No se pudo actualizar metadata ZDP en ruta: {e}")
+
+
+def evaluar_examenes_iniciales_lote(db, entregas):
+    """
+    Evalúa las hojas de respuesta de varios estudiantes en un solo envío.
+
+    Los exámenes se leen con un único find, cada entrega se valida por
+    separado (un error no afecta a las demás) y las válidas se puntúan y
+    guardan juntas con EvaluadorZDP.evaluar_lote.
+
+    Args:
+        db: Database - Instancia MongoDB
+        entregas: list - [{"usuario": str, "respuestas": list}, ...]
+
+    Returns:
+        dict: {
+            "resultados": [{"usuario", "estado": "OK"|"ERROR", "resultado"|"error", "status"}],
+            "resumen": {"total", "evaluados", "errores"}
+        }
+    """
+    from src.models.evaluacion_zdp import EvaluadorZDP
+
+    salida = [None] * len(entregas)
+    usuarios = [e.get("usuario") for e in entregas if isinstance(e, dict) and isinstance(e.get("usuario"), str)]
+    examenes = {
+        doc["usuario"]: doc.get("contenido", {})
+        for doc in db[COLS["EXAM_INI"]].find({"usuario": {"$in": usuarios}}, {"usuario": 1, "contenido": 1})
+    }
+
+    pendientes = []  # (índice, entrega válida)
+    for i, entrega in enumerate(entregas):
+        usuario = entrega.get("usuario") if isinstance(entrega, dict) else None
+        if not usuario or not isinstance(usuario, str):
+            salida[i] = {"usuario": usuario, "estado": "ERROR", "error": "Usuario inválido", "status": 400}
+            continue
+        is_valid, error_msg = validate_exam_responses(entrega.get("respuestas"))
+        if not is_valid:
+            salida[i] = {"usuario": usuario, "estado": "ERROR", "error": f"Respuestas inválidas: {error_msg}", "status": 400}
+            continue
+        examen = examenes.get(usuario)
+        if not examen:
+            salida[i] = {"usuario": usuario, "estado": "ERROR", "error": "No hay examen inicial generado", "status": 404}
+            continue
+        is_valid, error_msg = validate_exam_structure(examen)
+        if not is_valid:
+            salida[i] = {"usuario": usuario, "estado": "ERROR", "error": f"Estructura de examen inválida: {error_msg}", "status": 400}
+            continue
+        pendientes.append((i, {"usuario": usuario, "respuestas": entrega["respuestas"], "examen": examen}))
+
+    if pendientes:
+        resultados = EvaluadorZDP().evaluar_lote([e for _, e in pendientes])
+        finalizar_examenes_iniciales(db, [r for r in resultados if "error" not in r])
+        for (i, entrega), resultado in zip(pendientes, resultados):
+            if "error" in resultado:
+                salida[i] = {"usuario": entrega["usuario"], "estado": "ERROR", "error": resultado["error"], "status": 500}
+            else:
+                salida[i] = {"usuario": entrega["usuario"], "estado": "OK", "resultado": resultado, "status": 200}
+
+    evaluados = sum(1 for r in salida if r["estado"] == "OK")
+    logger.info(f"📋 Lote de exámenes: {evaluados}/{len(entregas)} evaluados")
+    return {
+        "resultados": salida,
+        "resumen": {"total": len(entregas), "evaluados": evaluados, "errores": len(entregas) - evaluados},
+    }
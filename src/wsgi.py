@@ -0,0 +1,48 @@
+"""
+Punto de entrada de producción (WSGI).
+
+Linux / macOS: varios procesos con hilos, reciclaje y apagado ordenado
+    gunicorn -c gunicorn.conf.py src.wsgi:app
+
+Windows o sin gunicorn: un proceso con WSGI_WORKERS x WSGI_THREADS hilos
+    python -m src.wsgi
+
+La conexión a MongoDB se abre en la primera consulta de cada worker (ver
+LazyDatabase en src/database.py); con RUTEALO_PRELOAD=True la app se importa
+en el maestro y cada worker descarta el cliente heredado tras el fork.
+"""
+
+import logging
+from src.config import DEBUG, WSGI_BIND, WSGI_WORKERS, WSGI_THREADS
+from src.database import DatabaseConnection
+from src.app import crear_app
+
+logger = logging.getLogger(__name__)
+
+app = crear_app()
+
+if DEBUG:
+    logger.warning("⚠️ DEBUG=True en el servidor de producción; define DEBUG=False en claves.env")
+
+
+def reiniciar_tras_fork():
+    """Descarta en el worker el MongoClient creado por el maestro (no es seguro entre procesos)."""
+    conexion = DatabaseConnection._instance
+    if conexion is not None and conexion._pid is not None:
+        conexion.discard_after_fork()
+
+
+def servir_waitress(aplicacion=app, bind=WSGI_BIND, hilos=WSGI_WORKERS * WSGI_THREADS):
+    """Sirve la app con waitress (un proceso, `hilos` hilos)."""
+    try:
+        from waitress import serve
+    except ImportError:
+        raise SystemExit("waitress no está instalado. Ejecuta: pip install waitress")
+
+    host, _, puerto = bind.rpartition(":")
+    logger.info(f"🚀 waitress en {bind} con {hilos} hilos")
+    serve(aplicacion, host=host or "0.0.0.0", port=int(puerto), threads=hilos)
+
+
+if __name__ == "__main__":
+    servir_waitress()
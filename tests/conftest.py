@@ -21,3 +21,46 @@ def project_root_fixture():
 def logs_dir():
     """Proporciona el directorio de logs."""
     return project_root / "logs"
+
+
+def _reiniciar_modelos_perezosos():
+    from src.config import ModeloPerezoso
+
+    for modulo in list(sys.modules.values()):
+        if isinstance(getattr(modulo, "model", None), ModeloPerezoso):
+            modulo.model.reiniciar()
+
+
+@pytest.fixture
+def backend_falso(monkeypatch):
+    """Activa el modelo generativo falso (sin latencia) y lo descarta al terminar."""
+    monkeypatch.setenv("RUTEALO_LLM_BACKEND", "fake")
+    for clave in ("RUTEALO_FAKE_LATENCIA_MS", "RUTEALO_FAKE_DESVIACION_MS", "RUTEALO_FAKE_SEMILLA"):
+        monkeypatch.delenv(clave, raising=False)
+    from src.models.modelo_falso import reiniciar_estadisticas_llm
+
+    _reiniciar_modelos_perezosos()
+    reiniciar_estadisticas_llm()
+    yield
+    _reiniciar_modelos_perezosos()
+
+
+@pytest.fixture
+def bd_memoria():
+    """Instala el cliente MongoDB en memoria de benchmarks/ y restaura el original."""
+    from src.config import DB_NAME
+    from src.database import DatabaseConnection
+    from src.models.evaluacion_zdp import invalidar_perfil_zdp
+    from benchmarks.mongo_memoria import instalar_cliente_memoria
+
+    cliente_original = DatabaseConnection._client
+    asincrono_original = DatabaseConnection._async_client, DatabaseConnection._async_pid
+    cliente = instalar_cliente_memoria()
+    # Los perfiles cacheados de otra base no valen para esta
+    invalidar_perfil_zdp()
+    yield cliente[DB_NAME]
+    invalidar_perfil_zdp()
+    DatabaseConnection._client = cliente_original
+    DatabaseConnection._async_client, DatabaseConnection._async_pid = asincrono_original
+    if DatabaseConnection._instance is not None:
+        DatabaseConnection._instance._client = cliente_original
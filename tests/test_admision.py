@@ -0,0 +1,164 @@
+"""
+Tests para src/admision.py: turnos por usuario, cola del proceso y 429 con Retry-After.
+"""
+
+import time
+import datetime
+import threading
+import pytest
+from src import admision
+from src.admision import ControlAdmision, AdmisionRechazada, COL_ADMISION
+
+
+@pytest.fixture
+def control(bd_memoria, monkeypatch):
+    """Control con un puesto, un lugar en cola y espera corta, instalado en las rutas."""
+    nuevo = ControlAdmision(max_global=1, max_por_usuario=1, max_cola=1, espera_max_s=0.3, lease_s=60)
+    monkeypatch.setattr(admision, "control", nuevo)
+    return nuevo
+
+
+@pytest.fixture
+def cliente(bd_memoria, control, backend_falso):
+    from src.app import app
+
+    app.config["TESTING"] = True
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion["usuario"] = "ana"
+    return cliente
+
+
+def _en_hilo(control, usuario, db, liberar):
+    """Ocupa un turno en otro hilo hasta que se active `liberar`; retorna el hilo ya dentro."""
+    dentro = threading.Event()
+
+    def trabajo():
+        with control.turno(usuario, db):
+            dentro.set()
+            liberar.wait(5)
+
+    hilo = threading.Thread(target=trabajo)
+    hilo.start()
+    assert dentro.wait(5)
+    return hilo
+
+
+class TestTurnosPorUsuario:
+    """Tests del límite por usuario guardado en MongoDB."""
+
+    def test_segunda_generacion_rechazada(self, control, bd_memoria):
+        """Con una generación en curso, la segunda del mismo usuario se rechaza al instante."""
+        control.max_global = 2
+        with control.turno("ana", bd_memoria):
+            with pytest.raises(AdmisionRechazada) as rechazo:
+                with control.turno("ana", bd_memoria):
+                    pass
+            with control.turno("beto", bd_memoria):
+                pass
+        assert rechazo.value.motivo == "usuario" and rechazo.value.reintentar_en >= 1
+        assert control.estadisticas()["rechazados_usuario"] == 1
+
+    def test_turno_se_libera(self, control, bd_memoria):
+        """Al terminar (también con error) el turno se borra y el usuario puede volver a generar."""
+        with pytest.raises(RuntimeError):
+            with control.turno("ana", bd_memoria):
+                raise RuntimeError("falló el modelo")
+        assert bd_memoria[COL_ADMISION].count_documents({}) == 0
+        with control.turno("ana", bd_memoria):
+            pass
+        assert control.estadisticas()["en_ejecucion"] == 0
+
+    def test_turno_vencido_de_proceso_caido(self, control, bd_memoria):
+        """Un turno que no se liberó deja de bloquear cuando vence."""
+        bd_memoria[COL_ADMISION].insert_one({
+            "_id": "ana:0", "token": "otro", "expira": datetime.datetime.utcnow() - datetime.timedelta(seconds=1),
+        })
+        with control.turno("ana", bd_memoria):
+            assert bd_memoria[COL_ADMISION].find_one({"_id": "ana:0"})["token"] != "otro"
+
+
+class TestColaDelProceso:
+    """Tests del límite global con cola acotada."""
+
+    def test_cola_llena_y_espera_maxima(self, control, bd_memoria):
+        """Con el puesto ocupado, uno espera en cola (y vence) y el siguiente se rechaza por cola llena."""
+        liberar = threading.Event()
+        hilo = _en_hilo(control, "ana", bd_memoria, liberar)
+        errores = {}
+
+        def en_cola():
+            try:
+                with control.turno("beto", bd_memoria):
+                    pass
+            except AdmisionRechazada as e:
+                errores["beto"] = e
+
+        esperando = threading.Thread(target=en_cola)
+        esperando.start()
+        time.sleep(0.1)
+        with pytest.raises(AdmisionRechazada) as llena:
+            with control.turno("carla", bd_memoria):
+                pass
+        esperando.join()
+        liberar.set()
+        hilo.join()
+
+        assert llena.value.motivo == "cola" and llena.value.reintentar_en >= 1
+        assert errores["beto"].motivo == "espera"
+        estadisticas = control.estadisticas()
+        assert estadisticas["max_cola_observada"] == 1 and estadisticas["en_cola"] == 0
+        # Un rechazo por cola no deja tomado el turno del usuario
+        assert bd_memoria[COL_ADMISION].count_documents({"_id": "carla:0"}) == 0
+
+    def test_cola_fifo(self, control, bd_memoria):
+        """Los que esperan entran en orden de llegada cuando se libera el puesto."""
+        control.max_cola, control.espera_max_s = 3, 5
+        liberar = threading.Event()
+        hilo = _en_hilo(control, "ana", bd_memoria, liberar)
+        orden = []
+
+        def en_cola(usuario):
+            with control.turno(usuario, bd_memoria):
+                orden.append(usuario)
+
+        hilos = []
+        for usuario in ("beto", "carla", "dario"):
+            hilos.append(threading.Thread(target=en_cola, args=(usuario,)))
+            hilos[-1].start()
+            time.sleep(0.05)
+        liberar.set()
+        for h in [hilo, *hilos]:
+            h.join()
+
+        assert orden == ["beto", "carla", "dario"]
+        assert control.estadisticas()["admitidos"] == 4
+
+
+class TestRutas:
+    """Tests de los endpoints protegidos."""
+
+    def test_regenerar_test_429(self, cliente, control, bd_memoria):
+        """Con una generación del usuario en curso, regenerar-test responde 429 con Retry-After."""
+        ruta_id = str(bd_memoria["rutas_aprendizaje"].insert_one({"usuario": "ana", "nombre_ruta": "Biología"}).inserted_id)
+        with control.turno("ana", bd_memoria):
+            respuesta = cliente.post(f"/ruta/{ruta_id}/regenerar-test")
+
+        assert respuesta.status_code == 429
+        assert int(respuesta.headers["Retry-After"]) == respuesta.get_json()["reintentar_en"] >= 1
+        assert "generación en curso" in respuesta.get_json()["error"]
+
+    def test_upload_rechazada_redirige(self, cliente, control, bd_memoria):
+        """La carga de archivos rechazada vuelve al dashboard con un aviso."""
+        with control.turno("ana", bd_memoria):
+            respuesta = cliente.post("/upload", data={})
+        assert respuesta.status_code == 302 and "/dashboard" in respuesta.headers["Location"]
+        with cliente.session_transaction() as sesion:
+            assert "generación en curso" in sesion["_flashes"][0][1]
+
+    def test_metricas_solo_docentes(self, cliente, monkeypatch):
+        """/api/docente/admision expone la cola a docentes y responde 403 al resto."""
+        assert cliente.get("/api/docente/admision").status_code == 403
+        monkeypatch.setattr("src.app.DOCENTES", {"ana"})
+        datos = cliente.get("/api/docente/admision").get_json()
+        assert {"en_ejecucion", "en_cola", "max_cola_observada", "rechazados_cola"} <= set(datos)
@@ -0,0 +1,192 @@
+"""
+Tests para src/models/analitica_cohortes.py: contadores materializados por cohorte.
+"""
+
+import random
+import pytest
+from src.models.evaluacion_zdp import EvaluadorZDP, JERARQUIA_BLOOM
+from src.models.analitica_cohortes import (
+    COL_ANALITICA,
+    GLOBAL,
+    contribucion,
+    obtener_analitica,
+    reconstruir_analitica,
+    listar_cohortes,
+    asignar_cohorte,
+    normalizar_cohorte,
+)
+
+
+def _examen(rng, n_preguntas=10):
+    preguntas = [
+        {
+            "id": i,
+            "pregunta": f"P{i}",
+            "respuesta_correcta": "a",
+            "nivel_bloom_evaluado": rng.choice(JERARQUIA_BLOOM[: rng.randint(1, 6)]),
+        }
+        for i in range(1, n_preguntas + 1)
+    ]
+    return {"EXAMENES": {"EXAMEN_INICIAL": preguntas}}
+
+
+def _evaluar(evaluador, rng, usuario):
+    examen = _examen(rng, rng.randint(4, 12))
+    acierto = rng.random()
+    respuestas = [
+        {"pregunta_id": p["id"], "respuesta": "a" if rng.random() < acierto else "b"}
+        for p in examen["EXAMENES"]["EXAMEN_INICIAL"]
+    ]
+    return evaluador.evaluar_examen(usuario, respuestas, examen)
+
+
+def _sin_fecha(analitica):
+    return {k: v for k, v in analitica.items() if k != "fecha_actualizacion"}
+
+
+@pytest.fixture
+def cohortes(bd_memoria):
+    """25 estudiantes en dos cohortes (y algunos sin cohorte), evaluados varias veces."""
+    rng = random.Random(5)
+    perfiles = bd_memoria["usuario_perfil"]
+    for i in range(25):
+        doc = {"usuario": f"est_{i}"}
+        if i % 5:
+            doc["cohorte"] = "2025-I" if i % 2 else "2025-II"
+        perfiles.insert_one(doc)
+
+    evaluador = EvaluadorZDP()
+    for _ in range(60):
+        _evaluar(evaluador, rng, f"est_{rng.randrange(25)}")
+    return bd_memoria
+
+
+class TestContribucion:
+    """Tests del aporte individual."""
+
+    def test_perfil_sin_evaluar_no_aporta(self):
+        """Un perfil sin competencias no suma estudiantes."""
+        assert contribucion({"usuario": "ana"}) == {}
+        assert contribucion(None) == {}
+
+    def test_claves_del_aporte(self):
+        """Cuenta nivel actual, zona próxima y competencia por nivel."""
+        aporte = contribucion(
+            {
+                "competencias": {"Recordar": {"competente": True}, "Aplicar": {"competente": False}},
+                "nivel_actual": "Recordar",
+                "zona_proxima": ["Comprender", "Aplicar"],
+                "puntaje_ultimo_examen": 40.5,
+            }
+        )
+        assert aporte["estudiantes"] == 1
+        assert aporte["suma_puntaje"] == 40.5
+        assert aporte["por_nivel.Recordar.competentes"] == 1
+        assert aporte["por_nivel.Aplicar.evaluados"] == 1
+        assert aporte["por_nivel.Aplicar.competentes"] == 0
+        assert aporte["zona_proxima.Comprender+Aplicar"] == 1
+
+
+class TestAnaliticaIncremental:
+    """Tests de consistencia entre el mantenimiento incremental y la reconstrucción."""
+
+    def test_incremental_igual_a_reconstruccion(self, cohortes):
+        """Los $inc por evaluación coinciden con el pipeline de agregación."""
+        incremental = {c: obtener_analitica(cohortes, c) for c in ("2025-I", "2025-II", "sin_cohorte", GLOBAL)}
+        reconstruir_analitica(cohortes)
+        for cohorte, esperado in incremental.items():
+            assert _sin_fecha(obtener_analitica(cohortes, cohorte)) == _sin_fecha(esperado)
+
+    def test_reevaluar_no_duplica_estudiantes(self, cohortes):
+        """Cada estudiante evaluado cuenta una sola vez aunque rinda varios exámenes."""
+        evaluados = cohortes["usuario_perfil"].count_documents({"competencias": {"$exists": True}})
+        assert obtener_analitica(cohortes, GLOBAL)["estudiantes"] == evaluados
+        total = sum(c["estudiantes"] for c in listar_cohortes(cohortes))
+        assert total == evaluados
+
+    def test_porcentajes_y_zona_mas_comun(self, bd_memoria):
+        """El documento leído expone porcentajes por nivel y la zona más frecuente."""
+        bd_memoria["usuario_perfil"].insert_many([{"usuario": u, "cohorte": "A"} for u in ("u1", "u2", "u3")])
+        evaluador = EvaluadorZDP()
+        examen = {
+            "EXAMENES": {
+                "EXAMEN_INICIAL": [
+                    {"id": 1, "respuesta_correcta": "a", "nivel_bloom_evaluado": "Recordar"},
+                    {"id": 2, "respuesta_correcta": "a", "nivel_bloom_evaluado": "Comprender"},
+                ]
+            }
+        }
+        evaluador.evaluar_examen("u1", [{"pregunta_id": 1, "respuesta": "a"}, {"pregunta_id": 2, "respuesta": "b"}], examen)
+        evaluador.evaluar_examen("u2", [{"pregunta_id": 1, "respuesta": "a"}, {"pregunta_id": 2, "respuesta": "b"}], examen)
+        evaluador.evaluar_examen("u3", [{"pregunta_id": 1, "respuesta": "b"}, {"pregunta_id": 2, "respuesta": "b"}], examen)
+
+        analitica = obtener_analitica(bd_memoria, "A")
+        assert analitica["estudiantes"] == 3
+        assert analitica["por_nivel"]["Recordar"]["porcentaje_competentes"] == pytest.approx(66.67)
+        assert analitica["por_nivel"]["Comprender"]["porcentaje_competentes"] == 0
+        assert analitica["zona_proxima_mas_comun"] == ["Comprender", "Aplicar"]
+
+    def test_lectura_es_un_solo_documento(self, cohortes):
+        """La lectura hace una única operación sobre la colección de analítica."""
+        cliente = cohortes.client
+        cliente.reiniciar_estadisticas()
+        obtener_analitica(cohortes, "2025-I")
+        assert cliente.estadisticas()["total"] == 1
+
+    def test_reconstruccion_elimina_cohortes_obsoletas(self, cohortes):
+        """Un documento de analítica sin perfiles detrás se elimina al reconstruir."""
+        cohortes[COL_ANALITICA].insert_one({"_id": "fantasma", "estudiantes": 3})
+        resumen = reconstruir_analitica(cohortes)
+        assert resumen["eliminados"] == 1
+        assert obtener_analitica(cohortes, "fantasma") is None
+
+
+class TestAsignacionCohorte:
+    """Tests del cambio de cohorte de un estudiante."""
+
+    def test_mueve_el_aporte(self, cohortes):
+        """Al cambiar de cohorte el estudiante deja de contar en la anterior y pasa a la nueva."""
+        evaluado = next(
+            p["usuario"] for p in cohortes["usuario_perfil"].find({"cohorte": "2025-I", "competencias": {"$exists": True}})
+        )
+        antes = {c: obtener_analitica(cohortes, c)["estudiantes"] for c in ("2025-I", "2025-II", GLOBAL)}
+
+        assert asignar_cohorte(cohortes, evaluado, "2025-II") == {"cohorte_anterior": "2025-I", "cohorte": "2025-II"}
+        assert obtener_analitica(cohortes, "2025-I")["estudiantes"] == antes["2025-I"] - 1
+        assert obtener_analitica(cohortes, "2025-II")["estudiantes"] == antes["2025-II"] + 1
+        assert obtener_analitica(cohortes, GLOBAL)["estudiantes"] == antes[GLOBAL]
+
+        asignar_cohorte(cohortes, evaluado, None)
+        incremental = {c: obtener_analitica(cohortes, c) for c in ("2025-I", "2025-II", "sin_cohorte", GLOBAL)}
+        reconstruir_analitica(cohortes)
+        for cohorte, esperado in incremental.items():
+            assert _sin_fecha(obtener_analitica(cohortes, cohorte)) == _sin_fecha(esperado)
+
+    def test_usuario_inexistente_y_nombres(self, bd_memoria):
+        """Un usuario desconocido no crea perfil; los nombres reservados se rechazan."""
+        assert asignar_cohorte(bd_memoria, "nadie", "2025-I") is None
+        assert bd_memoria["usuario_perfil"].count_documents({}) == 0
+        assert normalizar_cohorte("  2025-I ") == "2025-I"
+        assert normalizar_cohorte("") is None
+        for invalida in (GLOBAL, "sin_cohorte", "a.b", "$x", "x" * 51):
+            with pytest.raises(ValueError):
+                normalizar_cohorte(invalida)
+
+    def test_endpoint_docente(self, cohortes, monkeypatch):
+        """PUT /api/docente/cohortes/<usuario> asigna la cohorte solo a pedido de un docente."""
+        from src.app import app
+
+        cliente = app.test_client()
+        with cliente.session_transaction() as sesion:
+            sesion["usuario"] = "profe"
+        assert cliente.put("/api/docente/cohortes/est_0", json={"cohorte": "2025-I"}).status_code == 403
+
+        monkeypatch.setattr("src.app.DOCENTES", {"profe"})
+        assert cliente.put("/api/docente/cohortes/est_0", json={"cohorte": "a.b"}).status_code == 400
+        assert cliente.put("/api/docente/cohortes/est_0", json={}).status_code == 400
+        assert cliente.put("/api/docente/cohortes/nadie", json={"cohorte": "2025-I"}).status_code == 404
+
+        respuesta = cliente.put("/api/docente/cohortes/est_0", json={"cohorte": "2025-I"})
+        assert respuesta.status_code == 200
+        assert respuesta.get_json() == {"usuario": "est_0", "cohorte_anterior": None, "cohorte": "2025-I"}
+        assert cohortes["usuario_perfil"].find_one({"usuario": "est_0"})["cohorte"] == "2025-I"
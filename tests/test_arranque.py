@@ -0,0 +1,86 @@
+"""
+Tests de arranque en frío: presupuesto de tiempo de importación.
+
+Importa los módulos del servidor en un intérprete limpio con `-X importtime`
+y falla si se cargan librerías pesadas que deben inicializarse bajo demanda.
+El presupuesto de tiempo depende de la máquina, así que solo se comprueba si
+se define RUTEALO_IMPORT_BUDGET_MS (p. ej. 1000).
+"""
+
+import os
+import re
+import sys
+import json
+import subprocess
+import pytest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+MODULOS_ARRANQUE = [
+    "src.app",
+    "src.web_utils",
+    "src.generadores_pedagogicos",
+    "src.models.evaluacion_zdp",
+    "src.models.chatbot_tutor",
+]
+
+# Librerías que solo deben cargarse en el primer uso
+MODULOS_PESADOS = ["pandas", "pypdf", "docx", "pptx", "google.generativeai"]
+
+# Opcional: sin la variable el test del presupuesto se omite
+PRESUPUESTO_MS = float(os.environ["RUTEALO_IMPORT_BUDGET_MS"]) if os.getenv("RUTEALO_IMPORT_BUDGET_MS") else None
+
+
+def _perfil_importacion():
+    """Ejecuta la importación en un subproceso y retorna (ms por módulo, pesados cargados)."""
+    codigo = (
+        "import sys, json\n"
+        + "".join(f"import {m}\n" for m in MODULOS_ARRANQUE)
+        + f"print(json.dumps([m for m in {MODULOS_PESADOS!r} if m in sys.modules]))\n"
+    )
+    env = dict(os.environ)
+    # Sin claves: el arranque no debe depender de ellas
+    for clave in list(env):
+        if clave.startswith("GOOGLE_API_KEY"):
+            env.pop(clave)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    tiempos = {}
+    for linea in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$", linea)
+        if m and len(m.group(2)) == 1:  # solo módulos de primer nivel
+            tiempos[m.group(3)] = int(m.group(1)) / 1000
+    pesados = json.loads(proc.stdout.strip().splitlines()[-1])
+    return tiempos, pesados
+
+
+@pytest.fixture(scope="module")
+def perfil():
+    """Perfil de importación, medido una sola vez para todos los tests."""
+    return _perfil_importacion()
+
+
+class TestArranqueEnFrio:
+    """Tests del perfil de importación del servidor."""
+
+    def test_no_importa_librerias_pesadas(self, perfil):
+        """Gemini, pandas y los extractores deben cargarse bajo demanda."""
+        _, pesados = perfil
+        assert pesados == []
+
+    @pytest.mark.skipif(PRESUPUESTO_MS is None, reason="define RUTEALO_IMPORT_BUDGET_MS para medir el presupuesto")
+    def test_tiempo_importacion_dentro_de_presupuesto(self, perfil):
+        """La importación de los módulos del servidor no debe superar el presupuesto."""
+        tiempos, _ = perfil
+        total = sum(tiempos.values())
+        top = sorted(tiempos.items(), key=lambda x: -x[1])[:5]
+        assert total <= PRESUPUESTO_MS, f"Arranque {total:.0f} ms > {PRESUPUESTO_MS:.0f} ms. Top: {top}"
@@ -0,0 +1,169 @@
+"""
+Tests para src/asgi.py: /api/chatbot asíncrono y puente WSGI hacia Flask.
+"""
+
+import json
+import time
+import asyncio
+import pytest
+
+pytest.importorskip("asgiref")
+
+from src.asgi import app, flask_app  # noqa: E402
+from src.models.chatbot_tutor import TutorVirtual, invalidar_contexto_tutor, model  # noqa: E402
+from src.models.sesiones_chat import COL_SESIONES, TURNOS_RECIENTES, LOTE_RESUMEN  # noqa: E402
+
+
+@pytest.fixture
+def ruta(bd_memoria, backend_falso):
+    """Ruta de "ana" lista para conversar."""
+    invalidar_contexto_tutor()
+    resultado = bd_memoria["rutas_aprendizaje"].insert_one({"usuario": "ana", "nombre_ruta": "Biología"})
+    yield bd_memoria, str(resultado.inserted_id)
+    invalidar_contexto_tutor()
+
+
+def _cookie(usuario):
+    return "session=" + flask_app.session_interface.get_signing_serializer(flask_app).dumps({"usuario": usuario})
+
+
+async def _llamar(metodo, ruta, cuerpo=None, usuario="ana"):
+    """Una petición HTTP a la app ASGI; retorna (estado, cuerpo en bytes)."""
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else b""
+    cabeceras = [(b"content-type", b"application/json")]
+    if usuario:
+        cabeceras.append((b"cookie", _cookie(usuario).encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": metodo, "scheme": "http",
+        "path": ruta, "raw_path": ruta.encode(), "root_path": "", "query_string": b"", "headers": cabeceras,
+        "server": ("testserver", 80), "client": ("127.0.0.1", 1234),
+    }
+    mensajes = [{"type": "http.request", "body": datos, "more_body": False}]
+    enviados = []
+
+    async def receive():
+        return mensajes.pop(0) if mensajes else {"type": "http.disconnect"}
+
+    async def send(mensaje):
+        enviados.append(mensaje)
+
+    await app(scope, receive, send)
+    estado = next(m["status"] for m in enviados if m["type"] == "http.response.start")
+    return estado, b"".join(m.get("body", b"") for m in enviados if m["type"] == "http.response.body")
+
+
+def _chat(ruta_id, mensaje, sesion_id=None, usuario="ana"):
+    estado, cuerpo = asyncio.run(_llamar("POST", "/api/chatbot", {"mensaje": mensaje, "ruta_id": ruta_id, "sesion_id": sesion_id}, usuario))
+    return estado, json.loads(cuerpo)
+
+
+class TestChatbotAsync:
+    """Tests de POST /api/chatbot servido por chatbot_async."""
+
+    def test_conversacion_en_una_sesion(self, ruta):
+        """Dos mensajes comparten la sesión guardada con el cliente asíncrono."""
+        db, ruta_id = ruta
+        estado, primera = _chat(ruta_id, "¿Qué es la célula?")
+        _, segunda = _chat(ruta_id, "¿Y el núcleo?", primera["sesion_id"])
+
+        assert estado == 200 and primera["exito"] and not primera["desde_cache"]
+        assert segunda["sesion_id"] == primera["sesion_id"]
+        sesion = db[COL_SESIONES].find_one({"_id": primera["sesion_id"]})
+        assert [t["texto"] for t in sesion["turnos"][::2]] == ["¿Qué es la célula?", "¿Y el núcleo?"]
+
+    def test_validaciones_como_flask(self, ruta):
+        """Sin sesión responde 401 y con el mensaje vacío 400, igual que la ruta Flask."""
+        _, ruta_id = ruta
+        assert _chat(ruta_id, "Hola", usuario=None)[0] == 401
+        estado, cuerpo = _chat(ruta_id, "  ")
+        assert estado == 400 and cuerpo["error"] == "Mensaje vacío"
+
+    def test_plegado_asincrono(self, ruta):
+        """Una conversación larga se pliega en el resumen también por la vía asíncrona."""
+        db, ruta_id = ruta
+        sesion_id = None
+        for i in range(12):
+            sesion_id = _chat(ruta_id, f"Pregunta {i}", sesion_id)[1]["sesion_id"]
+
+        sesion = db[COL_SESIONES].find_one({"_id": sesion_id})
+        assert len(sesion["turnos"]) <= TURNOS_RECIENTES + LOTE_RESUMEN
+        assert sesion["resumen"] and sesion["turnos_resumidos"] + len(sesion["turnos"]) == 24
+
+    def test_metricas_de_la_ruta_async(self, ruta):
+        """La vía asíncrona registra la petición con sus comandos de MongoDB y su llamada al modelo."""
+        from src.metricas import registro, registrar_escucha_mongo
+
+        _, ruta_id = ruta
+        registrar_escucha_mongo()
+        registro.reiniciar()
+        _chat(ruta_id, "¿Qué es la célula?")
+
+        etiquetas = (("endpoint", "/api/chatbot"), ("metodo", "POST"))
+        assert registro.valor("rutealo_http_peticiones_total", etiquetas + (("estado", "200"),)) == 1
+        assert registro._series["rutealo_http_mongo_comandos"][etiquetas].suma > 0
+        assert registro.valor("rutealo_http_llm_segundos", etiquetas) == 1
+
+    def test_esperas_concurrentes_sin_hilos(self, ruta, monkeypatch):
+        """Cien conversaciones con 200 ms de modelo terminan en bastante menos que en serie."""
+        _, ruta_id = ruta
+        monkeypatch.setenv("RUTEALO_FAKE_LATENCIA_MS", "200")
+        model.reiniciar()
+
+        async def todas():
+            return await asyncio.gather(*[
+                TutorVirtual(ruta_id, "ana").conversar_async(f"Duda {i}") for i in range(100)
+            ])
+
+        inicio = time.perf_counter()
+        resultados = asyncio.run(todas())
+        assert all(r["exito"] for r in resultados)
+        assert time.perf_counter() - inicio < 5
+
+
+class TestPuenteWSGI:
+    """Tests de las rutas que siguen en Flask."""
+
+    def test_delega_en_flask(self, ruta):
+        """Las rutas sin versión asíncrona responde la app Flask."""
+        estado, cuerpo = asyncio.run(_llamar("GET", "/login", usuario=None))
+        assert estado == 200 and b"<html" in cuerpo.lower()
+
+    def test_peticiones_en_el_pool_del_puente(self):
+        """Cada petición WSGI corre en un hilo del pool propio, en paralelo, con Content-Length respetado."""
+        import threading
+        from src.asgi import PuenteWSGI
+
+        hilos = []
+
+        def lenta(environ, start_response):
+            hilos.append(threading.current_thread().name)
+            time.sleep(0.3)
+            start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", "2")])
+            return [b"ok", b"sobrante"]
+
+        puente = PuenteWSGI(lenta, hilos=2)
+
+        async def pedir():
+            enviados = []
+            mensajes = [{"type": "http.request", "body": b""}]
+
+            async def receive():
+                return mensajes.pop(0)
+
+            async def send(mensaje):
+                enviados.append(mensaje)
+
+            scope = {"type": "http", "http_version": "1.1", "method": "GET", "path": "/", "query_string": b"", "headers": []}
+            await puente(scope, receive, send)
+            return b"".join(m.get("body", b"") for m in enviados if m["type"] == "http.response.body")
+
+        async def dos_a_la_vez():
+            return await asyncio.gather(pedir(), pedir())
+
+        inicio = time.perf_counter()
+        cuerpos = asyncio.run(dos_a_la_vez())
+        puente.pool.shutdown()
+
+        assert cuerpos == [b"ok", b"ok"]
+        assert time.perf_counter() - inicio < 0.55
+        assert len(set(hilos)) == 2 and all(h.startswith("puente_wsgi") for h in hilos)
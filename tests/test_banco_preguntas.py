@@ -0,0 +1,259 @@
+"""
+Tests para src/models/banco_preguntas.py: banco de preguntas con estadísticas.
+"""
+
+import pytest
+from src.models.evaluacion_zdp import EvaluadorZDP
+from src.models.banco_preguntas import (
+    COL_BANCO,
+    huella_pregunta,
+    huellas_documentos,
+    estadisticas_item,
+    parametros_irt,
+    pool_diagnostico,
+    registrar_respuestas_lote,
+    ensamblar_examen_inicial,
+    ensamblar_tests_nivel,
+    guardar_preguntas,
+    MIN_RESPUESTAS_ESTADISTICAS,
+    MIN_POOL_CALIBRADO,
+    TAMANO_EXAMEN_INICIAL,
+    TIPO_DIAGNOSTICO,
+)
+
+NIVELES = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar", "Crear"]
+
+
+def _unidades(*documentos):
+    return [{"texto": f"Contenido de {d} parte {i}", "documento": d, "nivel": "Aplicar"} for d in documentos for i in range(2)]
+
+
+class GeneradorExamen:
+    """Generador falso que cuenta sus llamadas y produce 12 preguntas distintas."""
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self, contenido_total, unidades):
+        self.llamadas += 1
+        return {
+            "EXAMENES": {
+                "EXAMEN_INICIAL": [
+                    {
+                        "id": i + 1,
+                        "pregunta": f"Pregunta {self.llamadas}-{i}",
+                        "opciones": ["a) x", "b) y"],
+                        "respuesta_correcta": "a",
+                        "nivel_bloom_evaluado": NIVELES[i % 6],
+                    }
+                    for i in range(12)
+                ]
+            }
+        }
+
+
+def _generador_tests(registro):
+    def generar(num_preguntas):
+        registro.append(num_preguntas)
+        base = len(registro) * 100
+        return [
+            {"id": i, "pregunta": f"Test {base + i}", "opciones": ["a) x"], "respuesta_correcta": "a", "realizado": False}
+            for i in range(num_preguntas)
+        ]
+
+    return generar
+
+
+def _calibrar(db, banco_ids, estudiantes=MIN_RESPUESTAS_ESTADISTICAS + 10):
+    """Respuestas simuladas: el ítem i lo aciertan los estudiantes con habilidad sobre su umbral."""
+    evaluaciones = []
+    for k in range(estudiantes):
+        habilidad = (k + 0.5) / estudiantes
+        evaluaciones.append([
+            {"banco_id": banco_id, "es_correcto": habilidad > (i + 1) / (len(banco_ids) + 1)}
+            for i, banco_id in enumerate(banco_ids)
+        ])
+    registrar_respuestas_lote(db, evaluaciones)
+
+
+class TestHuellas:
+    """Tests de identidad de documentos y preguntas."""
+
+    def test_huella_pregunta_ignora_formato_e_id(self):
+        """Mayúsculas, espacios e id no cambian la identidad."""
+        a = {"id": 1, "pregunta": "¿Qué es  X?", "opciones": ["a) Uno"], "respuesta_correcta": "a"}
+        b = {"id": 7, "pregunta": "¿qué es x?", "opciones": ["a) uno"], "respuesta_correcta": "a", "realizado": True}
+        assert huella_pregunta(a) == huella_pregunta(b)
+
+    def test_huella_por_documento(self):
+        """Cada documento tiene su propia huella y cambia con su texto."""
+        huellas = huellas_documentos(_unidades("a.pdf", "b.pdf"))
+        assert set(huellas) == {"a.pdf", "b.pdf"}
+        modificado = huellas_documentos([{"texto": "otro", "documento": "a.pdf"}])
+        assert modificado["a.pdf"] != huellas["a.pdf"]
+
+
+class TestEstadisticas:
+    """Tests del p-valor y la discriminación."""
+
+    def test_p_valor_y_discriminacion(self):
+        """Un ítem que aciertan los mejores estudiantes discrimina positivamente."""
+        item = {"estadisticas": {"respuestas": 0, "aciertos": 0, "suma_resto": 0.0, "suma_resto2": 0.0, "suma_resto_acierto": 0.0}}
+        for acierto, resto in [(1, 0.9), (1, 0.8), (0, 0.3), (0, 0.2), (1, 0.7)]:
+            e = item["estadisticas"]
+            e["respuestas"] += 1
+            e["aciertos"] += acierto
+            e["suma_resto"] += resto
+            e["suma_resto2"] += resto * resto
+            e["suma_resto_acierto"] += resto * acierto
+        stats = estadisticas_item(item)
+        assert stats["p_valor"] == 0.6
+        assert stats["discriminacion"] > 0.9
+
+    def test_parametros_irt(self, bd_memoria):
+        """Tras MIN_RESPUESTAS_ESTADISTICAS respuestas el ítem fácil tiene menor dificultad que el difícil."""
+        examen = ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf"), GeneradorExamen())
+        banco_ids = [p["banco_id"] for p in examen["EXAMENES"]["EXAMEN_INICIAL"]]
+        _calibrar(bd_memoria, banco_ids, estudiantes=MIN_RESPUESTAS_ESTADISTICAS - 1)
+        assert parametros_irt(bd_memoria[COL_BANCO].find_one({"_id": banco_ids[0]})) == {}
+
+        _calibrar(bd_memoria, banco_ids)
+        facil, dificil = (parametros_irt(bd_memoria[COL_BANCO].find_one({"_id": i})) for i in (banco_ids[0], banco_ids[-1]))
+        assert facil["irt_b"] < 0 < dificil["irt_b"]
+        assert facil["irt_a"] > 0 and dificil["irt_a"] > 0
+
+    def test_evaluacion_actualiza_contadores(self, bd_memoria):
+        """Las respuestas de un examen ensamblado se acumulan en sus ítems."""
+        examen = ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf"), GeneradorExamen())
+        preguntas = examen["EXAMENES"]["EXAMEN_INICIAL"]
+        respuestas = [{"pregunta_id": p["id"], "respuesta": "a" if p["id"] % 2 else "b"} for p in preguntas]
+        EvaluadorZDP().evaluar_examen("ana", respuestas, examen)
+
+        item = bd_memoria[COL_BANCO].find_one({"_id": preguntas[0]["banco_id"]})
+        assert item["estadisticas"]["respuestas"] == 1
+        assert item["estadisticas"]["aciertos"] == 1
+        assert estadisticas_item(item)["p_valor"] == 1.0
+
+
+class TestEnsamblado:
+    """Tests de reutilización del banco al ensamblar exámenes y tests."""
+
+    def test_examen_reutiliza_el_banco(self, bd_memoria):
+        """Con el mismo material la segunda vez no se llama al generador."""
+        generar = GeneradorExamen()
+        primero = ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf"), generar)
+        segundo = ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf"), generar)
+
+        assert generar.llamadas == 1
+        assert len(segundo["EXAMENES"]["EXAMEN_INICIAL"]) == 12
+        ids = {p["banco_id"] for p in primero["EXAMENES"]["EXAMEN_INICIAL"]}
+        assert ids == {p["banco_id"] for p in segundo["EXAMENES"]["EXAMEN_INICIAL"]}
+        assert bd_memoria[COL_BANCO].find_one({"_id": next(iter(ids))})["exposiciones"] == 2
+
+    def test_documento_nuevo_genera_preguntas(self, bd_memoria):
+        """Un documento sin ítems que lo cubran provoca una generación."""
+        generar = GeneradorExamen()
+        ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf"), generar)
+        ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf", "b.pdf"), generar)
+        assert generar.llamadas == 2
+
+    def test_documento_modificado_invalida_sus_items(self, bd_memoria):
+        """Los ítems de un documento que cambió dejan de ser elegibles."""
+        generar = GeneradorExamen()
+        ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf"), generar)
+        examen = ensamblar_examen_inicial(
+            bd_memoria, "texto", [{"texto": "nuevo", "documento": "a.pdf", "nivel": "Aplicar"}], generar
+        )
+        assert generar.llamadas == 2
+        assert all(p["pregunta"].startswith("Pregunta 2-") for p in examen["EXAMENES"]["EXAMEN_INICIAL"])
+
+    def test_pool_calibrado_no_reduce_el_examen(self, bd_memoria):
+        """El examen fijo se puntúa por umbral: con el banco calibrado mantiene su cuota por nivel."""
+        generar = GeneradorExamen()
+        examen = ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf"), generar)
+        _calibrar(bd_memoria, [p["banco_id"] for p in examen["EXAMENES"]["EXAMEN_INICIAL"]])
+
+        siguiente = ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf"), generar)["EXAMENES"]["EXAMEN_INICIAL"]
+        assert generar.llamadas == 1
+        assert len(siguiente) == TAMANO_EXAMEN_INICIAL
+        assert sum(p["nivel_bloom_evaluado"] == "Recordar" for p in siguiente) == 2
+
+    def test_pool_diagnostico_usa_el_banco(self, bd_memoria):
+        """El pool suma al examen los demás ítems del material, numerados sin repetir."""
+        generar = GeneradorExamen()
+        unidades = _unidades("a.pdf")
+        huellas = list(huellas_documentos(unidades).values())
+        examen = ensamblar_examen_inicial(bd_memoria, "texto", unidades, generar)["EXAMENES"]["EXAMEN_INICIAL"]
+        extra = guardar_preguntas(bd_memoria, TIPO_DIAGNOSTICO, generar("texto", unidades)["EXAMENES"]["EXAMEN_INICIAL"][:6], huellas)
+        # Ítems de otro estudiante que también cubren b.pdf: no son elegibles con solo a.pdf
+        ensamblar_examen_inicial(bd_memoria, "texto", _unidades("a.pdf", "b.pdf"), generar)
+
+        pool = pool_diagnostico(bd_memoria, examen, huellas)
+        assert {p["banco_id"] for p in pool} == {p["banco_id"] for p in examen} | {i["_id"] for i in extra}
+        assert [p["id"] for p in pool] == list(range(1, len(pool) + 1))
+
+        # Exámenes anteriores sin huellas guardadas: se usan las de sus ítems
+        assert {p["banco_id"] for p in pool_diagnostico(bd_memoria, examen)} == {p["banco_id"] for p in pool}
+
+    def test_pool_calibrado_solo_calibrados(self, bd_memoria):
+        """Con MIN_POOL_CALIBRADO ítems calibrados el pool adaptativo deja fuera los demás."""
+        generar = GeneradorExamen()
+        unidades = _unidades("a.pdf")
+        huellas = list(huellas_documentos(unidades).values())
+        examen = ensamblar_examen_inicial(bd_memoria, "texto", unidades, generar)["EXAMENES"]["EXAMEN_INICIAL"]
+        _calibrar(bd_memoria, [p["banco_id"] for p in examen])
+        guardar_preguntas(bd_memoria, TIPO_DIAGNOSTICO, generar("texto", unidades)["EXAMENES"]["EXAMEN_INICIAL"][:6], huellas)
+
+        pool = pool_diagnostico(bd_memoria, examen, huellas)
+        assert len(pool) == MIN_POOL_CALIBRADO
+        assert {p["banco_id"] for p in pool} == {p["banco_id"] for p in examen}
+        assert all("irt_a" in p and "irt_b" in p for p in pool)
+
+    def test_tests_de_nivel_solo_generan_lo_que_falta(self, bd_memoria):
+        """El generador de tests recibe solo la cantidad faltante."""
+        pedidos = []
+        generar = _generador_tests(pedidos)
+        textos = _unidades("a.pdf")
+
+        primeros = ensamblar_tests_nivel(bd_memoria, "Aplicar", textos, 3, generar)
+        ensamblar_tests_nivel(bd_memoria, "Aplicar", textos, 3, generar)
+        ampliados = ensamblar_tests_nivel(bd_memoria, "Aplicar", textos, 5, generar)
+
+        assert pedidos == [3, 2]
+        assert [t["id"] for t in primeros] == [1, 2, 3]
+        assert len(ampliados) == 5 and not any(t["realizado"] for t in ampliados)
+
+
+class TestRutaConBanco:
+    """Tests de la generación de rutas con el modelo falso."""
+
+    @pytest.fixture
+    def material(self, bd_memoria, backend_falso):
+        bd_memoria["materiales_crudos"].insert_one(
+            {
+                "usuario_propietario": "ana",
+                "nombre_archivo": "apuntes.pdf",
+                "estado_procesamiento": "BLOOM_COMPLETADO",
+                "unidades_contenido": [
+                    {"contenido_texto": f"Texto {i} sobre bases de datos", "Categoria_Bloom": nivel}
+                    for i, nivel in enumerate(NIVELES * 2)
+                ],
+            }
+        )
+        return bd_memoria
+
+    def test_regenerar_ruta_no_regenera_preguntas(self, material):
+        """Regenerar la ruta sin material nuevo no pide preguntas al modelo."""
+        from src.web_utils import generar_ruta_aprendizaje
+        from src.models.modelo_falso import estadisticas_llm, reiniciar_estadisticas_llm
+
+        generar_ruta_aprendizaje("ana", material)
+        primera = estadisticas_llm()["llamadas"]
+        reiniciar_estadisticas_llm()
+        generar_ruta_aprendizaje("ana", material)
+        segunda = estadisticas_llm()["llamadas"]
+
+        assert primera.get("examen_diagnostico") == 1 and primera.get("tests_nivel", 0) > 0
+        assert "examen_diagnostico" not in segunda and "tests_nivel" not in segunda
+        ruta = material["rutas_aprendizaje"].find_one({"usuario": "ana"})
+        assert all(t.get("banco_id") for tests in ruta["estructura_ruta"]["examenes"].values() for t in tests)
@@ -0,0 +1,66 @@
+"""
+Tests para benchmarks/: Mongo en memoria y pipeline de extremo a extremo sin claves.
+"""
+
+import pytest
+from pymongo import UpdateOne, InsertOne, ReturnDocument
+from benchmarks.mongo_memoria import ClienteMemoria
+from benchmarks.benchmark_pipeline import ejecutar_benchmark
+
+
+@pytest.fixture
+def col():
+    return ClienteMemoria()["test"]["docs"]
+
+
+@pytest.fixture
+def entorno_benchmark(monkeypatch, backend_falso, bd_memoria):
+    """El benchmark cambia variables de entorno y el cliente de BD; se restauran al final."""
+    for clave in ("RUTEALO_FAKE_LATENCIA_MS", "RUTEALO_FAKE_DESVIACION_MS", "RUTEALO_FAKE_SEMILLA"):
+        monkeypatch.setenv(clave, "0")
+
+
+class TestMongoMemoria:
+    """Tests del subconjunto de la API de pymongo."""
+
+    def test_find_con_proyeccion_orden_y_limite(self, col):
+        """find respeta filtro, proyección, sort y limit."""
+        col.insert_many([{"u": "a", "n": i, "x": "grande"} for i in range(5)] + [{"u": "b", "n": 9}])
+        docs = list(col.find({"u": "a", "n": {"$gte": 1}}, {"n": 1, "_id": 0}).sort("n", -1).limit(2))
+        assert docs == [{"n": 4}, {"n": 3}]
+
+    def test_update_upsert_con_operadores(self, col):
+        """update_one con upsert copia el filtro y aplica $set/$inc/$push."""
+        col.update_one({"usuario": "ana"}, {"$set": {"nivel": "Aplicar"}, "$inc": {"intentos": 1}}, upsert=True)
+        col.update_one({"usuario": "ana"}, {"$inc": {"intentos": 2}, "$push": {"hist": 1}})
+        doc = col.find_one({"usuario": "ana"})
+        assert doc["nivel"] == "Aplicar" and doc["intentos"] == 3 and doc["hist"] == [1]
+
+    def test_bulk_write_y_find_one_and_update(self, col):
+        """bulk_write aplica operaciones de pymongo; find_one_and_update devuelve el estado previo."""
+        res = col.bulk_write([InsertOne({"k": 1, "v": 0}), UpdateOne({"k": 2}, {"$set": {"v": 5}}, upsert=True)])
+        assert res.inserted_count == 1 and res.upserted_count == 1
+        previo = col.find_one_and_update({"k": 2}, {"$inc": {"v": 1}}, return_document=ReturnDocument.BEFORE)
+        assert previo["v"] == 5 and col.find_one({"k": 2})["v"] == 6
+
+    def test_base_no_admite_valor_booleano(self):
+        """Como pymongo, `if db:` debe fallar en lugar de pasar en silencio."""
+        with pytest.raises(NotImplementedError):
+            bool(ClienteMemoria()["test"])
+
+
+class TestBenchmarkPipeline:
+    """Smoke test del pipeline carga -> Bloom -> ruta con el backend falso."""
+
+    def test_pipeline_completo_sin_claves(self, entorno_benchmark):
+        """Genera la ruta de cada usuario y reporta métricas por etapa."""
+        resultado = ejecutar_benchmark(usuarios=2, documentos=3, paginas=2, palabras_por_pagina=40, medir_memoria=False)
+
+        assert resultado["totales"]["rutas_generadas"] == 2
+        etapas = resultado["etapas"]
+        assert set(etapas) == {"ingesta", "etiquetado", "ruta"}
+        assert etapas["ingesta"]["llamadas_llm"] == {}
+        # Una clasificación por unidad con texto y un examen diagnóstico por usuario
+        assert etapas["etiquetado"]["llamadas_llm"]["clasificacion_bloom"] > 0
+        assert etapas["ruta"]["llamadas_llm"]["examen_diagnostico"] == 2
+        assert resultado["totales"]["operaciones_bd"]["total"] > 0
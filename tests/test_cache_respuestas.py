@@ -0,0 +1,84 @@
+"""
+Tests para src/models/cache_respuestas.py: caché semántica de respuestas del tutor.
+"""
+
+import pytest
+from src.models.chatbot_tutor import TutorVirtual, invalidar_contexto_tutor
+from src.models.indice_tutor import indexar_material, huella_material
+from src.models.modelo_falso import estadisticas_llm
+from src.models.cache_respuestas import (
+    firmar_pregunta,
+    buscar_respuesta,
+    guardar_respuesta,
+    estadisticas_cache_respuestas,
+    reiniciar_estadisticas_cache_respuestas,
+)
+
+UNIDADES = [{"indice": 1, "tipo_unidad": "pagina", "contenido_texto": "La normalización elimina redundancia en tablas."}]
+
+
+class TestFirma:
+    """Tests de la normalización de preguntas."""
+
+    def test_parafrasis_con_la_misma_firma(self):
+        """Distintas formas de preguntar lo mismo comparten términos y bandas."""
+        firmas = [firmar_pregunta(p) for p in ("¿Qué es la normalización?", "Explícame la normalizacion", "¿qué significa normalización?")]
+        assert all(f["terminos"] == ["normalizacion"] for f in firmas)
+        assert firmas[0]["bandas"] == firmas[1]["bandas"]
+
+    def test_preguntas_que_dependen_de_la_conversacion(self):
+        """Las preguntas que remiten a mensajes anteriores o sin contenido no se firman."""
+        assert firmar_pregunta("Dame otro ejemplo de eso") is None
+        assert firmar_pregunta("¿y qué es?") is None
+
+
+class TestBuscarRespuesta:
+    """Tests de búsqueda con umbral."""
+
+    def test_umbral_huella_e_idioma(self, bd_memoria):
+        """Solo responde preguntas similares sobre la misma huella e idioma."""
+        guardar_respuesta(bd_memoria, "h1", "es", firmar_pregunta("¿Qué es la primera forma normal?"), "1FN es...")
+
+        assert buscar_respuesta(bd_memoria, "h1", "es", firmar_pregunta("Explícame la primera forma normal"))["respuesta"] == "1FN es..."
+        assert buscar_respuesta(bd_memoria, "h1", "es", firmar_pregunta("¿Qué es la segunda forma normal?")) is None
+        assert buscar_respuesta(bd_memoria, "h2", "es", firmar_pregunta("primera forma normal")) is None
+        assert buscar_respuesta(bd_memoria, "h1", "en", firmar_pregunta("primera forma normal")) is None
+
+
+class TestTutorConCache:
+    """El tutor reutiliza respuestas entre estudiantes con el mismo material."""
+
+    @pytest.fixture
+    def rutas(self, bd_memoria, backend_falso):
+        invalidar_contexto_tutor()
+        reiniciar_estadisticas_cache_respuestas()
+        ids = {}
+        for usuario in ("ana", "luis"):
+            ids[usuario] = str(bd_memoria["rutas_aprendizaje"].insert_one({"usuario": usuario, "nombre_ruta": "BD"}).inserted_id)
+            indexar_material(bd_memoria, usuario, f"{usuario}_apuntes.pdf", UNIDADES)
+        yield bd_memoria, ids
+        invalidar_contexto_tutor()
+
+    def test_segundo_estudiante_sin_llamar_al_modelo(self, rutas):
+        """La misma pregunta con otras palabras se responde desde la caché."""
+        db, ids = rutas
+        assert huella_material(db, "ana") == huella_material(db, "luis")
+
+        primera = TutorVirtual(ids["ana"], "ana").conversar("¿Qué es la normalización?")
+        llamadas = estadisticas_llm()["total_llamadas"]
+        segunda = TutorVirtual(ids["luis"], "luis").conversar("explícame la normalizacion")
+
+        assert not primera["desde_cache"] and segunda["desde_cache"]
+        assert segunda["respuesta"] == primera["respuesta"]
+        assert estadisticas_llm()["total_llamadas"] == llamadas
+        assert db["sesiones_chat"].find_one({"_id": segunda["sesion_id"]})["turnos"][1]["texto"] == segunda["respuesta"]
+        assert estadisticas_cache_respuestas()["tasa_aciertos"] == 0.5
+
+    def test_material_distinto(self, rutas):
+        """Con otro material la pregunta vuelve a llamar al modelo."""
+        db, ids = rutas
+        TutorVirtual(ids["ana"], "ana").conversar("¿Qué es la normalización?")
+        indexar_material(db, "luis", "extra.pdf", [{"contenido_texto": "Índices B-tree"}])
+        invalidar_contexto_tutor("luis")
+
+        assert not TutorVirtual(ids["luis"], "luis").conversar("¿Qué es la normalización?")["desde_cache"]
@@ -0,0 +1,114 @@
+"""
+Tests para src/models/chatbot_tutor.py: caché de contexto por ruta y usuario.
+"""
+
+import datetime
+import pytest
+from src.models import chatbot_tutor
+from src.models.chatbot_tutor import TutorVirtual, invalidar_contexto_tutor
+
+
+@pytest.fixture
+def ruta(bd_memoria, backend_falso):
+    """Ruta de "ana" con una flashcard; la caché del tutor empieza vacía."""
+    invalidar_contexto_tutor()
+    resultado = bd_memoria["rutas_aprendizaje"].insert_one({
+        "usuario": "ana",
+        "nombre_ruta": "Biología",
+        "estructura_ruta": {"flashcards": {"Recordar": [{"frente": "Célula", "reverso": "Unidad básica"}]}},
+        "metadatos_ruta": {"zona_proxima": ["Comprender"]},
+    })
+    yield bd_memoria, str(resultado.inserted_id)
+    invalidar_contexto_tutor()
+
+
+def _lecturas_ruta(db):
+    return db.client.estadisticas().get("rutas_aprendizaje.find_one", 0)
+
+
+class TestCacheContexto:
+    """Tests de la reutilización del contexto entre mensajes."""
+
+    def test_segundo_tutor_no_relee_la_ruta(self, ruta):
+        """Un nuevo TutorVirtual para la misma ruta y usuario usa el contexto cacheado."""
+        db, ruta_id = ruta
+        TutorVirtual(ruta_id, "ana").responder("¿Qué es la célula?")
+        db.client.reiniciar_estadisticas()
+
+        tutor = TutorVirtual(ruta_id, "ana")
+        assert tutor.contexto_ruta["nombre_ruta"] == "Biología"
+        # Solo la lectura proyectada de la versión de la ruta
+        assert _lecturas_ruta(db) == 1
+
+    def test_prompt_por_idioma_se_construye_una_vez(self, ruta, monkeypatch):
+        """El prompt base de cada idioma se arma solo en el primer mensaje."""
+        _, ruta_id = ruta
+        llamadas = []
+        original = TutorVirtual._prompt_ingles
+        monkeypatch.setattr(TutorVirtual, "_prompt_ingles", lambda self: llamadas.append(1) or original(self))
+
+        for _ in range(3):
+            TutorVirtual(ruta_id, "ana", idioma="en").responder("What is a cell?")
+        TutorVirtual(ruta_id, "ana", idioma="es").responder("¿Qué es la célula?")
+        assert len(llamadas) == 1
+
+    def test_ruta_de_otro_usuario(self, ruta):
+        """No se carga (ni se cachea) la ruta de otro usuario."""
+        db, ruta_id = ruta
+        assert TutorVirtual(ruta_id, "luis").contexto_ruta is None
+        assert len(chatbot_tutor._cache_contextos) == 0
+
+
+class TestInvalidacion:
+    """Tests de la invalidación al escribir rutas o materiales."""
+
+    def test_invalidar_por_ruta(self, ruta):
+        """Tras invalidar, el tutor refleja los cambios de la ruta."""
+        db, ruta_id = ruta
+        TutorVirtual(ruta_id, "ana")
+        db["rutas_aprendizaje"].update_one({"usuario": "ana"}, {"$set": {"nombre_ruta": "Genética"}})
+        assert TutorVirtual(ruta_id, "ana").contexto_ruta["nombre_ruta"] == "Biología"
+
+        invalidar_contexto_tutor("ana", ruta_id)
+        assert TutorVirtual(ruta_id, "ana").contexto_ruta["nombre_ruta"] == "Genética"
+
+    def test_finalizar_examen_invalida(self, ruta):
+        """Actualizar la ZDP de la ruta tras el examen inicial descarta el contexto."""
+        from src.web_utils import finalizar_examenes_iniciales
+
+        db, ruta_id = ruta
+        TutorVirtual(ruta_id, "ana")
+        finalizar_examenes_iniciales(db, [{"usuario": "ana", "zona_proxima": ["Aplicar", "Analizar"]}])
+        assert TutorVirtual(ruta_id, "ana").contexto_ruta["zona_proxima"] == ["Aplicar", "Analizar"]
+
+
+class TestVariosProcesos:
+    """Tests de la validación contra MongoDB (escrituras hechas por otro worker)."""
+
+    def test_ruta_actualizada_en_otro_proceso(self, ruta):
+        """Una ruta con otra fecha_actualizacion se vuelve a cargar sin invalidar la caché."""
+        db, ruta_id = ruta
+        TutorVirtual(ruta_id, "ana")
+        db["rutas_aprendizaje"].update_one(
+            {"usuario": "ana"},
+            {"$set": {"nombre_ruta": "Genética", "fecha_actualizacion": datetime.datetime.utcnow()}},
+        )
+        assert TutorVirtual(ruta_id, "ana").contexto_ruta["nombre_ruta"] == "Genética"
+
+    def test_ruta_eliminada_en_otro_proceso(self, ruta):
+        """Si la ruta ya no existe el tutor no usa el contexto cacheado."""
+        db, ruta_id = ruta
+        TutorVirtual(ruta_id, "ana")
+        db["rutas_aprendizaje"].delete_many({"usuario": "ana"})
+        assert TutorVirtual(ruta_id, "ana").contexto_ruta is None
+        assert len(chatbot_tutor._cache_contextos) == 0
+
+    def test_huella_no_se_comparte_entre_tutores(self, ruta):
+        """Cada tutor lee la huella del material: un material nuevo en otro proceso cambia la clave de respuestas."""
+        from src.models.indice_tutor import indexar_material
+
+        db, ruta_id = ruta
+        indexar_material(db, "ana", "celula.pdf", [{"contenido_texto": "La célula es la unidad básica de la vida."}])
+        huella = TutorVirtual(ruta_id, "ana")._huella_material()
+        indexar_material(db, "ana", "adn.pdf", [{"contenido_texto": "El ADN guarda la información genética."}])
+        assert huella and TutorVirtual(ruta_id, "ana")._huella_material() != huella
@@ -0,0 +1,70 @@
+"""
+Tests para el contenido de la ruta por niveles: resumen sin estructura y páginas con $slice.
+"""
+
+import pytest
+from src.web_utils import obtener_resumen_ruta, obtener_nivel_ruta, LIMITE_NIVEL_MAX
+
+
+def _insertar_ruta(db, usuario="ana"):
+    return db["rutas_aprendizaje"].insert_one({
+        "usuario": usuario,
+        "nombre_ruta": "Biología",
+        "estado": "ACTIVA",
+        "metadatos_ruta": {"niveles_incluidos": ["Recordar", "Comprender"]},
+        "estructura_ruta": {
+            "flashcards": {
+                "Recordar": [{"frente": f"F{i}", "reverso": f"R{i}"} for i in range(12)],
+                "Comprender": [{"frente": "C", "reverso": "c"}],
+            },
+            "examenes": {"Recordar": [{"pregunta": f"P{i}"} for i in range(3)]},
+        },
+    }).inserted_id
+
+
+class TestResumenRuta:
+    """Tests de /ruta/<id>/contenido en modo resumen."""
+
+    def test_sin_estructura_con_conteos(self, bd_memoria):
+        """El resumen no trae flashcards ni tests, solo cuántos hay por nivel."""
+        ruta = obtener_resumen_ruta(bd_memoria, _insertar_ruta(bd_memoria), "ana")
+
+        assert "estructura_ruta" not in ruta and ruta["tiene_estructura"]
+        assert ruta["resumen_niveles"] == {
+            "Recordar": {"flashcards": 12, "examenes": 3},
+            "Comprender": {"flashcards": 1, "examenes": 0},
+        }
+        assert ruta["metadatos_ruta"]["niveles_incluidos"] == ["Recordar", "Comprender"]
+
+    def test_ruta_ajena(self, bd_memoria):
+        """La ruta de otro usuario no se encuentra."""
+        assert obtener_resumen_ruta(bd_memoria, _insertar_ruta(bd_memoria, "luis"), "ana") is None
+
+
+class TestNivelRuta:
+    """Tests de /ruta/<id>/nivel/<nivel>."""
+
+    def test_pagina_de_una_parte(self, bd_memoria):
+        """Con offset y limit solo se devuelve el tramo pedido, con el total del nivel."""
+        contenido = obtener_nivel_ruta(bd_memoria, _insertar_ruta(bd_memoria), "ana", "Recordar",
+                                       ("flashcards",), offset=10, limit=5)
+
+        assert list(contenido) == ["flashcards"]
+        assert [f["frente"] for f in contenido["flashcards"]["items"]] == ["F10", "F11"]
+        assert contenido["flashcards"]["total"] == 12
+
+    def test_nivel_sin_contenido(self, bd_memoria):
+        """Un nivel sin tests devuelve una lista vacía y total 0."""
+        contenido = obtener_nivel_ruta(bd_memoria, _insertar_ruta(bd_memoria), "ana", "Crear")
+        assert contenido["examenes"] == {"items": [], "total": 0, "offset": 0, "limit": 10}
+
+    def test_limite_maximo(self, bd_memoria):
+        """El tamaño de página se acota a LIMITE_NIVEL_MAX."""
+        contenido = obtener_nivel_ruta(bd_memoria, _insertar_ruta(bd_memoria), "ana", "Recordar", limit=1000)
+        assert contenido["flashcards"]["limit"] == LIMITE_NIVEL_MAX
+
+    @pytest.mark.parametrize("nivel,partes", [("estructura_ruta", ("flashcards",)), ("Recordar", ("usuario",))])
+    def test_nivel_o_parte_invalidos(self, bd_memoria, nivel, partes):
+        """Nivel y parte se validan antes de formar la ruta del campo."""
+        with pytest.raises(ValueError):
+            obtener_nivel_ruta(bd_memoria, _insertar_ruta(bd_memoria), "ana", nivel, partes)
@@ -0,0 +1,103 @@
+"""
+Tests para web_utils.obtener_datos_dashboard: datos iniciales del dashboard en una pasada.
+"""
+
+import datetime
+from src.models.evaluacion_zdp import EvaluadorZDP
+from src.web_utils import obtener_datos_dashboard, obtener_rutas_usuario
+
+EXAMEN = {
+    "EXAMENES": {
+        "EXAMEN_INICIAL": [
+            {"id": 1, "respuesta_correcta": "a", "nivel_bloom_evaluado": "Recordar"},
+            {"id": 2, "respuesta_correcta": "a", "nivel_bloom_evaluado": "Comprender"},
+        ]
+    }
+}
+
+
+def _insertar_rutas(db):
+    db["rutas_aprendizaje"].insert_many([
+        {
+            "usuario": "ana",
+            "nombre_ruta": "Antigua",
+            "fecha_actualizacion": datetime.datetime(2025, 1, 1),
+            "estructura_ruta": {"flashcards": {"Recordar": [{"frente": "A", "reverso": "a"}]}},
+        },
+        {
+            "usuario": "ana",
+            "nombre_ruta": "Biología",
+            "fecha_actualizacion": datetime.datetime(2025, 6, 1),
+            "archivos_fuente": ["bio.pdf"],
+            "estructura_ruta": {"flashcards": {"Recordar": [{"frente": "Célula", "reverso": "Unidad"}]}},
+            "metadatos_ruta": {"niveles_incluidos": ["Recordar"]},
+        },
+        {"usuario": "luis", "nombre_ruta": "Química", "fecha_actualizacion": datetime.datetime(2025, 7, 1)},
+    ])
+
+
+class TestDatosDashboard:
+    """Tests del payload de /api/dashboard/bootstrap."""
+
+    def test_pocas_consultas(self, bd_memoria, tmp_path):
+        """Rutas, examen y perfil se leen con una consulta por colección."""
+        _insertar_rutas(bd_memoria)
+        bd_memoria["examen_inicial"].insert_one({"usuario": "ana", "estado": "PENDIENTE", "contenido": EXAMEN})
+        bd_memoria.client.reiniciar_estadisticas()
+
+        datos = obtener_datos_dashboard("ana", bd_memoria, str(tmp_path))
+
+        stats = bd_memoria.client.estadisticas()
+        assert stats["total"] == 3
+        assert stats.get("rutas_aprendizaje.aggregate") == 1
+        assert datos["archivos"] == []
+
+    def test_rutas_y_ruta_activa(self, bd_memoria, tmp_path):
+        """El listado coincide con /rutas/lista y la ruta activa (la más reciente) llega sin contenido."""
+        _insertar_rutas(bd_memoria)
+        datos = obtener_datos_dashboard("ana", bd_memoria, str(tmp_path))
+
+        assert datos["rutas"] == obtener_rutas_usuario("ana", bd_memoria)
+        assert "estructura_ruta" not in datos["rutas"][0]
+        ruta = datos["estado"]["ruta"]
+        assert ruta["id"] == datos["rutas"][0]["ruta_id"]
+        assert ruta["niveles"] == {"Recordar": {"flashcards": 1, "examenes": 0}}
+        assert "estructura" not in ruta and "Célula" not in str(ruta)
+        assert ruta["metadatos"]["niveles_incluidos"] == ["Recordar"]
+
+    def test_ruta_estado_sin_contenido(self, bd_memoria):
+        """/ruta/estado devuelve los conteos por nivel de la ruta más reciente, no sus flashcards."""
+        from src.app import app
+
+        _insertar_rutas(bd_memoria)
+        cliente = app.test_client()
+        with cliente.session_transaction() as sesion:
+            sesion["usuario"] = "ana"
+        ruta = cliente.get("/ruta/estado").get_json()["ruta"]
+
+        biologia = bd_memoria["rutas_aprendizaje"].find_one({"nombre_ruta": "Biología"})
+        assert ruta == {
+            "id": str(biologia["_id"]),
+            "metadatos": {"niveles_incluidos": ["Recordar"]},
+            "niveles": {"Recordar": {"flashcards": 1, "examenes": 0}},
+        }
+
+    def test_examen_completado_sin_preguntas(self, bd_memoria, tmp_path):
+        """Con el examen completado solo se envía su estado, junto al perfil ZDP."""
+        bd_memoria["examen_inicial"].insert_one({"usuario": "ana", "estado": "COMPLETADO", "contenido": EXAMEN})
+        EvaluadorZDP().evaluar_examen("ana", [{"pregunta_id": 1, "respuesta": "a"}, {"pregunta_id": 2, "respuesta": "b"}], EXAMEN)
+
+        datos = obtener_datos_dashboard("ana", bd_memoria, str(tmp_path))
+
+        assert not datos["estado"]["examen_pendiente"] and datos["estado"]["examen_generado"]
+        assert "contenido" not in datos["examen_inicial"]
+        assert datos["perfil_zdp"]["nivel_actual"] == "Recordar"
+        assert datos["perfil_zdp"]["niveles_competentes"] == ["Recordar"]
+        assert datos["estado"]["perfil_zdp"]["competencias"]["Recordar"]["competente"]
+
+    def test_usuario_nuevo(self, bd_memoria, tmp_path):
+        """Sin ruta ni examen el dashboard recibe valores vacíos."""
+        datos = obtener_datos_dashboard("nadie", bd_memoria, str(tmp_path))
+        assert datos["rutas"] == [] and datos["examen_inicial"] is None
+        assert datos["estado"]["examen_pendiente"] and not datos["estado"]["examen_generado"]
+        assert datos["perfil_zdp"]["nivel_actual"] is None
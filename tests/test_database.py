@@ -4,7 +4,8 @@ Tests para src/database.py: singleton de conexión MongoDB.
 
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from src.database import DatabaseConnection, get_database, get_mongo_client
+from pymongo.errors import OperationFailure
+from src.database import DatabaseConnection, LazyDatabase, get_database, get_mongo_client, get_async_client, ensure_ttl_index
 
 
 class TestDatabaseConnection:
@@ -52,3 +53,81 @@ class TestDatabaseConnectionPooling:
             conn = DatabaseConnection()
             assert hasattr(conn, '_health_check')
             assert callable(conn._health_check)
+
+
+class TestConexionPorProceso:
+    """Tests de la conexión perezosa y segura ante fork."""
+
+    def test_cliente_heredado_se_descarta(self):
+        """Un cliente creado por otro proceso (antes del fork) se reemplaza por uno propio."""
+        with patch('src.database.MongoClient') as mock_client:
+            conn = DatabaseConnection()
+            heredado = MagicMock()
+            conn._client, conn._pid = heredado, -1  # Simula un cliente creado por el proceso maestro
+
+            DatabaseConnection()
+
+            assert conn._client is mock_client.return_value
+            heredado.close.assert_not_called()
+
+    def test_primer_uso_concurrente_crea_un_solo_cliente(self, monkeypatch):
+        """Varios hilos que abren la conexión a la vez comparten un único MongoClient."""
+        import time
+        import threading
+
+        conn = DatabaseConnection()
+        monkeypatch.setattr(conn, "_client", None)
+        monkeypatch.setattr(conn, "_pid", None)
+        monkeypatch.setattr(DatabaseConnection, "_client", None)
+
+        with patch('src.database.MongoClient', side_effect=lambda **_: time.sleep(0.05) or MagicMock()) as mock_client:
+            hilos = [threading.Thread(target=DatabaseConnection) for _ in range(8)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+
+        assert mock_client.call_count == 1
+
+    def test_lazy_database_usa_el_cliente_actual(self, bd_memoria):
+        """LazyDatabase resuelve la base del cliente instalado en cada acceso."""
+        db = LazyDatabase()
+        db["rutas_aprendizaje"].insert_one({"usuario": "ana"})
+        assert bd_memoria["rutas_aprendizaje"].count_documents({"usuario": "ana"}) == 1
+
+    def test_cliente_asincrono_por_proceso(self, bd_memoria, monkeypatch):
+        """El AsyncMongoClient heredado de otro proceso se reemplaza; el propio se reutiliza."""
+        heredado = MagicMock()
+        monkeypatch.setattr(DatabaseConnection, "_async_client", heredado)
+        monkeypatch.setattr(DatabaseConnection, "_async_pid", -1)
+
+        with patch('pymongo.AsyncMongoClient') as mock_async:
+            cliente = get_async_client()
+            assert cliente is mock_async.return_value and get_async_client() is cliente
+            assert mock_async.call_count == 1
+
+
+class TestIndiceTTL:
+    """Tests de ensure_ttl_index (crear el índice TTL o ajustar su plazo)."""
+
+    def test_conflicto_de_opciones_usa_collmod(self):
+        """Si el índice existe con otro plazo (código 85) se ajusta con collMod."""
+        coleccion = MagicMock()
+        coleccion.name = "sesiones_chat"
+        coleccion.create_index.side_effect = OperationFailure("IndexOptionsConflict", code=85)
+
+        ensure_ttl_index(coleccion, "fecha_actualizacion", 3600, "ttl_sesiones")
+
+        coleccion.database.command.assert_called_once_with(
+            "collMod", "sesiones_chat", index={"name": "ttl_sesiones", "expireAfterSeconds": 3600}
+        )
+
+    def test_otros_errores_se_propagan(self):
+        """Un error distinto (p. ej. sin privilegios) no se convierte en collMod."""
+        coleccion = MagicMock()
+        coleccion.create_index.side_effect = OperationFailure("not authorized", code=13)
+
+        with pytest.raises(OperationFailure) as error:
+            ensure_ttl_index(coleccion, "fecha_creacion", 60, "ttl_respuestas")
+        assert error.value.code == 13
+        coleccion.database.command.assert_not_called()
@@ -0,0 +1,148 @@
+"""
+Tests para src/models/diagnostico_adaptativo.py: diagnóstico adaptativo 2PL/EAP.
+"""
+
+import pytest
+from src.models.evaluacion_zdp import JERARQUIA_BLOOM, obtener_resumen_perfil
+from src.models.diagnostico_adaptativo import (
+    MAX_PREGUNTAS,
+    posterior,
+    estimar,
+    parametros_item,
+    seleccionar_siguiente,
+    indice_nivel,
+    iniciar_diagnostico,
+    responder_diagnostico,
+)
+
+
+def _examen(por_nivel=5):
+    """Banco con `por_nivel` preguntas de cada nivel Bloom (respuesta correcta "a")."""
+    preguntas = [
+        {
+            "id": i * 10 + j,
+            "pregunta": f"{nivel} {j}",
+            "opciones": ["a) x", "b) y"],
+            "respuesta_correcta": "a",
+            "nivel_bloom_evaluado": nivel,
+        }
+        for i, nivel in enumerate(JERARQUIA_BLOOM)
+        for j in range(por_nivel)
+    ]
+    return {"EXAMENES": {"EXAMEN_INICIAL": preguntas}}
+
+
+def _simular(db, usuario, nivel_dominado):
+    """Estudiante que acierta hasta `nivel_dominado` (índice) y falla el resto."""
+    respuesta = iniciar_diagnostico(db, usuario, _examen())
+    respondidas = 0
+    while True:
+        pregunta = respuesta["pregunta"]
+        assert "respuesta_correcta" not in pregunta
+        respondidas += 1
+        acierta = JERARQUIA_BLOOM.index(pregunta["nivel_bloom_evaluado"]) <= nivel_dominado
+        respuesta = responder_diagnostico(db, usuario, pregunta["id"], "a" if acierta else "b")
+        if respuesta.get("completado"):
+            return respuesta["resultado"], respondidas
+
+
+class TestModelo2PL:
+    """Tests del modelo de respuesta y la selección de ítems."""
+
+    def test_posterior_se_mueve_con_las_respuestas(self):
+        """Aciertos suben la estimación y fallos la bajan."""
+        item = parametros_item({"nivel_bloom_evaluado": "Aplicar"})
+        theta_bien, _ = estimar(posterior([(*item, True)] * 3))
+        theta_mal, _ = estimar(posterior([(*item, False)] * 3))
+        assert theta_bien > 0 > theta_mal
+
+    def test_parametros_calibrados_tienen_prioridad(self):
+        """irt_a/irt_b reemplazan los valores por nivel."""
+        assert parametros_item({"nivel_bloom_evaluado": "Crear", "irt_a": 0.8, "irt_b": -1}) == (0.8, -1.0)
+
+    def test_selecciona_el_item_mas_informativo(self):
+        """En θ alto se elige una pregunta difícil y en θ bajo una fácil."""
+        pool = _examen(1)["EXAMENES"]["EXAMEN_INICIAL"]
+        assert seleccionar_siguiente(pool, set(), 1.6)["nivel_bloom_evaluado"] == "Evaluar"
+        assert seleccionar_siguiente(pool, set(), -1.6)["nivel_bloom_evaluado"] == "Comprender"
+        assert seleccionar_siguiente(pool, {p["id"] for p in pool}, 0.0) is None
+
+    def test_nivel_sin_competencias(self):
+        """Una habilidad muy baja no es competente en ningún nivel."""
+        assert indice_nivel(-4.0) == -1
+
+
+class TestSesionAdaptativa:
+    """Tests del flujo pregunta a pregunta."""
+
+    @pytest.mark.parametrize("nivel", range(len(JERARQUIA_BLOOM)))
+    def test_converge_al_nivel_con_menos_preguntas(self, bd_memoria, nivel):
+        """Identifica el nivel dominado sin agotar el banco de 30 preguntas."""
+        resultado, respondidas = _simular(bd_memoria, "ana", nivel)
+        assert resultado["nivel_actual"] == JERARQUIA_BLOOM[nivel]
+        assert respondidas <= MAX_PREGUNTAS
+
+    def test_resultado_se_guarda_en_el_perfil(self, bd_memoria):
+        """El resultado final actualiza el perfil y el historial como evaluar_examen."""
+        resultado, _ = _simular(bd_memoria, "luis", 2)
+        perfil = obtener_resumen_perfil("luis")
+        assert perfil["nivel_actual"] == "Aplicar"
+        assert perfil["zona_proxima"] == ["Analizar", "Evaluar"]
+        evaluacion = bd_memoria["evaluaciones_estudiante"].find_one({"usuario": "luis"})
+        assert evaluacion["modo"] == "adaptativo"
+        detalle = bd_memoria["evaluaciones_detalle"].find_one({"_id": evaluacion["_id"]})
+        assert len(detalle["preguntas"]) == len(resultado["respuestas_procesadas"])
+
+    def test_rechaza_respuestas_fuera_de_turno(self, bd_memoria):
+        """Solo se acepta la respuesta a la pregunta actual, una vez."""
+        primera = iniciar_diagnostico(bd_memoria, "eva", _examen())["pregunta"]
+        otra = primera["id"] + 1
+        assert responder_diagnostico(bd_memoria, "eva", otra, "a")["status"] == 409
+        assert not responder_diagnostico(bd_memoria, "eva", primera["id"], "a").get("error")
+        assert responder_diagnostico(bd_memoria, "eva", primera["id"], "a")["status"] == 409
+
+    def test_sin_sesion(self, bd_memoria):
+        """Responder sin iniciar retorna 404."""
+        assert responder_diagnostico(bd_memoria, "nadie", 1, "a")["status"] == 404
+
+    def test_retoma_la_sesion_en_curso(self, bd_memoria):
+        """Volver a iniciar con el mismo examen retoma la pregunta pendiente; un examen nuevo reinicia."""
+        primera = iniciar_diagnostico(bd_memoria, "eva", _examen(), version=1)["pregunta"]
+        segunda = responder_diagnostico(bd_memoria, "eva", primera["id"], "a")["pregunta"]
+
+        retomada = iniciar_diagnostico(bd_memoria, "eva", _examen(), version=1)
+        assert retomada["numero"] == 2 and retomada["pregunta"]["id"] == segunda["id"]
+        assert iniciar_diagnostico(bd_memoria, "eva", _examen(), version=2)["numero"] == 1
+
+
+class TestRutasAdaptativas:
+    """Tests de los endpoints /examen-inicial/adaptativo/*."""
+
+    @pytest.fixture
+    def cliente(self, bd_memoria):
+        from src.app import app
+
+        cliente = app.test_client()
+        with cliente.session_transaction() as sesion:
+            sesion["usuario"] = "ana"
+        return cliente
+
+    def test_examen_completado_409(self, cliente, bd_memoria):
+        """Con el examen inicial completado no se abre otra sesión adaptativa."""
+        bd_memoria["examen_inicial"].insert_one({"usuario": "ana", "estado": "COMPLETADO", "contenido": _examen()})
+        respuesta = cliente.post("/examen-inicial/adaptativo/iniciar")
+        assert respuesta.status_code == 409
+        assert bd_memoria["diagnostico_adaptativo"].count_documents({}) == 0
+
+    def test_flujo_completo(self, cliente, bd_memoria):
+        """El diagnóstico termina marcando el examen inicial como completado."""
+        bd_memoria["examen_inicial"].insert_one({"usuario": "ana", "estado": "PENDIENTE", "contenido": _examen()})
+        datos = cliente.post("/examen-inicial/adaptativo/iniciar").get_json()
+        while True:
+            datos = cliente.post(
+                "/examen-inicial/adaptativo/responder", json={"pregunta_id": datos["pregunta"]["id"], "respuesta": "a"}
+            ).get_json()
+            if datos["completado"]:
+                break
+        assert bd_memoria["examen_inicial"].find_one({"usuario": "ana"})["estado"] == "COMPLETADO"
+        assert cliente.post("/examen-inicial/adaptativo/iniciar").status_code == 409
@@ -0,0 +1,115 @@
+"""
+Tests para la evaluación de exámenes iniciales en lote (aula completa).
+"""
+
+from src.models.evaluacion_zdp import EvaluadorZDP, obtener_resumen_perfil
+from src.models.analitica_cohortes import GLOBAL, obtener_analitica, reconstruir_analitica
+from src.web_utils import evaluar_examenes_iniciales_lote
+from benchmarks.benchmark_lote_examenes import examen_sintetico, hojas_de_respuesta, ejecutar_benchmark
+
+
+def _sin_volatiles(resultado):
+    return {k: v for k, v in resultado.items() if k not in ("_id", "evaluacion_id", "fecha_evaluacion")}
+
+
+def _sin_fecha(analitica):
+    return {k: v for k, v in analitica.items() if k != "fecha_actualizacion"}
+
+
+def _preparar(db, hojas):
+    examen = examen_sintetico()
+    for hoja in hojas:
+        db["examen_inicial"].insert_one({"usuario": hoja["usuario"], "estado": "PENDIENTE", "contenido": examen})
+        db["rutas_aprendizaje"].insert_one({"usuario": hoja["usuario"], "metadatos_ruta": {}})
+    return examen
+
+
+class TestEvaluarLote:
+    """Tests de EvaluadorZDP.evaluar_lote."""
+
+    def test_mismo_resultado_que_uno_por_uno(self, bd_memoria):
+        """La puntuación en lote coincide con evaluar_examen para cada estudiante."""
+        examen = examen_sintetico()
+        hojas = hojas_de_respuesta(8)
+        evaluador = EvaluadorZDP()
+
+        lote = evaluador.evaluar_lote([{**h, "examen": examen} for h in hojas])
+        individuales = [evaluador.calcular_resultado(h["usuario"], h["respuestas"], examen) for h in hojas]
+
+        assert [_sin_volatiles(r) for r in lote] == [_sin_volatiles(r) for r in individuales]
+        for hoja, resultado in zip(hojas, lote):
+            assert obtener_resumen_perfil(hoja["usuario"])["nivel_actual"] == resultado["nivel_actual"]
+
+    def test_operaciones_constantes(self, bd_memoria):
+        """Guardar 30 evaluaciones no escala el número de operaciones de BD."""
+        examen = examen_sintetico()
+        cliente = bd_memoria.client
+        cliente.reiniciar_estadisticas()
+
+        EvaluadorZDP().evaluar_lote([{**h, "examen": examen} for h in hojas_de_respuesta(30)])
+
+        stats = cliente.estadisticas()
+        assert stats["evaluaciones_estudiante.insert_many"] == 1
+        assert stats["usuario_perfil.bulk_write"] == 1
+        assert stats["total"] <= 5
+
+    def test_analitica_igual_a_reconstruir(self, bd_memoria):
+        """Los incrementos agrupados por cohorte equivalen a recalcular desde cero,
+        incluso con un estudiante repetido en el lote."""
+        examen = examen_sintetico()
+        bd_memoria["usuario_perfil"].insert_one({"usuario": "alumno_1", "cohorte": "2025-I"})
+        hojas = hojas_de_respuesta(10)
+        evaluador = EvaluadorZDP()
+        evaluador.evaluar_lote([{**h, "examen": examen} for h in hojas[:4]])
+        evaluador.evaluar_lote([{**h, "examen": examen} for h in hojas + [dict(hojas[0], respuestas=hojas[5]["respuestas"])]])
+
+        incremental = obtener_analitica(bd_memoria, GLOBAL)
+        reconstruir_analitica(bd_memoria)
+        completo = obtener_analitica(bd_memoria, GLOBAL)
+        assert _sin_fecha(incremental) == _sin_fecha(completo)
+        assert incremental["estudiantes"] == 10
+
+
+class TestLoteExamenesIniciales:
+    """Tests de evaluar_examenes_iniciales_lote (endpoint de docentes)."""
+
+    def test_resultados_por_estudiante_y_errores_aislados(self, bd_memoria):
+        """Cada entrega tiene su estado; una inválida no impide evaluar las demás."""
+        hojas = hojas_de_respuesta(3)
+        _preparar(bd_memoria, hojas)
+        entregas = hojas + [
+            {"usuario": "sin_examen", "respuestas": hojas[0]["respuestas"]},
+            {"usuario": "alumno_1", "respuestas": []},
+        ]
+
+        salida = evaluar_examenes_iniciales_lote(bd_memoria, entregas)
+
+        estados = [(r["usuario"], r["estado"], r["status"]) for r in salida["resultados"]]
+        assert estados[:3] == [(h["usuario"], "OK", 200) for h in hojas]
+        assert estados[3:] == [("sin_examen", "ERROR", 404), ("alumno_1", "ERROR", 400)]
+        assert salida["resumen"] == {"total": 5, "evaluados": 3, "errores": 2}
+        assert isinstance(salida["resultados"][0]["resultado"]["evaluacion_id"], str)
+
+    def test_marca_examenes_y_rutas(self, bd_memoria):
+        """Los exámenes quedan completados y las rutas con la metadata ZDP."""
+        hojas = hojas_de_respuesta(4)
+        _preparar(bd_memoria, hojas)
+        salida = evaluar_examenes_iniciales_lote(bd_memoria, hojas)
+
+        assert bd_memoria["examen_inicial"].count_documents({"estado": "COMPLETADO"}) == 4
+        for r in salida["resultados"]:
+            ruta = bd_memoria["rutas_aprendizaje"].find_one({"usuario": r["usuario"]})
+            assert ruta["metadatos_ruta"]["personalizada_zdp"] is True
+            assert ruta["metadatos_ruta"]["zona_proxima"] == r["resultado"]["zona_proxima"]
+
+
+class TestBenchmarkLote:
+    """Smoke test del benchmark individual vs. lote."""
+
+    def test_lote_usa_menos_operaciones(self, bd_memoria):
+        """Ambos modos dan los mismos niveles y el lote usa muchas menos operaciones."""
+        resultado = ejecutar_benchmark(estudiantes=12)
+        modos = resultado["modos"]
+        assert resultado["resultados_iguales"]
+        assert modos["lote"]["evaluaciones"] == modos["individual"]["evaluaciones"] == 12
+        assert modos["lote"]["operaciones_bd"] * 5 < modos["individual"]["operaciones_bd"]
@@ -0,0 +1,96 @@
+"""
+Tests para src/models/historial_evaluaciones.py: resumen time-series y detalle compacto.
+"""
+
+import datetime
+from bson import ObjectId
+from src.models.evaluacion_zdp import EvaluadorZDP
+from src.models.reevaluacion_cohorte import reevaluar_cohorte
+from src.models.historial_evaluaciones import (
+    COL_RESUMEN,
+    COL_DETALLE,
+    COL_LEGADO,
+    asegurar_colecciones,
+    compactar_respuestas,
+    expandir_detalle,
+    obtener_detalle,
+    compactar_historial,
+    migrar_historial,
+)
+
+EXAMEN = {
+    "EXAMENES": {
+        "EXAMEN_INICIAL": [
+            {"id": 1, "pregunta": "Enunciado largo de Recordar", "respuesta_correcta": "a", "nivel_bloom_evaluado": "Recordar"},
+            {"id": 2, "pregunta": "Enunciado largo de Aplicar", "respuesta_correcta": "b", "nivel_bloom_evaluado": "Aplicar"},
+        ]
+    }
+}
+RESPUESTAS = [{"pregunta_id": 1, "respuesta": "a", "tiempo_seg": 12}, {"pregunta_id": 2, "respuesta": "c"}]
+
+
+class TestFormatoCompacto:
+    """Tests de los arreglos paralelos del detalle."""
+
+    def test_ida_y_vuelta_sin_enunciados(self, bd_memoria):
+        """Compactar y expandir conserva todo salvo el texto de la pregunta."""
+        resultado = EvaluadorZDP().calcular_resultado("ana", RESPUESTAS, EXAMEN)
+        detalle = compactar_respuestas(resultado["respuestas_procesadas"])
+
+        assert detalle["preguntas"] == [1, 2] and detalle["niveles"] == [0, 2]
+        assert "banco_ids" not in detalle
+        esperado = [{k: v for k, v in r.items() if k != "pregunta"} for r in resultado["respuestas_procesadas"]]
+        assert expandir_detalle(detalle) == esperado
+
+    def test_evaluacion_guarda_resumen_y_detalle(self, bd_memoria):
+        """evaluar_examen escribe un resumen sin respuestas y un detalle con el mismo _id."""
+        resultado = EvaluadorZDP().evaluar_examen("ana", RESPUESTAS, EXAMEN)
+
+        resumen = bd_memoria[COL_RESUMEN].find_one({"usuario": "ana"})
+        assert "respuestas_procesadas" not in resumen and "recomendaciones" not in resumen
+        assert resumen["nivel_actual"] == resultado["nivel_actual"]
+        assert str(resumen["_id"]) == resultado["evaluacion_id"]
+        detalle = obtener_detalle(bd_memoria, resultado["evaluacion_id"])
+        assert [r["es_correcto"] for r in detalle] == [True, False]
+        assert "Enunciado" not in str(bd_memoria[COL_DETALLE].find_one({}))
+
+
+class TestRetencion:
+    """Tests de colecciones, expiración del detalle y migración."""
+
+    def test_asegurar_crea_timeseries(self, bd_memoria):
+        """La colección de resúmenes se crea como time-series."""
+        assert asegurar_colecciones(bd_memoria)
+        info = next(bd_memoria.list_collections(filter={"name": COL_RESUMEN}))
+        assert info["options"]["timeseries"]["metaField"] == "usuario"
+
+    def test_compactar_elimina_detalle_antiguo(self, bd_memoria):
+        """El detalle vencido se elimina; el resumen se conserva y no se re-puntúa."""
+        evaluador = EvaluadorZDP()
+        evaluador.evaluar_examen("ana", RESPUESTAS, EXAMEN)
+        evaluador.evaluar_examen("luis", RESPUESTAS, EXAMEN)
+        bd_memoria[COL_DETALLE].update_one(
+            {"usuario": "ana"}, {"$set": {"fecha_evaluacion": datetime.datetime.utcnow() - datetime.timedelta(days=400)}}
+        )
+
+        assert compactar_historial(bd_memoria, dias=180)["detalles_eliminados"] == 1
+        assert bd_memoria[COL_RESUMEN].count_documents({}) == 2
+        resumen = reevaluar_cohorte(bd_memoria, umbral=50)
+        assert resumen["evaluaciones"] == 1 and resumen["sin_detalle"] == 1
+
+    def test_migrar_formato_anterior(self, bd_memoria):
+        """Los documentos completos pasan a resumen + detalle conservando su _id."""
+        ahora = datetime.datetime.utcnow()
+        resultado = EvaluadorZDP().calcular_resultado("ana", RESPUESTAS, EXAMEN)
+        reciente = {**resultado, "_id": ObjectId()}
+        antiguo = {**resultado, "_id": ObjectId(), "fecha_evaluacion": ahora - datetime.timedelta(days=365)}
+        bd_memoria[COL_RESUMEN].insert_many([reciente, antiguo])
+
+        informe = migrar_historial(bd_memoria, dias=180)
+
+        assert informe["migradas"] == 2 and informe["detalles"] == 1
+        assert COL_LEGADO not in bd_memoria.list_collection_names()
+        assert next(bd_memoria.list_collections(filter={"name": COL_RESUMEN}))["type"] == "timeseries"
+        assert "respuestas_procesadas" not in bd_memoria[COL_RESUMEN].find_one({"_id": reciente["_id"]})
+        assert obtener_detalle(bd_memoria, reciente["_id"])[0]["pregunta_id"] == 1
+        assert obtener_detalle(bd_memoria, antiguo["_id"]) is None
@@ -0,0 +1,120 @@
+"""
+Tests para src/models/indice_tutor.py: recuperación BM25 de fragmentos para el tutor.
+"""
+
+import pytest
+from src.models.chatbot_tutor import TutorVirtual, invalidar_contexto_tutor
+from src.models.modelo_falso import ChatFalso
+from src.models.indice_tutor import (
+    COL_INDICE,
+    buscar_pasajes,
+    fragmentos_ruta,
+    indexar_material,
+    indexar_ruta,
+)
+
+UNIDADES = [
+    {"indice": 1, "tipo_unidad": "pagina", "contenido_texto": "La mitocondria produce energía para la célula mediante respiración."},
+    {"indice": 2, "tipo_unidad": "pagina", "contenido_texto": "La fotosíntesis ocurre en los cloroplastos de las plantas."},
+    {"indice": 3, "tipo_unidad": "pagina", "contenido_texto": "El núcleo guarda el material genético de la célula."},
+]
+RUTA = {
+    "usuario": "ana",
+    "nombre_ruta": "Biología",
+    "estructura_ruta": {
+        "flashcards": {"Recordar": [{"frente": "Ribosoma", "reverso": "Sintetiza proteínas"}]},
+        "examenes": {"Comprender": [{"pregunta": "¿Dónde ocurre la fotosíntesis?", "opciones": ["a) Núcleo", "b) Cloroplasto"], "respuesta_correcta": "b"}]},
+    },
+}
+
+
+def _estadisticas(db, usuario="ana"):
+    return db[COL_INDICE].find_one({"_id": f"estadisticas:{usuario}"})
+
+
+class TestIndexacion:
+    """Tests de la construcción incremental del índice."""
+
+    def test_reindexar_reemplaza_la_fuente(self, bd_memoria):
+        """Volver a ingerir un archivo reemplaza sus fragmentos y mantiene las estadísticas."""
+        indexar_material(bd_memoria, "ana", "bio.pdf", UNIDADES)
+        indexar_material(bd_memoria, "ana", "bio.pdf", UNIDADES[:1])
+        indexar_ruta(bd_memoria, "ana", RUTA)
+
+        fragmentos = list(bd_memoria[COL_INDICE].find({"usuario": "ana", "fuente": {"$exists": True}}))
+        assert len(fragmentos) == 3
+        estadisticas = _estadisticas(bd_memoria)
+        assert estadisticas["n_fragmentos"] == 3
+        assert estadisticas["longitud_total"] == sum(f["longitud"] for f in fragmentos)
+
+    def test_fragmentos_de_ruta(self):
+        """Las preguntas de test se indexan con el texto de la opción correcta."""
+        textos = [p["texto"] for p in fragmentos_ruta(RUTA)]
+        assert "Ribosoma: Sintetiza proteínas" in textos
+        assert "¿Dónde ocurre la fotosíntesis? Respuesta: Cloroplasto" in textos
+
+
+class TestBusqueda:
+    """Tests de buscar_pasajes."""
+
+    def test_fragmento_relevante_primero(self, bd_memoria):
+        """La pregunta recupera el fragmento que trata el tema, sin tildes ni plurales."""
+        bd_memoria["materiales_crudos"].insert_one(
+            {"usuario_propietario": "ana", "nombre_archivo": "bio.pdf", "unidades_contenido": UNIDADES}
+        )
+        pasajes = buscar_pasajes(bd_memoria, "ana", "¿qué hacen las mitocondrias?", k=2)
+        assert pasajes[0]["etiqueta"] == "bio.pdf · pagina 1"
+        assert all("fotosíntesis" not in p["texto"] for p in pasajes)
+
+    def test_reconstruye_material_anterior(self, bd_memoria):
+        """El material ingerido antes del índice se indexa en la primera búsqueda."""
+        bd_memoria["materiales_crudos"].insert_one(
+            {"usuario_propietario": "ana", "nombre_archivo": "bio.pdf", "unidades_contenido": UNIDADES}
+        )
+        bd_memoria["rutas_aprendizaje"].insert_one(RUTA)
+        indexar_material(bd_memoria, "ana", "nuevo.pdf", [{"contenido_texto": "Tema sin relación"}])
+
+        assert buscar_pasajes(bd_memoria, "ana", "ribosoma")[0]["tipo"] == "flashcard"
+        assert _estadisticas(bd_memoria)["completo"]
+        assert buscar_pasajes(bd_memoria, "ana", "núcleo")
+
+    def test_sin_terminos_utiles(self, bd_memoria):
+        """Una consulta solo con stopwords no consulta el índice."""
+        assert buscar_pasajes(bd_memoria, "ana", "¿y eso que es?") == []
+
+    def test_usuarios_aislados(self, bd_memoria):
+        """Solo se recuperan fragmentos del propio usuario."""
+        indexar_material(bd_memoria, "luis", "bio.pdf", UNIDADES)
+        assert buscar_pasajes(bd_memoria, "ana", "mitocondria") == []
+
+
+class TestTutorConRecuperacion:
+    """El tutor envía solo los fragmentos relevantes a cada pregunta."""
+
+    @pytest.fixture
+    def mensajes_enviados(self, monkeypatch):
+        enviados = []
+        original = ChatFalso.send_message
+
+        def send_message(self, mensaje, **kwargs):
+            enviados.append(mensaje)
+            return original(self, mensaje, **kwargs)
+
+        monkeypatch.setattr(ChatFalso, "send_message", send_message)
+        return enviados
+
+    def test_mensaje_con_pasajes(self, bd_memoria, backend_falso, mensajes_enviados):
+        """El mensaje lleva el fragmento recuperado y no el resto del material."""
+        invalidar_contexto_tutor()
+        ruta_id = str(bd_memoria["rutas_aprendizaje"].insert_one(dict(RUTA)).inserted_id)
+        indexar_material(bd_memoria, "ana", "bio.pdf", UNIDADES)
+        indexar_ruta(bd_memoria, "ana")
+
+        tutor = TutorVirtual(ruta_id, "ana")
+        assert tutor.conversar("Explícame la fotosíntesis")["exito"]
+
+        enviado = mensajes_enviados[-1]
+        assert "cloroplastos" in enviado and "mitocondria" not in enviado
+        assert "Explícame la fotosíntesis" in enviado
+        assert "mitocondria" not in tutor._prompt_base()
+        invalidar_contexto_tutor()
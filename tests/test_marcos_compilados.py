@@ -0,0 +1,97 @@
+"""
+Tests para src/data/marcos_compilados.py: compilación y carga del artefacto de marcos.
+"""
+
+import os
+import json
+import shutil
+import pytest
+from pathlib import Path
+from src.data import marcos_compilados
+from src.data.marcos_compilados import (
+    compilar_marcos,
+    obtener_marcos_compilados,
+    limpiar_cache_marcos,
+    NOMBRE_ARTEFACTO,
+    VERSION_ARTEFACTO,
+)
+
+PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+
+
+@pytest.fixture
+def dir_marcos(tmp_path):
+    """Copia los CSV reales a un directorio temporal."""
+    for nombre in ("df_bloom.csv", "df_zdp.csv", "df_flow.csv"):
+        shutil.copy(PROCESSED / nombre, tmp_path / nombre)
+    limpiar_cache_marcos()
+    yield tmp_path
+    limpiar_cache_marcos()
+
+
+class TestCompilarMarcos:
+    """Tests para el paso de compilación."""
+
+    def test_compilar_escribe_artefacto_versionado(self, dir_marcos):
+        """Debe escribir un JSON con versión y firma de fuentes."""
+        compilar_marcos(dir_marcos)
+        artefacto = json.loads((dir_marcos / NOMBRE_ARTEFACTO).read_text(encoding="utf-8"))
+        assert artefacto["version"] == VERSION_ARTEFACTO
+        assert set(artefacto["fuentes"]) == {"df_bloom.csv", "df_zdp.csv", "df_flow.csv"}
+
+    def test_contexto_por_nivel_renderizado(self, dir_marcos):
+        """Cada nivel Bloom debe tener su contexto ya renderizado."""
+        artefacto = compilar_marcos(dir_marcos, ruta_artefacto=False)
+        contexto = artefacto["contexto_por_nivel"]["Recordar"]
+        assert "TAXONOMÍA DE BLOOM - Recordar" in contexto
+        assert "Recuperar el conocimiento relevante" in contexto
+        assert "nan" not in contexto
+
+    def test_contexto_examen_incluye_tres_marcos(self, dir_marcos):
+        """El contexto del examen debe incluir Bloom, ZDP y Flow."""
+        contexto = compilar_marcos(dir_marcos, ruta_artefacto=False)["contexto_examen"]
+        assert "TAXONOMÍA DE BLOOM" in contexto
+        assert "ZONA DE DESARROLLO PRÓXIMO" in contexto
+        assert "TEORÍA DEL FLOW" in contexto
+
+    def test_csv_ausente_no_falla(self, tmp_path):
+        """Sin CSV debe generar contextos vacíos por nivel."""
+        artefacto = compilar_marcos(tmp_path, ruta_artefacto=False)
+        assert artefacto["contexto_por_nivel"]["Crear"] == ""
+
+
+class TestObtenerMarcosCompilados:
+    """Tests para la carga en memoria e invalidación por mtime."""
+
+    def test_carga_una_sola_vez(self, dir_marcos, monkeypatch):
+        """Llamadas sucesivas no deben recompilar."""
+        llamadas = []
+        original = marcos_compilados._leer_csv_marcos
+
+        def contar(d):
+            llamadas.append(d)
+            return original(d)
+
+        monkeypatch.setattr(marcos_compilados, "_leer_csv_marcos", contar)
+        primero = obtener_marcos_compilados(dir_marcos)
+        segundo = obtener_marcos_compilados(dir_marcos)
+        assert primero is segundo
+        assert len(llamadas) == 1
+
+    def test_reutiliza_artefacto_en_disco(self, dir_marcos, monkeypatch):
+        """Un artefacto vigente en disco se carga sin leer los CSV."""
+        compilar_marcos(dir_marcos)
+        limpiar_cache_marcos()
+        monkeypatch.setattr(marcos_compilados, "_leer_csv_marcos", lambda d: pytest.fail("no debe recompilar"))
+        marcos = obtener_marcos_compilados(dir_marcos)
+        assert marcos["contexto_por_nivel"]["Recordar"]
+
+    def test_invalida_al_cambiar_mtime(self, dir_marcos):
+        """Si un CSV cambia, el artefacto se recompila."""
+        primero = obtener_marcos_compilados(dir_marcos)
+        csv = dir_marcos / "df_bloom.csv"
+        st = os.stat(csv)
+        os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        segundo = obtener_marcos_compilados(dir_marcos)
+        assert segundo is not primero
+        assert segundo["fuentes"]["df_bloom.csv"][0] == st.st_mtime_ns + 10**9
@@ -0,0 +1,169 @@
+"""
+Tests para src/metricas.py: middleware por petición, CommandListener, tiempo del modelo y /metrics.
+"""
+
+import logging
+import pytest
+from flask import Flask
+from src import metricas
+from src.config import ModeloPerezoso
+from src.metricas import (
+    RegistroMetricas,
+    MiddlewareMetricas,
+    registro,
+    iniciar_medicion,
+    finalizar_medicion,
+    registrar_escucha_mongo,
+    instalar_metricas,
+    LIMITES_SEGUNDOS,
+)
+
+
+@pytest.fixture(autouse=True)
+def registro_limpio():
+    registro.reiniciar()
+    yield
+    registro.reiniciar()
+
+
+@pytest.fixture
+def cliente(bd_memoria):
+    """App mínima con las métricas instaladas: una ruta lee MongoDB y otra responde en streaming."""
+    app = Flask(__name__)
+    instalar_metricas(app)
+
+    @app.route("/rutas/<usuario>")
+    def rutas(usuario):
+        return {"rutas": [r["nombre_ruta"] for r in bd_memoria["rutas_aprendizaje"].find({"usuario": usuario})]}
+
+    @app.route("/stream")
+    def stream():
+        return app.response_class((f"parte {i}\n" for i in range(3)), mimetype="text/plain")
+
+    bd_memoria["rutas_aprendizaje"].insert_one({"usuario": "ana", "nombre_ruta": "Biología"})
+    return app.test_client()
+
+
+def _serie(nombre, **etiquetas):
+    return registro.valor(nombre, tuple(etiquetas.items()))
+
+
+class TestExposicion:
+    """Tests del formato de texto de Prometheus."""
+
+    def test_histograma_acumulado(self):
+        """Las cubetas son acumulativas y terminan en +Inf con el total, la suma y el conteo."""
+        propio = RegistroMetricas()
+        for valor in (0.003, 0.2, 0.2, 500):
+            propio.observar("rutealo_http_duracion_segundos", (("endpoint", "/x"),), valor)
+        texto = propio.exponer()
+
+        assert "# TYPE rutealo_http_duracion_segundos histogram" in texto
+        assert 'rutealo_http_duracion_segundos_bucket{endpoint="/x",le="0.005"} 1' in texto
+        assert 'rutealo_http_duracion_segundos_bucket{endpoint="/x",le="0.25"} 3' in texto
+        assert f'rutealo_http_duracion_segundos_bucket{{endpoint="/x",le="{LIMITES_SEGUNDOS[-1]}"}} 3' in texto
+        assert 'rutealo_http_duracion_segundos_bucket{endpoint="/x",le="+Inf"} 4' in texto
+        assert 'rutealo_http_duracion_segundos_count{endpoint="/x"} 4' in texto
+
+    def test_escapa_etiquetas(self):
+        """Comillas, barras y saltos de línea en las etiquetas se escapan."""
+        propio = RegistroMetricas()
+        propio.contar("rutealo_mongo_comandos_total", (("comando", 'a"b\\c\nd'),))
+        assert 'rutealo_mongo_comandos_total{comando="a\\"b\\\\c\\nd"} 1' in propio.exponer()
+
+
+class TestMiddleware:
+    """Tests de la medición por petición."""
+
+    def test_endpoint_mongo_y_bytes(self, cliente):
+        """Cada petición queda con su regla, su estado, sus comandos de MongoDB y sus bytes."""
+        registrar_escucha_mongo()
+        cuerpo = cliente.get("/rutas/ana").get_data()
+        cliente.get("/rutas/beto").get_data()
+
+        etiquetas = {"endpoint": "/rutas/<usuario>", "metodo": "GET"}
+        assert _serie("rutealo_http_peticiones_total", **etiquetas, estado="200") == 2
+        assert _serie("rutealo_mongo_comandos_total", comando="find") >= 2
+        histograma = registro._series["rutealo_http_mongo_comandos"][tuple(etiquetas.items())]
+        assert histograma.suma == 2
+        assert registro._series["rutealo_http_respuesta_bytes"][tuple(etiquetas.items())].suma >= len(cuerpo)
+
+    def test_streaming_y_404(self, cliente):
+        """El streaming se cuenta al enviar el último byte; las rutas inexistentes van a sin_ruta."""
+        assert cliente.get("/stream").get_data() == b"parte 0\nparte 1\nparte 2\n"
+        cliente.get("/no-existe").get_data()
+
+        assert registro._series["rutealo_http_respuesta_bytes"][(("endpoint", "/stream"), ("metodo", "GET"))].suma == 24
+        assert _serie("rutealo_http_peticiones_total", endpoint="sin_ruta", metodo="GET", estado="404") == 1
+
+    def test_excepcion_cuenta_500(self):
+        """Si la app WSGI lanza una excepción la petición se registra igual."""
+        def app_rota(environ, start_response):
+            raise RuntimeError("fallo")
+
+        with pytest.raises(RuntimeError):
+            MiddlewareMetricas(app_rota)({"REQUEST_METHOD": "POST", "PATH_INFO": "/x"}, None)
+        assert _serie("rutealo_http_peticiones_total", endpoint="sin_ruta", metodo="POST", estado="500") == 1
+
+    def test_log_de_peticiones_lentas(self, cliente, monkeypatch, caplog):
+        """Por encima del umbral se registra el desglose de la petición."""
+        registrar_escucha_mongo()
+        monkeypatch.setattr(metricas, "METRICAS_LENTA_MS", 0.001)
+        with caplog.at_level(logging.WARNING, logger="src.metricas"):
+            cliente.get("/rutas/ana").get_data()
+        assert "GET /rutas/ana 200" in caplog.text and "find 1" in caplog.text
+
+
+class TestModelo:
+    """Tests del tiempo en llamadas al modelo."""
+
+    def test_llamadas_y_chat(self, backend_falso, monkeypatch):
+        """generate_content, send_message y el streaming cuentan como llamadas de la petición."""
+        from src.config import get_genai_model
+
+        monkeypatch.setenv("RUTEALO_FAKE_LATENCIA_MS", "20")
+        modelo = ModeloPerezoso(get_genai_model)
+        medicion = iniciar_medicion("POST", "/api/chatbot")
+        modelo.generate_content("Explica la célula")
+        modelo.start_chat(history=[]).send_message("Hola")
+        partes = list(modelo.generate_content("Resume", stream=True))
+        finalizar_medicion(medicion)
+
+        assert partes and medicion.llm_llamadas == 3
+        assert medicion.llm_s >= 0.05
+        assert _serie("rutealo_llm_llamadas_total") == 3
+
+    def test_fuera_de_peticion(self, backend_falso):
+        """Sin petición en curso la llamada solo suma a los totales del proceso."""
+        from src.config import get_genai_model
+
+        ModeloPerezoso(get_genai_model).generate_content("Explica la célula")
+        assert metricas.medicion_actual() is None
+        assert _serie("rutealo_llm_llamadas_total") == 1
+
+
+class TestEndpoint:
+    """Tests de GET /metrics en la app."""
+
+    def test_expone_metricas_y_admision(self, bd_memoria, backend_falso):
+        """El texto incluye las peticiones atendidas y el estado del control de admisión."""
+        from src.app import app
+
+        cliente = app.test_client()
+        cliente.get("/login").get_data()
+        respuesta = cliente.get("/metrics")
+
+        assert respuesta.content_type.startswith("text/plain; version=0.0.4")
+        texto = respuesta.get_data(as_text=True)
+        assert 'rutealo_http_peticiones_total{endpoint="/login",metodo="GET",estado="200"} 1' in texto
+        assert "rutealo_admision_en_cola 0" in texto
+        assert 'rutealo_admision_rechazados_total{motivo="usuario"}' in texto
+
+    def test_token(self, monkeypatch):
+        """Con RUTEALO_METRICAS_TOKEN solo responde al Bearer correcto."""
+        from src.app import app
+
+        monkeypatch.setattr("src.app.METRICAS_TOKEN", "secreto")
+        cliente = app.test_client()
+        assert cliente.get("/metrics").status_code == 401
+        assert cliente.get("/metrics", headers={"Authorization": "Bearer secreto"}).status_code == 200
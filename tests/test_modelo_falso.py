@@ -0,0 +1,103 @@
+"""
+Tests para src/models/modelo_falso.py: backend generativo falso y determinista.
+"""
+
+import json
+import pytest
+from src.config import get_genai_model
+from src.utils import validate_exam_structure
+from src.models.modelo_falso import (
+    ModeloFalso,
+    clasificar_prompt,
+    estadisticas_llm,
+    reiniciar_estadisticas_llm,
+    JERARQUIA_BLOOM,
+)
+
+
+@pytest.fixture
+def modelo():
+    reiniciar_estadisticas_llm()
+    yield ModeloFalso(semilla=7)
+    reiniciar_estadisticas_llm()
+
+
+class TestSeleccionBackend:
+    """Tests de la selección de backend por variable de entorno."""
+
+    def test_backend_fake_no_requiere_claves(self, monkeypatch):
+        """Con RUTEALO_LLM_BACKEND=fake se obtiene el modelo falso."""
+        monkeypatch.setenv("RUTEALO_LLM_BACKEND", "fake")
+        monkeypatch.setenv("RUTEALO_FAKE_LATENCIA_MS", "5")
+        modelo = get_genai_model("chatbot")
+        assert isinstance(modelo, ModeloFalso)
+        assert modelo.latencia_ms == 5.0
+
+
+class TestRespuestasValidas:
+    """Las respuestas deben respetar el esquema que espera cada prompt."""
+
+    def test_clasificacion_bloom(self, modelo):
+        """Devuelve una categoría Bloom válida."""
+        res = json.loads(modelo.generate_content('Responde SOLO JSON: {"Categoria_Bloom": "Nivel"}').text)
+        assert res["Categoria_Bloom"] in JERARQUIA_BLOOM
+
+    def test_examen_diagnostico_valido(self, modelo):
+        """El examen diagnóstico pasa validate_exam_structure y trae opción omitir."""
+        res = json.loads(modelo.generate_content('{"EXAMENES": {"EXAMEN_INICIAL": []}}').text)
+        assert validate_exam_structure(res) == (True, None)
+        assert all(p["opciones"][-1].startswith("e)") for p in res["EXAMENES"]["EXAMEN_INICIAL"])
+
+    def test_flashcards_respetan_cantidad(self, modelo):
+        """Genera la cantidad de flashcards pedida en el prompt."""
+        prompt = 'NIVEL COGNITIVO: Aplicar\n1. Genera 7 FLASHCARDS para nivel Aplicar\n{"FLASHCARDS": []}'
+        res = json.loads(modelo.generate_content(prompt).text)
+        assert len(res["FLASHCARDS"]) == 7
+        assert "Aplicar" in res["FLASHCARDS"][0]["frente"]
+
+    def test_tests_con_feedback(self, modelo):
+        """Cada pregunta trae feedback para las cuatro opciones."""
+        res = json.loads(modelo.generate_content('1. Genera 4 PREGUNTAS\n{"EXAMENES": []}').text)
+        assert len(res["EXAMENES"]) == 4
+        assert set(res["EXAMENES"][0]["feedback"]) == set("abcd")
+
+    def test_chat_texto_plano(self, modelo):
+        """Los prompts sin esquema reciben texto."""
+        chat = modelo.start_chat()
+        assert chat.send_message("Hola tutor").text
+        assert len(chat.history) == 2
+
+    def test_chat_por_partes(self, modelo):
+        """Con stream=True la respuesta llega en varias partes que forman el texto completo."""
+        respuesta = modelo.start_chat().send_message("Hola tutor", stream=True)
+        partes = [parte.text for parte in respuesta]
+        assert len(partes) > 1 and "".join(partes) == respuesta.text
+
+
+class TestDeterminismoYEstadisticas:
+    """Tests de reproducibilidad, latencia y conteo."""
+
+    def test_misma_entrada_misma_salida(self):
+        """Dos modelos con la misma semilla responden igual."""
+        prompt = '{"EXAMENES": {"EXAMEN_INICIAL": []}}'
+        assert ModeloFalso(semilla=1).generate_content(prompt).text == ModeloFalso(semilla=1).generate_content(prompt).text
+
+    def test_latencia_reproducible(self):
+        """La secuencia de latencias depende solo de la semilla."""
+        a = ModeloFalso(latencia_ms=100, desviacion_ms=40, semilla=3)
+        b = ModeloFalso(latencia_ms=100, desviacion_ms=40, semilla=3)
+        muestras = [a._muestrear_latencia() for _ in range(200)]
+        assert muestras == [b._muestrear_latencia() for _ in range(200)]
+        assert 0.08 < sum(muestras) / len(muestras) < 0.12
+
+    def test_cuenta_llamadas_por_tipo(self, modelo):
+        """Las estadísticas globales cuentan llamadas por tipo de prompt."""
+        modelo.generate_content('{"Categoria_Bloom": "x"}')
+        modelo.generate_content("hola")
+        stats = estadisticas_llm()
+        assert stats["llamadas"] == {"clasificacion_bloom": 1, "texto": 1}
+        assert stats["total_llamadas"] == 2
+
+    def test_clasificar_prompt_real_de_flashcards(self):
+        """Reconoce el prompt real de generadores_pedagogicos."""
+        assert clasificar_prompt('FORMATO JSON OBLIGATORIO: {"FLASHCARDS": [...]}') == "flashcards"
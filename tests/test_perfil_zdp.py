@@ -0,0 +1,86 @@
+"""
+Tests para el perfil ZDP cacheado de src/models/evaluacion_zdp.py.
+"""
+
+import datetime
+from src.models.evaluacion_zdp import (
+    EvaluadorZDP,
+    obtener_perfil_zdp,
+    obtener_resumen_perfil,
+)
+
+EXAMEN = {
+    "EXAMENES": {
+        "EXAMEN_INICIAL": [
+            {"id": 1, "respuesta_correcta": "a", "nivel_bloom_evaluado": "Recordar"},
+            {"id": 2, "respuesta_correcta": "a", "nivel_bloom_evaluado": "Comprender"},
+        ]
+    }
+}
+
+
+def _respuestas(*valores):
+    return [{"pregunta_id": i, "respuesta": v} for i, v in enumerate(valores, start=1)]
+
+
+class TestPerfilCacheado:
+    """Tests de la lectura del perfil desde usuario_perfil con caché."""
+
+    def test_perfil_igual_a_la_ultima_evaluacion(self, bd_memoria):
+        """El perfil coincide con la evaluación más reciente guardada."""
+        evaluador = EvaluadorZDP()
+        evaluador.evaluar_examen("ana", _respuestas("b", "b"), EXAMEN)
+        resultado = evaluador.evaluar_examen("ana", _respuestas("a", "b"), EXAMEN)
+
+        perfil = obtener_perfil_zdp("ana")
+        assert perfil["nivel_actual"] == resultado["nivel_actual"] == "Recordar"
+        assert perfil["zona_proxima"] == resultado["zona_proxima"]
+        assert perfil["puntaje"] == resultado["puntaje_total"]
+        assert perfil["competencias"] == resultado["resumen_por_nivel"]
+        assert perfil["recomendaciones"] == resultado["recomendaciones"]
+
+    def test_lecturas_no_consultan_el_historial(self, bd_memoria):
+        """La primera lectura trae el perfil y las siguientes solo su versión."""
+        EvaluadorZDP().evaluar_examen("ana", _respuestas("a", "a"), EXAMEN)
+        cliente = bd_memoria.client
+        cliente.reiniciar_estadisticas()
+
+        for _ in range(5):
+            obtener_perfil_zdp("ana")
+        stats = cliente.estadisticas()
+        assert stats["total"] == 5
+        assert stats.get("usuario_perfil.find_one") == 5
+
+    def test_evaluacion_invalida_la_cache(self, bd_memoria):
+        """Una evaluación nueva se refleja en la siguiente lectura."""
+        evaluador = EvaluadorZDP()
+        assert obtener_resumen_perfil("luis") is None
+        evaluador.evaluar_examen("luis", _respuestas("a", "a"), EXAMEN)
+        assert obtener_resumen_perfil("luis")["nivel_actual"] == "Comprender"
+
+    def test_perfil_escrito_por_otro_proceso(self, bd_memoria):
+        """Sin invalidar la caché, un perfil con otra fecha_actualizacion se vuelve a leer."""
+        EvaluadorZDP().evaluar_examen("ana", _respuestas("a", "a"), EXAMEN)
+        assert obtener_resumen_perfil("ana")["nivel_actual"] == "Comprender"
+
+        # Otro worker reevalúa: escribe el perfil pero no puede invalidar esta caché
+        bd_memoria["usuario_perfil"].update_one(
+            {"usuario": "ana"},
+            {"$set": {"nivel_actual": "Recordar", "fecha_actualizacion": datetime.datetime.utcnow()}},
+        )
+        assert obtener_resumen_perfil("ana")["nivel_actual"] == "Recordar"
+
+    def test_perfil_antiguo_sin_recomendaciones(self, bd_memoria):
+        """Los perfiles guardados sin recomendaciones las calculan al leer."""
+        bd_memoria["usuario_perfil"].insert_one(
+            {
+                "usuario": "eva",
+                "nivel_actual": "Recordar",
+                "zona_proxima": ["Comprender", "Aplicar"],
+                "puntaje_ultimo_examen": 16.67,
+                "competencias": {"Recordar": {"competente": True}, "Comprender": {"competente": False}},
+            }
+        )
+        perfil = obtener_perfil_zdp("eva")
+        assert perfil["recomendaciones"]
+        assert EvaluadorZDP().obtener_perfil_zdp_simple("eva")["brechas"][0] == "Comprender"
@@ -0,0 +1,180 @@
+"""
+Tests para src/models/reevaluacion_cohorte.py: scoring ZDP vectorizado.
+"""
+
+import random
+import pytest
+import numpy as np
+from src.models import evaluacion_zdp
+from src.models.evaluacion_zdp import EvaluadorZDP, JERARQUIA_BLOOM
+from src.models.reevaluacion_cohorte import (
+    construir_matriz,
+    puntuar_cohorte,
+    resultado_estudiante,
+    reevaluar_cohorte,
+)
+
+CAMPOS = ("resumen_por_nivel", "puntaje_total", "nivel_actual", "zona_proxima", "recomendaciones")
+# El historial guarda el resumen sin recomendaciones (se derivan del resumen por nivel)
+CAMPOS_RESUMEN = CAMPOS[:-1]
+
+
+def _examen_aleatorio(rng, n_preguntas=12):
+    preguntas = [
+        {
+            "id": i,
+            "pregunta": f"P{i}",
+            "respuesta_correcta": rng.choice("abcd"),
+            "nivel_bloom_evaluado": rng.choice(JERARQUIA_BLOOM[: rng.randint(1, 6)]),
+        }
+        for i in range(1, n_preguntas + 1)
+    ]
+    return {"EXAMENES": {"EXAMEN_INICIAL": preguntas}}
+
+
+def _respuestas(rng, examen, acierto):
+    return [
+        {"pregunta_id": p["id"], "respuesta": p["respuesta_correcta"] if rng.random() < acierto else "e"}
+        for p in examen["EXAMENES"]["EXAMEN_INICIAL"]
+    ]
+
+
+@pytest.fixture
+def cohorte(bd_memoria):
+    """40 evaluaciones reales generadas con EvaluadorZDP.evaluar_examen."""
+    rng = random.Random(11)
+    evaluador = EvaluadorZDP()
+    entradas = []
+    for i in range(40):
+        examen = _examen_aleatorio(rng, rng.randint(6, 14))
+        respuestas = _respuestas(rng, examen, rng.random())
+        evaluador.evaluar_examen(f"est_{i % 30}", respuestas, examen)
+        entradas.append((f"est_{i % 30}", respuestas, examen))
+    return bd_memoria, entradas
+
+
+class TestPuntuarCohorte:
+    """Tests del núcleo vectorizado."""
+
+    def test_conteos_por_nivel(self):
+        """Cuenta aciertos y totales por nivel ignorando el relleno."""
+        niveles = np.array([[0, 0, 2, -1], [1, 1, 1, 1]], dtype=np.int8)
+        correctas = np.array([[True, False, True, False], [True, True, True, False]])
+        p = puntuar_cohorte(niveles, correctas)
+        assert p["totales"][0].tolist() == [2, 0, 1, 0, 0, 0]
+        assert p["aciertos"][1].tolist() == [0, 3, 0, 0, 0, 0]
+        assert p["competentes"][1, 1] and not p["competentes"][0, 0]
+
+    def test_nivel_actual_es_el_competente_mas_alto(self):
+        """Sin competencias el nivel actual es Recordar y la zona los dos primeros."""
+        niveles = np.array([[0, 3], [0, 1]], dtype=np.int8)
+        correctas = np.array([[True, True], [False, False]])
+        p = puntuar_cohorte(niveles, correctas)
+        assert resultado_estudiante(p, 0)["nivel_actual"] == "Analizar"
+        assert resultado_estudiante(p, 0)["zona_proxima"] == ["Evaluar", "Crear"]
+        assert resultado_estudiante(p, 1)["zona_proxima"] == ["Recordar", "Comprender"]
+
+    def test_pesos_invalidos(self):
+        """Exige un peso por nivel."""
+        with pytest.raises(ValueError):
+            puntuar_cohorte(np.zeros((1, 1), dtype=np.int8), np.zeros((1, 1), dtype=bool), pesos=[1, 2])
+
+
+class TestEquivalenciaConEvaluador:
+    """El motor vectorizado reproduce exactamente evaluar_examen."""
+
+    def test_mismos_resultados_con_parametros_actuales(self, cohorte):
+        """Re-puntuar con los parámetros por defecto no cambia nada."""
+        db, entradas = cohorte
+        detalles = list(db["evaluaciones_detalle"].find({}))
+        matriz = construir_matriz(detalles)
+        puntajes = puntuar_cohorte(matriz.niveles, matriz.correctas)
+        evaluador = EvaluadorZDP()
+        for fila, (detalle, (usuario, respuestas, examen)) in enumerate(zip(detalles, entradas)):
+            nuevo = resultado_estudiante(puntajes, fila)
+            original = evaluador.calcular_resultado(usuario, respuestas, examen)
+            guardado = db["evaluaciones_estudiante"].find_one({"_id": detalle["_id"]})
+            assert {c: original[c] for c in CAMPOS} == nuevo
+            assert {c: guardado[c] for c in CAMPOS_RESUMEN} == {c: nuevo[c] for c in CAMPOS_RESUMEN}
+
+    def test_nuevo_umbral_equivale_a_reevaluar(self, cohorte, monkeypatch):
+        """Con otro umbral coincide con evaluar_examen bajo ese umbral."""
+        db, entradas = cohorte
+        resumen = reevaluar_cohorte(db, umbral=50)
+        assert resumen["evaluaciones"] == 40
+        assert resumen["escrituras_evaluaciones"] == 40
+
+        monkeypatch.setattr(evaluacion_zdp, "UMBRAL_COMPETENCIA", 50)
+        evaluador = EvaluadorZDP()
+        evaluador._guardar_resultado_evaluacion = lambda usuario, resultado: None
+        guardadas = list(db["evaluaciones_estudiante"].find({}))
+        for (usuario, respuestas, examen), guardada in zip(entradas, guardadas):
+            esperado = evaluador.evaluar_examen(usuario, respuestas, examen)
+            assert {c: guardada[c] for c in CAMPOS_RESUMEN} == {c: esperado[c] for c in CAMPOS_RESUMEN}
+            assert guardada["parametros_scoring"]["umbral"] == 50
+
+
+class TestReevaluarCohorte:
+    """Tests de la escritura por lotes."""
+
+    def test_perfil_toma_la_evaluacion_mas_reciente(self, cohorte):
+        """usuario_perfil refleja la última evaluación de cada usuario."""
+        db, _ = cohorte
+        reevaluar_cohorte(db, umbral=0)
+        ultima = db["evaluaciones_estudiante"].find_one({"usuario": "est_3"}, sort=[("fecha_evaluacion", -1)])
+        perfil = db["usuario_perfil"].find_one({"usuario": "est_3"})
+        assert perfil["nivel_actual"] == ultima["nivel_actual"]
+        assert perfil["puntaje_ultimo_examen"] == ultima["puntaje_total"]
+
+    def test_dry_run_no_escribe(self, cohorte):
+        """--dry-run informa cambios sin modificar documentos."""
+        db, _ = cohorte
+        antes = [e["nivel_actual"] for e in db["evaluaciones_estudiante"].find({})]
+        resumen = reevaluar_cohorte(db, umbral=0, dry_run=True)
+        assert resumen["escrituras_evaluaciones"] == 0
+        assert resumen["cambios_nivel"] > 0
+        assert [e["nivel_actual"] for e in db["evaluaciones_estudiante"].find({})] == antes
+
+
+class TestTimeSeries:
+    """Tests de la escritura según la versión del servidor."""
+
+    @pytest.fixture
+    def cohorte_timeseries(self, bd_memoria):
+        """Evaluaciones guardadas con el resumen en una colección time-series."""
+        from src.models.historial_evaluaciones import asegurar_colecciones
+
+        asegurar_colecciones(bd_memoria)
+        rng = random.Random(3)
+        evaluador = EvaluadorZDP()
+        for i in range(10):
+            examen = _examen_aleatorio(rng)
+            evaluador.evaluar_examen(f"est_{i % 4}", _respuestas(rng, examen, rng.random()), examen)
+        return bd_memoria
+
+    def test_servidor_anterior_escribe_aparte(self, cohorte_timeseries):
+        """Sin MongoDB 7.0 no se actualiza la time-series; el historial muestra la re-evaluación."""
+        from src.models.historial_evaluaciones import historial_usuario
+
+        db = cohorte_timeseries
+        antes = {e["_id"]: e["nivel_actual"] for e in db["evaluaciones_estudiante"].find({})}
+        resumen = reevaluar_cohorte(db, umbral=0)
+
+        assert resumen["destino_evaluaciones"] == "evaluaciones_reevaluadas"
+        assert {e["_id"]: e["nivel_actual"] for e in db["evaluaciones_estudiante"].find({})} == antes
+        assert db["evaluaciones_reevaluadas"].count_documents({}) == 10
+        historial = historial_usuario(db, "est_1")
+        assert historial and all(e["parametros_scoring"]["umbral"] == 0 for e in historial)
+        perfil = db["usuario_perfil"].find_one({"usuario": "est_1"})
+        assert perfil["nivel_actual"] == historial[0]["nivel_actual"]
+        assert EvaluadorZDP().obtener_evaluacion_estudiante("est_1")["parametros_scoring"]["umbral"] == 0
+
+    def test_mongodb_7_actualiza_en_sitio(self, cohorte_timeseries, monkeypatch):
+        """Con MongoDB 7.0 o superior los resúmenes se actualizan en la time-series."""
+        db = cohorte_timeseries
+        monkeypatch.setattr(db, "command", lambda comando, *a, **k: {"ok": 1.0, "versionArray": [7, 0, 2, 0]})
+        resumen = reevaluar_cohorte(db, umbral=0)
+
+        assert resumen["destino_evaluaciones"] == "evaluaciones_estudiante"
+        assert db["evaluaciones_reevaluadas"].count_documents({}) == 0
+        assert all(e["parametros_scoring"]["umbral"] == 0 for e in db["evaluaciones_estudiante"].find({}))
@@ -0,0 +1,143 @@
+"""
+Tests para src/models/regenerar_rutas.py: regeneración masiva con checkpoint.
+"""
+
+import json
+import time
+import threading
+import pytest
+from src.config import ModeloPerezoso, configurar_limite_llm
+from src.models import regenerar_rutas
+from src.models.regenerar_rutas import ejecutar_regeneracion, listar_usuarios
+from src.models.modelo_falso import estadisticas_llm
+
+
+def _sembrar(db, usuarios, cohorte="2025-I"):
+    """Crea perfiles con un material ya etiquetado por usuario."""
+    for u in usuarios:
+        db["usuario_perfil"].insert_one({"usuario": u, "cohorte": cohorte})
+        db["materiales_crudos"].insert_one(
+            {
+                "usuario_propietario": u,
+                "nombre_archivo": f"{u}.pdf",
+                "estado_procesamiento": "BLOOM_COMPLETADO",
+                "unidades_contenido": [
+                    {"contenido_texto": "Las bases de datos relacionales usan tablas.", "Categoria_Bloom": "Recordar"},
+                    {"contenido_texto": "Normalizar evita redundancia en el esquema.", "Categoria_Bloom": "Aplicar"},
+                ],
+            }
+        )
+
+
+@pytest.fixture
+def db(backend_falso, bd_memoria):
+    _sembrar(bd_memoria, ["ana", "luis", "eva"])
+    _sembrar(bd_memoria, ["otro"], cohorte="2024-II")
+    return bd_memoria
+
+
+class TestListarUsuarios:
+    """Tests de selección de usuarios."""
+
+    def test_filtros_por_cohorte_y_lista(self, db):
+        """Combina cohorte, consulta y lista explícita."""
+        assert listar_usuarios(db) == ["ana", "eva", "luis", "otro"]
+        assert listar_usuarios(db, cohorte="2025-I") == ["ana", "eva", "luis"]
+        assert listar_usuarios(db, cohorte="2025-I", usuarios=["eva", "otro"]) == ["eva"]
+        assert listar_usuarios(db, filtro={"usuario": {"$in": ["otro"]}}) == ["otro"]
+
+
+class TestEjecutarRegeneracion:
+    """Tests del runner con backend falso y BD en memoria."""
+
+    def test_regenera_todas_las_rutas(self, db, tmp_path):
+        """Cada usuario de la cohorte obtiene su ruta."""
+        resumen = ejecutar_regeneracion(db, cohorte="2025-I", trabajadores=3, checkpoint=tmp_path / "cp.json")
+        assert resumen["procesados"] == ["ana", "eva", "luis"]
+        assert db["rutas_aprendizaje"].count_documents({}) == 3
+        assert db["rutas_aprendizaje"].find_one({"usuario": "otro"}) is None
+
+    def test_dry_run_no_llama_al_modelo(self, db, tmp_path):
+        """--dry-run solo lista usuarios y materiales."""
+        resumen = ejecutar_regeneracion(db, dry_run=True, checkpoint=tmp_path / "cp.json")
+        assert resumen["pendientes"] == ["ana", "eva", "luis", "otro"]
+        assert resumen["materiales"]["ana"] == 1
+        assert estadisticas_llm()["total_llamadas"] == 0
+        assert db["rutas_aprendizaje"].count_documents({}) == 0
+
+    def test_reanuda_desde_checkpoint(self, db, tmp_path, monkeypatch):
+        """Una segunda ejecución solo procesa los fallidos y omite los completados."""
+        checkpoint = tmp_path / "cp.json"
+        original = regenerar_rutas.regenerar_usuario
+
+        def falla_luis(usuario, db=None):
+            if usuario == "luis":
+                return usuario, False, "fallo simulado"
+            return original(usuario, db)
+
+        monkeypatch.setattr(regenerar_rutas, "regenerar_usuario", falla_luis)
+        primero = ejecutar_regeneracion(db, cohorte="2025-I", checkpoint=checkpoint)
+        assert primero["fallidos"] == ["luis"]
+        assert json.loads(checkpoint.read_text(encoding="utf-8"))["fallidos"] == {"luis": "fallo simulado"}
+
+        monkeypatch.setattr(regenerar_rutas, "regenerar_usuario", original)
+        segundo = ejecutar_regeneracion(db, cohorte="2025-I", checkpoint=checkpoint)
+        assert segundo["procesados"] == ["luis"]
+        assert segundo["omitidos"] == ["ana", "eva"]
+        # Sin fallidos pendientes el checkpoint se borra
+        assert not checkpoint.exists()
+
+    def test_siguiente_regeneracion_procesa_todo(self, db, tmp_path):
+        """Tras una ejecución completa, la siguiente (otro cambio de prompts) no omite a nadie."""
+        checkpoint = tmp_path / "cp.json"
+        ejecutar_regeneracion(db, cohorte="2025-I", checkpoint=checkpoint)
+        assert not checkpoint.exists()
+
+        resumen = ejecutar_regeneracion(db, cohorte="2025-I", checkpoint=checkpoint)
+        assert resumen["procesados"] == ["ana", "eva", "luis"] and resumen["omitidos"] == []
+
+    def test_checkpoint_de_otra_seleccion(self, db, tmp_path, monkeypatch):
+        """El checkpoint de una cohorte no hace omitir usuarios al regenerar otra selección."""
+        checkpoint = tmp_path / "cp.json"
+        monkeypatch.setattr(regenerar_rutas, "regenerar_usuario", lambda u, db=None: (u, u != "luis", "ok"))
+        ejecutar_regeneracion(db, cohorte="2025-I", checkpoint=checkpoint)
+        assert checkpoint.exists()
+
+        resumen = ejecutar_regeneracion(db, usuarios=["ana", "otro"], checkpoint=checkpoint)
+        assert resumen["procesados"] == ["ana", "otro"] and resumen["omitidos"] == []
+
+    def test_reiniciar_ignora_checkpoint(self, db, tmp_path):
+        """--reiniciar vuelve a procesar a todos."""
+        checkpoint = tmp_path / "cp.json"
+        ejecutar_regeneracion(db, usuarios=["ana"], checkpoint=checkpoint)
+        resumen = ejecutar_regeneracion(db, usuarios=["ana"], checkpoint=checkpoint, reiniciar=True)
+        assert resumen["procesados"] == ["ana"]
+
+
+class TestLimiteConcurrenciaLLM:
+    """El límite global se aplica en ModeloPerezoso.generate_content."""
+
+    def test_no_supera_el_limite(self):
+        """Con 8 hilos y límite 2 nunca hay más de 2 llamadas simultáneas."""
+        activos, maximo, lock = [0], [0], threading.Lock()
+
+        class Lento:
+            def generate_content(self, prompt):
+                with lock:
+                    activos[0] += 1
+                    maximo[0] = max(maximo[0], activos[0])
+                time.sleep(0.02)
+                with lock:
+                    activos[0] -= 1
+
+        modelo = ModeloPerezoso(Lento)
+        configurar_limite_llm(2)
+        try:
+            hilos = [threading.Thread(target=modelo.generate_content, args=("x",)) for _ in range(8)]
+            for h in hilos:
+                h.start()
+            for h in hilos:
+                h.join()
+        finally:
+            configurar_limite_llm(0)
+        assert maximo[0] == 2
@@ -0,0 +1,87 @@
+"""
+Tests para src/respuestas_http.py: ETag débil, 304 condicional y compresión.
+"""
+
+import gzip
+import pytest
+from flask import Flask
+from src import respuestas_http
+from src.respuestas_http import responder_json, estadisticas_respuestas, reiniciar_estadisticas_respuestas
+
+GRANDE = {"flashcards": [{"frente": f"Concepto {i}", "reverso": "Explicación " * 10} for i in range(50)]}
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    """App mínima: /con-version depende de una versión y /sin-version de su cuerpo."""
+    app = Flask(__name__)
+    estado = {"version": 1, "datos": GRANDE}
+
+    @app.route("/con-version")
+    def con_version():
+        return responder_json(estado["datos"], ("prueba", estado["version"]))
+
+    @app.route("/sin-version")
+    def sin_version():
+        return responder_json({"total": estado["version"]})
+
+    monkeypatch.setattr(respuestas_http, "brotli", None)
+    reiniciar_estadisticas_respuestas()
+    cliente = app.test_client()
+    cliente.estado = estado
+    return cliente
+
+
+class TestCondicional:
+    """Tests de ETag e If-None-Match."""
+
+    def test_304_con_mismo_etag(self, cliente):
+        """Repetir el ETag recibido devuelve 304 sin cuerpo."""
+        etag = cliente.get("/con-version").headers["ETag"]
+        assert etag.startswith('W/"')
+
+        respuesta = cliente.get("/con-version", headers={"If-None-Match": etag})
+        assert respuesta.status_code == 304 and respuesta.get_data() == b""
+        assert respuesta.headers["ETag"] == etag
+
+    def test_nueva_version_invalida(self, cliente):
+        """Al cambiar la versión se envía el contenido nuevo con otro ETag."""
+        etag = cliente.get("/con-version").headers["ETag"]
+        cliente.estado["version"] = 2
+
+        respuesta = cliente.get("/con-version", headers={"If-None-Match": etag})
+        assert respuesta.status_code == 200 and respuesta.headers["ETag"] != etag
+
+    def test_etag_del_cuerpo(self, cliente):
+        """Sin versión, el ETag cambia solo si cambia el JSON."""
+        primero = cliente.get("/sin-version").headers["ETag"]
+        assert cliente.get("/sin-version").headers["ETag"] == primero
+        cliente.estado["version"] = 3
+        assert cliente.get("/sin-version", headers={"If-None-Match": primero}).status_code == 200
+
+
+class TestCompresion:
+    """Tests de Content-Encoding y métricas."""
+
+    def test_gzip_sobre_el_umbral(self, cliente):
+        """Un JSON grande se envía con gzip si el cliente lo acepta."""
+        respuesta = cliente.get("/con-version", headers={"Accept-Encoding": "gzip"})
+        assert respuesta.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in respuesta.headers["Vary"]
+        assert gzip.decompress(respuesta.get_data()).decode("utf-8").startswith("{")
+
+    def test_pequenas_sin_comprimir(self, cliente):
+        """Las respuestas bajo el umbral o sin Accept-Encoding no se comprimen."""
+        assert "Content-Encoding" not in cliente.get("/sin-version", headers={"Accept-Encoding": "gzip"}).headers
+        assert "Content-Encoding" not in cliente.get("/con-version").headers
+
+    def test_ahorro_medido(self, cliente):
+        """Las métricas suman lo ahorrado por compresión y por los 304."""
+        etag = cliente.get("/con-version", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+        cliente.get("/con-version", headers={"If-None-Match": etag})
+
+        stats = estadisticas_respuestas()
+        assert stats["respuestas_304"] == 1 and stats["respuestas_gzip"] == 1
+        assert stats["bytes_ahorrados_304"] == stats["bytes_json"]
+        assert stats["bytes_enviados"] < stats["bytes_json"] / 5
+        assert stats["ahorro"] > 0.9
@@ -0,0 +1,88 @@
+"""
+Tests para src/seleccion_contenido.py: selección de contenido con cobertura.
+"""
+
+import pytest
+from src.seleccion_contenido import (
+    seleccionar_contexto,
+    estimar_tokens,
+    tokenizar,
+    _fragmentar,
+)
+
+TEMAS = {
+    "biologia.pdf": "La célula es la unidad básica de la vida. Las mitocondrias producen energía celular mediante respiración.",
+    "historia.pdf": "La revolución francesa transformó la monarquía absoluta. Los jacobinos impulsaron reformas republicanas.",
+    "quimica.docx": "Los enlaces covalentes comparten electrones entre átomos. Las moléculas polares disuelven sales iónicas.",
+    "fisica.pptx": "La segunda ley de Newton relaciona fuerza, masa y aceleración. La energía cinética depende de la velocidad.",
+    "economia.pdf": "La inflación reduce el poder adquisitivo. Los bancos centrales ajustan tasas de interés monetarias.",
+}
+
+
+@pytest.fixture
+def unidades():
+    """Cinco documentos largos; el primero ocupa por sí solo todo el presupuesto."""
+    niveles = ["Recordar", "Comprender", "Aplicar", "Analizar", "Evaluar"]
+    resultado = []
+    for (doc, texto), nivel in zip(TEMAS.items(), niveles):
+        repeticiones = 60 if doc == "biologia.pdf" else 10
+        for i in range(repeticiones):
+            resultado.append({"texto": f"{texto} Sección {i}.", "documento": doc, "nivel": nivel})
+    return resultado
+
+
+class TestSeleccionarContexto:
+    """Tests del selector con presupuesto de tokens."""
+
+    def test_contenido_corto_se_devuelve_completo(self):
+        """Si todo cabe en el presupuesto, no se descarta nada."""
+        textos = ["Primer párrafo.", "Segundo párrafo."]
+        resultado = seleccionar_contexto(textos, 1000)
+        assert "Primer párrafo." in resultado and "Segundo párrafo." in resultado
+
+    def test_respeta_presupuesto(self, unidades):
+        """El contexto resultante no supera el presupuesto estimado."""
+        resultado = seleccionar_contexto(unidades, 300)
+        assert estimar_tokens(resultado) <= 300 + 10 * len(TEMAS)  # encabezados por documento
+
+    def test_cubre_todos_los_documentos(self, unidades):
+        """Con presupuesto reducido, todos los documentos aparecen (a diferencia de truncar)."""
+        truncado = "\n".join(u["texto"] for u in unidades)[:1200]
+        assert "revolución" not in truncado
+
+        resultado = seleccionar_contexto(unidades, 300)
+        for doc in TEMAS:
+            assert f"--- {doc} ---" in resultado
+
+    def test_evita_fragmentos_redundantes(self):
+        """Entre fragmentos casi idénticos prefiere uno distinto."""
+        repetidos = ["Las mitocondrias producen energía celular en la respiración."] * 20
+        distinto = ["La fotosíntesis convierte luz solar en glucosa dentro del cloroplasto."]
+        resultado = seleccionar_contexto(repetidos + distinto, 40, tokens_por_fragmento=20)
+        assert "fotosíntesis" in resultado
+
+    def test_mantiene_orden_original(self, unidades):
+        """Los documentos seleccionados conservan su orden de aparición."""
+        resultado = seleccionar_contexto(unidades, 300)
+        posiciones = [resultado.index(f"--- {doc} ---") for doc in TEMAS]
+        assert posiciones == sorted(posiciones)
+
+    def test_sin_contenido(self):
+        """Sin unidades retorna cadena vacía."""
+        assert seleccionar_contexto([], 100) == ""
+        assert seleccionar_contexto(["   "], 100) == ""
+
+
+class TestUtilidades:
+    """Tests de tokenización y fragmentación."""
+
+    def test_tokenizar_quita_stopwords_y_numeros(self):
+        """Debe descartar stopwords, números y palabras cortas."""
+        assert tokenizar("La célula de 2024 es la unidad") == ["célula", "unidad"]
+
+    def test_fragmentar_respeta_tamano(self):
+        """Ningún fragmento supera el máximo de caracteres."""
+        texto = "\n".join(f"Oración número {i} del párrafo." for i in range(200))
+        fragmentos = _fragmentar(texto, 200)
+        assert len(fragmentos) > 1
+        assert all(len(f) <= 200 for f in fragmentos)
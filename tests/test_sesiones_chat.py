@@ -0,0 +1,137 @@
+"""
+Tests para src/models/sesiones_chat.py: memoria conversacional del tutor en el servidor.
+"""
+
+import pytest
+from src.models.chatbot_tutor import TutorVirtual, invalidar_contexto_tutor, precargar_tutor
+from src.models.modelo_falso import ModeloFalso
+from src.models.sesiones_chat import (
+    COL_SESIONES,
+    TURNOS_RECIENTES,
+    LOTE_RESUMEN,
+    crear_sesion,
+    normalizar_turnos,
+    plegar_turnos,
+)
+
+
+@pytest.fixture
+def ruta(bd_memoria, backend_falso):
+    """Ruta de "ana" lista para conversar."""
+    invalidar_contexto_tutor()
+    resultado = bd_memoria["rutas_aprendizaje"].insert_one({"usuario": "ana", "nombre_ruta": "Biología"})
+    yield bd_memoria, str(resultado.inserted_id)
+    invalidar_contexto_tutor()
+
+
+@pytest.fixture
+def chats_creados(monkeypatch):
+    """Registra la historia con la que se abre cada sesión de chat del modelo falso."""
+    historias = []
+    original = ModeloFalso.start_chat
+
+    def start_chat(self, history=None, **kwargs):
+        historias.append(history)
+        return original(self, history, **kwargs)
+
+    monkeypatch.setattr(ModeloFalso, "start_chat", start_chat)
+    return historias
+
+
+class TestConversar:
+    """Tests de TutorVirtual.conversar."""
+
+    def test_reutiliza_la_sesion_de_gemini(self, ruta, chats_creados):
+        """Los mensajes de una misma conversación usan una sola sesión de chat."""
+        db, ruta_id = ruta
+        primera = TutorVirtual(ruta_id, "ana").conversar("¿Qué es la célula?")
+        segunda = TutorVirtual(ruta_id, "ana").conversar("¿Y el núcleo?", sesion_id=primera["sesion_id"])
+
+        assert primera["exito"] and segunda["sesion_id"] == primera["sesion_id"]
+        assert len(chats_creados) == 1
+        sesion = db[COL_SESIONES].find_one({"_id": primera["sesion_id"]})
+        assert [t["tipo"] for t in sesion["turnos"]] == ["usuario", "tutor"] * 2
+
+    def test_historia_acotada_con_resumen(self, ruta, chats_creados):
+        """Una conversación larga conserva pocos turnos literales y pliega el resto en el resumen."""
+        db, ruta_id = ruta
+        sesion_id = None
+        for i in range(12):
+            sesion_id = TutorVirtual(ruta_id, "ana").conversar(f"Pregunta {i}", sesion_id=sesion_id)["sesion_id"]
+
+        sesion = db[COL_SESIONES].find_one({"_id": sesion_id})
+        assert len(sesion["turnos"]) <= TURNOS_RECIENTES + LOTE_RESUMEN
+        assert sesion["resumen"] and sesion["turnos_resumidos"] + len(sesion["turnos"]) == 24
+        # Cada plegado reinicia la sesión de Gemini desde el resumen
+        assert len(chats_creados) > 1
+        assert all(len(h) <= 2 + TURNOS_RECIENTES for h in chats_creados)
+        assert "RESUMEN DE LA CONVERSACIÓN" in chats_creados[-1][0]["parts"][0]
+
+    def test_sesion_de_otro_usuario(self, ruta):
+        """Un sesion_id ajeno no se reutiliza: se abre una sesión nueva."""
+        db, ruta_id = ruta
+        ajena = crear_sesion(db, "luis", ruta_id)
+        resultado = TutorVirtual(ruta_id, "ana").conversar("Hola", sesion_id=ajena["_id"])
+        assert resultado["sesion_id"] != ajena["_id"]
+        assert db[COL_SESIONES].find_one({"_id": ajena["_id"]})["turnos"] == []
+
+    def test_siembra_con_historial_del_dashboard(self, ruta, chats_creados):
+        """Sin sesión, el historial del cliente siembra la conversación."""
+        _, ruta_id = ruta
+        historial = [{"rol": "usuario", "contenido": "Hola"}, {"rol": "tutor", "contenido": "¡Hola!"}]
+        TutorVirtual(ruta_id, "ana").conversar("¿Qué es la célula?", historial=historial)
+        assert [c["role"] for c in chats_creados[0]] == ["user", "model", "user", "model"]
+
+
+class TestConversarStream:
+    """Tests de TutorVirtual.conversar_stream (respuesta por partes)."""
+
+    def test_fragmentos_y_fin(self, ruta):
+        """Las partes forman la respuesta completa, que se guarda en la sesión."""
+        db, ruta_id = ruta
+        eventos = list(TutorVirtual(ruta_id, "ana").conversar_stream("¿Qué es la célula?"))
+
+        fragmentos = [e["texto"] for e in eventos if e["tipo"] == "fragmento"]
+        fin = eventos[-1]
+        assert len(fragmentos) > 1 and fin["tipo"] == "fin" and fin["exito"]
+        assert "".join(fragmentos) == fin["respuesta"]
+        assert db[COL_SESIONES].find_one({"_id": fin["sesion_id"]})["turnos"][1]["texto"] == fin["respuesta"]
+
+    def test_cliente_desconectado(self, ruta, chats_creados):
+        """Si el stream se corta, el intercambio no se guarda y la sesión de Gemini se descarta."""
+        db, ruta_id = ruta
+        sesion_id = TutorVirtual(ruta_id, "ana").conversar("¿Qué es la célula?")["sesion_id"]
+
+        stream = TutorVirtual(ruta_id, "ana").conversar_stream("¿Y el núcleo?", sesion_id=sesion_id)
+        assert next(stream)["tipo"] == "fragmento"
+        stream.close()
+
+        assert len(db[COL_SESIONES].find_one({"_id": sesion_id})["turnos"]) == 2
+        TutorVirtual(ruta_id, "ana").conversar("¿Y el núcleo?", sesion_id=sesion_id)
+        assert len(chats_creados) == 2
+
+    def test_precargar_tutor(self, ruta):
+        """El tutor precargado llega con el contexto y el prompt base listos."""
+        _, ruta_id = ruta
+        tutor = precargar_tutor(ruta_id, "ana", "en").result(timeout=5)
+        assert tutor.contexto_ruta["nombre_ruta"] == "Biología"
+        assert "en" in tutor._entrada["prompts"]
+
+
+class TestPlegado:
+    """Tests del plegado de turnos."""
+
+    def test_normalizar_descarta_vacios(self):
+        """Los mensajes vacíos o mal formados se ignoran."""
+        assert normalizar_turnos([{"tipo": "usuario", "texto": " "}, "x", {"texto": "ok"}]) == [
+            {"tipo": "tutor", "texto": "ok"}
+        ]
+
+    def test_no_pisa_escrituras_concurrentes(self, bd_memoria):
+        """Si otro proceso agregó turnos, el plegado se omite."""
+        historial = [{"tipo": "usuario", "texto": f"m{i}"} for i in range(TURNOS_RECIENTES + LOTE_RESUMEN + 1)]
+        sesion = crear_sesion(bd_memoria, "ana", "r1", historial)
+        bd_memoria[COL_SESIONES].update_one({"_id": sesion["_id"]}, {"$inc": {"version": 1}})
+
+        assert not plegar_turnos(bd_memoria, sesion, lambda resumen, turnos: "resumen")
+        assert bd_memoria[COL_SESIONES].find_one({"_id": sesion["_id"]})["resumen"] == ""
@@ -0,0 +1,114 @@
+"""
+Tests para src/transcripcion.py: transcodificación, recorte de silencios y trozos paralelos.
+"""
+
+import io
+import time
+import wave
+import numpy as np
+import pytest
+from src import transcripcion
+from src.transcripcion import (
+    ErrorTranscripcion,
+    FRECUENCIA,
+    decodificar,
+    segmentos_de_voz,
+    transcribir,
+    estadisticas_transcripcion,
+    reiniciar_estadisticas_transcripcion,
+)
+
+
+def _wav(partes, frecuencia=44100, canales=2):
+    """WAV de 16 bits con tonos (segundos > 0) y silencios (segundos < 0)."""
+    senal = []
+    for segundos in partes:
+        n = int(abs(segundos) * frecuencia)
+        if segundos > 0:
+            senal.append(8000 * np.sin(2 * np.pi * 440 * np.arange(n) / frecuencia))
+        else:
+            senal.append(np.zeros(n))
+    muestras = np.repeat(np.concatenate(senal).astype("<i2")[:, None], canales, axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as escritor:
+        escritor.setnchannels(canales)
+        escritor.setsampwidth(2)
+        escritor.setframerate(frecuencia)
+        escritor.writeframes(muestras.tobytes())
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def backend_local(monkeypatch):
+    monkeypatch.setenv("RUTEALO_TRANSCRIPCION_BACKEND", "local")
+    reiniciar_estadisticas_transcripcion()
+
+
+class TestPreprocesado:
+    """Tests de decodificación y detección de silencios."""
+
+    def test_mono_16khz(self):
+        """Un WAV estéreo de 44,1 kHz se convierte a mono de 16 kHz."""
+        pcm = decodificar(_wav([1.0]))
+        assert pcm.dtype == np.int16
+        assert abs(len(pcm) - FRECUENCIA) <= 1
+
+    def test_recorta_silencios(self):
+        """Se descartan los silencios de los extremos y los internos largos se acortan."""
+        pcm = decodificar(_wav([-2.0, 1.0, -3.0, 1.0, -2.0]))
+        segmentos = segmentos_de_voz(pcm)
+        assert len(segmentos) == 2
+        voz = sum(fin - inicio for inicio, fin in segmentos) / FRECUENCIA
+        assert 2.0 <= voz < 3.0
+
+    def test_pausas_cortas_no_separan(self):
+        """Una pausa breve dentro de una frase no crea otro tramo."""
+        assert len(segmentos_de_voz(decodificar(_wav([1.0, -0.2, 1.0])))) == 1
+
+
+class TestTranscribir:
+    """Tests del servicio con el backend local."""
+
+    def test_trozos_en_orden(self, backend_local, monkeypatch):
+        """Los trozos se transcriben en paralelo y se unen en el orden del audio."""
+        monkeypatch.setattr(transcripcion, "TRANSCRIPCION_TROZO_S", 2.5)
+        original = transcripcion._transcribir_local
+
+        def cortos_al_final(audio, nombre, idioma):
+            # Los trozos cortos terminan después que los largos
+            duracion = len(audio) / (2 * FRECUENCIA)
+            time.sleep(max(0.0, 0.3 - duracion / 10))
+            return original(audio, nombre, idioma)
+
+        monkeypatch.setitem(transcripcion._BACKENDS, "local", cortos_al_final)
+        resultado = transcribir(_wav([1.0, -1.0, 2.0, -1.0, 3.0]), "grabacion.wav", "es")
+
+        duraciones = [int(t[len("[es:"):-len("ms]")]) for t in resultado["texto"].split()]
+        assert resultado["trozos"] == 4
+        assert duraciones[0] < duraciones[1] < duraciones[2] == 2500
+        assert duraciones[3] < duraciones[0]
+
+    def test_reduce_bytes_enviados(self, backend_local):
+        """Lo que se sube es mucho menor que la grabación original."""
+        datos = _wav([-2.0, 2.0, -2.0])
+        resultado = transcribir(datos, "grabacion.wav")
+        assert resultado["trozos"] == 1
+        assert resultado["bytes_enviados"] < resultado["bytes_recibidos"] / 5
+        assert estadisticas_transcripcion()["bytes_enviados"] == resultado["bytes_enviados"]
+
+    def test_solo_silencio(self, backend_local):
+        """Una grabación sin voz no llama al backend."""
+        resultado = transcribir(_wav([-2.0]), "grabacion.wav")
+        assert resultado["texto"] == "" and resultado["trozos"] == 0
+
+    def test_formato_no_decodificable(self, backend_local, monkeypatch):
+        """Sin ffmpeg, un webm se envía tal cual en una sola petición."""
+        monkeypatch.setattr(transcripcion, "_ffmpeg", lambda: None)
+        resultado = transcribir(b"\x1aE\xdf\xa3" + b"\x00" * 100, "grabacion.webm", "en")
+        assert resultado["texto"] == "[en:104B]"
+        assert resultado["bytes_enviados"] == resultado["bytes_recibidos"]
+
+    def test_backend_desconocido(self):
+        """Un backend mal configurado se informa con ErrorTranscripcion."""
+        with pytest.raises(ErrorTranscripcion):
+            transcribir(_wav([1.0]), backend="nube")
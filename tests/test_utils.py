@@ -21,7 +21,9 @@ from src.utils import (
     crear_carpeta_usuario,
     listar_archivos_usuario,
     validar_acceso_archivo,
-    obtener_ruta_archivo
+    obtener_ruta_archivo,
+    CacheLRU,
+    ContadoresProceso,
 )
 
 
@@ -432,3 +434,71 @@ class TestFileManagement:
         ruta = obtener_ruta_archivo("USUARIO8", "inexistente.pdf", str(tmp_path))
         assert ruta is None
 
+
+class TestCacheLRU:
+    """Tests para la caché LRU con TTL."""
+
+    def test_guardar_y_obtener(self):
+        """Retorna el valor guardado y AUSENTE para claves desconocidas."""
+        cache = CacheLRU(max_elementos=4, ttl_segundos=60)
+        cache.guardar("a", None)
+        assert cache.obtener("a") is None
+        assert cache.obtener("b") is CacheLRU.AUSENTE
+        assert cache.estadisticas()["aciertos"] == 1
+
+    def test_expulsa_el_menos_usado(self):
+        """Al superar el máximo se descarta la entrada usada hace más tiempo."""
+        cache = CacheLRU(max_elementos=2, ttl_segundos=60)
+        cache.guardar("a", 1)
+        cache.guardar("b", 2)
+        cache.obtener("a")
+        cache.guardar("c", 3)
+        assert cache.obtener("b") is CacheLRU.AUSENTE
+        assert cache.obtener("a") == 1
+
+    def test_expiracion_por_ttl(self):
+        """Una entrada vencida se trata como ausente."""
+        cache = CacheLRU(ttl_segundos=0.01)
+        cache.guardar("a", 1)
+        time.sleep(0.02)
+        assert cache.obtener("a") is CacheLRU.AUSENTE
+        assert len(cache) == 0
+
+    def test_invalidacion_descarta_lecturas_en_curso(self):
+        """Un valor leído antes de una invalidación no se guarda."""
+        cache = CacheLRU()
+        generacion = cache.generacion()
+        cache.invalidar("a")
+        cache.guardar("a", "viejo", generacion)
+        assert cache.obtener("a") is CacheLRU.AUSENTE
+
+    def test_invalidar_donde(self):
+        """Descarta solo las claves que cumplen el predicado."""
+        cache = CacheLRU()
+        cache.guardar(("r1", "ana"), 1)
+        cache.guardar(("r2", "ana"), 2)
+        cache.guardar(("r1", "luis"), 3)
+        assert cache.invalidar_donde(lambda clave: clave[1] == "ana") == 2
+        assert cache.obtener(("r1", "ana")) is CacheLRU.AUSENTE
+        assert cache.obtener(("r1", "luis")) == 3
+
+
+class TestContadoresProceso:
+    """Tests de los contadores de métricas por proceso."""
+
+    def test_sumar_copiar_y_limpiar(self):
+        """Los valores se acumulan entre hilos, la copia no se ve afectada y limpiar los reinicia."""
+        import threading
+
+        contadores = ContadoresProceso()
+        hilos = [threading.Thread(target=lambda: [contadores.sumar(aciertos=1, bytes=10) for _ in range(500)]) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        copia = contadores.copia()
+        contadores.sumar(aciertos=1)
+        assert copia == {"aciertos": 2000, "bytes": 20000}
+        contadores.limpiar()
+        assert contadores.copia() == {}